@@ -0,0 +1,199 @@
+#  Copyright 2013 – present by the SalishSeaCast Project contributors
+#  and The University of British Columbia
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""SalishSeaCast resolver for the ERDDAP datasets that figures are produced from.
+
+Most of the ERDDAP datasets that figures use are served from files that the nowcast
+system produces on the same machine.
+The :kbd:`figures: local datasets` section of the nowcast system configuration
+maps ERDDAP dataset ids to the patterns of those files,
+and to the renaming that ERDDAP applies to their dimensions and variables.
+Local files are opened lazily so that only the hyperslabs that a figure uses are read.
+Datasets that are not available locally are opened from ERDDAP.
+"""
+
+import glob
+import logging
+import time
+from pathlib import Path
+
+import arrow
+import numpy
+import requests
+import xarray
+
+logger = logging.getLogger(__name__)
+
+
+def open_dataset(dataset_url, local_datasets=None, time_range=None, **fields):
+    """Open the dataset at the ERDDAP ``dataset_url`` from the local files that it is
+    served from, if they are available, or from ERDDAP.
+
+    :arg str dataset_url: ERDDAP dataset URL or URL template
+                          from :kbd:`figures: dataset URLs` in the nowcast system
+                          configuration.
+
+    :arg dict local_datasets: :kbd:`figures: local datasets` section of the nowcast
+                              system configuration.
+                              If :py:obj:`None`, the dataset is opened from ERDDAP.
+
+    :arg time_range: Start and end of the period that is needed.
+                     Used to select the files to open for file patterns that contain
+                     a date format;
+                     e.g. :kbd:`hrdps_{:y%Ym%md%d}.nc`.
+    :type time_range: 2-tuple of :py:class:`arrow.Arrow`
+
+    :arg fields: Values of the replacement fields in ``dataset_url`` and the
+                 local file pattern; e.g. ``place="PointAtkinson"``.
+
+    :returns: Dataset with ERDDAP dimension and variable names.
+    :rtype: :py:class:`xarray.Dataset`
+    """
+    ds = _open_local_dataset(dataset_url, local_datasets, time_range, fields)
+    if ds is not None:
+        return ds
+    return xarray.open_dataset(dataset_url.format(**fields))
+
+
+def download_dataset(dataset_url, local_datasets=None, time_range=None, **fields):
+    """Open the dataset at the ERDDAP ``dataset_url`` from the local files that it is
+    served from, if they are available, or download it from ERDDAP as a netCDF file.
+
+    Use this instead of :py:func:`open_dataset` for datasets that cannot be opened
+    from ERDDAP via OPeNDAP.
+    Downloaded files are cached in the :kbd:`response cache dir` from
+    ``local_datasets`` for :kbd:`response cache max age` minutes.
+
+    :arg str dataset_url: ERDDAP dataset URL or URL template
+                          from :kbd:`figures: dataset URLs` in the nowcast system
+                          configuration.
+
+    :arg dict local_datasets: :kbd:`figures: local datasets` section of the nowcast
+                              system configuration.
+                              If :py:obj:`None`, the dataset is downloaded to
+                              :file:`/tmp/` and not cached.
+
+    :arg time_range: Start and end of the period that is needed.
+    :type time_range: 2-tuple of :py:class:`arrow.Arrow`
+
+    :arg fields: Values of the replacement fields in ``dataset_url`` and the
+                 local file pattern; e.g. ``place="PointAtkinson"``.
+
+    :returns: Dataset with ERDDAP dimension and variable names.
+    :rtype: :py:class:`xarray.Dataset`
+    """
+    ds = _open_local_dataset(dataset_url, local_datasets, time_range, fields)
+    if ds is not None:
+        return ds
+    dataset_url = dataset_url.format(**fields)
+    dataset_id = dataset_url.rsplit("/", 1)[1]
+    if local_datasets is None:
+        nc_path = Path("/tmp", f"{dataset_id}.nc")
+        max_age = 0
+    else:
+        nc_path = Path(local_datasets["response cache dir"], f"{dataset_id}.nc")
+        max_age = local_datasets["response cache max age"] * 60
+    try:
+        is_fresh = time.time() - nc_path.stat().st_mtime < max_age
+    except FileNotFoundError:
+        is_fresh = False
+    if is_fresh:
+        logger.debug(f"using cached {dataset_id} response: {nc_path}")
+    else:
+        nc_path.parent.mkdir(parents=True, exist_ok=True)
+        resp = requests.get(f"{dataset_url}.nc")
+        resp.raise_for_status()
+        tmp_path = nc_path.with_suffix(".nc.tmp")
+        tmp_path.write_bytes(resp.content)
+        tmp_path.replace(nc_path)
+        logger.debug(f"downloaded {dataset_id} from ERDDAP to {nc_path}")
+    return xarray.open_dataset(nc_path)
+
+
+def _local_files(files_pattern, time_range, fields):
+    """
+    :param str files_pattern:
+    :param 2-tuple time_range:
+    :param dict fields:
+
+    :return: Paths of the existing local files for the dataset, sorted.
+    :rtype: list
+    """
+    if "{:" in files_pattern:
+        if time_range is None:
+            raise ValueError(f"time_range is required for {files_pattern}")
+        start, end = time_range
+        nc_paths = [
+            files_pattern.format(day.datetime, **fields)
+            for day in arrow.Arrow.range("day", start.floor("day"), end.floor("day"))
+        ]
+        # All of the days in the period have to be available locally
+        return nc_paths if all(Path(p).exists() for p in nc_paths) else []
+    return sorted(glob.glob(files_pattern.format(**fields)))
+
+
+def _open_local_dataset(dataset_url, local_datasets, time_range, fields):
+    """
+    :param str dataset_url:
+    :param dict local_datasets:
+    :param 2-tuple time_range:
+    :param dict fields:
+
+    :return: Dataset opened from the local files, or None if the dataset is not
+             available locally.
+    :rtype: :py:class:`xarray.Dataset`
+    """
+    if local_datasets is None:
+        return
+    dataset_id_tmpl = dataset_url.rsplit("/", 1)[1]
+    dataset_id = dataset_id_tmpl.format(**fields)
+    try:
+        local_dataset = local_datasets["datasets"][dataset_id_tmpl]
+    except KeyError:
+        # No local files configured for dataset
+        return
+    nc_paths = _local_files(local_dataset["files"], time_range, fields)
+    if not nc_paths:
+        logger.debug(f"no local files for {dataset_id}; using ERDDAP")
+        return
+    logger.debug(f"opening {dataset_id} from {len(nc_paths)} local files")
+    rename = local_dataset.get("rename", {})
+
+    def _rename(ds):
+        return ds.rename(
+            {
+                name: rename[name]
+                for name in rename
+                if name in ds.variables or name in ds.dims
+            }
+        )
+
+    ds = xarray.open_mfdataset(
+        nc_paths,
+        preprocess=_rename,
+        combine="nested",
+        concat_dim="time",
+        data_vars="minimal",
+        coords="minimal",
+        compat="override",
+    )
+    # Rolling forecast files are in day directories that don't sort in time order,
+    # and a forecast run can overlap the following day's files
+    ds = ds.sortby("time")
+    _, index = numpy.unique(ds.time.values, return_index=True)
+    return ds.isel(time=index)
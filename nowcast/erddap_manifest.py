@@ -0,0 +1,314 @@
+#  Copyright 2013 – present by the SalishSeaCast Project contributors
+#  and The University of British Columbia
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""SalishSeaCast manifests of the netCDF files in the datasets that ERDDAP serves.
+
+The workers that write the files of a dataset record them in the dataset's
+manifest in the :kbd:`erddap: manifest dir` directory of the nowcast system
+configuration.
+The manifest is a JSON Lines file in which each line is the record of a file:
+its path, time range, size, variables, and SHA-256 checksum.
+Files are only read and hashed when they are new or have changed,
+so a manifest is updated incrementally.
+
+The :py:mod:`nowcast.workers.ping_erddap` worker writes the paths of the files that have been
+recorded since it last pinged ERDDAP for a dataset into the dataset's flag files.
+
+Figures and workers can use :py:func:`files_covering` to get the paths of the
+files that cover a time range instead of globbing the results directories.
+"""
+
+import datetime
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+import attr
+import netCDF4
+
+logger = logging.getLogger(__name__)
+
+#: Names of the time coordinate variables of the files in the datasets,
+#: in the order in which they are looked for
+TIME_VARS = ("time_counter", "time")
+
+
+@attr.s
+class Manifest:
+    """Manifest of the netCDF files in a dataset.
+
+    Use :py:meth:`from_config` to get the manifest of a dataset in the
+    :kbd:`erddap: manifest dir` directory of the nowcast system configuration.
+    """
+
+    #: Path of the manifest JSON Lines file
+    path = attr.ib(type=Path)
+
+    @classmethod
+    def from_config(cls, config, dataset):
+        """Construct the manifest of a dataset from the :kbd:`erddap: manifest dir`
+        item of the nowcast system configuration.
+
+        :arg config: Nowcast system configuration.
+        :type config: :py:class:`nemo_nowcast.Config`
+
+        :arg str dataset: Name of the dataset;
+                          e.g. :kbd:`nowcast-green`, or :kbd:`SCVIP-CTD`.
+
+        :returns: Manifest of the dataset, or :py:obj:`None` if the configuration
+                  has no :kbd:`erddap: manifest dir` item.
+        :rtype: :py:class:`nowcast.erddap_manifest.Manifest`
+        """
+        try:
+            manifest_dir = config["erddap"]["manifest dir"]
+        except KeyError:
+            return
+        return cls(Path(manifest_dir, f"{dataset}.jsonl"))
+
+    @property
+    def published_path(self):
+        """Path of the file that holds the sequence number of the most recent
+        record that has been published to ERDDAP.
+        """
+        return self.path.with_suffix(".published")
+
+    def records(self):
+        """
+        :returns: Most recent records of the files in the manifest,
+                  keyed by file path.
+        :rtype: dict
+        """
+        records = {}
+        try:
+            with self.path.open() as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        records[record["path"]] = record
+        except FileNotFoundError:
+            pass
+        return records
+
+    def update(self, nc_paths, replace=False):
+        """Record files in the manifest.
+
+        Files whose size and modification time match their records are not
+        read again.
+
+        :arg nc_paths: Paths of the netCDF files.
+        :type nc_paths: iterable of :py:class:`pathlib.Path` or str
+
+        :arg boolean replace: Drop the records of the files that are not in nc_paths,
+                              for datasets like the rolling forecasts whose
+                              files are replaced by each update.
+
+        :returns: Records of the files that are new or have changed.
+        :rtype: list
+        """
+        records = self.records()
+        # Sequence numbers of dropped records that have been published are not
+        # re-used, so that new records are always after the published ones
+        seq = max(
+            [self._published_seq(), *(record["seq"] for record in records.values())]
+        )
+        current, changed = {}, []
+        for nc_path in nc_paths:
+            nc_path = os.fspath(nc_path)
+            stat = os.stat(nc_path)
+            record = records.get(nc_path)
+            if (
+                record is None
+                or record["size"] != stat.st_size
+                or record["mtime ns"] != stat.st_mtime_ns
+            ):
+                seq += 1
+                record = file_record(nc_path, stat, seq)
+                changed.append(record)
+            current[nc_path] = record
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if replace:
+            tmp_path = self.path.with_suffix(".jsonl.tmp")
+            with tmp_path.open("wt") as f:
+                f.writelines(f"{json.dumps(record)}\n" for record in current.values())
+            tmp_path.replace(self.path)
+        elif changed:
+            with self.path.open("at") as f:
+                f.writelines(f"{json.dumps(record)}\n" for record in changed)
+        logger.debug(f"recorded {len(changed)} new or changed file(s) in {self.path}")
+        return changed
+
+    def covering(self, start, end):
+        """Find the files whose time ranges overlap the time range from start to end.
+
+        :arg start: Start of the time range.
+        :type start: :py:class:`datetime.datetime` or :py:class:`arrow.Arrow`
+
+        :arg end: End of the time range.
+        :type end: :py:class:`datetime.datetime` or :py:class:`arrow.Arrow`
+
+        :returns: Paths of the files, sorted by the start of their time ranges.
+        :rtype: list of :py:class:`pathlib.Path`
+        """
+        start, end = _iso_time(start), _iso_time(end)
+        records = sorted(
+            (
+                record
+                for record in self.records().values()
+                if record["time start"] is not None
+                and record["time start"] <= end
+                and record["time end"] >= start
+            ),
+            key=lambda record: (record["time start"], record["path"]),
+        )
+        return [Path(record["path"]) for record in records]
+
+    def unpublished(self):
+        """
+        :returns: Records of the files that have been recorded since the manifest
+                  was last published, in the order in which they were recorded.
+        :rtype: list
+        """
+        published_seq = self._published_seq()
+        return sorted(
+            (
+                record
+                for record in self.records().values()
+                if record["seq"] > published_seq
+            ),
+            key=lambda record: record["seq"],
+        )
+
+    def _published_seq(self):
+        try:
+            return int(self.published_path.read_text())
+        except FileNotFoundError:
+            return 0
+
+    def mark_published(self, records):
+        """Mark records, and all of the records before them, as published.
+
+        :arg list records: Records from :py:meth:`unpublished`.
+        """
+        if records:
+            self.published_path.write_text(f"{records[-1]['seq']}\n")
+
+
+def file_record(nc_path, stat, seq):
+    """Read the manifest record of a netCDF file.
+
+    :arg str nc_path: Path of the netCDF file.
+
+    :arg stat: Status of the file.
+    :type stat: :py:class:`os.stat_result`
+
+    :arg int seq: Sequence number of the record in the manifest.
+
+    :returns: File record.
+    :rtype: dict
+    """
+    with netCDF4.Dataset(nc_path) as ds:
+        variables = sorted(name for name in ds.variables if name not in ds.dimensions)
+        time_var = next(
+            (ds.variables[name] for name in TIME_VARS if name in ds.variables), None
+        )
+        time_start = time_end = None
+        if time_var is not None and time_var.size > 0:
+            times = time_var[:].compressed()
+            if times.size > 0:
+                time_start, time_end = (
+                    _iso_time(time)
+                    for time in netCDF4.num2date(
+                        (times.min(), times.max()),
+                        time_var.units,
+                        getattr(time_var, "calendar", "standard"),
+                        only_use_cftime_datetimes=False,
+                        only_use_python_datetimes=True,
+                    )
+                )
+    with open(nc_path, "rb") as f:
+        sha256 = hashlib.file_digest(f, "sha256").hexdigest()
+    return {
+        "seq": seq,
+        "path": nc_path,
+        "time start": time_start,
+        "time end": time_end,
+        "size": stat.st_size,
+        "mtime ns": stat.st_mtime_ns,
+        "variables": variables,
+        "sha256": sha256,
+    }
+
+
+def _iso_time(time):
+    if not isinstance(time, datetime.datetime):
+        # arrow.Arrow
+        time = time.datetime
+    if time.tzinfo is not None:
+        time = time.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return time.isoformat(timespec="seconds")
+
+
+def record_files(config, dataset, nc_paths, replace=False):
+    """Record files in the manifest of a dataset,
+    if the nowcast system configuration has an :kbd:`erddap: manifest dir` item.
+
+    :arg config: Nowcast system configuration.
+    :type config: :py:class:`nemo_nowcast.Config`
+
+    :arg str dataset: Name of the dataset;
+                      e.g. :kbd:`nowcast-green`, or :kbd:`SCVIP-CTD`.
+
+    :arg nc_paths: Paths of the netCDF files.
+    :type nc_paths: iterable of :py:class:`pathlib.Path` or str
+
+    :arg boolean replace: Drop the records of the files that are not in nc_paths.
+
+    :returns: Records of the files that are new or have changed.
+    :rtype: list
+    """
+    manifest = Manifest.from_config(config, dataset)
+    if manifest is None:
+        return []
+    return manifest.update(nc_paths, replace)
+
+
+def files_covering(config, dataset, start, end):
+    """Find the files in the manifest of a dataset whose time ranges overlap
+    the time range from start to end.
+
+    :arg config: Nowcast system configuration.
+    :type config: :py:class:`nemo_nowcast.Config`
+
+    :arg str dataset: Name of the dataset;
+                      e.g. :kbd:`nowcast-green`, or :kbd:`SCVIP-CTD`.
+
+    :arg start: Start of the time range.
+    :type start: :py:class:`datetime.datetime` or :py:class:`arrow.Arrow`
+
+    :arg end: End of the time range.
+    :type end: :py:class:`datetime.datetime` or :py:class:`arrow.Arrow`
+
+    :returns: Paths of the files, sorted by the start of their time ranges.
+    :rtype: list of :py:class:`pathlib.Path`
+    """
+    manifest = Manifest.from_config(config, dataset)
+    if manifest is None:
+        raise KeyError(f"no erddap: manifest dir in config for {dataset} dataset")
+    return manifest.covering(start, end)
@@ -15,6 +15,12 @@
 """Produce a 2-panel figure that shows time series of temperature and salinity observations and
 model run results at an Ocean Networks Canada (ONC) Salish Sea (VENUS) node.
 
+When the daily ONC CTD datasets that :py:mod:`nowcast.workers.get_onc_ctd` stores
+cover the model results period, the observations are plotted from them,
+so they are the 15 minute means of the QA/QC-filtered samples.
+Otherwise, the QA/QC-filtered samples are requested from ONC and plotted
+at their full resolution.
+
 Testing notebook for this module is
 https://nbviewer.org/github/SalishSeaCast/SalishSeaNowcast/blob/main/notebooks/figures/comparison/TestCompareVENUS_CTD.ipynb
 """
@@ -22,18 +28,22 @@ https://nbviewer.org/github/SalishSeaCast/SalishSeaNowcast/blob/main/notebooks/f
 # SPDX-License-Identifier: Apache-2.0
 
 
-import os
 from collections import namedtuple
 
 import matplotlib.pyplot as plt
 import numpy as np
 import pytz
 from matplotlib.dates import DateFormatter
-from salishsea_tools import data_tools, places, nc_tools, teos_tools
+from salishsea_tools import places, nc_tools, teos_tools
 
 import nowcast.figures.website_theme
+from nowcast import observations
 from nowcast.figures import shared
 
+#: ONC CTD data are requested when the figure is rendered,
+#: so it is excluded from the :py:mod:`nowcast.render_cache`
+RENDER_CACHE = False
+
 
 def make_figure(
     node_name,
@@ -44,6 +54,7 @@ def make_figure(
     dev_mesh_mask,
     figsize=(8, 10),
     theme=nowcast.figures.website_theme,
+    ctd_config=None,
 ):
     """Plot the temperature and salinity time series of observations and model
     results at an ONC VENUS node.
@@ -72,10 +83,23 @@ def make_figure(
                 figure. See :py:mod:`nowcast.figures.website_theme` for an
                 example.
 
+    :arg dict ctd_config: :kbd:`observations: ctd data` section of the nowcast
+                          system configuration.
+                          Used to read the observations from the locally stored
+                          ONC CTD datasets of 15 minute means
+                          instead of requesting the samples from ONC.
+                          See :py:func:`nowcast.observations.get_onc_ctd_data`.
+
     :returns: :py:class:`matplotlib.figure.Figure`
     """
     plot_data = _prep_plot_data(
-        node_name, grid_T_hr, dev_grid_T_hr, timezone, mesh_mask, dev_mesh_mask
+        node_name,
+        grid_T_hr,
+        dev_grid_T_hr,
+        timezone,
+        mesh_mask,
+        dev_mesh_mask,
+        ctd_config,
     )
     fig, (ax_sal, ax_temp) = _prep_fig_axes(figsize, theme)
     _plot_salinity_time_series(ax_sal, node_name, plot_data, theme)
@@ -85,7 +109,7 @@ def make_figure(
 
 
 def _prep_plot_data(
-    place, grid_T_hr, dev_grid_T_hr, timezone, mesh_mask, dev_mesh_mask
+    place, grid_T_hr, dev_grid_T_hr, timezone, mesh_mask, dev_mesh_mask, ctd_config
 ):
     try:
         j, i = places.PLACES[place]["NEMO grid ji"]
@@ -165,15 +189,8 @@ def _prep_plot_data(
             w_depths,
         )
     # Observations
-    onc_data = data_tools.get_onc_data(
-        "scalardata",
-        "getByLocation",
-        os.environ["ONC_USER_TOKEN"],
-        locationCode=station_code,
-        deviceCategoryCode="CTD",
-        sensorCategoryCodes="salinity,temperature",
-        dateFrom=data_tools.onc_datetime(model_time[0], "utc"),
-        dateTo=data_tools.onc_datetime(model_time[-1], "utc"),
+    ctd_data = observations.get_onc_ctd_data(
+        station_code, model_time[0], model_time[-1], ctd_config
     )
     plot_data = namedtuple(
         "PlotData",
@@ -186,7 +203,7 @@ def _prep_plot_data(
         model_temperature_ts=model_temperature_ts,
         dev_model_salinity_ts=dev_model_salinity_ts,
         dev_model_temperature_ts=dev_model_temperature_ts,
-        ctd_data=data_tools.onc_json_to_dataset(onc_data),
+        ctd_data=ctd_data,
     )
 
 
@@ -201,22 +218,11 @@ def _calc_results_time_series(
     psu_to_teos=False,
 ):
     time_series = namedtuple("TimeSeries", "var, time")
+    var = shared.interpolate_tracer_block_to_depths(
+        tracer, tracer_depths, node_depth, tracer_mask, w_depths
+    )
     if psu_to_teos:
-        var = teos_tools.psu_teos(
-            [
-                shared.interpolate_tracer_to_depths(
-                    tracer[i, :], tracer_depths, node_depth, tracer_mask, w_depths
-                )
-                for i in range(tracer.shape[0])
-            ]
-        )
-    else:
-        var = [
-            shared.interpolate_tracer_to_depths(
-                tracer[i, :], tracer_depths, node_depth, tracer_mask, w_depths
-            )
-            for i in range(tracer.shape[0])
-        ]
+        var = teos_tools.psu_teos(var)
     return time_series(var=var, time=[t.to(timezone) for t in model_time])
 
 
@@ -236,10 +242,9 @@ def _prep_fig_axes(figsize, theme):
 
 def _plot_salinity_time_series(ax, place, plot_data, theme):
     ctd_data = plot_data.ctd_data
-    qaqc_mask = ctd_data.salinity.attrs["qaqcFlag"] == 1
     ax.plot(
-        ctd_data.salinity.sampleTime[qaqc_mask],
-        ctd_data.salinity[qaqc_mask],
+        ctd_data.salinity.time,
+        ctd_data.salinity,
         linewidth=2,
         label="Observations",
         color=theme.COLOURS["time series"]["VENUS CTD salinity"],
@@ -293,10 +298,9 @@ def _salinity_axis_labels(ax, place, plot_data, theme):
 
 def _plot_temperature_time_series(ax, plot_data, timezone, theme):
     ctd_data = plot_data.ctd_data
-    qaqc_mask = ctd_data.salinity.attrs["qaqcFlag"] == 1
     ax.plot(
-        ctd_data.temperature.sampleTime[qaqc_mask],
-        ctd_data.temperature[qaqc_mask],
+        ctd_data.temperature.time,
+        ctd_data.temperature,
         linewidth=2,
         label="Observations",
         color=theme.COLOURS["time series"]["VENUS CTD temperature"],
@@ -40,8 +40,13 @@ from salishsea_tools import stormtools, unit_conversions
 from salishsea_tools.places import PLACES
 
 import nowcast.figures.website_theme
+from nowcast import erddap_datasets
 from nowcast.figures import shared
 
+#: Sand Heads wind observations are requested from ECCC when the figure is rendered,
+#: so it is excluded from the :py:mod:`nowcast.render_cache`
+RENDER_CACHE = False
+
 
 def make_figure(
     hrdps_dataset_url,
@@ -50,6 +55,7 @@ def make_figure(
     coastline,
     figsize=(16, 7),
     theme=nowcast.figures.website_theme,
+    local_datasets=None,
 ):
     """Plot the time series observed and HRDPS model forcing wind speed and
     direction at Sand Heads.
@@ -71,9 +77,15 @@ def make_figure(
                   figure. See :py:mod:`nowcast.figures.website_theme` for an
                   example.
 
+    :param dict local_datasets: :kbd:`figures: local datasets` section of the
+                                nowcast system configuration.
+                                Used to open the HRDPS dataset from the local files
+                                that ERDDAP serves it from.
+                                See :py:func:`nowcast.erddap_datasets.open_dataset`.
+
     :returns: :py:class:`matplotlib.figure.Figure`
     """
-    plot_data = _prep_plot_data(hrdps_dataset_url, run_type, run_date)
+    plot_data = _prep_plot_data(hrdps_dataset_url, run_type, run_date, local_datasets)
     fig, (ax_speed, ax_dir, ax_map) = _prep_fig_axes(figsize, theme)
     _plot_wind_speed_time_series(ax_speed, plot_data, theme)
     _plot_wind_direction_time_series(ax_dir, plot_data, theme)
@@ -86,8 +98,10 @@ def make_figure(
     return fig
 
 
-def _prep_plot_data(hrdps_dataset_url, run_type, run_date):
-    hrdps = xarray.open_dataset(hrdps_dataset_url)
+def _prep_plot_data(hrdps_dataset_url, run_type, run_date, local_datasets):
+    hrdps = erddap_datasets.open_dataset(
+        hrdps_dataset_url, local_datasets, time_range=(run_date, run_date)
+    )
     j, i = PLACES["Sand Heads"]["GEM2.5 grid ji"]
     u_hrdps = hrdps.u_wind.sel(time=run_date.format("YYYY-MM-DD")).isel(
         gridY=j, gridX=i
@@ -46,7 +46,6 @@ https://nbviewer.org/github/SalishSeaCast/SalishSeaNowcast/blob/main/notebooks/f
 """
 
 from datetime import timedelta
-from pathlib import Path
 from types import SimpleNamespace
 
 import arrow
@@ -54,7 +53,6 @@ import matplotlib.dates
 import matplotlib.pyplot as plt
 import numpy
 import pandas
-import requests
 import xarray
 from matplotlib import gridspec
 from matplotlib.ticker import NullFormatter
@@ -63,8 +61,13 @@ from salishsea_tools import data_tools, viz_tools, wind_tools
 from salishsea_tools.places import PLACES
 
 import nowcast.figures.website_theme
+from nowcast import erddap_datasets, storm_surge
 from nowcast.figures import shared
 
+#: Tide gauge observations are downloaded when the figure is rendered,
+#: so it is excluded from the :py:mod:`nowcast.render_cache`
+RENDER_CACHE = False
+
 
 def make_figure(
     place,
@@ -76,6 +79,7 @@ def make_figure(
     grid_T_hr_path,
     figsize=(20, 12),
     theme=nowcast.figures.website_theme,
+    local_datasets=None,
 ):
     """Plot tidal prediction and models water level timeseries,
     storm surge residual timeseries, sea surface height contours
@@ -114,6 +118,12 @@ def make_figure(
                 figure. See :py:mod:`nowcast.figures.website_theme` for an
                 example.
 
+    :arg dict local_datasets: :kbd:`figures: local datasets` section of the
+                              nowcast system configuration.
+                              Used to open the sea surface height forecast dataset
+                              from the local files that ERDDAP serves it from.
+                              See :py:func:`nowcast.erddap_datasets.download_dataset`.
+
     :returns: :py:class:`matplotlib.figure.Figure`
     """
     plot_data = _prep_plot_data(
@@ -124,6 +134,7 @@ def make_figure(
         weather_path,
         bathy,
         grid_T_hr_path,
+        local_datasets,
     )
     fig, (ax_info, ax_ssh, ax_map, ax_res) = _prep_fig_axes(figsize, theme)
     _plot_info_box(ax_info, place, plot_data, theme)
@@ -141,9 +152,10 @@ def _prep_plot_data(
     weather_path,
     bathy,
     grid_T_hr_path,
+    local_datasets,
 ):
     # NEMO sea surface height forecast dataset
-    ssh_forecast = _get_ssh_forecast(place, ssh_fcst_dataset_url_tmpl)
+    ssh_forecast = _get_ssh_forecast(place, ssh_fcst_dataset_url_tmpl, local_datasets)
     # CHS water level observations dataset
     try:
         obs_1min = (
@@ -214,7 +226,7 @@ def _prep_plot_data(
         # No observations available
         obs_residual = None
     # Wind at NEmo model time of max sea surface height
-    wind_4h_avg = wind_tools.calc_wind_avg_at_point(
+    wind_4h_avg = storm_surge.calc_wind_avg_at_point(
         arrow.get(str(max_ssh.time.values)),
         weather_path,
         PLACES[place]["wind grid ji"],
@@ -247,16 +259,12 @@ def _prep_plot_data(
     )
 
 
-def _get_ssh_forecast(place, dataset_url_tmpl):
-    ## TODO: This is a work-around because neither netCDF4 nor xarray are able
+def _get_ssh_forecast(place, dataset_url_tmpl, local_datasets):
+    ## TODO: Downloading is a work-around because neither netCDF4 nor xarray are able
     ##       to load the dataset directly from the URL due to an OpenDAP issue
-    dataset_url = dataset_url_tmpl.format(place=place.replace(" ", ""))
-    dataset_id = dataset_url.rsplit("/", 1)[1]
-    ssh_file = Path("/tmp").joinpath(dataset_id).with_suffix(".nc")
-    with ssh_file.open("wb") as f:
-        resp = requests.get(f"{dataset_url}.nc")
-        f.write(resp.content)
-    ssh_forecast = xarray.open_dataset(ssh_file)
+    ssh_forecast = erddap_datasets.download_dataset(
+        dataset_url_tmpl, local_datasets, place=place.replace(" ", "")
+    )
     return ssh_forecast
 
 
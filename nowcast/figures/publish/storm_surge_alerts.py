@@ -30,15 +30,14 @@ Testing notebook for this module is
 https://nbviewer.org/github/SalishSeaCast/SalishSeaNowcast/blob/main/notebooks/figures/publish/TestStormSurgeAlertsModule.ipynb
 """
 
-from collections import namedtuple
-
 import arrow
 import matplotlib.pyplot as plt
 import numpy
 from matplotlib import gridspec
-from salishsea_tools import places, nc_tools, stormtools, unit_conversions, wind_tools
+from salishsea_tools import places, unit_conversions
 
 import nowcast.figures.website_theme
+from nowcast import storm_surge
 from nowcast.figures import shared
 
 
@@ -49,6 +48,7 @@ def make_figure(
     tidal_predictions,
     figsize=(18, 20),
     theme=nowcast.figures.website_theme,
+    storm_surge_summary=None,
 ):
     """Plot high water level risk indication markers and 4h average wind
     vectors on a Salish Sea map with summary text below.
@@ -72,9 +72,18 @@ def make_figure(
                 figure. See :py:mod:`nowcast.figures.website_theme` for an
                 example.
 
+    :arg storm_surge_summary: Storm surge summary that was calculated for
+                              the run by the :ref:`MakePlotsWorker` worker.
+                              If :py:obj:`None`, the summary is calculated from
+                              ``grids_15m``, ``tidal_predictions``,
+                              and ``weather_path``.
+    :type storm_surge_summary: :py:class:`types.SimpleNamespace`
+
     :returns: :py:class:`matplotlib.figure.Figure`
     """
-    plot_data = _prep_plot_data(grids_15m, tidal_predictions, weather_path)
+    plot_data = _prep_plot_data(
+        grids_15m, tidal_predictions, weather_path, storm_surge_summary
+    )
     fig, (ax_map, ax_pa_info, ax_cr_info, ax_vic_info) = _prep_fig_axes(figsize, theme)
     _plot_alerts_map(ax_map, coastline, plot_data, theme)
     info_boxes = (ax_pa_info, ax_cr_info, ax_vic_info)
@@ -85,39 +94,14 @@ def make_figure(
     return fig
 
 
-def _prep_plot_data(grids_15m, tidal_predictions, weather_path):
-    max_ssh, max_ssh_time, risk_levels = {}, {}, {}
-    u_wind_4h_avg, v_wind_4h_avg, max_wind_avg = {}, {}, {}
-    for name in places.TIDE_GAUGE_SITES + places.SUPP_TIDE_SITES:
-        ssh_ts = nc_tools.ssh_timeseries_at_point(grids_15m[name], 0, 0, datetimes=True)
-        ttide = shared.get_tides(name, tidal_predictions)
-        max_ssh[name], max_ssh_time[name] = shared.find_ssh_max(name, ssh_ts, ttide)
-        risk_levels[name] = stormtools.storm_surge_risk_level(
-            name, max_ssh[name], ttide
-        )
-        wind_avg = wind_tools.calc_wind_avg_at_point(
-            arrow.get(max_ssh_time[name]),
-            weather_path,
-            places.PLACES[name]["wind grid ji"],
-            avg_hrs=-4,
-        )
-        u_wind_4h_avg[name], v_wind_4h_avg[name] = wind_avg
-        max_wind_avg[name], _ = wind_tools.wind_speed_dir(
-            u_wind_4h_avg[name], v_wind_4h_avg[name]
-        )
-    plot_data = namedtuple(
-        "PlotData",
-        "ssh_ts, max_ssh, max_ssh_time, risk_levels, "
-        "u_wind_4h_avg, v_wind_4h_avg, max_wind_avg",
-    )
-    return plot_data(
-        ssh_ts,
-        max_ssh,
-        max_ssh_time,
-        risk_levels,
-        u_wind_4h_avg,
-        v_wind_4h_avg,
-        max_wind_avg,
+def _prep_plot_data(grids_15m, tidal_predictions, weather_path, storm_surge_summary):
+    if storm_surge_summary is not None:
+        return storm_surge_summary
+    return storm_surge.calc_storm_surge_summary(
+        grids_15m,
+        tidal_predictions,
+        weather_path,
+        places.TIDE_GAUGE_SITES + places.SUPP_TIDE_SITES,
     )
 
 
@@ -156,7 +140,7 @@ def _plot_alerts_map(ax, coastline, plot_data, theme):
         )
 
     # Format the axes and make it pretty
-    _alerts_map_axis_labels(ax, plot_data.ssh_ts.time[0], theme)
+    _alerts_map_axis_labels(ax, plot_data.start_time.datetime, theme)
     _alerts_map_marker_legend(ax, theme)
     _alerts_map_wind_legend(ax, theme)
     _alerts_map_geo_labels(ax, theme)
@@ -19,6 +19,9 @@
 """Produce surface currents tile figures in both the website themed and un-themed style."""
 
 import datetime
+import json
+from pathlib import Path
+from types import SimpleNamespace
 
 import netCDF4
 import numpy
@@ -29,6 +32,25 @@ from salishsea_tools import viz_tools
 
 import nowcast.figures.website_theme
 
+# Stride for sub-sampling the velocity field for quiver arrows
+_K = 3
+
+# Arrow parameters: list of tuples of (speed_min, speed_max, arrow_width, arrow_head_width)
+_ARROW_PARAMS = [
+    (0.05, 0.25, 0.003, 3.00),
+    (0.25, 0.50, 0.005, 2.75),
+    (0.50, 1.00, 0.007, 2.25),
+    (1.00, 1.50, 0.009, 2.00),
+    (1.50, 2.00, 0.011, 1.50),
+    (2.00, 2.50, 0.013, 1.25),
+    (2.50, 3.00, 0.015, 1.00),
+    (3.00, 4.00, 0.017, 0.75),
+    (4.00, 100, 0.020, 2.00),
+]
+
+# Some vectors in the middle of the Atlantic to ensure we get at least one for each arrow size
+_ATLANTIC_U = numpy.linspace(0, 5, 50)
+
 
 def make_figure(
     run_date,
@@ -87,12 +109,16 @@ def make_figure(
     netCDF4.Dataset(coordf) as dsCoord, \
     netCDF4.Dataset(mesh_maskf) as dsMask, \
     netCDF4.Dataset(bathyf) as dsBathy:
+        maskU, maskV = _prepareVelocity(t_index, dsU, dsV, dsCoord, dsMask)
+        coord_xt, coord_yt = _prepareCoordinates(dsCoord)
         fig_list, tile_list = _makeTiles(
-            t_index,
-            dsU,
-            dsV,
-            dsCoord,
-            dsMask,
+            dsU.variables["time_counter"][t_index],
+            dsU.variables["time_counter"].units,
+            dsU.variables["time_counter"].calendar,
+            maskU,
+            maskV,
+            coord_xt,
+            coord_yt,
             dsBathy,
             theme,
             tile_coords_dic,
@@ -103,6 +129,229 @@ def make_figure(
     return fig_list, tile_list
 
 
+def prepare_fields(Uf, Vf, coordf, mesh_maskf, bathyf, fields_dir):
+    """Calculate the unstaggered, rotated, and masked surface velocity fields for all
+    of the time indices in a results file, and collect the static grid arrays that the
+    tile figures need.
+    The arrays are stored as memory-mappable :file:`.npy` files in fields_dir so that
+    tile rendering processes can attach to them with :py:func:`load_fields` instead of
+    opening and processing the netCDF files for every tile figure.
+
+    :param Uf: Path to SalishSeaCast NEMO grid_U output file.
+    :type Uf: :py:class:`pathlib.Path`
+
+    :param Vf: Path to SalishSeaCast NEMO grid_V output file.
+    :type Vf: :py:class:`pathlib.Path`
+
+    :param coordf: Path to SalishSeaCast NEMO model coordinates file.
+    :type coordf: :py:class:`pathlib.Path`
+
+    :param mesh_maskf: Path to SalishSeaCast NEMO-generated mesh mask file.
+    :type mesh_maskf: :py:class:`pathlib.Path`
+
+    :param bathyf: Path to SalishSeaCast NEMO model bathymetry file.
+    :type bathyf: :py:class:`pathlib.Path`
+
+    :param fields_dir: Directory to store the prepared arrays in.
+    :type fields_dir: :py:class:`pathlib.Path`
+    """
+    fields_dir = Path(fields_dir)
+    # fmt: off
+    with \
+    netCDF4.Dataset(Uf) as dsU, \
+    netCDF4.Dataset(Vf) as dsV, \
+    netCDF4.Dataset(coordf) as dsCoord, \
+    netCDF4.Dataset(mesh_maskf) as dsMask, \
+    netCDF4.Dataset(bathyf) as dsBathy:
+        time_counter = dsU.variables["time_counter"]
+        time_attrs = {"units": time_counter.units, "calendar": time_counter.calendar}
+        numpy.save(fields_dir / "time_counter.npy", time_counter[:].data)
+        coord_xt, coord_yt = _prepareCoordinates(dsCoord)
+        numpy.save(fields_dir / "coord_xt.npy", numpy.ma.filled(coord_xt, numpy.nan))
+        numpy.save(fields_dir / "coord_yt.npy", numpy.ma.filled(coord_yt, numpy.nan))
+        for var in ("nav_lon", "nav_lat", "Bathymetry"):
+            numpy.save(
+                fields_dir / f"{var}.npy",
+                numpy.ma.filled(
+                    dsBathy.variables[var][:].astype(numpy.float64), numpy.nan
+                ),
+            )
+        u_fields = numpy.lib.format.open_memmap(
+            fields_dir / "u.npy",
+            mode="w+",
+            dtype=numpy.float32,
+            shape=(time_counter.size, *coord_xt.shape),
+        )
+        v_fields = numpy.lib.format.open_memmap(
+            fields_dir / "v.npy",
+            mode="w+",
+            dtype=numpy.float32,
+            shape=(time_counter.size, *coord_xt.shape),
+        )
+        for t_index in range(time_counter.size):
+            maskU, maskV = _prepareVelocity(t_index, dsU, dsV, dsCoord, dsMask)
+            u_fields[t_index] = numpy.ma.filled(maskU, numpy.nan)
+            v_fields[t_index] = numpy.ma.filled(maskV, numpy.nan)
+        u_fields.flush()
+        v_fields.flush()
+        del u_fields, v_fields
+    # fmt: on
+    (fields_dir / "time_counter.json").write_text(json.dumps(time_attrs))
+
+
+def load_fields(fields_dir):
+    """Attach to the surface velocity fields and static grid arrays stored in fields_dir
+    by :py:func:`prepare_fields`.
+
+    The velocity fields are memory-mapped read-only so that many tile rendering
+    processes share the same pages instead of each holding its own copy.
+
+    :param fields_dir: Directory that the prepared arrays are stored in.
+    :type fields_dir: :py:class:`pathlib.Path`
+
+    :returns: Prepared surface velocity fields and static grid arrays.
+    :rtype: :py:class:`types.SimpleNamespace`
+    """
+    fields_dir = Path(fields_dir)
+    time_attrs = json.loads((fields_dir / "time_counter.json").read_text())
+
+    def _load(name):
+        return numpy.load(fields_dir / f"{name}.npy", mmap_mode="r")
+
+    # Static grid arrays are wrapped in a netCDF4.Dataset look-alike because that is
+    # what the salishsea_tools.viz_tools land mask and coastline functions expect
+    bathy = SimpleNamespace(
+        variables={
+            var: numpy.ma.masked_invalid(_load(var))
+            for var in ("nav_lon", "nav_lat", "Bathymetry")
+        }
+    )
+    return SimpleNamespace(
+        time_counter=_load("time_counter"),
+        units=time_attrs["units"],
+        calendar=time_attrs["calendar"],
+        u=_load("u"),
+        v=_load("v"),
+        coord_xt=numpy.ma.masked_invalid(_load("coord_xt")),
+        coord_yt=numpy.ma.masked_invalid(_load("coord_yt")),
+        bathy=bathy,
+    )
+
+
+def make_figure_from_fields(
+    t_index,
+    fields,
+    tile_coords_dic,
+    expansion_factor,
+    theme=nowcast.figures.website_theme,
+):
+    """
+    Create a list of surface current tile figures for a given time index t_index
+    from surface velocity fields and grid arrays prepared by :py:func:`prepare_fields`.
+
+    :param t_index: time index
+    :type t_index: int
+
+    :param fields: Prepared surface velocity fields and static grid arrays
+                   returned by :py:func:`load_fields`.
+    :type fields: :py:class:`types.SimpleNamespace`
+
+    :param tile_coords_dic: Dictionary containing tile coordinate definitions in longitude and latitude.
+                            See :py:mod:`nowcast.figures.surface_current_domain`.
+    :type tile_coords_dic: dict
+
+    :param expansion_factor: Overlap fraction for tiles (typically between 0 and 0.25)
+    :type expansion_factor: float
+
+    :param theme: Module-like object that defines the style elements for the
+                figure. See :py:mod:`nowcast.figures.website_theme` for an
+                example.
+
+    :returns: list of matplotlib Figures and list of names for all figures
+    """
+    return _makeTiles(
+        fields.time_counter[t_index],
+        fields.units,
+        fields.calendar,
+        numpy.ma.masked_invalid(fields.u[t_index]),
+        numpy.ma.masked_invalid(fields.v[t_index]),
+        fields.coord_xt,
+        fields.coord_yt,
+        fields.bathy,
+        theme,
+        tile_coords_dic,
+        expansion_factor,
+    )
+
+
+def make_tile_figures(
+    fields,
+    tile_coords_dic,
+    expansion_factor,
+    theme=nowcast.figures.website_theme,
+):
+    """
+    Create persistent surface current tile figures that contain all of the artists
+    that do not change with time (land, coastline, axes, quiver keys, etc.).
+    Use :py:func:`update_tile_figures` to load the velocity field for a time index
+    into the figures before saving them.
+
+    :param fields: Prepared surface velocity fields and static grid arrays
+                   returned by :py:func:`load_fields`.
+    :type fields: :py:class:`types.SimpleNamespace`
+
+    :param tile_coords_dic: Dictionary containing tile coordinate definitions in longitude and latitude.
+                            See :py:mod:`nowcast.figures.surface_current_domain`.
+    :type tile_coords_dic: dict
+
+    :param expansion_factor: Overlap fraction for tiles (typically between 0 and 0.25)
+    :type expansion_factor: float
+
+    :param theme: Module-like object that defines the style elements for the
+                figure. See :py:mod:`nowcast.figures.website_theme` for an
+                example.
+
+    :returns: Tile figures and the artists that are updated for each time index.
+    :rtype: :py:class:`types.SimpleNamespace`
+    """
+    return _makeTileFigures(
+        numpy.ma.masked_invalid(fields.u[0]),
+        fields.coord_xt,
+        fields.coord_yt,
+        fields.bathy,
+        theme,
+        tile_coords_dic,
+        expansion_factor,
+    )
+
+
+def update_tile_figures(tile_figs, t_index, fields):
+    """
+    Update the quiver arrows and titles of tile figures created by
+    :py:func:`make_tile_figures` for time index t_index.
+
+    :param tile_figs: Tile figures returned by :py:func:`make_tile_figures`.
+    :type tile_figs: :py:class:`types.SimpleNamespace`
+
+    :param t_index: time index
+    :type t_index: int
+
+    :param fields: Prepared surface velocity fields and static grid arrays
+                   returned by :py:func:`load_fields`.
+    :type fields: :py:class:`types.SimpleNamespace`
+
+    :returns: list of matplotlib Figures and list of names for all figures
+    """
+    return _updateTileFigures(
+        tile_figs,
+        fields.time_counter[t_index],
+        fields.units,
+        fields.calendar,
+        numpy.ma.masked_invalid(fields.u[t_index]),
+        numpy.ma.masked_invalid(fields.v[t_index]),
+    )
+
+
 def _prepareVelocity(time, dsU, dsV, dsCoord, dsMask):
     """
     Load the velocities and unstagger, rotate and mask them.
@@ -163,31 +412,46 @@ def _createTileTitle(sec, units, calendar):
 
 
 def _makeTiles(
-    t_index,
-    dsU,
-    dsV,
-    dsCoord,
-    dsMask,
+    sec,
+    units,
+    calendar,
+    maskU,
+    maskV,
+    coord_xt,
+    coord_yt,
     dsBathy,
     theme,
     tile_coords_dic,
     expansion_factor,
 ):
     """
-    Produce surface current tile figures for each tile at time index t_index
+    Produce surface current tile figures for each tile from the masked velocity
+    fields at time sec
     """
-    units = dsU.variables["time_counter"].units
-    calendar = dsU.variables["time_counter"].calendar
-    maskU, maskV = _prepareVelocity(t_index, dsU, dsV, dsCoord, dsMask)
-    coord_xt, coord_yt = _prepareCoordinates(dsCoord)
+    tile_figs = _makeTileFigures(
+        maskU, coord_xt, coord_yt, dsBathy, theme, tile_coords_dic, expansion_factor
+    )
+    return _updateTileFigures(tile_figs, sec, units, calendar, maskU, maskV)
 
-    k = 3
 
-    tiles = []
-    figs = []
+def _makeTileFigures(
+    maskU, coord_xt, coord_yt, dsBathy, theme, tile_coords_dic, expansion_factor
+):
+    """
+    Produce the static artists of the surface current tile figure for each tile.
+    The quiver arrows are placed at the water points of maskU;
+    their directions are set by _updateTileFigures().
+    """
+    X, Y = coord_xt[::_K, ::_K].flatten(), coord_yt[::_K, ::_K].flatten()
+    U = maskU[::_K, ::_K].flatten()
+    sites = numpy.logical_not(numpy.ma.getmaskarray(U))
+    zeros = numpy.zeros(_ATLANTIC_U.shape)
+    XC = numpy.concatenate([numpy.ma.getdata(X)[sites], zeros])
+    YC = numpy.concatenate([numpy.ma.getdata(Y)[sites], zeros])
+
+    tiles = {}
     for tile, values in tile_coords_dic.items():
         x1, x2, y1, y2 = values[0], values[1], values[2], values[3]
-        sec = dsU.variables["time_counter"][t_index]
 
         if theme is None:
             fig = Figure(figsize=(8.5, 11), facecolor="white")
@@ -198,37 +462,7 @@ def _makeTiles(
 
         ax = fig.add_subplot(111)
 
-        X, Y = coord_xt[::k, ::k].flatten(), coord_yt[::k, ::k].flatten()
-        U, V = maskU[::k, ::k].flatten(), maskV[::k, ::k].flatten()
-
-        i = numpy.logical_not(U.mask)
-        XC, YC, UC, VC = X[i], Y[i], U[i].data, V[i].data
-
-        # Add some vectors in the middle of the Atlantic to ensure we get at least one for each arrow size
-        tempU = numpy.linspace(0, 5, 50)
-        zeros = numpy.zeros(tempU.shape)
-        XC = numpy.concatenate([XC, zeros])
-        YC = numpy.concatenate([YC, zeros])
-        UC = numpy.concatenate([UC, tempU])
-        VC = numpy.concatenate([VC, zeros])
-        SC = numpy.sqrt(UC**2 + VC**2)
-        i = SC < 0.05
-        if numpy.any(i):
-            UCC, VCC, XCC, YCC = _cut(UC, VC, XC, YC, i)
-            ax.scatter(XCC, YCC, s=2, c="k")
-
-        # Arrow parameters: list of tuples of (speed_min, speed_max, arrow_width, arrow_head_width)
-        arrowparamslist = [
-            (0.05, 0.25, 0.003, 3.00),
-            (0.25, 0.50, 0.005, 2.75),
-            (0.50, 1.00, 0.007, 2.25),
-            (1.00, 1.50, 0.009, 2.00),
-            (1.50, 2.00, 0.011, 1.50),
-            (2.00, 2.50, 0.013, 1.25),
-            (2.50, 3.00, 0.015, 1.00),
-            (3.00, 4.00, 0.017, 0.75),
-            (4.00, 100, 0.020, 2.00),
-        ]
+        dots = ax.scatter(numpy.empty(0), numpy.empty(0), s=2, c="k")
 
         if theme is None:
             # Quiver key positions (x,y) relative to axes that spans [0,1]x[0,1]
@@ -271,9 +505,11 @@ def _makeTiles(
                 transform=ax.transAxes,
             )
 
-        # Draw each arrow
-        for arrowparams, positions in zip(arrowparamslist, positionslist):
-            _drawArrows(arrowparams, positions, UC, VC, XC, YC, SC, ax, theme, FP)
+        # Draw a set of arrows for each speed range
+        quivers = [
+            _drawArrows(arrowparams, positions, XC, YC, ax, theme, FP)
+            for arrowparams, positions in zip(_ARROW_PARAMS, positionslist)
+        ]
 
         ax.grid(True)
 
@@ -284,18 +520,18 @@ def _makeTiles(
         ax.set_ylim([y1 - dy, y2 + dy])
 
         # Decorations
-        title = _createTileTitle(sec, units, calendar) + "\n" + tile
         x_label = "Longitude"
         y_label = "Latitude"
 
         if theme is None:
-            title_notheme = "SalishSeaCast Surface Currents\n" + title + "\n"
-            ax.set_title(title_notheme, fontsize=12, loc="left")
+            title_fmt = "SalishSeaCast Surface Currents\n{time}\n" + tile + "\n"
+            title = ax.set_title("", fontsize=12, loc="left")
             ax.set_xlabel(x_label)
             ax.set_ylabel(y_label)
         else:
-            ax.set_title(
-                title,
+            title_fmt = "{time}\n" + tile
+            title = ax.set_title(
+                "",
                 fontsize=10,
                 color=theme.COLOURS["text"]["axis"],
                 fontproperties=FP,
@@ -317,32 +553,69 @@ def _makeTiles(
         x_tick_labels = ["{:.1f}".format(q) for q in x_tick_loc]
         ax.set_xticks(x_tick_loc, x_tick_labels, rotation=45)
 
+        # Explicit slices keep viz_tools indexing valid for numpy arrays as well as
+        # netCDF4 variables
         viz_tools.plot_land_mask(
-            ax, dsBathy, coords="map", color="burlywood", zorder=-9
+            ax,
+            dsBathy,
+            coords="map",
+            xslice=slice(None),
+            yslice=slice(None),
+            color="burlywood",
+            zorder=-9,
         )
         ax.set_rasterization_zorder(-1)
-        viz_tools.plot_coastline(ax, dsBathy, coords="map")
+        viz_tools.plot_coastline(
+            ax, dsBathy, coords="map", xslice=slice(None), yslice=slice(None)
+        )
         viz_tools.set_aspect(ax, coords="map", lats=numpy.ma.filled(coord_yt))
 
-        tiles += [tile]
-        figs += [fig]
-    return figs, tiles
+        tiles[tile] = SimpleNamespace(
+            fig=fig, dots=dots, quivers=quivers, title=title, title_fmt=title_fmt
+        )
+    return SimpleNamespace(sites=sites, XC=XC, YC=YC, tiles=tiles)
 
 
-def _cut(UC, VC, XC, YC, i):
+def _updateTileFigures(tile_figs, sec, units, calendar, maskU, maskV):
     """
-    Helper function to subset vectors
+    Set the quiver arrows, slow speed dots, and titles of the tile figures
+    for the masked velocity fields at time sec
     """
-    return UC[i], VC[i], XC[i], YC[i]
+    U = maskU[::_K, ::_K].flatten()[tile_figs.sites]
+    V = maskV[::_K, ::_K].flatten()[tile_figs.sites]
+    UC = numpy.ma.concatenate([U, _ATLANTIC_U])
+    VC = numpy.ma.concatenate([V, numpy.zeros(_ATLANTIC_U.shape)])
+    SC = numpy.ma.sqrt(UC**2 + VC**2)
+    slow = numpy.ma.filled(SC < 0.05, False)
+    dot_offsets = numpy.column_stack([tile_figs.XC[slow], tile_figs.YC[slow]])
+    arrows = []
+    for speed_min, speed_max, width, headwidth in _ARROW_PARAMS:
+        i = numpy.ma.filled((SC >= speed_min) & (SC < speed_max), False)
+        arrows.append(
+            (
+                numpy.ma.masked_where(~i, UC / SC),
+                numpy.ma.masked_where(~i, VC / SC),
+            )
+        )
+    title_time = _createTileTitle(sec, units, calendar)
+
+    figs, tiles = [], []
+    for tile, tile_fig in tile_figs.tiles.items():
+        tile_fig.dots.set_offsets(dot_offsets)
+        for quiver, (u_arrows, v_arrows) in zip(tile_fig.quivers, arrows):
+            quiver.set_UVC(u_arrows, v_arrows)
+        tile_fig.title.set_text(tile_fig.title_fmt.format(time=title_time))
+        tiles += [tile]
+        figs += [tile_fig.fig]
+    return figs, tiles
 
 
-def _drawArrows(arrowparams, positions, UC, VC, XC, YC, SC, ax, theme, FP):
+def _drawArrows(arrowparams, positions, XC, YC, ax, theme, FP):
     """
-    Helper function to draw arrows in each velocity range
-    arrowparams holds the quiver arrow parameters corresponding to each speed range
+    Helper function to draw the arrows and quiverkey for a velocity range
+    arrowparams holds the quiver arrow parameters corresponding to the speed range
     positions holds the coordinates relative to the [0,1]x[0,1] axes to draw the quiverkey
-    UC, VC are the velocity components at positions XC, YC
-    SC is the speed
+    XC, YC are the arrow positions; the arrows are masked until their directions are set
     ax is the axes to draw on
     theme is the theme
     FP is a font properties dictionary
@@ -351,50 +624,49 @@ def _drawArrows(arrowparams, positions, UC, VC, XC, YC, SC, ax, theme, FP):
     speed_min, speed_max, width, headwidth = arrowparams
     xpos, ypos = positions
 
-    i = (SC >= speed_min) & (SC < speed_max)
-    if numpy.any(i):
-        # Draw the quiver arrows
-        UCC, VCC, XCC, YCC = _cut(UC, VC, XC, YC, i)
-        q = ax.quiver(
-            XCC,
-            YCC,
-            UCC / SC[i],
-            VCC / SC[i],
-            headwidth=2,
-            headlength=0.008 / width,
-            headaxislength=0.008 / width,
-            width=width,
-            scale=50,
-            zorder=3,
-        )
-
-        # Construct quiver label
-        if speed_min >= 4:
-            label = r">= {:.2f} m/s".format(speed_min)
-        else:
-            label = r"{:.2f}-{:.2f} m/s".format(speed_min, speed_max)
+    # Draw the quiver arrows
+    no_arrows = numpy.ma.masked_all(XC.shape)
+    q = ax.quiver(
+        XC,
+        YC,
+        no_arrows,
+        no_arrows,
+        headwidth=2,
+        headlength=0.008 / width,
+        headaxislength=0.008 / width,
+        width=width,
+        scale=50,
+        zorder=3,
+    )
 
-        # Add the quiverkey label
-        if theme is None:
-            qk = ax.quiverkey(q, xpos, ypos, 1, label, labelpos="E")
-        else:
-            fontsize = FP.get_size() - 4
-            quickerKey_dict = {
-                "family": FP.get_family(),
-                "style": FP.get_style(),
-                "variant": FP.get_variant(),
-                "weight": FP.get_weight(),
-                "stretch": FP.get_stretch(),
-                "size": fontsize,
-            }
-            qk = ax.quiverkey(
-                q,
-                xpos,
-                ypos,
-                1,
-                label,
-                labelpos="E",
-                color=theme.COLOURS["text"]["axis"],
-                labelcolor=theme.COLOURS["text"]["axis"],
-                fontproperties=quickerKey_dict,
-            )
+    # Construct quiver label
+    if speed_min >= 4:
+        label = r">= {:.2f} m/s".format(speed_min)
+    else:
+        label = r"{:.2f}-{:.2f} m/s".format(speed_min, speed_max)
+
+    # Add the quiverkey label
+    if theme is None:
+        ax.quiverkey(q, xpos, ypos, 1, label, labelpos="E")
+    else:
+        fontsize = FP.get_size() - 4
+        quickerKey_dict = {
+            "family": FP.get_family(),
+            "style": FP.get_style(),
+            "variant": FP.get_variant(),
+            "weight": FP.get_weight(),
+            "stretch": FP.get_stretch(),
+            "size": fontsize,
+        }
+        ax.quiverkey(
+            q,
+            xpos,
+            ypos,
+            1,
+            label,
+            labelpos="E",
+            color=theme.COLOURS["text"]["axis"],
+            labelcolor=theme.COLOURS["text"]["axis"],
+            fontproperties=quickerKey_dict,
+        )
+    return q
@@ -53,7 +53,9 @@ def make_figure(
     """
     :param xr_dataset: Hourly average 3d biological fields and tracer fields
                        from the gridapp datasets of the data server ERDAPP
-                       (https://salishsea.eos.ubc.ca/erddap/griddap/index.html?page=1&itemsPerPage=1000).
+                       (https://salishsea.eos.ubc.ca/erddap/griddap/index.html?page=1&itemsPerPage=1000),
+                       or the hourly profiles at place from
+                       :py:func:`nowcast.station_timeseries.open_station_timeseries`.
     :type xr_dataset: :class:`xarray.core.dataset.Dataset`
 
     :param left_variable: One of the data variables among 'nitrate',
@@ -86,17 +88,13 @@ def _prep_plot_data(xr_dataset, left_variable, right_variable, place):
     end_day = arw.get(xr_dataset.time_coverage_end)
     start_day = end_day.shift(days=-49)
     time_slice = slice(start_day.date(), end_day.shift(days=+1).date())
-    grid_y, grid_x = places.PLACES[place]["NEMO grid ji"]
-    left_var = (
-        xr_dataset[left_variable]
-        .sel(time=time_slice)
-        .isel(depth=0, gridX=grid_x, gridY=grid_y)
-    )
-    right_var = (
-        xr_dataset[right_variable]
-        .sel(time=time_slice)
-        .isel(depth=0, gridX=grid_x, gridY=grid_y)
-    )
+    surface = {"depth": 0}
+    if "gridY" in xr_dataset.dims:
+        # Full domain dataset rather than a station time series dataset
+        grid_y, grid_x = places.PLACES[place]["NEMO grid ji"]
+        surface.update({"gridY": grid_y, "gridX": grid_x})
+    left_var = xr_dataset[left_variable].sel(time=time_slice).isel(surface)
+    right_var = xr_dataset[right_variable].sel(time=time_slice).isel(surface)
     return SimpleNamespace(
         left_var=left_var,
         right_var=right_var,
@@ -41,16 +41,19 @@ from types import SimpleNamespace
 import matplotlib.pyplot as plt
 import numpy as np
 from matplotlib import gridspec
-from salishsea_tools import visualisations as vis
 from salishsea_tools import viz_tools
 
 import nowcast.figures.website_theme
+from nowcast.figures import shared
+
+#: The thalweg file is read when a figure is rendered,
+#: so its fingerprint is part of the figures' :py:mod:`nowcast.render_cache` keys
+RENDER_CACHE_FILES = (shared.THALWEG_FILE,)
 
 
 def make_figure(
     tracer_var,
-    bathy,
-    mesh_mask,
+    grid,
     cmap,
     depth_integrated,
     figsize=(16, 9),
@@ -64,11 +67,9 @@ def make_figure(
     :param tracer_var: Hourly average tracer results from NEMO run.
     :type tracer_var: :py:class:`netCDF4.Variable`
 
-    :param bathy: SalishSeaCast NEMO model bathymetry data.
-    :type bathy: :class:`netCDF4.Dataset`
-
-    :param mesh_mask: NEMO-generated mesh mask for run that produced tracer_var.
-    :type mesh_mask: :class:`netCDF4.Dataset`
+    :param grid: SalishSeaCast NEMO model bathymetry and mesh mask grid arrays
+                 for the run that produced tracer_var.
+    :type grid: :py:class:`nowcast.results_context.ResultsContext`
 
     :param cmap: Colour map to use for tracer_var contour plots.
     :type cmap: :py:class:`matplotlib.colors.LinearSegmentedColormap`
@@ -84,13 +85,13 @@ def make_figure(
 
     :returns: :py:class:`matplotlib.figure.Figure`
     """
-    plot_data = _prep_plot_data(tracer_var, mesh_mask, depth_integrated)
+    plot_data = _prep_plot_data(tracer_var, grid, depth_integrated)
     fig, (ax_thalweg, ax_surface) = _prep_fig_axes(figsize, theme)
 
     clevels_thalweg, clevels_surface, show_thalweg_cbar = _calc_clevels(plot_data)
 
     cbar_thalweg = _plot_tracer_thalweg(
-        ax_thalweg, plot_data, bathy, mesh_mask, cmap, clevels_thalweg
+        ax_thalweg, plot_data, grid, cmap, clevels_thalweg
     )
     _thalweg_axes_labels(
         ax_thalweg, plot_data, show_thalweg_cbar, clevels_thalweg, cbar_thalweg, theme
@@ -103,19 +104,17 @@ def make_figure(
     return fig
 
 
-def _prep_plot_data(tracer_var, mesh_mask, depth_integrated):
+def _prep_plot_data(tracer_var, grid, depth_integrated):
     hr = 19
     sj, ej = 200, 800
     si, ei = 20, 395
 
     tracer_hr = tracer_var[hr]
-    masked_tracer_hr = np.ma.masked_where(mesh_mask["tmask"][0, ...] == 0, tracer_hr)
+    masked_tracer_hr = np.ma.masked_where(grid.tmask == 0, tracer_hr)
     surface_hr = masked_tracer_hr[0, sj:ej, si:ei]
 
     if depth_integrated:
-        grid_heights = mesh_mask.variables["e3t_1d"][:][0].reshape(
-            tracer_hr.shape[0], 1, 1
-        )
+        grid_heights = grid.e3t_1d.reshape(tracer_hr.shape[0], 1, 1)
         height_weighted = masked_tracer_hr[:, sj:ej, si:ei] * grid_heights
         surface_hr = height_weighted.sum(axis=0)
 
@@ -182,16 +181,18 @@ def _calc_clevels(plot_data):
     return clevels_thalweg, clevels_surface, show_thalweg_cbar
 
 
-def _plot_tracer_thalweg(ax, plot_data, bathy, mesh_mask, cmap, clevels):
-    cbar = vis.contour_thalweg(
-        ax,
-        plot_data.tracer_hr,
-        bathy,
-        mesh_mask,
-        clevels=clevels,
-        cmap=cmap,
+def _plot_tracer_thalweg(ax, plot_data, grid, cmap, clevels):
+    thalweg = shared.get_thalweg_operator(
+        grid,
         ## TODO: Can this path be moved into nowcast.yaml config file?
-        thalweg_file="/SalishSeaCast/tools/bathymetry/thalweg_working" ".txt",
+        thalweg_file=shared.THALWEG_FILE,
+    )
+    cbar = shared.contour_thalweg(
+        ax,
+        thalweg.apply(plot_data.tracer_hr),
+        thalweg,
+        clevels,
+        cmap,
         cbar_args={"fraction": 0.030, "pad": 0.04, "aspect": 45},
     )
     return cbar
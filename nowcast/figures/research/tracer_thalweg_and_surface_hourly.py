@@ -30,17 +30,24 @@ from types import SimpleNamespace
 import matplotlib.pyplot as plt
 import numpy as np
 from matplotlib import gridspec
-from salishsea_tools import visualisations as vis
 from salishsea_tools import viz_tools
 
 import nowcast.figures.website_theme
+from nowcast.figures import shared
+
+#: The thalweg file is read when a figure is rendered,
+#: so its fingerprint is part of the figures' :py:mod:`nowcast.render_cache` keys
+RENDER_CACHE_FILES = (shared.THALWEG_FILE,)
+
+#: Grid y and x index ranges of the surface plot region
+SURFACE_J_LIMITS = (200, 800)
+SURFACE_I_LIMITS = (20, 395)
 
 
 def make_figure(
     hr,
     tracer_var,
-    bathy,
-    mesh_mask,
+    grid,
     clevels_thalweg,
     clevels_surface,
     cmap,
@@ -59,11 +66,9 @@ def make_figure(
     :param tracer_var: Hourly average tracer results from NEMO run.
     :type tracer_var: :py:class:`netCDF4.Variable`
 
-    :param bathy: SalishSeaCast NEMO model bathymetry data.
-    :type bathy: :class:`netCDF4.Dataset`
-
-    :param mesh_mask: NEMO-generated mesh mask for run that produced tracer_var.
-    :type mesh_mask: :class:`netCDF4.Dataset`
+    :param grid: SalishSeaCast NEMO model bathymetry and mesh mask grid arrays
+                 for the run that produced tracer_var.
+    :type grid: :py:class:`nowcast.results_context.ResultsContext`
 
     :param clevels_thalweg: Colour bar contour intervals for thalweg plot.
     :type clevels_thalweg: :class:`numpy.ndarray`
@@ -85,10 +90,10 @@ def make_figure(
 
     :returns: :py:class:`matplotlib.figure.Figure`
     """
-    plot_data = _prep_plot_data(hr, tracer_var, mesh_mask, depth_integrated)
+    plot_data = _prep_plot_data(hr, tracer_var, grid, depth_integrated)
     fig, (ax_thalweg, ax_surface) = _prep_fig_axes(figsize, theme)
     cbar_thalweg = _plot_tracer_thalweg(
-        ax_thalweg, plot_data, bathy, mesh_mask, cmap, clevels_thalweg
+        ax_thalweg, plot_data, grid, cmap, clevels_thalweg
     )
     _thalweg_axes_labels(ax_thalweg, plot_data, clevels_thalweg, cbar_thalweg, theme)
 
@@ -99,15 +104,16 @@ def make_figure(
     return fig
 
 
-def clevels(tracer_var, mesh_mask, depth_integrated):
+def clevels(tracer_var, grid, depth_integrated):
     """Calculate the colour bar contour intervals for the thalweg and surface
     plot axes based on the tracer variable values at hr=0.
 
     :param tracer_var: Hourly average tracer results from NEMO run.
     :type tracer_var: :py:class:`netCDF4.Variable`
 
-    :param mesh_mask: NEMO-generated mesh mask for run that produced tracer_var.
-    :type mesh_mask: :class:`netCDF4.Dataset`
+    :param grid: SalishSeaCast NEMO model bathymetry and mesh mask grid arrays
+                 for the run that produced tracer_var.
+    :type grid: :py:class:`nowcast.results_context.ResultsContext`
 
     :param boolean depth_integrated: Integrate the tracer over the water column
                                      depth when :py:obj:`True`.
@@ -115,23 +121,71 @@ def clevels(tracer_var, mesh_mask, depth_integrated):
     :returns: Colour bar contour intervals for thalweg and surface plot axes.
     :rtype: 2-tuple of :class:`numpy.ndarray` objects
     """
-    plot_data = _prep_plot_data(0, tracer_var, mesh_mask, depth_integrated)
-    clevels_thalweg, clevels_surface = _calc_clevels(plot_data)
-    return clevels_thalweg, clevels_surface
+    tracer_clevels = tracers_clevels(
+        {tracer_var.name: tracer_var},
+        grid,
+        {tracer_var.name: depth_integrated},
+    )
+    return tracer_clevels[tracer_var.name]
+
+
+def tracers_clevels(tracer_vars, grid, depth_integrated):
+    """Calculate the colour bar contour intervals for the thalweg and surface
+    plot axes of several tracers based on their values at hr=0.
+
+    The mesh mask land mask and grid cell thicknesses are read once and shared
+    by all of the tracers,
+    and only hr=0 is read from each tracer variable.
+
+    :param dict tracer_vars: Hourly average tracer results from NEMO run;
+                             :py:class:`netCDF4.Variable` objects keyed by
+                             tracer name.
+
+    :param grid: SalishSeaCast NEMO model bathymetry and mesh mask grid arrays
+                 for the run that produced the tracer variables.
+    :type grid: :py:class:`nowcast.results_context.ResultsContext`
+
+    :param dict depth_integrated: Flags to integrate the tracers over the water
+                                  column depth, keyed by tracer name.
+
+    :returns: Colour bar contour intervals for thalweg and surface plot axes,
+              keyed by tracer name.
+    :rtype: dict of 2-tuples of :class:`numpy.ndarray` objects
+    """
+    (sj, ej), (si, ei) = SURFACE_J_LIMITS, SURFACE_I_LIMITS
+    surface_land = grid.tmask[:, sj:ej, si:ei] == 0
+    grid_heights = grid.e3t_1d[:, np.newaxis, np.newaxis]
+    tracer_clevels = {}
+    for tracer, tracer_var in tracer_vars.items():
+        tracer_hr = tracer_var[0]
+        values = np.ma.getdata(tracer_hr)
+        missing = np.ma.getmaskarray(tracer_hr)
+        # Exclude values that np.ma.masked_values(tracer_hr, 0) would mask
+        thalweg_values = values[~np.isclose(values, 0) & ~missing]
+        surface_missing = surface_land | missing[:, sj:ej, si:ei]
+        if depth_integrated[tracer]:
+            height_weighted = np.where(
+                surface_missing, 0, values[:, sj:ej, si:ei] * grid_heights
+            )
+            surface_values = height_weighted.sum(axis=0)[~surface_missing.all(axis=0)]
+        else:
+            surface_values = values[0, sj:ej, si:ei][~surface_missing[0]]
+        tracer_clevels[tracer] = (
+            _percentile_clevels(thalweg_values),
+            _percentile_clevels(surface_values),
+        )
+    return tracer_clevels
 
 
-def _prep_plot_data(hr, tracer_var, mesh_mask, depth_integrated):
-    sj, ej = 200, 800
-    si, ei = 20, 395
+def _prep_plot_data(hr, tracer_var, grid, depth_integrated):
+    (sj, ej), (si, ei) = SURFACE_J_LIMITS, SURFACE_I_LIMITS
 
     tracer_hr = tracer_var[hr]
-    masked_tracer_hr = np.ma.masked_where(mesh_mask["tmask"][0, ...] == 0, tracer_hr)
+    masked_tracer_hr = np.ma.masked_where(grid.tmask == 0, tracer_hr)
     surface_hr = masked_tracer_hr[0, sj:ej, si:ei]
 
     if depth_integrated:
-        grid_heights = mesh_mask.variables["e3t_1d"][:][0].reshape(
-            tracer_hr.shape[0], 1, 1
-        )
+        grid_heights = grid.e3t_1d.reshape(tracer_hr.shape[0], 1, 1)
         height_weighted = masked_tracer_hr[:, sj:ej, si:ei] * grid_heights
         surface_hr = height_weighted.sum(axis=0)
 
@@ -160,37 +214,29 @@ def _prep_fig_axes(figsize, theme):
     return fig, (ax_thalweg, ax_surface)
 
 
-def _calc_clevels(plot_data):
-    """Calculate contour levels for the thalweg and surface plot axes."""
-    percent_98_thalweg = np.percentile(
-        np.ma.masked_values(plot_data.tracer_hr, 0).compressed(), 98
-    )
-    percent_2_thalweg = np.percentile(
-        np.ma.masked_values(plot_data.tracer_hr, 0).compressed(), 2
-    )
-    percent_98_surf = np.percentile(plot_data.surface_hr.compressed(), 98)
-    percent_2_surf = np.percentile(plot_data.surface_hr.compressed(), 2)
-    clevels_thalweg = np.arange(
-        percent_2_thalweg,
-        percent_98_thalweg,
-        (percent_98_thalweg - percent_2_thalweg) / 20.0,
-    )
-    clevels_surface = np.arange(
-        percent_2_surf, percent_98_surf, (percent_98_surf - percent_2_surf) / 20.0
-    )
-    return clevels_thalweg, clevels_surface
+def _percentile_clevels(values):
+    """Calculate 20 contour levels spanning the 2nd to 98th percentiles of values.
 
+    Both percentiles are calculated from a single partial sort of values.
+    """
+    # Percentiles array of the same dtype as values so that float32 results
+    # are not promoted to float64
+    percent_2, percent_98 = np.percentile(values, np.array((2, 98), values.dtype))
+    return np.arange(percent_2, percent_98, (percent_98 - percent_2) / 20.0)
 
-def _plot_tracer_thalweg(ax, plot_data, bathy, mesh_mask, cmap, clevels):
-    cbar = vis.contour_thalweg(
-        ax,
-        plot_data.tracer_hr,
-        bathy,
-        mesh_mask,
-        clevels=clevels,
-        cmap=cmap,
+
+def _plot_tracer_thalweg(ax, plot_data, grid, cmap, clevels):
+    thalweg = shared.get_thalweg_operator(
+        grid,
         ## TODO: Can this path be moved into nowcast.yaml config file?
-        thalweg_file="/SalishSeaCast/tools/bathymetry/thalweg_working" ".txt",
+        thalweg_file=shared.THALWEG_FILE,
+    )
+    cbar = shared.contour_thalweg(
+        ax,
+        thalweg.apply(plot_data.tracer_hr),
+        thalweg,
+        clevels,
+        cmap,
         cbar_args={"fraction": 0.030, "pad": 0.04, "aspect": 45},
     )
     return cbar
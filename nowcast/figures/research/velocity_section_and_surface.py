@@ -42,8 +42,7 @@ import nowcast.figures.website_theme
 def make_figure(
     U_var,
     V_var,
-    bathy,
-    mesh_mask,
+    grid,
     cmap=cmocean.cm.curl,
     figsize=(20, 12),
     theme=nowcast.figures.website_theme,
@@ -65,11 +64,9 @@ def make_figure(
     :param V_var: Hourly average V velocity from NEMO run
     :type V_var: :class:`numpy.ndarray`
 
-    :param bathy: SalishSeaCast NEMO model bathymetry data.
-    :type bathy: :class:`netCDF4.Dataset`
-
-    :param mesh_mask: NEMO-generated mesh mask for run that produced tracer_var.
-    :type mesh_mask: :class:`netCDF4.Dataset`
+    :param grid: SalishSeaCast NEMO model bathymetry and mesh mask grid arrays
+                 for the run that produced U_var and V_var.
+    :type grid: :py:class:`nowcast.results_context.ResultsContext`
 
     :param cmap: Colour map to use for tracer_var contour plots.
     :type cmap: :py:class:`matplotlib.colors.LinearSegmentedColormap`
@@ -97,7 +94,7 @@ def make_figure(
     :returns: :py:class:`matplotlib.figure.Figure`
     """
     # Prepare data
-    plot_data = _prep_plot_data(U_var, V_var, mesh_mask, bathy, sections=sections)
+    plot_data = _prep_plot_data(U_var, V_var, grid, sections=sections)
 
     # Prepare layout
     fig, (ax_section, ax_surface, ax_cbar) = _prep_fig_axes(
@@ -132,17 +129,19 @@ def make_figure(
     _cbar_labels(cbar, np.arange(-0.5, 0.6, 0.1), theme, "Alongstrait Velocity [m/s]")
 
     # Plot surface
-    _plot_vel_surface(ax_surface, plot_data, bathy, sections=(sections, section_lims))
+    _plot_vel_surface(
+        ax_surface, plot_data, grid.bathy, sections=(sections, section_lims)
+    )
     _surface_axes_labels(ax_surface, theme, lims=surface_lims)
 
     return fig
 
 
-def _prep_plot_data(U, V, mesh_mask, bathy, hr=0, sections=(450,)):
+def _prep_plot_data(U, V, grid, hr=0, sections=(450,)):
     # Index, mask, and unstagger U and V
     U_trim, V_trim = viz_tools.unstagger(
-        np.ma.masked_where(mesh_mask["umask"][0, ...] == 0, U[hr, ...]),
-        np.ma.masked_where(mesh_mask["vmask"][0, ...] == 0, V[hr, ...]),
+        np.ma.masked_where(grid.umask == 0, U[hr, ...]),
+        np.ma.masked_where(grid.vmask == 0, V[hr, ...]),
     )
 
     # Extract surface
@@ -157,9 +156,7 @@ def _prep_plot_data(U, V, mesh_mask, bathy, hr=0, sections=(450,)):
         U_section[index, :, :] = U_trim[:, section - 1, :]
         V_section[index, :, :] = V_trim[:, section - 1, :]
 
-    bathy_array = bathy.variables["Bathymetry"][...].data
-    bathy_mask = bathy.variables["Bathymetry"][:].mask
-    bathy_array[bathy_mask] = 0
+    bathy_array = np.ma.filled(grid.bathymetry, 0)
 
     return SimpleNamespace(
         U_surface=U_surface,
@@ -168,7 +165,7 @@ def _prep_plot_data(U, V, mesh_mask, bathy, hr=0, sections=(450,)):
         V_section=V_section,
         gridX=np.arange(U_surface.shape[1]) + 1,
         gridY=np.arange(U_surface.shape[0]) + 1,
-        depth=mesh_mask["gdept_1d"][0, ...],
+        depth=grid.gdept_1d,
         bathy_array=bathy_array,
     )
 
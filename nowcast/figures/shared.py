@@ -31,13 +31,14 @@ import io
 import os
 
 import arrow
+import attr
 import matplotlib.image
 import numpy as np
 import scipy.interpolate
 from matplotlib import patches
 from matplotlib.backends import backend_agg as backend
 from matplotlib.figure import Figure
-from salishsea_tools import stormtools
+from salishsea_tools import geo_tools, stormtools
 from salishsea_tools.places import PLACES
 
 import nowcast.figures.website_theme
@@ -344,19 +345,203 @@ def interpolate_tracer_to_depths(
     :raises: :py:exc:`ValueError` if any of the values in ``interp_depths``
              exceed the maximum model grid depth.
     """
+    return interpolate_tracer_block_to_depths(
+        tracer[np.newaxis, :], tracer_depths, interp_depths, tracer_mask, w_depths
+    )[0]
+
+
+def interpolate_tracer_block_to_depths(
+    tracers, tracer_depths, interp_depths, tracer_mask, w_depths
+):
+    """Calculate the interpolated values of a block of ``tracers`` depth profiles
+    at ``interp_depths`` using linear interpolation.
+
+    All of the profiles in the block share the same depths and mask,
+    so the indices of the depths that bracket ``interp_depths`` and the
+    interpolation weights are calculated once and applied to all of the
+    profiles in a single vectorized operation.
+
+    :arg tracers: Depth profiles of a model tracer variable;
+                  e.g. the hourly profiles at a grid point.
+                  Depth must be the last dimension.
+    :type tracers: :py:class:`numpy.ndarray`
+
+    :arg tracer_depths: Depths at which the model tracer variable has values.
+    :type tracer_depths: :py:class:`numpy.ndarray`
+
+    :arg interp_depths: Depth(s) at which to calculate the interpolated values
+                        of the model variable.
+    :type interp_depths: :py:class:`numpy.ndarray` or number
+
+    :arg tracer_mask: Mask to use obtain the water sections of ``tracers``
+                      and ``tracer_depths``;
+                      i.e. a 1D slice of :py:attr:`tmask` from the mesh mask.
+    :type tracer_mask: :py:class:`numpy.ndarray`
+
+    :arg w_depths: Depths of the model grid w-points;
+                   i.e. a 1D slice of :py:attr:`gdepw_0` from the mesh mask.
+    :type w_depths: :py:class:`numpy.ndarray`
+
+    :returns: Values of ``tracers`` linearly interpolated to ``interp_depths``.
+              The shape is the shape of ``tracers`` without its depth dimension,
+              followed by the shape of ``interp_depths``.
+    :rtype: :py:class:`numpy.ndarray`
+
+    :raises: :py:exc:`ValueError` if any of the values in ``interp_depths``
+             exceed the maximum model grid depth.
+    """
+    if np.any(np.asarray(interp_depths) > w_depths[tracer_mask == False][0]):
+        raise ValueError("A requested depth is outside the interpolation range.")
+    wet = np.asarray(tracer_mask == True)
+    wet_depths = np.asarray(tracer_depths)[wet]
+    # Bracketing indices and weights for linear interpolation,
+    # extrapolating from the end segments like scipy.interpolate.interp1d()
+    upper = np.clip(np.searchsorted(wet_depths, interp_depths), 1, wet_depths.size - 1)
+    lower = upper - 1
+    weights = (interp_depths - wet_depths[lower]) / (
+        wet_depths[upper] - wet_depths[lower]
+    )
+    wet_tracers = np.asarray(tracers)[..., wet]
+    return wet_tracers[..., lower] * (1 - weights) + wet_tracers[..., upper] * weights
+
+
+#: Default file of the grid j, i indices of the points along the domain thalweg
+THALWEG_FILE = "/SalishSeaCast/tools/bathymetry/thalweg_working.txt"
+
+_thalweg_operators = {}
+
+
+@attr.s
+class ThalwegOperator:
+    """Gather operator for vertical sections of model tracer fields along the
+    domain thalweg.
+
+    Everything that depends only on the thalweg points and the model grid is
+    calculated once by :py:func:`get_thalweg_operator`,
+    so extracting the thalweg section from a tracer field is a single
+    fancy-indexing operation.
+    """
+
+    #: Grid y indices of the thalweg points
+    js = attr.ib()
+    #: Grid x indices of the thalweg points
+    is_ = attr.ib()
+    #: Along-thalweg distances of the points [km]
+    distance = attr.ib()
+    #: Depths of the tracer grid points on the thalweg [m];
+    #: shape is (depth, thalweg point)
+    depths = attr.ib()
+    #: Bathymetry depths at the thalweg points [m]
+    bottom = attr.ib()
+    #: Model levels and thalweg point indices of the first land cell of
+    #: the thalweg water columns
+    fill_levels = attr.ib()
+    fill_points = attr.ib()
+
+    def apply(self, tracer):
+        """Extract the thalweg section from a block of tracer fields.
+
+        The value in the first land cell of each water column is set to the
+        value in the cell above it so that contours extend to the bottom.
+
+        :arg tracer: Tracer field(s) with depth, y, and x as the last 3
+                     dimensions; e.g. the hourly fields of a day,
+                     with shape (time, depth, y, x).
+        :type tracer: :py:class:`numpy.ndarray`
+
+        :returns: Thalweg section(s) of tracer with the leading dimensions
+                  of tracer followed by depth and thalweg point.
+        :rtype: :py:class:`numpy.ndarray`
+        """
+        section = tracer[..., self.js, self.is_]
+        section[..., self.fill_levels, self.fill_points] = section[
+            ..., self.fill_levels - 1, self.fill_points
+        ]
+        return section
+
+
+def get_thalweg_operator(grid, thalweg_file=THALWEG_FILE):
+    """Return the thalweg operator for the bathymetry and mesh mask grid,
+    calculating it the first time it is requested.
+
+    :arg grid: SalishSeaCast NEMO model bathymetry and mesh mask grid arrays.
+    :type grid: :py:class:`nowcast.results_context.ResultsContext`
+
+    :arg thalweg_file: File of the grid j, i indices of the thalweg points.
+    :type thalweg_file: :py:class:`pathlib.Path` or str
+
+    :rtype: :py:class:`nowcast.figures.shared.ThalwegOperator`
+    """
+    key = (*grid.filepaths(), os.fspath(thalweg_file))
     try:
-        if any(interp_depths > w_depths[tracer_mask == False][0]):
-            raise ValueError("A requested depth is outside the interpolation range.")
-    except TypeError:
-        if interp_depths > w_depths[tracer_mask == False][0]:
-            raise ValueError("A requested depth is outside the interpolation range.")
-    depth_interp = scipy.interpolate.interp1d(
-        tracer_depths[tracer_mask == True],
-        tracer[tracer_mask == True],
-        fill_value="extrapolate",
-        assume_sorted=True,
+        return _thalweg_operators[key]
+    except KeyError:
+        pass
+    js, is_ = np.loadtxt(thalweg_file, delimiter=" ", dtype=int).T
+    lons = grid.nav_lon[js, is_]
+    lats = grid.nav_lat[js, is_]
+    distance = np.concatenate(
+        ([0], np.cumsum(geo_tools.haversine(lons[1:], lats[1:], lons[:-1], lats[:-1])))
+    )
+    depths = grid.gdept_0[:, js, is_]
+    mbathy = np.asarray(grid.mbathy[js, is_])
+    fill_points = np.flatnonzero((mbathy > 0) & (mbathy < depths.shape[0]))
+    _thalweg_operators[key] = ThalwegOperator(
+        js=js,
+        is_=is_,
+        distance=distance,
+        depths=depths,
+        bottom=grid.bathymetry[js, is_],
+        fill_levels=mbathy[fill_points],
+        fill_points=fill_points,
+    )
+    return _thalweg_operators[key]
+
+
+def contour_thalweg(
+    ax, section, thalweg, clevels, cmap, land_colour="burlywood", cbar_args=None
+):
+    """Plot colour contours of a tracer thalweg section with the bathymetry
+    along the thalweg shown as land.
+
+    :arg ax: Axes to plot on.
+    :type ax: :py:class:`matplotlib.axes.Axes`
+
+    :arg section: Tracer thalweg section from :py:meth:`ThalwegOperator.apply`.
+    :type section: :py:class:`numpy.ndarray`
+
+    :arg thalweg: Thalweg operator from :py:func:`get_thalweg_operator`.
+    :type thalweg: :py:class:`nowcast.figures.shared.ThalwegOperator`
+
+    :arg clevels: Colour bar contour intervals.
+    :type clevels: :class:`numpy.ndarray`
+
+    :arg cmap: Colour map to use for the contours.
+    :type cmap: :py:class:`matplotlib.colors.Colormap`
+
+    :arg str land_colour: Colour of the bathymetry patch.
+
+    :arg dict cbar_args: Keyword arguments for :py:func:`matplotlib.pyplot.colorbar`.
+
+    :returns: :py:class:`matplotlib.colorbar.Colorbar`
+    """
+    distance = np.broadcast_to(thalweg.distance, thalweg.depths.shape)
+    mesh = ax.contourf(
+        distance, thalweg.depths, section, clevels, cmap=cmap, extend="both"
+    )
+    zmin = 450
+    bottom = np.column_stack((thalweg.distance, thalweg.bottom))
+    ax.add_patch(
+        patches.Polygon(
+            np.concatenate((bottom, [[thalweg.distance[-1], zmin], [0, zmin]]), axis=0),
+            facecolor=land_colour,
+            edgecolor=land_colour,
+        )
     )
-    return depth_interp(interp_depths)
+    cbar = ax.figure.colorbar(mesh, ax=ax, **(cbar_args or {}))
+    ax.invert_yaxis()
+    ax.set_xlim(thalweg.distance[0], thalweg.distance[-1])
+    return cbar
 
 
 def localize_time(data_array, time_coord="time", local_datetime=None):
@@ -39,11 +39,20 @@ import xarray
 from pandas.plotting import register_matplotlib_converters
 
 import nowcast.figures.website_theme
+from nowcast import erddap_datasets
 from nowcast.figures import shared
 
+#: NDBC buoy observations are downloaded when the figure is rendered,
+#: so it is excluded from the :py:mod:`nowcast.render_cache`
+RENDER_CACHE = False
+
 
 def make_figure(
-    buoy, wwatch3_dataset_url, figsize=(16, 9), theme=nowcast.figures.website_theme
+    buoy,
+    wwatch3_dataset_url,
+    figsize=(16, 9),
+    theme=nowcast.figures.website_theme,
+    local_datasets=None,
 ):
     """Plot significant wave height and dominant wave period calculated
     by the SoG WaveWatch3(TM) model,
@@ -63,9 +72,15 @@ def make_figure(
                 figure. See :py:mod:`nowcast.figures.website_theme` for an
                 example.
 
+    :arg dict local_datasets: :kbd:`figures: local datasets` section of the
+                              nowcast system configuration.
+                              Used to open the WaveWatch3(TM) dataset from the local
+                              files that ERDDAP serves it from.
+                              See :py:func:`nowcast.erddap_datasets.open_dataset`.
+
     :returns: :py:class:`matplotlib.figure.Figure`
     """
-    plot_data = _prep_plot_data(buoy, wwatch3_dataset_url)
+    plot_data = _prep_plot_data(buoy, wwatch3_dataset_url, local_datasets)
     fig, (ax_sig_height, ax_peak_freq) = _prep_fig_axes(figsize, theme)
     _plot_wave_height_time_series(ax_sig_height, plot_data, theme)
     _wave_height_time_series_labels(ax_sig_height, buoy, plot_data, theme)
@@ -74,8 +89,8 @@ def make_figure(
     return fig
 
 
-def _prep_plot_data(buoy, wwatch3_dataset_url):
-    wwatch3_fields = xarray.open_dataset(wwatch3_dataset_url)
+def _prep_plot_data(buoy, wwatch3_dataset_url, local_datasets):
+    wwatch3_fields = erddap_datasets.open_dataset(wwatch3_dataset_url, local_datasets)
     wwatch3 = xarray.Dataset(
         {
             "wave_height": wwatch3_fields.hs.sel(
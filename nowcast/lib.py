@@ -18,15 +18,27 @@
 
 """SalishSeaCast utility functions for use by workers."""
 
+import functools
 import grp
 import logging
 import logging.handlers
 import os
+import pickle
 import subprocess
-
+from pathlib import Path
+from types import SimpleNamespace
+
+import netCDF4
+import numpy
+import pandas
+import scipy.spatial
+import xarray
 from nemo_nowcast import WorkerError
 from nemo_nowcast.fileutils import FilePerms
 
+# Mean radius of the Earth in metres
+EARTH_RADIUS = 6_371_009
+
 
 def configure_logging(config, logger, debug, email=True):
     """Set up logging configuration.
@@ -202,3 +214,323 @@ def run_in_subprocess(cmd, output_logger, error_logger):
             if line:
                 error_logger(line)
         raise WorkerError
+
+
+class NEMOGridLocator:
+    """Locator for the nearest wet NEMO grid T-point to lon/lat positions.
+
+    The locator is a KD-tree of the wet surface T-points of the grid.
+    The points are stored as 3-d Cartesian coordinates on the unit sphere so that
+    the nearest point in the tree is also the nearest point along a great circle.
+
+    Use :py:func:`nowcast.lib.get_nemo_grid_locator` to get a locator that is
+    built from the model coordinates and mesh mask files, and cached.
+
+    :arg lons: Longitudes of the grid T-points.
+    :type lons: 2-d :py:class:`numpy.ndarray`
+
+    :arg lats: Latitudes of the grid T-points.
+    :type lats: 2-d :py:class:`numpy.ndarray`
+
+    :arg tmask: Surface T-point mask of the grid; 1 for water, 0 for land.
+    :type tmask: 2-d :py:class:`numpy.ndarray`
+    """
+
+    def __init__(self, lons, lats, tmask):
+        wet = numpy.asarray(tmask).astype(bool)
+        self.grid_shape = wet.shape
+        self.wet_j, self.wet_i = numpy.nonzero(wet)
+        self.tree = scipy.spatial.KDTree(
+            _lon_lat_to_xyz(numpy.asarray(lons)[wet], numpy.asarray(lats)[wet])
+        )
+
+    def query(self, lons, lats, max_distance=None):
+        """Find the nearest wet grid point for each of the lon/lat positions.
+
+        :arg lons: Longitudes of the positions.
+        :type lons: :py:class:`numpy.ndarray`
+
+        :arg lats: Latitudes of the positions.
+        :type lats: :py:class:`numpy.ndarray`
+
+        :arg max_distance: Maximum great circle distance in metres between a position
+                           and its nearest wet grid point.
+                           Defaults to None meaning no limit.
+        :type max_distance: float
+
+        :returns: Grid j and i indices of the nearest wet grid points,
+                  with the same shape as lons.
+                  Positions that are NaN or are farther than max_distance from any
+                  wet grid point have j and i indices of -1.
+        :rtype: 2-tuple of :py:class:`numpy.ndarray`
+        """
+        lons, lats = numpy.broadcast_arrays(
+            numpy.asarray(lons, dtype=float), numpy.asarray(lats, dtype=float)
+        )
+        js = numpy.full(lons.shape, -1, dtype=int)
+        is_ = numpy.full(lons.shape, -1, dtype=int)
+        valid = numpy.logical_and(numpy.isfinite(lons), numpy.isfinite(lats))
+        if not valid.any():
+            return js, is_
+        distance_upper_bound = (
+            numpy.inf
+            if max_distance is None
+            else 2 * numpy.sin(max_distance / EARTH_RADIUS / 2)
+        )
+        chords, indices = self.tree.query(
+            _lon_lat_to_xyz(lons[valid], lats[valid]),
+            distance_upper_bound=distance_upper_bound,
+        )
+        found = numpy.isfinite(chords)
+        valid_js = numpy.full(indices.shape, -1, dtype=int)
+        valid_is = numpy.full(indices.shape, -1, dtype=int)
+        valid_js[found] = self.wet_j[indices[found]]
+        valid_is[found] = self.wet_i[indices[found]]
+        js[valid] = valid_js
+        is_[valid] = valid_is
+        return js, is_
+
+
+def _lon_lat_to_xyz(lons, lats):
+    lons, lats = numpy.radians(lons), numpy.radians(lats)
+    return numpy.column_stack(
+        (
+            numpy.cos(lats) * numpy.cos(lons),
+            numpy.cos(lats) * numpy.sin(lons),
+            numpy.sin(lats),
+        )
+    )
+
+
+def great_circle_distance(lons, lats, lon, lat):
+    """Calculate the great circle distances between lon/lat positions and a point
+    using the haversine formula.
+
+    :arg lons: Longitudes of the positions.
+    :type lons: :py:class:`numpy.ndarray`
+
+    :arg lats: Latitudes of the positions.
+    :type lats: :py:class:`numpy.ndarray`
+
+    :arg float lon: Longitude of the point.
+
+    :arg float lat: Latitude of the point.
+
+    :returns: Distances in metres, with the same shape as lons.
+              Positions that are NaN have NaN distances.
+    :rtype: :py:class:`numpy.ndarray`
+    """
+    lons, lats = numpy.radians(lons), numpy.radians(lats)
+    lon, lat = numpy.radians(lon), numpy.radians(lat)
+    a = (
+        numpy.sin((lats - lat) / 2) ** 2
+        + numpy.cos(lats) * numpy.cos(lat) * numpy.sin((lons - lon) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS * numpy.arcsin(numpy.sqrt(a))
+
+
+def locate_in_geofences(lons, lats, geofences):
+    """Find the circular geofence that each of the lon/lat positions is in.
+
+    :arg lons: Longitudes of the positions.
+    :type lons: :py:class:`numpy.ndarray`
+
+    :arg lats: Latitudes of the positions.
+    :type lats: :py:class:`numpy.ndarray`
+
+    :arg geofences: Geofences with ``lon``, ``lat``, and ``radius`` attributes;
+                    ``radius`` is the great circle radius in metres.
+    :type geofences: sequence of :py:class:`types.SimpleNamespace`
+
+    :returns: Index in geofences of the geofence that each position is in,
+              with the same shape as lons.
+              Positions that are NaN or outside of all of the geofences
+              have an index of -1.
+              If geofences overlap, the lowest index is returned.
+    :rtype: :py:class:`numpy.ndarray` of :py:class:`numpy.int16`
+    """
+    lons, lats = numpy.broadcast_arrays(
+        numpy.asarray(lons, dtype=float), numpy.asarray(lats, dtype=float)
+    )
+    indices = numpy.full(lons.shape, -1, dtype=numpy.int16)
+    for index in reversed(range(len(geofences))):
+        geofence = geofences[index]
+        distances = great_circle_distance(lons, lats, geofence.lon, geofence.lat)
+        # NaN distances compare False, so NaN positions are outside of all geofences
+        indices[distances <= geofence.radius] = index
+    return indices
+
+
+def resample_stats(data_array, freq):
+    """Aggregate a time series into time bins of width freq with mean,
+    standard deviation, and sample count as the aggregation functions.
+
+    The bins and results are the same as those from
+    :py:meth:`xarray.DataArray.resample` followed by
+    :py:meth:`mean`, :py:meth:`std`, and :py:meth:`count`,
+    but all three aggregations are calculated from a single binning of the data
+    instead of re-grouping it for each of them.
+    NaN values are excluded from the aggregations.
+
+    :arg data_array: Time series to aggregate.
+    :type data_array: :py:class:`xarray.DataArray`
+
+    :arg str freq: Bin width as a pandas offset alias; e.g. :kbd:`1min`.
+
+    :returns: Aggregated time series with ``mean``, ``std_dev``,
+              and ``sample_count`` attributes.
+              ``mean`` and ``std_dev`` are NaN, and ``sample_count`` is 0
+              for bins that contain no values.
+              ``sample_count`` is :py:class:`numpy.int32`.
+    :rtype: :py:class:`types.SimpleNamespace` of :py:class:`xarray.DataArray`
+
+    :raises: :py:exc:`ValueError` if data_array is empty.
+    """
+    if data_array.size == 0:
+        raise ValueError(f"no {data_array.name} values to resample")
+    times = data_array.time.values.astype("datetime64[ns]")
+    values = data_array.values.astype(float)
+    bin_width = pandas.Timedelta(freq).to_timedelta64()
+    first_bin = pandas.Timestamp(times.min()).floor(freq).to_datetime64()
+    bin_indices = ((times - first_bin) // bin_width).astype(int)
+    n_bins = bin_indices.max() + 1
+    valid = numpy.isfinite(values)
+    bin_indices, values = bin_indices[valid], values[valid]
+    sample_counts = numpy.bincount(bin_indices, minlength=n_bins)
+    sums = numpy.bincount(bin_indices, weights=values, minlength=n_bins)
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        means = sums / sample_counts
+        # Deviations from the bin means for numerical stability
+        sq_devs = numpy.bincount(
+            bin_indices, weights=(values - means[bin_indices]) ** 2, minlength=n_bins
+        )
+        std_devs = numpy.sqrt(sq_devs / sample_counts)
+    bin_times = first_bin + numpy.arange(n_bins) * bin_width
+
+    def _data_array(data):
+        return xarray.DataArray(
+            name=data_array.name, data=data, coords={"time": bin_times}, dims="time"
+        )
+
+    return SimpleNamespace(
+        mean=_data_array(means),
+        std_dev=_data_array(std_devs),
+        sample_count=_data_array(sample_counts.astype(numpy.int32)),
+    )
+
+
+@functools.cache
+def get_nemo_grid_locator(coords_file, mesh_mask_file, cache_dir=None):
+    """Return a :py:class:`nowcast.lib.NEMOGridLocator` for the grid defined by
+    coords_file and mesh_mask_file.
+
+    The locator is memoized so that it is built at most once per process.
+    If cache_dir is given the locator is also pickled there and re-used by later
+    processes until the coordinates or mesh mask file is changed.
+
+    :arg coords_file: Path of the NEMO model coordinates file.
+    :type coords_file: :py:class:`pathlib.Path` or str
+
+    :arg mesh_mask_file: Path of the NEMO mesh mask file.
+    :type mesh_mask_file: :py:class:`pathlib.Path` or str
+
+    :arg cache_dir: Directory in which to store the pickled locator.
+                    Defaults to None meaning that the locator is not stored.
+    :type cache_dir: :py:class:`pathlib.Path` or str
+
+    :rtype: :py:class:`nowcast.lib.NEMOGridLocator`
+    """
+    coords_file, mesh_mask_file = Path(coords_file), Path(mesh_mask_file)
+    sources = {
+        os.fspath(coords_file): coords_file.stat().st_mtime_ns,
+        os.fspath(mesh_mask_file): mesh_mask_file.stat().st_mtime_ns,
+    }
+    if cache_dir is not None:
+        cache_file = Path(
+            cache_dir,
+            f"NEMO_grid_locator_{coords_file.stem}_{mesh_mask_file.stem}.pickle",
+        )
+        try:
+            with cache_file.open("rb") as f:
+                cached = pickle.load(f)
+            if cached["sources"] == sources:
+                return cached["locator"]
+        except OSError, EOFError, KeyError, pickle.UnpicklingError:
+            # Missing or stale cache file, so build the locator
+            pass
+    with (
+        netCDF4.Dataset(coords_file) as coords,
+        netCDF4.Dataset(mesh_mask_file) as mesh_mask,
+    ):
+        locator = NEMOGridLocator(
+            coords.variables["glamt"][0],
+            coords.variables["gphit"][0],
+            mesh_mask.variables["tmask"][0, 0],
+        )
+    if cache_dir is not None:
+        tmp_file = cache_file.with_suffix(".tmp")
+        with tmp_file.open("wb") as f:
+            pickle.dump(
+                {"sources": sources, "locator": locator},
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        tmp_file.replace(cache_file)
+        fix_perms(cache_file)
+    return locator
+
+
+@functools.cache
+def get_grid_arrays(nc_file, var_names, cache_dir=None):
+    """Return the arrays of the grid variables var_names from the netCDF file nc_file.
+
+    The arrays are memoized so that nc_file is read at most once per process.
+    If cache_dir is given the arrays are also stored there in a compressed
+    :file:`.npz` file that is re-used by later processes until nc_file is changed,
+    or if nc_file is no longer available.
+
+    :arg nc_file: Path of the netCDF file that contains the grid variables.
+    :type nc_file: :py:class:`pathlib.Path` or str
+
+    :arg var_names: Names of the grid variables.
+    :type var_names: tuple
+
+    :arg cache_dir: Directory in which to store the arrays.
+                    Defaults to None meaning that the arrays are not stored.
+    :type cache_dir: :py:class:`pathlib.Path` or str
+
+    :returns: Read-only arrays keyed by variable name.
+    :rtype: dict
+    """
+    nc_file = Path(nc_file)
+    try:
+        source_mtime = nc_file.stat().st_mtime_ns
+    except FileNotFoundError:
+        if cache_dir is None:
+            raise
+        source_mtime = None
+    if cache_dir is not None:
+        cache_file = Path(cache_dir, f"{nc_file.stem}_{'_'.join(var_names)}.npz")
+        try:
+            with numpy.load(cache_file) as cached:
+                if source_mtime is None or cached["source_mtime"] == source_mtime:
+                    return _read_only({name: cached[name] for name in var_names})
+        except OSError, KeyError, ValueError:
+            # Missing or stale cache file, so read the arrays from nc_file
+            if source_mtime is None:
+                raise FileNotFoundError(nc_file) from None
+    with netCDF4.Dataset(nc_file) as ds:
+        arrays = {name: numpy.asarray(ds.variables[name][:]) for name in var_names}
+    if cache_dir is not None:
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix(".tmp.npz")
+        numpy.savez_compressed(tmp_file, source_mtime=source_mtime, **arrays)
+        tmp_file.replace(cache_file)
+        fix_perms(cache_file)
+    return _read_only(arrays)
+
+
+def _read_only(arrays):
+    for array in arrays.values():
+        array.setflags(write=False)
+    return arrays
@@ -0,0 +1,181 @@
+#  Copyright 2013 – present by the SalishSeaCast Project contributors
+#  and The University of British Columbia
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""SalishSeaCast observation data providers for use by figure modules.
+
+Observations are served from the netCDF files that the observation collection workers
+(e.g. :py:mod:`nowcast.workers.get_onc_ctd`) have already downloaded and stored.
+Remote ONC API requests are only made when the local store does not cover
+the requested period,
+and their responses are cached on disk so that figures can be re-rendered without
+waiting on the ONC web services.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+import arrow
+import xarray
+from salishsea_tools import data_tools
+
+logger = logging.getLogger(__name__)
+
+
+def get_onc_ctd_data(station_code, start, end, ctd_config=None):
+    """Return QA-filtered ONC CTD temperature and salinity observations for a station.
+
+    The daily files stored by :py:mod:`nowcast.workers.get_onc_ctd` are used if they
+    cover the whole period from ``start`` to ``end``;
+    their observations are 15 minute means.
+    Otherwise, the observation samples are requested from the ONC scalardata API,
+    with the response cached in the ``response cache dir`` from ``ctd_config``.
+
+    :param str station_code: ONC station code; e.g. ``SCVIP``.
+
+    :param :py:class:`arrow.Arrow` start: Start of observations period.
+
+    :param :py:class:`arrow.Arrow` end: End of observations period.
+
+    :param dict ctd_config: :kbd:`observations: ctd data` section of the nowcast system
+                            configuration.
+                            If :py:obj:`None`, the observations are always requested from
+                            ONC and the response is not cached.
+
+    :return: Temperature and salinity observations with a ``time`` dimension.
+    :rtype: :py:class:`xarray.Dataset`
+
+    :raises: :py:exc:`TypeError` if no observations are available.
+    """
+    start, end = start.to("utc"), end.to("utc")
+    if ctd_config is not None:
+        ds = _read_local_ctd_data(station_code, start, end, ctd_config)
+        if ds is not None:
+            return ds
+    cache_dir = None if ctd_config is None else ctd_config.get("response cache dir")
+    onc_data = _cached_onc_request(
+        cache_dir,
+        # Only cache responses for periods that ONC is unlikely to add data to
+        end < arrow.utcnow().shift(days=-1),
+        "scalardata",
+        "getByLocation",
+        locationCode=station_code,
+        deviceCategoryCode="CTD",
+        sensorCategoryCodes="salinity,temperature",
+        dateFrom=data_tools.onc_datetime(start, "utc"),
+        dateTo=data_tools.onc_datetime(end, "utc"),
+    )
+    ctd_data = data_tools.onc_json_to_dataset(onc_data)
+    return xarray.Dataset(
+        {var: qaqc_filter(ctd_data, var) for var in ("temperature", "salinity")}
+    )
+
+
+def _read_local_ctd_data(station_code, start, end, ctd_config):
+    """
+    :param str station_code:
+    :param :py:class:`arrow.Arrow` start:
+    :param :py:class:`arrow.Arrow` end:
+    :param dict ctd_config:
+
+    :return: Stored observations, or None if the local store does not cover the period.
+    :rtype: :py:class:`xarray.Dataset`
+    """
+    dest_dir = Path(ctd_config["dest dir"])
+    filepath_tmpl = ctd_config["filepath template"]
+    nc_filepaths = [
+        dest_dir
+        / filepath_tmpl.format(station=station_code, yyyymmdd=day.format("YYYYMMDD"))
+        for day in arrow.Arrow.range("day", start.floor("day"), end.floor("day"))
+    ]
+    missing = [nc_filepath for nc_filepath in nc_filepaths if not nc_filepath.exists()]
+    if missing:
+        logger.debug(
+            f"{station_code} CTD observations not in local store: {missing[0]} not found"
+        )
+        return
+    datasets = []
+    for nc_filepath in nc_filepaths:
+        with xarray.open_dataset(nc_filepath) as ds:
+            datasets.append(ds[["temperature", "salinity"]].load())
+    ds = xarray.concat(datasets, dim="time").sel(time=slice(start.naive, end.naive))
+    logger.debug(f"read {station_code} CTD observations from {dest_dir}")
+    return ds
+
+
+def _cached_onc_request(cache_dir, cacheable, endpoint, method, **params):
+    """Make an ONC API request via a response cache in cache_dir.
+
+    :param str cache_dir: Directory to cache responses in, or None to disable caching.
+    :param boolean cacheable: Store the response in the cache.
+    :param str endpoint:
+    :param str method:
+    :param params: ONC API request parameters.
+
+    :return: Decoded JSON response from ONC.
+    :rtype: dict
+    """
+    if cache_dir is None:
+        return data_tools.get_onc_data(
+            endpoint, method, os.environ["ONC_USER_TOKEN"], **params
+        )
+    request_key = json.dumps([endpoint, method, params], sort_keys=True)
+    cache_file = (
+        Path(cache_dir)
+        / f"{endpoint}_{hashlib.sha256(request_key.encode()).hexdigest()[:16]}.json"
+    )
+    try:
+        onc_data = json.loads(cache_file.read_text())
+        logger.debug(f"ONC {endpoint} response read from {cache_file}")
+        return onc_data
+    except FileNotFoundError:
+        pass
+    onc_data = data_tools.get_onc_data(
+        endpoint, method, os.environ["ONC_USER_TOKEN"], **params
+    )
+    if cacheable:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix(".tmp")
+        tmp_file.write_text(json.dumps(onc_data))
+        tmp_file.replace(cache_file)
+        logger.debug(f"ONC {endpoint} response cached in {cache_file}")
+    return onc_data
+
+
+def qaqc_filter(ctd_data, var):
+    """Filter ONC CTD observations to exclude those that do not pass ONC QA/QC.
+
+    This is used by both :py:func:`get_onc_ctd_data` and the
+    :py:mod:`nowcast.workers.get_onc_ctd` worker so that the stored and requested
+    observations have the same QA/QC filtering.
+
+    :param :py:class:`xarray.Dataset` ctd_data: ONC scalardata observations.
+    :param str var: Name of the variable to filter; e.g. ``temperature``.
+
+    :return: Observations of var with qaqcFlag == 1, with a time dimension.
+    :rtype: :py:class:`xarray.DataArray`
+    """
+    qaqc_mask = ctd_data.data_vars[var].attrs["qaqcFlag"] == 1
+    return xarray.DataArray(
+        name=var,
+        data=ctd_data.data_vars[var][qaqc_mask].values,
+        coords={"time": ctd_data.data_vars[var].sampleTime[qaqc_mask].values},
+        dims="time",
+    )
@@ -0,0 +1,319 @@
+#  Copyright 2013 – present by the SalishSeaCast Project contributors
+#  and The University of British Columbia
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""SalishSeaCast content-addressed cache of the figure files that the
+:ref:`MakePlotsWorker` worker renders.
+
+The cache key of a figure is a hash of the source code of the figure function's
+module and of the figures theme and shared modules,
+fingerprints of the function's arguments and defaults,
+and the figure file format.
+Files and netCDF datasets in the arguments are fingerprinted by their paths,
+modification times and sizes rather than by their contents,
+so the key is cheap to calculate.
+Figure modules that read data files other than those in their arguments
+list them in a module-level ``RENDER_CACHE_FILES`` tuple,
+so that the fingerprints of those files are part of their figures' keys.
+Figure modules that fetch data when a figure is rendered opt out of the cache
+by setting a module-level ``RENDER_CACHE = False``.
+Figures whose arguments cannot be fingerprinted,
+like :py:class:`xarray.Dataset` objects,
+which may be backed by remote data or by several files,
+are always rendered.
+
+Figure files are hard-linked from the cache when their key is found there.
+Rendered files are hard-linked into the cache, so it uses no extra disk space
+while the rendered files exist.
+"""
+
+import datetime
+import functools
+import hashlib
+import importlib
+import inspect
+import logging
+import os
+import shutil
+import time
+import types
+from pathlib import Path
+
+import arrow
+import attr
+import matplotlib
+import matplotlib.colors
+import netCDF4
+import numpy
+
+from nowcast import results_context
+
+logger = logging.getLogger(__name__)
+
+#: Modules whose source code is part of every cache key because figure functions
+#: use them for their style and common elements
+SHARED_MODULES = (
+    "nowcast.figures.shared",
+    "nowcast.figures.website_theme",
+    "nowcast.results_context",
+)
+
+
+class Uncacheable(Exception):
+    """Raised when a figure function argument cannot be fingerprinted."""
+
+
+@attr.s
+class RenderCache:
+    """Cache of rendered figure files, and its hit and miss counts.
+
+    Use :py:meth:`from_config` to get a cache that uses the
+    :kbd:`figures: render cache` section of the nowcast system configuration.
+    """
+
+    #: Directory in which cached figure files are stored;
+    #: None means that the cache is disabled
+    cache_dir = attr.ib(default=None, type=Path)
+    #: Age in days after which cached figure files are deleted
+    max_age = attr.ib(default=7, type=int)
+    hits = attr.ib(default=0, type=int)
+    misses = attr.ib(default=0, type=int)
+    fingerprints = attr.ib(factory=dict)
+
+    @classmethod
+    def from_config(cls, config):
+        """Construct a cache from the :kbd:`figures: render cache` section of the
+        nowcast system configuration.
+        If the configuration has no :kbd:`figures: render cache` section,
+        the cache is disabled and every figure is rendered.
+
+        :arg config: Nowcast system configuration.
+        :type config: :py:class:`nemo_nowcast.Config`
+
+        :rtype: :py:class:`nowcast.render_cache.RenderCache`
+        """
+        try:
+            cache_config = config["figures"]["render cache"]
+        except KeyError:
+            return cls()
+        return cls(Path(cache_config["cache dir"]), cache_config["max age"])
+
+    def key(self, fig_func, args, kwargs, fig_save_format):
+        """Calculate the cache key of a figure.
+
+        :arg fig_func: Figure function.
+        :type fig_func: callable
+
+        :arg args: Positional arguments of the figure function.
+        :type args: list or tuple
+
+        :arg dict kwargs: Keyword arguments of the figure function.
+
+        :arg str fig_save_format: Figure file format; e.g. :kbd:`svg`.
+
+        :returns: Hex digest cache key, or :py:obj:`None` if the cache is disabled,
+                  the figure's module is excluded from the cache,
+                  or the figure's arguments can't be fingerprinted.
+        :rtype: str
+        """
+        if self.cache_dir is None:
+            return
+        fig_module = importlib.import_module(fig_func.__module__)
+        if not getattr(fig_module, "RENDER_CACHE", True):
+            logger.debug(f"{fig_func.__module__} figures are excluded from cache")
+            return
+        defaults = {
+            name: param.default
+            for name, param in inspect.signature(fig_func).parameters.items()
+            if param.default is not inspect.Parameter.empty
+        }
+        try:
+            parts = [
+                f"{fig_func.__module__}.{fig_func.__qualname__}",
+                _module_source_hash(fig_func.__module__),
+                *(_module_source_hash(module) for module in SHARED_MODULES),
+                *(
+                    _path_fingerprint(path)
+                    for path in getattr(fig_module, "RENDER_CACHE_FILES", ())
+                ),
+                matplotlib.__version__,
+                fig_save_format,
+                self._fingerprint(args),
+                self._fingerprint(kwargs),
+                self._fingerprint(defaults),
+            ]
+        except Uncacheable as e:
+            logger.debug(f"{fig_func.__module__}.{fig_func.__name__} not cached: {e}")
+            return
+        return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+    def fetch(self, key, fig_path):
+        """Hard-link the cached figure file for key to fig_path.
+
+        :arg str key: Cache key from :py:meth:`key`.
+
+        :arg fig_path: Path of the figure file.
+        :type fig_path: :py:class:`pathlib.Path`
+
+        :returns: Flag indicating whether the figure was found in the cache.
+        :rtype: boolean
+        """
+        if key is None:
+            if self.cache_dir is not None:
+                self.misses += 1
+            return False
+        cached = self.cache_dir / f"{key}{fig_path.suffix}"
+        try:
+            link_or_copy(cached, fig_path)
+        except FileNotFoundError:
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def store(self, key, fig_path):
+        """Hard-link a rendered figure file into the cache.
+
+        :arg str key: Cache key from :py:meth:`key`.
+
+        :arg fig_path: Path of the figure file.
+        :type fig_path: :py:class:`pathlib.Path`
+        """
+        if key is None:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        link_or_copy(fig_path, self.cache_dir / f"{key}{fig_path.suffix}")
+
+    def prune(self):
+        """Delete cached figure files that are older than :py:attr:`max_age` days."""
+        if self.cache_dir is None or not self.cache_dir.exists():
+            return
+        oldest = time.time() - self.max_age * 24 * 60 * 60
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                if entry.stat().st_mtime < oldest:
+                    os.unlink(entry.path)
+
+    def stats(self):
+        """
+        :returns: Cache hit and miss counts.
+        :rtype: dict
+        """
+        return {"hits": self.hits, "misses": self.misses}
+
+    def _fingerprint(self, obj):
+        if obj is None or isinstance(obj, (bool, int, float, complex, numpy.generic)):
+            return repr(obj)
+        if isinstance(obj, (str, os.PathLike)):
+            return _path_fingerprint(obj)
+        if isinstance(obj, bytes):
+            return hashlib.sha256(obj).hexdigest()
+        if isinstance(obj, (arrow.Arrow, datetime.date, datetime.time)):
+            return obj.isoformat()
+        if isinstance(obj, types.ModuleType):
+            return f"{obj.__name__}:{_module_source_hash(obj.__name__)}"
+        if isinstance(obj, matplotlib.colors.Colormap):
+            return f"cmap:{obj.name}:{obj.N}"
+        if isinstance(obj, (types.FunctionType, type)):
+            source_hash = _module_source_hash(obj.__module__)
+            return f"{obj.__module__}.{obj.__qualname__}:{source_hash}"
+        if isinstance(obj, (list, tuple)):
+            return f"[{','.join(self._fingerprint(item) for item in obj)}]"
+        if isinstance(obj, dict):
+            items = (
+                f"{self._fingerprint(k)}:{self._fingerprint(v)}" for k, v in obj.items()
+            )
+            return f"{{{','.join(sorted(items))}}}"
+        if isinstance(obj, types.SimpleNamespace):
+            return self._fingerprint(vars(obj))
+        # Fingerprints of the objects below are memoized because they are
+        # expensive to calculate and are repeated in the arguments of many figures
+        if id(obj) in self.fingerprints:
+            return self.fingerprints[id(obj)][1]
+        if isinstance(obj, numpy.ndarray):
+            if obj.dtype.hasobject:
+                raise Uncacheable("numpy object array argument")
+            digest = hashlib.sha256(numpy.ascontiguousarray(obj).view(numpy.uint8))
+            if numpy.ma.isMaskedArray(obj):
+                digest.update(numpy.ma.getmaskarray(obj).tobytes())
+            fingerprint = f"array:{obj.dtype}:{obj.shape}:{digest.hexdigest()}"
+        elif isinstance(obj, netCDF4.Dataset):
+            fingerprint = f"dataset:{_dataset_stat(obj)}"
+        elif isinstance(obj, netCDF4.Variable):
+            fingerprint = f"variable:{_dataset_stat(obj.group())}:{obj.name}"
+        elif isinstance(obj, results_context.ResultsContext):
+            fingerprint = (
+                f"grid:{_dataset_stat(obj.bathy)}:{_dataset_stat(obj.mesh_mask)}"
+            )
+        else:
+            raise Uncacheable(f"{type(obj).__name__} argument")
+        # Keep a reference to obj so that its id is not re-used by another object
+        self.fingerprints[id(obj)] = (obj, fingerprint)
+        return fingerprint
+
+
+def _path_fingerprint(obj):
+    if os.path.isdir(obj):
+        # Changes to the files in a directory don't change its modification time
+        raise Uncacheable(f"directory argument: {os.fspath(obj)}")
+    if os.path.isfile(obj):
+        return f"{os.fspath(obj)!r}{_file_stat(obj)}"
+    return repr(os.fspath(obj))
+
+
+def _file_stat(path):
+    stat = os.stat(path)
+    return f":{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def _dataset_stat(dataset):
+    try:
+        path = dataset.filepath()
+    except ValueError:
+        raise Uncacheable("in-memory netCDF dataset argument") from None
+    return f"{path!r}{_file_stat(path)}"
+
+
+@functools.cache
+def _module_source_hash(module_name):
+    try:
+        source_file = importlib.import_module(module_name).__file__
+        return hashlib.sha256(Path(source_file).read_bytes()).hexdigest()
+    except ImportError, AttributeError, TypeError, OSError:
+        raise Uncacheable(f"no source for {module_name} module") from None
+
+
+def link_or_copy(src, dest):
+    """Hard-link dest to src, replacing dest if it exists.
+    src is copied to dest if they are on different file systems.
+
+    :arg src: Path of the existing file.
+    :type src: :py:class:`pathlib.Path`
+
+    :arg dest: Path of the link.
+    :type dest: :py:class:`pathlib.Path`
+    """
+    tmp_dest = dest.with_name(f".{dest.name}.tmp")
+    tmp_dest.unlink(missing_ok=True)
+    try:
+        os.link(src, tmp_dest)
+    except FileNotFoundError:
+        raise
+    except OSError:
+        # src and dest are on different file systems
+        shutil.copy2(src, tmp_dest)
+    tmp_dest.replace(dest)
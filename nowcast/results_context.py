@@ -0,0 +1,146 @@
+#  Copyright 2013 – present by the SalishSeaCast Project contributors
+#  and The University of British Columbia
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""SalishSeaCast NEMO model grid arrays shared by the figures that the
+:ref:`MakePlotsWorker` worker renders.
+
+A :py:class:`ResultsContext` is created once per :ref:`MakePlotsWorker` run
+from the run type's bathymetry and mesh mask files.
+Each grid array is read from its file the first time it is used,
+and then shared by all of the figures as a read-only numpy array,
+so the figures don't re-read the same mesh mask and bathymetry variables
+from disk.
+Arrays that have been loaded before a process is forked are shared with the
+child processes by copy-on-write.
+"""
+
+import functools
+import logging
+import os
+
+import attr
+import netCDF4
+import numpy
+
+logger = logging.getLogger(__name__)
+
+
+@attr.s
+class ResultsContext:
+    """Lazily loaded, memoized, read-only bathymetry and mesh mask grid arrays.
+
+    The arrays have the time dimension of the mesh mask variables removed.
+    They are :py:class:`numpy.ma.MaskedArray` objects,
+    like :py:class:`netCDF4.Variable` slices are.
+
+    Use :py:meth:`from_files` to open the bathymetry and mesh mask files.
+    """
+
+    #: SalishSeaCast NEMO model bathymetry dataset
+    bathy = attr.ib()
+    #: NEMO-generated mesh mask dataset
+    mesh_mask = attr.ib()
+
+    @classmethod
+    def from_files(cls, bathy_path, mesh_mask_path):
+        """Construct a context from bathymetry and mesh mask file paths.
+
+        :arg bathy_path: Path of the bathymetry file.
+        :type bathy_path: :py:class:`pathlib.Path` or str
+
+        :arg mesh_mask_path: Path of the mesh mask file.
+        :type mesh_mask_path: :py:class:`pathlib.Path` or str
+
+        :rtype: :py:class:`nowcast.results_context.ResultsContext`
+        """
+        return cls(netCDF4.Dataset(bathy_path), netCDF4.Dataset(mesh_mask_path))
+
+    @functools.cached_property
+    def bathymetry(self):
+        """Bathymetry depths [m], masked on land; dimensions are (y, x)."""
+        return self._load(self.bathy, "Bathymetry")
+
+    @functools.cached_property
+    def nav_lon(self):
+        """Grid point longitudes; dimensions are (y, x)."""
+        return self._load(self.bathy, "nav_lon")
+
+    @functools.cached_property
+    def nav_lat(self):
+        """Grid point latitudes; dimensions are (y, x)."""
+        return self._load(self.bathy, "nav_lat")
+
+    @functools.cached_property
+    def tmask(self):
+        """T-grid water (1) / land (0) mask; dimensions are (depth, y, x)."""
+        return self._load(self.mesh_mask, "tmask", squeeze_time=True)
+
+    @functools.cached_property
+    def umask(self):
+        """U-grid water (1) / land (0) mask; dimensions are (depth, y, x)."""
+        return self._load(self.mesh_mask, "umask", squeeze_time=True)
+
+    @functools.cached_property
+    def vmask(self):
+        """V-grid water (1) / land (0) mask; dimensions are (depth, y, x)."""
+        return self._load(self.mesh_mask, "vmask", squeeze_time=True)
+
+    @functools.cached_property
+    def mbathy(self):
+        """Number of water levels of the T-grid water columns; dimensions are (y, x)."""
+        return self._load(self.mesh_mask, "mbathy", squeeze_time=True)
+
+    @functools.cached_property
+    def gdept_0(self):
+        """T-grid point depths [m]; dimensions are (depth, y, x)."""
+        return self._load(self.mesh_mask, "gdept_0", squeeze_time=True)
+
+    @functools.cached_property
+    def gdepw_0(self):
+        """W-grid point depths [m]; dimensions are (depth, y, x)."""
+        return self._load(self.mesh_mask, "gdepw_0", squeeze_time=True)
+
+    @functools.cached_property
+    def gdept_1d(self):
+        """Reference T-grid depths [m]; dimension is (depth,)."""
+        return self._load(self.mesh_mask, "gdept_1d", squeeze_time=True)
+
+    @functools.cached_property
+    def e3t_1d(self):
+        """Reference T-grid cell thicknesses [m]; dimension is (depth,)."""
+        return self._load(self.mesh_mask, "e3t_1d", squeeze_time=True)
+
+    def filepaths(self):
+        """
+        :returns: Paths of the bathymetry and mesh mask files.
+        :rtype: 2-tuple of str
+        """
+        return self.bathy.filepath(), self.mesh_mask.filepath()
+
+    @staticmethod
+    def _load(dataset, var_name, squeeze_time=False):
+        array = (
+            dataset.variables[var_name][0]
+            if squeeze_time
+            else dataset.variables[var_name][:]
+        )
+        array.flags.writeable = False
+        if numpy.ma.isMaskedArray(array) and array.mask is not numpy.ma.nomask:
+            array.mask.flags.writeable = False
+        logger.debug(f"loaded {var_name} from {os.path.basename(dataset.filepath())}")
+        return array
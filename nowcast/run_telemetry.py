@@ -0,0 +1,307 @@
+#  Copyright 2013 – present by the SalishSeaCast Project contributors
+#  and The University of British Columbia
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""SalishSeaCast NEMO run throughput telemetry for the run watcher workers.
+
+:py:class:`RunThroughput` keeps a rolling time step rate from the values of the
+:file:`time.step` file that the watchers poll, predicts when the run will finish,
+and flags runs whose rate drops well below the historical rate for the run type
+on the host.
+Per-run performance summaries are appended to the JSON lines history file in the
+:kbd:`run telemetry` section of the nowcast system configuration,
+and the historical rates are calculated from them.
+"""
+
+import collections
+import json
+import logging
+import statistics
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import arrow
+import attr
+
+logger = logging.getLogger(__name__)
+
+
+@attr.s
+class RunThroughput:
+    """Time step rate and performance summary of a NEMO run.
+
+    Use :py:meth:`from_config` to get a tracker that uses the :kbd:`run telemetry`
+    section of the nowcast system configuration.
+    """
+
+    run_type = attr.ib(type=str)
+    host_name = attr.ib(type=str)
+    #: Number of :file:`time.step` samples to calculate the rolling rate from
+    window = attr.ib(default=6, type=int)
+    #: Median time steps per second of recent runs of run_type on host_name
+    historical_rate = attr.ib(default=None, type=float)
+    #: Fraction of historical_rate below which the run is flagged as stalled
+    stall_fraction = attr.ib(default=0.5, type=float)
+    #: JSON lines file to append the run's performance summary to
+    history_file = attr.ib(default=None, type=Path)
+    clock = attr.ib(default=time.time)
+    created = attr.ib(default=None, type=float)
+    started = attr.ib(default=None, type=float)
+    finished = attr.ib(default=None, type=float)
+    it000 = attr.ib(default=None, type=int)
+    itend = attr.ib(default=None, type=int)
+    samples = attr.ib(factory=collections.deque)
+
+    def __attrs_post_init__(self):
+        if self.created is None:
+            self.created = self.clock()
+
+    @classmethod
+    def from_config(cls, config, run_type, host_name):
+        """Construct a tracker from the :kbd:`run telemetry` section of the nowcast
+        system configuration.
+        If the configuration has no :kbd:`run telemetry` section,
+        the tracker has no historical rate and its summary is not stored.
+
+        :arg config: Nowcast system configuration.
+        :type config: :py:class:`nemo_nowcast.Config`
+
+        :arg str run_type: Run type of the run.
+
+        :arg str host_name: Name of the host that the run is on.
+
+        :rtype: :py:class:`nowcast.run_telemetry.RunThroughput`
+        """
+        try:
+            telemetry_config = config["run telemetry"]
+        except KeyError:
+            return cls(run_type, host_name)
+        history_file = Path(telemetry_config["history file"])
+        return cls(
+            run_type,
+            host_name,
+            window=telemetry_config["rate window"],
+            historical_rate=read_historical_rate(
+                history_file, run_type, host_name, telemetry_config["history runs"]
+            ),
+            stall_fraction=telemetry_config["stall fraction"],
+            history_file=history_file,
+        )
+
+    def run_started(self):
+        """Record the end of the run's queue wait and the start of its wall time."""
+        self.started = self.clock()
+
+    def run_finished(self):
+        """Record the end of the run's wall time."""
+        self.finished = self.clock()
+
+    def update(self, time_step, it000, itend):
+        """Add a time step sample and calculate the rolling time step rate.
+
+        :arg int time_step: Time step value from the run's :file:`time.step` file.
+
+        :arg int it000: Starting time step number of the run.
+
+        :arg int itend: Ending time step number of the run.
+
+        :returns: Rolling time step rate in steps per second,
+                  predicted finish time,
+                  and flag indicating whether the run is stalled.
+                  ``rate`` and ``eta`` are :py:obj:`None` until there are
+                  2 samples.
+        :rtype: :py:class:`types.SimpleNamespace`
+        """
+        now = self.clock()
+        if self.started is None:
+            self.started = now
+        if self.samples and time_step < self.samples[-1][1]:
+            # Run was re-started, so the previous samples don't apply
+            self.samples.clear()
+        self.it000, self.itend = it000, itend
+        self.samples.append((now, time_step))
+        while len(self.samples) > self.window:
+            self.samples.popleft()
+        progress = SimpleNamespace(rate=None, eta=None, stalled=False)
+        (first_time, first_step), (last_time, last_step) = (
+            self.samples[0],
+            self.samples[-1],
+        )
+        if last_time <= first_time:
+            return progress
+        progress.rate = (last_step - first_step) / (last_time - first_time)
+        if progress.rate > 0:
+            progress.eta = arrow.get(now).shift(
+                seconds=(itend - time_step) / progress.rate
+            )
+        progress.stalled = (
+            self.historical_rate is not None
+            and progress.rate < self.stall_fraction * self.historical_rate
+        )
+        return progress
+
+    def progress_msg(self, progress):
+        """Format the rolling rate and predicted finish time for a progress log message.
+
+        :arg progress: Return value of :py:meth:`update`.
+        :type progress: :py:class:`types.SimpleNamespace`
+
+        :rtype: str
+        """
+        if progress.rate is None:
+            return ""
+        msg = f", {progress.rate:.2f} steps/s"
+        if progress.eta is not None:
+            msg = f"{msg}, ETA {progress.eta.format('YYYY-MM-DD HH:mm:ss UTC')}"
+        return msg
+
+    def poll_interval(self, default, min_interval=60, max_interval=15 * 60):
+        """Calculate how long to wait before polling the run again.
+
+        The interval is 1/10 of the predicted time remaining in the run,
+        so that polls are less frequent early in long runs,
+        and more frequent as the run approaches its predicted finish time.
+
+        :arg int default: Interval to use until there is a positive time step rate.
+
+        :arg int min_interval: Shortest interval to return.
+
+        :arg int max_interval: Longest interval to return.
+
+        :returns: Poll interval in seconds.
+        :rtype: float
+        """
+        if len(self.samples) < 2:
+            return default
+        (first_time, first_step), (last_time, last_step) = (
+            self.samples[0],
+            self.samples[-1],
+        )
+        if last_time <= first_time or last_step <= first_step:
+            return default
+        rate = (last_step - first_step) / (last_time - first_time)
+        remaining = (self.itend - last_step) / rate
+        return min(max(remaining / 10, min_interval), max_interval)
+
+    def log_stall(self, progress, msg_prefix):
+        """Log a warning if the run is stalled.
+
+        :arg progress: Return value of :py:meth:`update`.
+        :type progress: :py:class:`types.SimpleNamespace`
+
+        :arg str msg_prefix: Run description to start the log message with.
+        """
+        if progress.stalled:
+            logger.warning(
+                f"{msg_prefix}: time step rate {progress.rate:.2f} steps/s is less than "
+                f"{self.stall_fraction:.0%} of {self.historical_rate:.2f} steps/s "
+                f"historical rate for {self.run_type} on {self.host_name}; "
+                f"run may be stalled"
+            )
+
+    def summary(self, completed):
+        """Calculate the run's performance summary.
+
+        :arg boolean completed: Flag indicating whether the run completed successfully.
+
+        :returns: Time steps per second, wall time, and queue wait time in seconds.
+                  Time steps per second is :py:obj:`None` if there were
+                  no time step samples.
+        :rtype: dict
+        """
+        finished = self.clock() if self.finished is None else self.finished
+        started = finished if self.started is None else self.started
+        wall_time = finished - started
+        steps_per_second = None
+        if self.samples and wall_time > 0:
+            last_step = self.itend if completed else self.samples[-1][1]
+            steps_per_second = round((last_step - self.it000) / wall_time, 3)
+        return {
+            "steps per second": steps_per_second,
+            "wall time": round(wall_time),
+            "queue wait": round(started - self.created),
+        }
+
+    def record(self, run_date, completed):
+        """Append the run's performance summary to the history file.
+
+        Nothing is stored if the tracker has no history file.
+
+        :arg run_date: Date of the run.
+        :type run_date: :py:class:`arrow.Arrow`
+
+        :arg boolean completed: Flag indicating whether the run completed successfully.
+
+        :returns: Performance summary from :py:meth:`summary`.
+        :rtype: dict
+        """
+        summary = self.summary(completed)
+        if self.history_file is None:
+            return summary
+        record = {
+            "run type": self.run_type,
+            "host": self.host_name,
+            "run date": run_date.format("YYYY-MM-DD"),
+            "completed": completed,
+            **summary,
+        }
+        self.history_file.parent.mkdir(parents=True, exist_ok=True)
+        with self.history_file.open("at") as f:
+            f.write(f"{json.dumps(record)}\n")
+        logger.debug(
+            f"stored {self.run_type} on {self.host_name} performance summary "
+            f"in {self.history_file}"
+        )
+        return summary
+
+
+def read_historical_rate(history_file, run_type, host_name, n_runs):
+    """Calculate the historical time step rate of run_type runs on host_name.
+
+    :arg history_file: JSON lines file of run performance summaries.
+    :type history_file: :py:class:`pathlib.Path`
+
+    :arg str run_type: Run type to calculate the historical rate for.
+
+    :arg str host_name: Name of the host to calculate the historical rate for.
+
+    :arg int n_runs: Number of most recent completed runs to calculate the rate from.
+
+    :returns: Median time steps per second of the runs,
+              or :py:obj:`None` if there are no completed runs in the history file.
+    :rtype: float
+    """
+    rates = collections.deque(maxlen=n_runs)
+    try:
+        with history_file.open("rt") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Truncated line from an interrupted write
+                    continue
+                if (
+                    record["run type"] == run_type
+                    and record["host"] == host_name
+                    and record["completed"]
+                    and record["steps per second"] is not None
+                ):
+                    rates.append(record["steps per second"])
+    except FileNotFoundError:
+        return
+    return statistics.median(rates) if rates else None
@@ -19,11 +19,16 @@
 """SalishSeaCast ssh and sftp client functions."""
 
 import os
+import uuid
+from types import SimpleNamespace
 
 import paramiko
 
 from nowcast import lib
 
+#: Exceptions that indicate that the connection to the remote host has been lost
+CONNECTION_ERRORS = (paramiko.ssh_exception.SSHException, EOFError, ConnectionError)
+
 
 class SSHCommandError(Exception):
     """Raised when :py:func:`nowcast.ssh_sftp.ssh_exec_command` result in
@@ -42,7 +47,7 @@ class SSHCommandError(Exception):
         self.stderr = stderr
 
 
-def ssh(host, key_filename, ssh_config_file="~/.ssh/config"):
+def ssh(host, key_filename, ssh_config_file="~/.ssh/config", keepalive_interval=0):
     """Return an SSH client connected to host.
 
     It is assumed that ssh_config_file contains an entry for host,
@@ -61,6 +66,11 @@ def ssh(host, key_filename, ssh_config_file="~/.ssh/config"):
                                 which to obtain the hostname and username
                                 values.
 
+    :param int keepalive_interval: Interval in seconds at which to send keep-alive
+                                   packets to host so that the connection is not
+                                   closed while it is idle between polls.
+                                   Defaults to 0 meaning no keep-alive packets.
+
     :returns: ssh client object
     :rtype: :py:class:`paramiko.client.SSHClient`
     """
@@ -90,6 +100,8 @@ def ssh(host, key_filename, ssh_config_file="~/.ssh/config"):
             look_for_keys=False,
             disabled_algorithms={"pubkeys": ["rsa-sha2-512", "rsa-sha2-256"]},
         )
+    if keepalive_interval:
+        ssh_client.get_transport().set_keepalive(keepalive_interval)
     return ssh_client
 
 
@@ -118,7 +130,80 @@ def ssh_exec_command(ssh_client, cmd, host, logger):
     return _stdout.read().decode()
 
 
-def sftp(host, key_filename, ssh_config_file="~/.ssh/config"):
+def remote_probe(ssh_client, cmds, host, logger):
+    """Execute a batch of commands on host in a single shell script via ssh_client
+    connection, and return the output and exit status of each of them.
+
+    Use this instead of several :py:func:`ssh_exec_command` calls to query the state
+    of a remote process each time it is polled.
+
+    :param :py:class:`paramiko.client.SSHClient`
+
+    :param dict cmds: Commands to execute on host, keyed by the names to use for
+                      their results.
+
+    :param str host: Name of the host to execute the commands on.
+
+    :param logger: Logger object to send debug messages to.
+    :type logger: :py:class:`logging.Logger`
+
+    :return: Results of the commands keyed by their names in cmds.
+             Each result has ``output`` (stdout, with newline separators),
+             ``stderr`` (with newline separators),
+             and ``status`` (exit status) attributes.
+    :rtype: dict of :py:class:`types.SimpleNamespace`
+
+    :raises: :py:exc:`paramiko.ssh_exception.SSHException` if the output of the
+             script is incomplete; e.g. because the connection was lost.
+    """
+    marker = f"probe-{uuid.uuid4().hex}"
+    # Each command's stdout is followed by its stderr, which is collected in
+    # a temporary file, so that they are separated by markers
+    script = "\n".join(
+        [
+            "probe_stderr=$(mktemp)",
+            "trap 'rm -f \"$probe_stderr\"' EXIT",
+            *(
+                f"echo {marker}\n"
+                f'{{ {cmd}\n}} 2>"$probe_stderr"\n'
+                f"probe_status=$?\n"
+                f"echo {marker}:stderr\n"
+                f'cat "$probe_stderr"\n'
+                f"echo {marker} $probe_status"
+                for cmd in cmds.values()
+            ),
+        ]
+    )
+    logger.debug(f"probing {', '.join(cmds)} on {host}")
+    _, _stdout, _ = ssh_client.exec_command(script)
+    results = {}
+    names = iter(cmds)
+    stdout_lines, output_lines = [], []
+    for line in _stdout.read().decode().splitlines():
+        # Output that lacks a final newline precedes the next marker
+        output, found_marker, tag = line.partition(marker)
+        if output or not found_marker:
+            output_lines.append(output)
+        if not found_marker:
+            continue
+        if tag == ":stderr":
+            stdout_lines = output_lines
+        elif tag:
+            results[next(names)] = SimpleNamespace(
+                output="".join(f"{line}\n" for line in stdout_lines),
+                stderr="".join(f"{line}\n" for line in output_lines),
+                status=int(tag),
+            )
+            stdout_lines = []
+        output_lines = []
+    if len(results) != len(cmds):
+        raise paramiko.ssh_exception.SSHException(
+            f"incomplete remote probe output from {host}"
+        )
+    return results
+
+
+def sftp(host, key_filename, ssh_config_file="~/.ssh/config", keepalive_interval=0):
     """Return an SFTP client connected to host, and the SSH client on
     which it is based.
 
@@ -138,11 +223,15 @@ def sftp(host, key_filename, ssh_config_file="~/.ssh/config"):
                                 which to obtain the hostname and username
                                 values.
 
+    :param int keepalive_interval: Interval in seconds at which to send keep-alive
+                                   packets to host.
+                                   Defaults to 0 meaning no keep-alive packets.
+
     :returns: 2-tuple containing a ssh and sftp client objects
     :rtype: (:py:class:`paramiko.client.SSHClient`,
              :py:class:`paramiko.sftp_client.SFTPClient`)
     """
-    ssh_client = ssh(host, key_filename, ssh_config_file)
+    ssh_client = ssh(host, key_filename, ssh_config_file, keepalive_interval)
     sftp_client = ssh_client.open_sftp()
     return ssh_client, sftp_client
 
@@ -0,0 +1,208 @@
+#  Copyright 2013 – present by the SalishSeaCast Project contributors
+#  and The University of British Columbia
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""SalishSeaCast store of hourly model profile time series at stations.
+
+The :ref:`MakePlotsWorker` worker extracts the hourly profiles at each of the
+stations in the :kbd:`figures: station time series` section of the nowcast system
+configuration from each day's nowcast-green results,
+and appends them to a netCDF file per station.
+The files hold the most recent :kbd:`days` days of profiles with ERDDAP dimension
+and variable names,
+so the research time series figures read them instead of the multi-year
+3d physics and biology fields ERDDAP datasets.
+A station file that does not exist yet is seeded from those ERDDAP datasets.
+"""
+
+import logging
+from pathlib import Path
+
+import numpy
+import pandas
+import xarray
+from salishsea_tools import places
+
+logger = logging.getLogger(__name__)
+
+
+def update_station_timeseries(results_dir, ts_config):
+    """Append the day's hourly profiles at the stations from the nowcast-green
+    results in results_dir to the station time series files.
+
+    :arg results_dir: Directory of the day's nowcast-green results files.
+    :type results_dir: :py:class:`pathlib.Path`
+
+    :arg dict ts_config: :kbd:`figures: station time series` section of the
+                         nowcast system configuration.
+
+    :returns: Paths of the station time series files.
+    :rtype: list
+    """
+    day_profiles = extract_station_profiles(
+        results_dir, ts_config["places"], ts_config["variables"]
+    )
+    store_files = []
+    for place, day_ds in day_profiles.items():
+        store_file = station_file(place, ts_config["storage dir"])
+        if not store_file.exists() and "seed dataset URLs" in ts_config:
+            seed_ds = _seed_profiles(
+                ts_config["seed dataset URLs"],
+                place,
+                ts_config["variables"],
+                day_ds.time.values[0],
+                ts_config["days"],
+            )
+            day_ds = xarray.concat([seed_ds, day_ds], dim="time", join="override")
+        append_station_timeseries(store_file, day_ds, ts_config["days"])
+        logger.debug(f"appended {place} profiles to {store_file}")
+        store_files.append(store_file)
+    return store_files
+
+
+def extract_station_profiles(results_dir, station_places, variables):
+    """Extract the hourly profiles at the stations from the results files in
+    results_dir.
+
+    :arg results_dir: Directory of the day's nowcast-green results files.
+    :type results_dir: :py:class:`pathlib.Path`
+
+    :arg list station_places: Names of the stations in
+                              :py:data:`salishsea_tools.places.PLACES`.
+
+    :arg dict variables: Mappings of NEMO variable names to ERDDAP variable names,
+                         keyed by results file grid; e.g. :kbd:`grid_T`.
+
+    :returns: Profile datasets with time and depth dimensions,
+              keyed by station name.
+    :rtype: dict
+    """
+    profiles = {place: [] for place in station_places}
+    for grid, var_names in variables.items():
+        nc_path = sorted(Path(results_dir).glob(f"SalishSea_1h_*_{grid}.nc"))[0]
+        with xarray.open_dataset(nc_path) as ds:
+            grid_ds = ds[list(var_names)]
+            depth_dim = next(dim for dim in grid_ds.dims if dim.startswith("depth"))
+            grid_ds = grid_ds.rename(
+                {"time_counter": "time", depth_dim: "depth", **var_names}
+            )
+            for place in station_places:
+                grid_y, grid_x = places.PLACES[place]["NEMO grid ji"]
+                profile = grid_ds.isel(y=grid_y, x=grid_x).reset_coords(drop=True)
+                profiles[place].append(profile.load())
+    return {
+        place: _clear_encoding(xarray.merge(place_profiles, join="override"))
+        for place, place_profiles in profiles.items()
+    }
+
+
+def _seed_profiles(dataset_urls, place, variables, end, days):
+    grid_y, grid_x = places.PLACES[place]["NEMO grid ji"]
+    time_slice = slice(end - numpy.timedelta64(days, "D"), end)
+    seed_profiles = []
+    for grid, var_names in variables.items():
+        with xarray.open_dataset(dataset_urls[grid]) as ds:
+            seed_profiles.append(
+                ds[list(var_names.values())]
+                .sel(time=time_slice)
+                .isel(gridY=grid_y, gridX=grid_x)
+                .reset_coords(drop=True)
+                .load()
+            )
+    seed_ds = xarray.merge(seed_profiles, join="override")
+    # ERDDAP time slices are inclusive
+    seed_ds = seed_ds.sel(time=seed_ds.time < end)
+    logger.info(f"seeded {place} time series from ERDDAP")
+    return _clear_encoding(seed_ds)
+
+
+def _clear_encoding(ds):
+    for var in ds.variables.values():
+        var.encoding = {}
+    return ds
+
+
+def append_station_timeseries(store_file, day_ds, days):
+    """Append profiles to a station time series file,
+    and drop the profiles that are more than days days older than the newest one.
+
+    Profiles in the file that have the same times as the ones in day_ds are replaced,
+    so the day's results can be re-processed.
+
+    :arg store_file: Path of the station time series file.
+    :type store_file: :py:class:`pathlib.Path`
+
+    :arg day_ds: Profiles to append.
+    :type day_ds: :py:class:`xarray.Dataset`
+
+    :arg int days: Number of days of profiles to keep in the file.
+    """
+    try:
+        with xarray.open_dataset(store_file) as stored:
+            stored = stored.load()
+    except FileNotFoundError:
+        ds = day_ds
+    else:
+        stored = stored.sel(time=~stored.time.isin(day_ds.time))
+        ds = xarray.concat([stored, day_ds], dim="time", join="override")
+        ds = ds.sortby("time")
+    ds = ds.sel(time=ds.time > ds.time[-1] - numpy.timedelta64(days, "D"))
+    ds.attrs.update(
+        {
+            "time_coverage_start": _iso_time(ds.time.values[0]),
+            "time_coverage_end": _iso_time(ds.time.values[-1]),
+        }
+    )
+    store_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = store_file.with_suffix(".nc.tmp")
+    ds.to_netcdf(
+        tmp_file,
+        encoding={var: {"zlib": True, "complevel": 4} for var in ds.data_vars},
+        unlimited_dims=("time",),
+    )
+    tmp_file.replace(store_file)
+
+
+def _iso_time(time):
+    return f"{pandas.Timestamp(time).isoformat(timespec='seconds')}Z"
+
+
+def open_station_timeseries(place, storage_dir):
+    """Open the time series file of a station.
+
+    :arg str place: Name of the station in :py:data:`salishsea_tools.places.PLACES`.
+
+    :arg storage_dir: :kbd:`storage dir` from the :kbd:`figures: station time series`
+                      section of the nowcast system configuration.
+    :type storage_dir: :py:class:`pathlib.Path` or str
+
+    :returns: Hourly profiles with ERDDAP dimension and variable names.
+    :rtype: :py:class:`xarray.Dataset`
+    """
+    return xarray.open_dataset(station_file(place, storage_dir))
+
+
+def station_file(place, storage_dir):
+    """
+    :param str place:
+    :param storage_dir:
+    :type storage_dir: :py:class:`pathlib.Path` or str
+
+    :return: Path of the station time series file.
+    :rtype: :py:class:`pathlib.Path`
+    """
+    return Path(storage_dir, f"{place.replace(' ', '')}_timeseries.nc")
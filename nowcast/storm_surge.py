@@ -0,0 +1,347 @@
+#  Copyright 2013 – present by the SalishSeaCast Project contributors
+#  and The University of British Columbia
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""SalishSeaCast storm surge summary of the maximum sea surface height,
+its time and risk level, and the 4 hour average wind preceding it
+at the tide gauge stations for a forecast run.
+
+The summary is calculated once per forecast run by the :ref:`MakePlotsWorker`
+worker and stored in the run's results directory as JSON and netCDF files.
+The storm surge alerts figures read it instead of re-processing the tidal predictions,
+the tide gauge station sea surface height files, and the weather forcing files.
+The :py:mod:`~nowcast.workers.make_feeds` worker reads the maximum sea surface heights,
+their times, and risk levels from it,
+but averages the winds from the ops weather forcing files as it always has.
+"""
+
+import collections
+import functools
+import json
+import logging
+import os
+from pathlib import Path
+from types import SimpleNamespace
+
+import arrow
+import attr
+import numpy
+import xarray
+from salishsea_tools import nc_tools, places, stormtools, wind_tools
+
+from nowcast.figures import shared
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_FILE_STEM = "storm_surge_summary"
+
+
+def calc_storm_surge_summary(grids_15m, tidal_predictions, weather_path, stations):
+    """Calculate the storm surge summary for a forecast run.
+
+    :arg dict grids_15m: Collection of 15 minute averaged sea surface height
+                         datasets at tide gauge locations,
+                         keyed by tide gauge station name.
+
+    :arg tidal_predictions: Path to directory of tidal prediction files.
+    :type tidal_predictions: :py:class:`pathlib.Path` or str
+
+    :arg weather_path: The directory where the weather forcing files
+                       are stored.
+    :type weather_path: :py:class:`pathlib.Path` or str
+
+    :arg stations: Names of the tide gauge stations to include in the summary.
+    :type stations: :py:class:`collections.abc.Iterable`
+
+    :returns: Storm surge summary with ``start_time`` attribute, and
+              ``max_ssh``, ``max_ssh_time``, ``risk_levels``,
+              ``u_wind_4h_avg``, ``v_wind_4h_avg``, ``max_wind_avg``,
+              and ``wind_dir_4h_avg`` dicts keyed by tide gauge station name.
+    :rtype: :py:class:`types.SimpleNamespace`
+    """
+    summary = SimpleNamespace(
+        start_time=None,
+        max_ssh={},
+        max_ssh_time={},
+        risk_levels={},
+        u_wind_4h_avg={},
+        v_wind_4h_avg={},
+        max_wind_avg={},
+        wind_dir_4h_avg={},
+    )
+    for name in stations:
+        ssh_ts = nc_tools.ssh_timeseries_at_point(grids_15m[name], 0, 0, datetimes=True)
+        if summary.start_time is None:
+            summary.start_time = arrow.get(ssh_ts.time[0])
+        ttide = shared.get_tides(name, tidal_predictions)
+        max_ssh, max_ssh_time = shared.find_ssh_max(name, ssh_ts, ttide)
+        summary.max_ssh[name] = float(max_ssh)
+        summary.max_ssh_time[name] = arrow.get(max_ssh_time)
+        summary.risk_levels[name] = stormtools.storm_surge_risk_level(
+            name, max_ssh, ttide
+        )
+        wind_avg = calc_wind_avg_at_point(
+            summary.max_ssh_time[name],
+            weather_path,
+            places.PLACES[name]["wind grid ji"],
+            avg_hrs=-4,
+        )
+        summary.u_wind_4h_avg[name] = float(wind_avg.u)
+        summary.v_wind_4h_avg[name] = float(wind_avg.v)
+        wind_vector = wind_tools.wind_speed_dir(wind_avg.u, wind_avg.v)
+        summary.max_wind_avg[name] = float(wind_vector.speed)
+        summary.wind_dir_4h_avg[name] = float(wind_vector.dir)
+    return summary
+
+
+#: Weather forcing file name format for :py:meth:`arrow.Arrow.format`
+WEATHER_FILE_FORMAT = "[ops_y]YYYY[m]MM[d]DD[.nc]"
+
+#: Average u and v wind components
+WindAvg = collections.namedtuple("WindAvg", "u v")
+
+
+@attr.s
+class WindPoints:
+    """Hourly u and v wind time series at the wind grid points of
+    :py:data:`salishsea_tools.places.PLACES` read from the weather forcing files.
+
+    Each day's forcing file is read once, for all of the points,
+    the first time that a wind average needs it,
+    so the wind averages for all of the tide gauge stations are array slices.
+    """
+
+    #: Directory where the weather forcing files are stored
+    weather_path = attr.ib(converter=Path)
+    #: Wind grid j, i indices of the points
+    points = attr.ib(
+        factory=lambda: sorted(
+            {
+                tuple(place["wind grid ji"])
+                for place in places.PLACES.values()
+                if "wind grid ji" in place
+            }
+        )
+    )
+    days = attr.ib(factory=dict)
+
+    def wind_avg(self, date_time, wind_ji, avg_hrs=-4):
+        """Calculate the average u and v wind components at a point for the
+        abs(avg_hrs) hours up to and including the hour of date_time.
+
+        :arg date_time: Date/time to calculate the average wind ending at.
+        :type date_time: :py:class:`arrow.Arrow`
+
+        :arg wind_ji: Wind grid j, i indices of the point.
+        :type wind_ji: 2-tuple
+
+        :arg int avg_hrs: Number of hours to average over, as a negative number.
+
+        :returns: Average u and v wind components.
+        :rtype: :py:class:`nowcast.storm_surge.WindAvg`
+
+        :raises: :py:exc:`ValueError` if wind_ji is not one of :py:attr:`points`.
+        """
+        point = self.points.index(tuple(wind_ji))
+        end = date_time.to("utc").floor("hour")
+        start = end.shift(hours=avg_hrs + 1)
+        days = [
+            self._day(day)
+            for day in arrow.Arrow.range("day", start.floor("day"), end.floor("day"))
+        ]
+        times = numpy.concatenate([day.time for day in days])
+        window = (times >= numpy.datetime64(start.naive)) & (
+            times <= numpy.datetime64(end.naive)
+        )
+        u_wind = numpy.concatenate([day.u_wind[:, point] for day in days])
+        v_wind = numpy.concatenate([day.v_wind[:, point] for day in days])
+        return WindAvg(u_wind[window].mean(), v_wind[window].mean())
+
+    def _day(self, day):
+        if day not in self.days:
+            weather_file = self.weather_path / day.format(WEATHER_FILE_FORMAT)
+            if not weather_file.exists():
+                # Like wind_tools.calc_wind_avg_at_point(), look for forecast days
+                # that are beyond the operational forcing files in the fcst/ directory
+                weather_file = self.weather_path / "fcst" / weather_file.name
+            js, is_ = numpy.array(self.points).T
+            with xarray.open_dataset(weather_file) as ds:
+                time_dim, y_dim, x_dim = ds.u_wind.dims
+                winds = (
+                    ds[["u_wind", "v_wind"]]
+                    .isel(
+                        {
+                            y_dim: xarray.DataArray(js, dims="point"),
+                            x_dim: xarray.DataArray(is_, dims="point"),
+                        }
+                    )
+                    .load()
+                )
+            self.days[day] = SimpleNamespace(
+                time=winds[time_dim].values,
+                u_wind=winds.u_wind.values,
+                v_wind=winds.v_wind.values,
+            )
+            logger.debug(f"read winds at {len(self.points)} points from {weather_file}")
+        return self.days[day]
+
+
+@functools.cache
+def _wind_points(weather_path):
+    return WindPoints(weather_path)
+
+
+def calc_wind_avg_at_point(date_time, weather_path, wind_ji, avg_hrs=-4):
+    """Calculate the average u and v wind components at a point for the
+    abs(avg_hrs) hours up to and including the hour of date_time.
+
+    This is a drop-in replacement for
+    :py:func:`salishsea_tools.wind_tools.calc_wind_avg_at_point` that reads
+    the wind time series at all of the wind grid points of
+    :py:data:`salishsea_tools.places.PLACES` from each forcing file once per
+    process.
+
+    :arg date_time: Date/time to calculate the average wind ending at.
+    :type date_time: :py:class:`arrow.Arrow`
+
+    :arg weather_path: The directory where the weather forcing files
+                       are stored.
+    :type weather_path: :py:class:`pathlib.Path` or str
+
+    :arg wind_ji: Wind grid j, i indices of the point.
+    :type wind_ji: 2-tuple
+
+    :arg int avg_hrs: Number of hours to average over, as a negative number.
+
+    :returns: Average u and v wind components.
+    :rtype: :py:class:`nowcast.storm_surge.WindAvg`
+    """
+    return _wind_points(os.fspath(weather_path)).wind_avg(date_time, wind_ji, avg_hrs)
+
+
+def write_storm_surge_summary(summary, results_dir):
+    """Store the storm surge summary in results_dir as
+    :file:`storm_surge_summary.json` and :file:`storm_surge_summary.nc`.
+
+    :arg summary: Storm surge summary from :py:func:`calc_storm_surge_summary`.
+    :type summary: :py:class:`types.SimpleNamespace`
+
+    :arg results_dir: Results directory of the forecast run.
+    :type results_dir: :py:class:`pathlib.Path` or str
+
+    :returns: Path of the JSON file.
+    :rtype: :py:class:`pathlib.Path`
+    """
+    results_dir = Path(results_dir)
+    stations = list(summary.max_ssh)
+    json_summary = {
+        "start time": summary.start_time.isoformat(),
+        "stations": {
+            name: {
+                "max ssh": summary.max_ssh[name],
+                "max ssh time": summary.max_ssh_time[name].isoformat(),
+                "risk level": summary.risk_levels[name],
+                "u wind 4h avg": summary.u_wind_4h_avg[name],
+                "v wind 4h avg": summary.v_wind_4h_avg[name],
+                "wind speed 4h avg": summary.max_wind_avg[name],
+                "wind dir 4h avg": summary.wind_dir_4h_avg[name],
+            }
+            for name in stations
+        },
+    }
+    json_file = results_dir / f"{SUMMARY_FILE_STEM}.json"
+    tmp_file = json_file.with_suffix(".json.tmp")
+    tmp_file.write_text(json.dumps(json_summary, indent=2))
+    tmp_file.replace(json_file)
+    ds = xarray.Dataset(
+        data_vars={
+            "max_ssh": (
+                "station",
+                [summary.max_ssh[name] for name in stations],
+                {
+                    "long_name": "maximum sea surface height above chart datum",
+                    "units": "m",
+                },
+            ),
+            "max_ssh_time": (
+                "station",
+                numpy.array(
+                    [summary.max_ssh_time[name].to("utc").naive for name in stations],
+                    dtype="datetime64[s]",
+                ),
+                {"long_name": "UTC time of maximum sea surface height"},
+            ),
+            "risk_level": (
+                "station",
+                [summary.risk_levels[name] or "no risk" for name in stations],
+                {"long_name": "storm surge risk level"},
+            ),
+            "u_wind_4h_avg": (
+                "station",
+                [summary.u_wind_4h_avg[name] for name in stations],
+                {
+                    "long_name": "4 hour average u wind preceding max ssh",
+                    "units": "m/s",
+                },
+            ),
+            "v_wind_4h_avg": (
+                "station",
+                [summary.v_wind_4h_avg[name] for name in stations],
+                {
+                    "long_name": "4 hour average v wind preceding max ssh",
+                    "units": "m/s",
+                },
+            ),
+        },
+        coords={"station": stations},
+        attrs={"start_time": summary.start_time.isoformat()},
+    )
+    ds.to_netcdf(results_dir / f"{SUMMARY_FILE_STEM}.nc")
+    logger.debug(f"stored storm surge summary in {results_dir}")
+    return json_file
+
+
+def read_storm_surge_summary(results_dir):
+    """Read the storm surge summary that :py:func:`write_storm_surge_summary`
+    stored in results_dir.
+
+    :arg results_dir: Results directory of the forecast run.
+    :type results_dir: :py:class:`pathlib.Path` or str
+
+    :returns: Storm surge summary with the same attributes as the return value of
+              :py:func:`calc_storm_surge_summary`.
+    :rtype: :py:class:`types.SimpleNamespace`
+
+    :raises: :py:exc:`FileNotFoundError` if there is no summary in results_dir.
+    """
+    json_file = Path(results_dir) / f"{SUMMARY_FILE_STEM}.json"
+    json_summary = json.loads(json_file.read_text())
+    stations = json_summary["stations"]
+    return SimpleNamespace(
+        start_time=arrow.get(json_summary["start time"]),
+        max_ssh={name: stn["max ssh"] for name, stn in stations.items()},
+        max_ssh_time={
+            name: arrow.get(stn["max ssh time"]) for name, stn in stations.items()
+        },
+        risk_levels={name: stn["risk level"] for name, stn in stations.items()},
+        u_wind_4h_avg={name: stn["u wind 4h avg"] for name, stn in stations.items()},
+        v_wind_4h_avg={name: stn["v wind 4h avg"] for name, stn in stations.items()},
+        max_wind_avg={name: stn["wind speed 4h avg"] for name, stn in stations.items()},
+        wind_dir_4h_avg={
+            name: stn["wind dir 4h avg"] for name, stn in stations.items()
+        },
+    )
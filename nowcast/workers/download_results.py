@@ -28,7 +28,7 @@ from pathlib import Path
 import arrow
 from nemo_nowcast import NowcastWorker, WorkerError
 
-from nowcast import lib
+from nowcast import erddap_manifest, lib
 
 NAME = "download_results"
 logger = logging.getLogger(NAME)
@@ -122,6 +122,9 @@ def download_results(parsed_args, config, *args):
             checklist[run_type][freq] = list(
                 map(os.fspath, results_archive_dir.glob(f"*SalishSea_{freq}_*.nc"))
             )
+        erddap_manifest.record_files(
+            config, run_type, checklist[run_type]["1h"] + checklist[run_type]["1d"]
+        )
     else:
         checklist[run_type]["destination"] = dest
     return checklist
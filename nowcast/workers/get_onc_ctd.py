@@ -38,6 +38,8 @@ from nemo_nowcast import NowcastWorker, WorkerError
 from salishsea_tools import data_tools
 from salishsea_tools.places import PLACES
 
+from nowcast import erddap_manifest, lib, observations
+
 NAME = "get_onc_ctd"
 logger = logging.getLogger(NAME)
 
@@ -102,12 +104,12 @@ def get_onc_ctd(parsed_args, config, *args):
         f"filtering ONC {parsed_args.onc_station} temperature data for {ymd} "
         f"to exclude qaqcFlag!=1"
     )
-    temperature = _qaqc_filter(ctd_data, "temperature")
+    temperature = observations.qaqc_filter(ctd_data, "temperature")
     logger.debug(
         f"filtering ONC {parsed_args.onc_station} salinity data for {ymd} "
         f"to exclude qaqcFlag!=1"
     )
-    salinity = _qaqc_filter(ctd_data, "salinity")
+    salinity = observations.qaqc_filter(ctd_data, "salinity")
     logger.debug(f"creating ONC {parsed_args.onc_station} CTD T&S dataset for {ymd}")
     ds = _create_dataset(parsed_args.onc_station, temperature, salinity)
     dest_dir = Path(config["observations"]["ctd data"]["dest dir"])
@@ -127,25 +129,14 @@ def get_onc_ctd(parsed_args, config, *args):
     }
     encoding["time"] = {"units": "minutes since 1970-01-01 00:00"}
     ds.to_netcdf(os.fspath(nc_filepath), encoding=encoding, unlimited_dims=("time",))
+    erddap_manifest.record_files(
+        config, f"{parsed_args.onc_station}-CTD", [nc_filepath]
+    )
     checklist = {parsed_args.onc_station: os.fspath(nc_filepath)}
     return checklist
 
 
-def _qaqc_filter(ctd_data, var):
-    qaqc_mask = ctd_data.data_vars[var].attrs["qaqcFlag"] == 1
-    filtered_var = xarray.DataArray(
-        name=var,
-        data=ctd_data.data_vars[var][qaqc_mask].values,
-        coords={"time": ctd_data.data_vars[var].sampleTime[qaqc_mask].values},
-        dims="time",
-    )
-    return filtered_var
-
-
 def _create_dataset(onc_station, temperature, salinity):
-    def count(values, axis):
-        return values.size
-
     metadata = {
         "SCVIP": {
             "place_name": "Central node",
@@ -167,17 +158,19 @@ def _create_dataset(onc_station, temperature, salinity):
         },
     }
     try:
-        temperature_mean = temperature.resample(time="15Min").mean()
-        temperature_std_dev = temperature.resample(time="15Min").std()
-        temperature_sample_count = temperature.resample(time="15Min").count()
-    except IndexError:
+        temperature_stats = lib.resample_stats(temperature, "15min")
+    except ValueError:
         # If the temperature data is messing no dataset can be created
         raise WorkerError(f"no {onc_station} temperate data; no dataset created")
+    temperature_mean = temperature_stats.mean
+    temperature_std_dev = temperature_stats.std_dev
+    temperature_sample_count = temperature_stats.sample_count
     try:
-        salinity_mean = salinity.resample(time="15Min").mean()
-        salinity_std_dev = salinity.resample(time="15Min").std()
-        salinity_sample_count = salinity.resample(time="15Min").count()
-    except IndexError, ValueError:
+        salinity_stats = lib.resample_stats(salinity, "15min")
+        salinity_mean = salinity_stats.mean
+        salinity_std_dev = salinity_stats.std_dev
+        salinity_sample_count = salinity_stats.sample_count
+    except ValueError:
         logger.warning(f"no {onc_station} salinity data")
         salinity_mean = temperature_mean.copy()
         salinity_mean.name = "salinity"
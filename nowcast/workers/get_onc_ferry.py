@@ -27,6 +27,7 @@ Development notebook:
 https://nbviewer.org/urls/bitbucket.org/salishsea/analysis-doug/raw/tip/notebooks/ONC-Ferry-DataToERDDAP.ipynb
 """
 
+import concurrent.futures
 import logging
 import os
 from contextlib import suppress
@@ -41,9 +42,14 @@ from nemo_nowcast import NowcastWorker, WorkerError
 from salishsea_tools import data_tools
 from salishsea_tools.places import PLACES
 
+from nowcast import erddap_manifest, lib
+
 NAME = "get_onc_ferry"
 logger = logging.getLogger(NAME)
 
+# crossing_number value for times when the ferry is in berth
+CROSSING_NUMBER_FILL_VALUE = -1
+
 
 def main():
     """For command-line usage see:
@@ -62,19 +68,39 @@ def main():
         default=arrow.now().floor("day").shift(days=-1),
         help="UTC date to get ONC ferry data for.",
     )
+    worker.cli.add_argument(
+        "--start-date",
+        type=worker.cli.arrow_date,
+        default=None,
+        help="""
+        First UTC date of a range of dates to get ONC ferry data for.
+        Use with --end-date to backfill missing days; --data-date is ignored.
+        Use YYYY-MM-DD format.
+        """,
+    )
+    worker.cli.add_argument(
+        "--end-date",
+        type=worker.cli.arrow_date,
+        default=None,
+        help="""
+        Last UTC date of a range of dates to get ONC ferry data for.
+        Defaults to --start-date, and requires --start-date.
+        Use YYYY-MM-DD format.
+        """,
+    )
     worker.run(get_onc_ferry, success, failure)
     return worker
 
 
 def success(parsed_args):
-    ymd = parsed_args.data_date.format("YYYY-MM-DD")
+    ymd = _format_data_dates(parsed_args)
     logger.info(f"{ymd} ONC {parsed_args.ferry_platform} ferry data file created")
     msg_type = f"success {parsed_args.ferry_platform}"
     return msg_type
 
 
 def failure(parsed_args):
-    ymd = parsed_args.data_date.format("YYYY-MM-DD")
+    ymd = _format_data_dates(parsed_args)
     logger.critical(
         f"{ymd} ONC {parsed_args.ferry_platform} ferry data file creation failed"
     )
@@ -83,15 +109,109 @@ def failure(parsed_args):
 
 
 def get_onc_ferry(parsed_args, config, *args):
-    ymd = parsed_args.data_date.format("YYYY-MM-DD")
     ferry_platform = parsed_args.ferry_platform
-    ferry_config = config["observations"]["ferry data"]["ferries"][ferry_platform]
+    ferry_data_config = config["observations"]["ferry data"]
+    ferry_config = ferry_data_config["ferries"][ferry_platform]
+    location_config = ferry_config["location"]
+    devices_config = ferry_config["devices"]
+    nemo_grid_config = config["observations"]["NEMO grid"]
+    if parsed_args.end_date is not None and parsed_args.start_date is None:
+        logger.error("--end-date requires --start-date")
+        raise WorkerError
+    data_dates = _calc_data_dates(parsed_args)
+    # Bound the number of concurrent requests made to the ONC API with our user token
+    max_requests = ferry_data_config["max concurrent requests"]
+    nc_filepaths = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_requests) as executor:
+        # Queue the requests for all of the days so that later days' data are
+        # downloaded while earlier days' datasets are created
+        onc_requests = {
+            data_date: _submit_onc_requests(
+                executor,
+                ferry_platform,
+                data_date.format("YYYY-MM-DD"),
+                location_config,
+                devices_config,
+            )
+            for data_date in data_dates
+        }
+        for data_date, (nav_request, device_requests) in onc_requests.items():
+            ymd = data_date.format("YYYY-MM-DD")
+            try:
+                dataset = _make_dataset(
+                    ferry_platform,
+                    ymd,
+                    nav_request,
+                    device_requests,
+                    ferry_config,
+                    nemo_grid_config,
+                )
+            except (WorkerError, requests.RequestException) as e:
+                # Request exceptions are raised from the queued futures' results
+                if len(data_dates) == 1:
+                    raise
+                logger.error(
+                    f"ONC {ferry_platform} dataset creation for {ymd} failed: "
+                    f"{type(e).__name__} {e}; continuing with next date"
+                )
+                continue
+            dest_dir = Path(ferry_data_config["dest dir"])
+            filepath_tmpl = ferry_config["filepath template"]
+            nc_filepath = dest_dir / filepath_tmpl.format(
+                ferry_platform=ferry_platform,
+                yyyymmdd=data_date.format("YYYYMMDD"),
+            )
+            _write_netcdf(dataset, ferry_platform, ymd, nc_filepath)
+            nc_filepaths.append(os.fspath(nc_filepath))
+    erddap_manifest.record_files(config, f"{ferry_platform}-ferry", nc_filepaths)
+    if not nc_filepaths:
+        logger.error(
+            f"no ONC {ferry_platform} datasets created for "
+            f"{_format_data_dates(parsed_args)}"
+        )
+        raise WorkerError
+    checklist = {ferry_platform: nc_filepaths}
+    return checklist
+
+
+def _calc_data_dates(parsed_args):
+    if parsed_args.start_date is None:
+        return [parsed_args.data_date]
+    end_date = parsed_args.end_date or parsed_args.start_date
+    return list(arrow.Arrow.range("day", parsed_args.start_date, end_date))
+
+
+def _format_data_dates(parsed_args):
+    if parsed_args.start_date is None:
+        return parsed_args.data_date.format("YYYY-MM-DD")
+    end_date = parsed_args.end_date or parsed_args.start_date
+    return (
+        f"{parsed_args.start_date.format('YYYY-MM-DD')} to "
+        f"{end_date.format('YYYY-MM-DD')}"
+    )
+
+
+def _submit_onc_requests(
+    executor, ferry_platform, ymd, location_config, devices_config
+):
+    nav_request = executor.submit(_get_nav_data, ferry_platform, ymd, location_config)
+    device_requests = {
+        device: executor.submit(
+            _get_water_data, ferry_platform, device, ymd, devices_config
+        )
+        for device in devices_config
+    }
+    return nav_request, device_requests
+
+
+def _make_dataset(
+    ferry_platform, ymd, nav_request, device_requests, ferry_config, nemo_grid_config
+):
     location_config = ferry_config["location"]
     devices_config = ferry_config["devices"]
-    nemo_ji_map = config["observations"]["lon/lat to NEMO ji map"]
     data_arrays = SimpleNamespace()
     try:
-        nav_data = _get_nav_data(ferry_platform, ymd, location_config)
+        nav_data = nav_request.result()
     except TypeError:
         logger.error(f"No nav data for {ferry_platform} so no dataset for {ymd}")
         raise WorkerError
@@ -102,9 +222,9 @@ def get_onc_ferry(parsed_args, config, *args):
         data_arrays.nemo_grid_i,
         data_arrays.on_crossing_mask,
         data_arrays.crossing_number,
-    ) = _calc_location_arrays(nav_data, location_config, nemo_ji_map)
+    ) = _calc_location_arrays(nav_data, location_config, nemo_grid_config)
     for device in devices_config:
-        device_data = _get_water_data(ferry_platform, device, ymd, devices_config)
+        device_data = device_requests[device].result()
         sensor_data_arrays = _qaqc_filter(
             ferry_platform, device, device_data, ymd, devices_config
         )
@@ -113,11 +233,10 @@ def get_onc_ferry(parsed_args, config, *args):
     dataset = _create_dataset(
         data_arrays, ferry_platform, ferry_config, location_config, ymd
     )
-    dest_dir = Path(config["observations"]["ferry data"]["dest dir"])
-    filepath_tmpl = ferry_config["filepath template"]
-    nc_filepath = dest_dir / filepath_tmpl.format(
-        ferry_platform=ferry_platform, yyyymmdd=parsed_args.data_date.format("YYYYMMDD")
-    )
+    return dataset
+
+
+def _write_netcdf(dataset, ferry_platform, ymd, nc_filepath):
     logger.debug(f"storing ONC {ferry_platform} dataset for {ymd} as {nc_filepath}")
     encoding = {
         "time": {
@@ -133,11 +252,13 @@ def get_onc_ferry(parsed_args, config, *args):
         if var.endswith("sample_count")
     }
     encoding.update(**sample_counts_encoding)
+    if "crossing_number" in dataset:
+        encoding["crossing_number"].update(
+            {"dtype": "int16", "_FillValue": CROSSING_NUMBER_FILL_VALUE}
+        )
     dataset.to_netcdf(
         os.fspath(nc_filepath), encoding=encoding, unlimited_dims=("time",)
     )
-    checklist = {ferry_platform: os.fspath(nc_filepath)}
-    return checklist
 
 
 def _get_nav_data(ferry_platform, ymd, location_config):
@@ -185,19 +306,30 @@ def _get_nav_data(ferry_platform, ymd, location_config):
     raise WorkerError(msg)
 
 
-def _calc_location_arrays(nav_data, location_config, nemo_ji_map):
+def _calc_location_arrays(nav_data, location_config, nemo_grid_config):
     lons = _resample_nav_coord(nav_data, "longitude", "degree_east")
     lats = _resample_nav_coord(nav_data, "latitude", "degree_north")
-    with xarray.open_dataset(nemo_ji_map) as grid_map:
-        nemo_grid_js = grid_map.jj.sel(lons=lons, lats=lats, method="nearest")
-        nemo_grid_js = nemo_grid_js.reset_coords(("lons", "lats"), drop=True)
-        nemo_grid_is = grid_map.ii.sel(lons=lons, lats=lats, method="nearest")
-        nemo_grid_is = nemo_grid_is.reset_coords(("lons", "lats"), drop=True)
+    locator = lib.get_nemo_grid_locator(
+        nemo_grid_config["coordinates"],
+        nemo_grid_config["mesh mask"],
+        nemo_grid_config.get("locator cache dir"),
+    )
+    js, is_ = locator.query(
+        lons.values, lats.values, max_distance=nemo_grid_config["max distance"]
+    )
+    nemo_grid_js = xarray.DataArray(
+        name="jj", data=js, coords={"time": lons.time.values}, dims="time"
+    )
+    nemo_grid_is = xarray.DataArray(
+        name="ii", data=is_, coords={"time": lons.time.values}, dims="time"
+    )
+    # PLACES in berth radii are in degrees, so convert them to great circle radii
     terminals = [
         SimpleNamespace(
             lon=PLACES[terminal]["lon lat"][0],
             lat=PLACES[terminal]["lon lat"][1],
-            radius=PLACES[terminal]["in berth radius"],
+            radius=numpy.radians(PLACES[terminal]["in berth radius"])
+            * lib.EARTH_RADIUS,
         )
         for terminal in location_config["terminals"]
     ]
@@ -216,42 +348,20 @@ def _resample_nav_coord(nav_data, coord, units):
 
 
 def _on_crossing(lons, lats, terminals):
-    in_berth = numpy.logical_or(
-        numpy.logical_and(
-            numpy.logical_and(
-                lons > (terminals[0].lon - terminals[0].radius),
-                lons < (terminals[0].lon + terminals[0].radius),
-            ),
-            numpy.logical_and(
-                lats > (terminals[0].lat - terminals[0].radius),
-                lats < (terminals[0].lat + terminals[0].radius),
-            ),
-        ),
-        numpy.logical_and(
-            numpy.logical_and(
-                lons > (terminals[1].lon - terminals[1].radius),
-                lons < (terminals[1].lon + terminals[1].radius),
-            ),
-            numpy.logical_and(
-                lats > (terminals[1].lat - terminals[1].radius),
-                lats < (terminals[1].lat + terminals[1].radius),
-            ),
-        ),
+    terminal_indices = lib.locate_in_geofences(lons.values, lats.values, terminals)
+    return xarray.DataArray(
+        data=terminal_indices < 0, coords={"time": lons.time.values}, dims="time"
     )
-    return numpy.logical_not(in_berth)
 
 
 def _calc_crossing_numbers(on_crossing_mask):
-    crossing_numbers = numpy.empty_like(on_crossing_mask, dtype=float)
-    crossing_number = 0
-    crossing_numbers[0] = 0 if on_crossing_mask[0] else numpy.nan
-    for minute in range(1, crossing_numbers.size):
-        if not on_crossing_mask[minute - 1] and on_crossing_mask[minute]:
-            crossing_number += 1
-        if on_crossing_mask[minute]:
-            crossing_numbers[minute] = crossing_number
-        else:
-            crossing_numbers[minute] = numpy.nan
+    on_crossing = on_crossing_mask.values
+    # Crossings start where the ferry leaves a berth;
+    # the ferry may already be on crossing 0 at the start of the period
+    crossing_starts = numpy.zeros_like(on_crossing)
+    crossing_starts[1:] = numpy.logical_and(on_crossing[1:], ~on_crossing[:-1])
+    crossing_numbers = numpy.cumsum(crossing_starts, dtype=numpy.int16)
+    crossing_numbers[~on_crossing] = CROSSING_NUMBER_FILL_VALUE
     return xarray.DataArray(
         name="crossing_number",
         data=crossing_numbers,
@@ -397,9 +507,6 @@ def _create_dataset(data_arrays, ferry_platform, ferry_config, location_config,
         "crossing_number",
     }
 
-    def count(values, axis):
-        return 0 if numpy.all(numpy.isnan(values)) else int(values.size)
-
     data_vars = {}
     for var, array in data_arrays.__dict__.items():
         if var in location_vars:
@@ -408,8 +515,8 @@ def _create_dataset(data_arrays, ferry_platform, ferry_config, location_config,
             )
         else:
             try:
-                data_array = array.resample(time="1Min").mean()
-            except IndexError, ValueError:
+                stats = lib.resample_stats(array, "1min")
+            except ValueError:
                 # array is empty, meaning there are no observations with
                 # qaqcFlag<=1 or qaqcFlac>=7, so substitute a DataArray full of NaNs
                 logger.warning(
@@ -426,19 +533,20 @@ def _create_dataset(data_arrays, ferry_platform, ferry_config, location_config,
                     dims="time",
                     attrs=array.attrs,
                 )
-                data_array = array.resample(time="1Min").mean()
+                stats = lib.resample_stats(array, "1min")
+            data_array = stats.mean
             data_array.attrs = array.attrs
             data_vars[var] = _create_dataarray(
                 var, data_array, ferry_platform, location_config
             )
             std_dev_var = f"{var}_std_dev"
-            std_dev_array = array.resample(time="1Min").std()
+            std_dev_array = stats.std_dev
             std_dev_array.attrs = array.attrs
             data_vars[std_dev_var] = _create_dataarray(
                 std_dev_var, std_dev_array, ferry_platform, location_config
             )
             sample_count_var = f"{var}_sample_count"
-            sample_count_array = array.resample(time="1Min").count()
+            sample_count_array = stats.sample_count
             sample_count_array.attrs = array.attrs
             try:
                 del sample_count_array.attrs["units"]
@@ -525,7 +633,7 @@ def _create_dataarray(var, array, ferry_platform, location_config):
             "ioos category": "identifier",
             "standard name": "crossing_number",
             "long name": "Crossing Number",
-            "flag_values": "0.0, 1.0, 2.0, ...",
+            "flag_values": "0, 1, 2, ...",
             "flag_meanings": "UTC day crossing number",
             "comment": "The first and last crossings of a UTC day are typically "
             "incomplete because the ferry operates in the Pacific "
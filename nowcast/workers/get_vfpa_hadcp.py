@@ -15,6 +15,10 @@
 """SalishSeaCast worker that processes VFPA HADCP observations from the 2nd Narrows Rail Bridge
 for a specified UTC day from CSV files into a monthly netCDF file.
 
+The day's hourly CSV files are processed in a single batch that is appended to the
+unlimited time dimension of the monthly file.
+Hours that are already stored in the file are skipped so that re-runs are cheap.
+
 The observations are stored as a collection of netCDF-4/HDF5 files that is accessible via
 https://salishsea.eos.ubc.ca/erddap/info/ubcVFPA2ndNarrowsCurrent2sV1/index.html.
 
@@ -27,6 +31,7 @@ import os
 from pathlib import Path
 
 import arrow
+import netCDF4
 import numpy
 import pandas
 import xarray
@@ -100,48 +105,46 @@ def get_vfpa_hadcp(parsed_args, config, *args):
     nc_filepath = dest_dir / filepath_tmpl.format(
         yyyymm=parsed_args.data_date.format("YYYYMM")
     )
-    # Process 1st hour to create new month netcdf file, or extend existing one
-    try:
-        ds = _make_hour_dataset(csv_dir, data_date, place)
-        if not nc_filepath.exists():
-            action = "created"
-            _write_netcdf(ds, nc_filepath)
-            logger.info(f"created {nc_filepath}")
-        else:
-            action = "extended"
-            with xarray.open_dataset(nc_filepath) as stored_ds:
-                extended_ds = xarray.concat((stored_ds, ds), dim="time")
-            _write_netcdf(extended_ds, nc_filepath)
-            logger.debug(
-                f"extended {nc_filepath} with {data_date.format('YYYY-MM-DD HH:mm')} hour"
-            )
-    except ValueError:
-        # Skip missing hour
-        action = "missing data"
-        logger.debug(f"no data for {data_date.format('YYYY-MM-DD HH:mm')} hour")
-        pass
-    # Process remaining day hours to extend netcdf file
+    # Process the day's hours in one batch to create new month netcdf file,
+    # or append to existing one
     end_hr = (
         data_date.shift(days=+1)
         if data_date.shift(days=+1) < arrow.utcnow()
         else arrow.utcnow().floor("hour")
     )
-    hr_range = arrow.Arrow.range(
-        "hour", start=data_date.shift(hours=+1), end=end_hr.shift(hours=-1)
-    )
+    hr_range = arrow.Arrow.range("hour", start=data_date, end=end_hr.shift(hours=-1))
+    stored_hours = _read_stored_hours(nc_filepath)
+    hour_datasets = []
     for hr in hr_range:
+        if numpy.datetime64(hr.naive, "h") in stored_hours:
+            logger.debug(
+                f"{hr.format('YYYY-MM-DD HH:mm')} hour already stored in {nc_filepath}"
+            )
+            continue
         try:
-            with xarray.open_dataset(nc_filepath) as stored_ds:
-                ds = _make_hour_dataset(csv_dir, hr, place)
-                extended_ds = xarray.concat((stored_ds, ds), dim="time")
+            hour_datasets.append(_make_hour_dataset(csv_dir, hr, place))
         except ValueError, FileNotFoundError:
             # Skip missing hour
             logger.debug(f"no data for {hr.format('YYYY-MM-DD HH:mm')} hour")
-            continue
-        _write_netcdf(extended_ds, nc_filepath)
-        logger.debug(
-            f"extended {nc_filepath} with {hr.format('YYYY-MM-DD HH:mm')} hour"
-        )
+    if not hour_datasets:
+        action = "missing data"
+    elif not nc_filepath.exists():
+        action = "created"
+        _write_netcdf(xarray.concat(hour_datasets, dim="time"), nc_filepath)
+        logger.info(f"created {nc_filepath}")
+    else:
+        action = "extended"
+        ds = xarray.concat(hour_datasets, dim="time")
+        n_records = _append_netcdf(ds, nc_filepath)
+        if n_records is None:
+            # New observations precede stored ones, so the file has to be rewritten
+            # to keep the time values in order
+            with xarray.open_dataset(nc_filepath) as stored_ds:
+                extended_ds = xarray.concat((stored_ds, ds), dim="time").load()
+            _write_netcdf(extended_ds, nc_filepath)
+            logger.debug(f"rewrote {nc_filepath} with {len(hour_datasets)} hours")
+        else:
+            logger.debug(f"appended {n_records} records to {nc_filepath}")
     checklist = {
         action: os.fspath(nc_filepath),
         "UTC date": data_date.format("YYYY-MM-DD"),
@@ -261,6 +264,71 @@ def _csv_to_dataset(csv_file, place):
     return xarray.Dataset.from_dataframe(df)
 
 
+def _read_stored_hours(nc_filepath):
+    """Index of the UTC hours for which observations are already stored in nc_filepath.
+
+    Observations at the top of an hour are excluded from the index because some csv
+    files include the 1st observation of the following hour.
+
+    :param :py:class:`pathlib.Path` nc_filepath:
+
+    :return: Hours that observations are stored for.
+    :rtype: set of :py:class:`numpy.datetime64`
+    """
+    try:
+        with netCDF4.Dataset(nc_filepath) as ds:
+            time = ds.variables["time"]
+            times = numpy.array(
+                netCDF4.num2date(
+                    time[:],
+                    time.units,
+                    only_use_cftime_datetimes=False,
+                    only_use_python_datetimes=True,
+                ),
+                dtype="datetime64[s]",
+            )
+    except OSError, KeyError:
+        # No file yet, or file has no time values
+        return set()
+    hours = times.astype("datetime64[h]")
+    return set(hours[times != hours])
+
+
+def _append_netcdf(ds, nc_filepath):
+    """Append the observations in ds that are not already stored to the unlimited
+    time dimension of nc_filepath.
+
+    :param :py.class:`xarray.Dataset` ds:
+    :param :py:class:`pathlib.Path` nc_filepath:
+
+    :return: Number of records appended, or None if ds contains observations that
+             precede the last stored observation and so cannot be appended.
+    :rtype: int
+    """
+    # Drop repeated times because some csv files contain hh:00 to hh+1:00
+    # instead of ending at hh:58
+    _, index = numpy.unique(ds.time.values, return_index=True)
+    ds = ds.isel(time=index)
+    with netCDF4.Dataset(nc_filepath, "a") as nc_ds:
+        time = nc_ds.variables["time"]
+        stored_times = time[:]
+        new_times = netCDF4.date2num(
+            pandas.to_datetime(ds.time.values).to_pydatetime(), time.units
+        )
+        new = numpy.logical_not(numpy.isin(new_times, stored_times))
+        if not new.any():
+            return 0
+        if stored_times.size and new_times[new].min() <= stored_times.max():
+            return None
+        start, stop = time.size, time.size + new.sum()
+        time[start:stop] = new_times[new]
+        for var in ("speed", "direction"):
+            nc_ds.variables[var][start:stop] = numpy.ma.masked_invalid(
+                ds[var].values[new]
+            )
+    return int(new.sum())
+
+
 def _write_netcdf(ds, nc_filepath):
     """
     :param :py.class:`xarray.Dataset` ds:
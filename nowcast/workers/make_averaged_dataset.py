@@ -36,6 +36,8 @@ import reshapr.api.v1.extract
 import xarray
 from tenacity import retry, stop_after_attempt, wait_random, retry_if_exception_type
 
+from nowcast import erddap_manifest
+
 NAME = "make_averaged_dataset"
 logger = logging.getLogger(NAME)
 
@@ -195,6 +197,9 @@ def make_averaged_dataset(parsed_args, config, *args):
         ]["file pattern"]
         dest_nc_filename = file_pattern.format(yyyymmdd=run_date.format("YYYYMMDD"))
         nc_path = nc_path.rename(nc_path.with_name(dest_nc_filename))
+    erddap_manifest.record_files(
+        config, f"{avg_time_interval}-averaged-{reshapr_var_group}", [nc_path]
+    )
     return {
         f"{avg_time_interval} {reshapr_var_group}": {
             "run date": run_date.format("YYYY-MM-DD"),
@@ -32,6 +32,7 @@ from salishsea_tools import nc_tools, stormtools, wind_tools
 from salishsea_tools.places import PLACES
 
 import nowcast.figures.shared
+from nowcast import storm_surge
 
 NAME = "make_feeds"
 logger = logging.getLogger(NAME)
@@ -164,7 +165,10 @@ def _render_entry_content(feed, max_ssh_info, config):
     max_ssh_time_local = arrow.get(max_ssh_info["max_ssh_time"]).to("local")
     feed_config = config["storm surge feeds"]["feeds"][feed]
     tide_gauge_stn = feed_config["tide gauge stn"]
-    max_ssh_info.update(_calc_wind_4h_avg(feed, max_ssh_info["max_ssh_time"], config))
+    if "wind_speed_4h_avg" not in max_ssh_info:
+        max_ssh_info.update(
+            _calc_wind_4h_avg(feed, max_ssh_info["max_ssh_time"], config)
+        )
     values = {
         "city": feed_config["city"],
         "tide_gauge_stn": tide_gauge_stn,
@@ -208,6 +212,31 @@ def _render_entry_content(feed, max_ssh_info, config):
 
 def _calc_max_ssh_risk(feed, run_date, run_type, config):
     feed_config = config["storm surge feeds"]["feeds"][feed]
+    results_dir = os.path.join(
+        config["results archive"][run_type], run_date.format("DDMMMYY").lower()
+    )
+    try:
+        summary = storm_surge.read_storm_surge_summary(results_dir)
+    except FileNotFoundError:
+        logger.debug(
+            f"no storm surge summary in {results_dir}; calculating {feed} max ssh risk"
+        )
+    else:
+        tide_gauge_stn = feed_config["tide gauge stn"]
+        if np.isnan(summary.max_ssh[tide_gauge_stn]):
+            logger.critical(
+                f"no {tide_gauge_stn} feed generated: max sea surface height is "
+                f"NaN at {summary.max_ssh_time[tide_gauge_stn]}"
+            )
+            raise WorkerError
+        # The summary's winds are averaged from the forecast weather files that
+        # the alerts figures use, so the feed winds are still averaged from
+        # the ops weather files by _render_entry_content()
+        return {
+            "max_ssh": summary.max_ssh[tide_gauge_stn],
+            "max_ssh_time": summary.max_ssh_time[tide_gauge_stn],
+            "risk_level": summary.risk_levels[tide_gauge_stn],
+        }
     ttide, _ = stormtools.load_tidal_predictions(
         os.path.join(
             config["ssh"]["tidal predictions"], feed_config["tidal predictions"]
@@ -246,7 +275,7 @@ def _calc_max_ssh(feed, ttide, run_date, run_type, config):
 def _calc_wind_4h_avg(feed, max_ssh_time, config):
     weather_path = config["weather"]["ops dir"]
     tide_gauge_stn = config["storm surge feeds"]["feeds"][feed]["tide gauge stn"]
-    wind_avg = wind_tools.calc_wind_avg_at_point(
+    wind_avg = storm_surge.calc_wind_avg_at_point(
         arrow.get(max_ssh_time),
         weather_path,
         PLACES[tide_gauge_stn]["wind grid ji"],
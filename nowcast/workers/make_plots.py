@@ -18,12 +18,14 @@
 
 """SalishSeaCast worker that produces visualization images for the website from run results."""
 
+import hashlib
 import logging
 import os
 import shlex
 import subprocess
 from glob import glob
 from pathlib import Path
+from types import SimpleNamespace
 
 # **IMPORTANT**: matplotlib must be imported before anything else that uses it
 # because of the matplotlib.use() call below
@@ -37,10 +39,19 @@ import arrow
 import cmocean
 from nemo_nowcast import NowcastWorker
 import netCDF4 as nc
+import numpy
+import PIL.Image
 import scipy.io as sio
 import xarray
+from salishsea_tools import places
 
-from nowcast import lib
+from nowcast import (
+    lib,
+    render_cache,
+    results_context,
+    station_timeseries,
+    storm_surge,
+)
 from nowcast.figures.research import (
     baynes_sound_agrif,
     time_series_plots,
@@ -179,8 +190,16 @@ def make_plots(parsed_args, config, *args):
             weather_path = weather_path / "fcst"
         results_dir = Path(config["results archive"][run_type], dmy)
         grid_dir = Path(config["figures"]["grid dir"])
-        bathy = nc.Dataset(grid_dir / config["run types"][run_type]["bathymetry"])
-        mesh_mask = nc.Dataset(grid_dir / config["run types"][run_type]["mesh mask"])
+        grid = results_context.ResultsContext.from_files(
+            grid_dir / config["run types"][run_type]["bathymetry"],
+            grid_dir / config["run types"][run_type]["mesh mask"],
+        )
+        # The comparison and publish figure modules keep the netCDF4.Dataset interface
+        # on purpose: compare_venus_ctd reads single mesh mask columns, with NEMO-3.4
+        # variable name fallbacks, alongside the nowcast-dev mesh mask, and
+        # compare_tide_prediction_max_ssh hands the bathymetry to
+        # salishsea_tools.viz_tools, which indexes netCDF variables orthogonally
+        bathy, mesh_mask = grid.bathy, grid.mesh_mask
         dev_mesh_mask = nc.Dataset(
             grid_dir / config["run types"]["nowcast-dev"]["mesh mask"]
         )
@@ -188,11 +207,11 @@ def make_plots(parsed_args, config, *args):
 
         if run_type == "nowcast" and plot_type == "research":
             fig_functions = _prep_nowcast_research_fig_functions(
-                bathy, mesh_mask, results_dir, run_date
+                grid, results_dir, run_date
             )
         if run_type == "nowcast-green" and plot_type == "research":
             fig_functions = _prep_nowcast_green_research_fig_functions(
-                config, bathy, mesh_mask, results_dir, run_date
+                config, grid, results_dir, run_date, test_figure_id
             )
         if run_type == "nowcast-agrif" and plot_type == "research":
             fig_functions = _prep_nowcast_agrif_research_fig_functions(
@@ -222,12 +241,16 @@ def make_plots(parsed_args, config, *args):
                 run_type,
                 run_date,
                 timezone,
+                test_figure_id,
             )
 
     if model == "wwatch3":
         wwatch3_dataset_url = config["figures"]["dataset URLs"]["wwatch3 fields"]
         fig_functions = _prep_wwatch3_publish_fig_functions(
-            wwatch3_dataset_url, run_type, run_date
+            wwatch3_dataset_url,
+            config["figures"]["local datasets"],
+            run_type,
+            run_date,
         )
 
     checklist = _render_figures(
@@ -258,7 +281,7 @@ def _results_dataset_gridded(station, results_dir):
     return nc.Dataset(filepaths[0])
 
 
-def _prep_nowcast_research_fig_functions(bathy, mesh_mask, results_dir, run_date):
+def _prep_nowcast_research_fig_functions(grid, results_dir, run_date):
     logger.info(
         f"preparing render list for {run_date.format('YYYY-MM-DD')} NEMO nowcast-blue research figures"
     )
@@ -273,10 +296,16 @@ def _prep_nowcast_research_fig_functions(bathy, mesh_mask, results_dir, run_date
         "temperature": {"nemo var": "votemper", "cmap": cmocean.cm.thermal},
     }
     fig_functions = {}
+    tracer_clevels = tracer_thalweg_and_surface_hourly.tracers_clevels(
+        {
+            tracer: grid_T_hr.variables[params["nemo var"]]
+            for tracer, params in image_loops.items()
+        },
+        grid,
+        {tracer: False for tracer in image_loops},
+    )
     for tracer, params in image_loops.items():
-        clevels_thalweg, clevels_surface = tracer_thalweg_and_surface_hourly.clevels(
-            grid_T_hr.variables[params["nemo var"]], mesh_mask, depth_integrated=False
-        )
+        clevels_thalweg, clevels_surface = tracer_clevels[tracer]
         fig_functions.update(
             {
                 f"{tracer}_thalweg_and_surface_{yyyymmdd}_{hr:02d}3000_UTC": {
@@ -284,14 +313,13 @@ def _prep_nowcast_research_fig_functions(bathy, mesh_mask, results_dir, run_date
                     "args": (
                         hr,
                         grid_T_hr.variables[params["nemo var"]],
-                        bathy,
-                        mesh_mask,
+                        grid,
                         clevels_thalweg,
                         clevels_surface,
                     ),
                     "kwargs": {"cmap": params["cmap"], "depth_integrated": False},
                     "format": "png",
-                    "image loop": True,
+                    "image loop": f"{tracer}_thalweg_and_surface_{yyyymmdd}",
                 }
                 for hr in range(24)
             }
@@ -307,8 +335,7 @@ def _prep_nowcast_research_fig_functions(bathy, mesh_mask, results_dir, run_date
                 "args": (
                     grid_U_hr.variables["vozocrtx"],
                     grid_V_hr.variables["vomecrty"],
-                    bathy,
-                    mesh_mask,
+                    grid,
                 ),
                 "kwargs": {
                     "sections": (450, 520, 680),
@@ -340,7 +367,7 @@ def _prep_nowcast_research_fig_functions(bathy, mesh_mask, results_dir, run_date
 
 
 def _prep_nowcast_green_research_fig_functions(
-    config, bathy, mesh_mask, results_dir, run_date
+    config, grid, results_dir, run_date, test_figure_id=None
 ):
     logger.info(
         f"preparing render list for {run_date.format('YYYY-MM-DD')} NEMO nowcast-green research figures"
@@ -351,142 +378,104 @@ def _prep_nowcast_green_research_fig_functions(
     turb_T_hr = _results_dataset("1h", "chem_T", results_dir)
     fig_functions = {}
     image_loops = {
-        "salinity": {"nemo var": "vosaline", "cmap": cmocean.cm.haline},
-        "temperature": {"nemo var": "votemper", "cmap": cmocean.cm.thermal},
-    }
-    for tracer, params in image_loops.items():
-        clevels_thalweg, clevels_surface = tracer_thalweg_and_surface_hourly.clevels(
-            grid_T_hr.variables[params["nemo var"]], mesh_mask, depth_integrated=False
-        )
-        fig_functions.update(
-            {
-                f"{tracer}_thalweg_and_surface_{yyyymmdd}_{hr:02d}3000_UTC": {
-                    "function": tracer_thalweg_and_surface_hourly.make_figure,
-                    "args": (
-                        hr,
-                        grid_T_hr.variables[params["nemo var"]],
-                        bathy,
-                        mesh_mask,
-                        clevels_thalweg,
-                        clevels_surface,
-                    ),
-                    "kwargs": {"cmap": params["cmap"], "depth_integrated": False},
-                    "format": "png",
-                    "image loop": True,
-                }
-                for hr in range(24)
-            }
-        )
-    logger.info(
-        f"added {tracer}_thalweg_and_surface figures to {run_date.format('YYYY-MM-DD')} NEMO "
-        f"nowcast-green research render list"
-    )
-    image_loops = {
+        "salinity": {
+            "dataset": grid_T_hr,
+            "nemo var": "vosaline",
+            "cmap": cmocean.cm.haline,
+            "depth integrated": False,
+        },
+        "temperature": {
+            "dataset": grid_T_hr,
+            "nemo var": "votemper",
+            "cmap": cmocean.cm.thermal,
+            "depth integrated": False,
+        },
         "nitrate": {
+            "dataset": biol_T_hr,
             "nemo var": "nitrate",
             "cmap": cmocean.cm.tempo,
             "depth integrated": False,
         },
         "ammonium": {
+            "dataset": biol_T_hr,
             "nemo var": "ammonium",
             "cmap": cmocean.cm.matter,
             "depth integrated": False,
         },
         "silicon": {
+            "dataset": biol_T_hr,
             "nemo var": "silicon",
             "cmap": cmocean.cm.turbid,
             "depth integrated": False,
         },
         "dissolved_organic_nitrogen": {
+            "dataset": biol_T_hr,
             "nemo var": "dissolved_organic_nitrogen",
             "cmap": cmocean.cm.amp,
             "depth integrated": False,
         },
         "particulate_organic_nitrogen": {
+            "dataset": biol_T_hr,
             "nemo var": "particulate_organic_nitrogen",
             "cmap": cmocean.cm.amp,
             "depth integrated": False,
         },
         "biogenic_silicon": {
+            "dataset": biol_T_hr,
             "nemo var": "biogenic_silicon",
             "cmap": cmocean.cm.turbid,
             "depth integrated": False,
         },
         "diatoms": {
+            "dataset": biol_T_hr,
             "nemo var": "diatoms",
             "cmap": cmocean.cm.algae,
             "depth integrated": True,
         },
         "flagellates": {
+            "dataset": biol_T_hr,
             "nemo var": "flagellates",
             "cmap": cmocean.cm.algae,
             "depth integrated": True,
         },
         "microzooplankton": {
+            "dataset": biol_T_hr,
             "nemo var": "microzooplankton",
             "cmap": cmocean.cm.algae,
             "depth integrated": True,
         },
         "mesozooplankton": {
+            "dataset": biol_T_hr,
             "nemo var": "mesozooplankton",
             "cmap": cmocean.cm.algae,
             "depth integrated": True,
         },
-    }
-    for tracer, params in image_loops.items():
-        clevels_thalweg, clevels_surface = tracer_thalweg_and_surface_hourly.clevels(
-            biol_T_hr.variables[params["nemo var"]],
-            mesh_mask,
-            depth_integrated=params["depth integrated"],
-        )
-        fig_functions.update(
-            {
-                f"{tracer}_thalweg_and_surface_{yyyymmdd}_{hr:02d}3000_UTC": {
-                    "function": tracer_thalweg_and_surface_hourly.make_figure,
-                    "args": (
-                        hr,
-                        biol_T_hr.variables[params["nemo var"]],
-                        bathy,
-                        mesh_mask,
-                        clevels_thalweg,
-                        clevels_surface,
-                    ),
-                    "kwargs": {
-                        "cmap": params["cmap"],
-                        "depth_integrated": params["depth integrated"],
-                    },
-                    "format": "png",
-                    "image loop": True,
-                }
-                for hr in range(24)
-            }
-        )
-        logger.info(
-            f"added {tracer}_thalweg_and_surface figures to {run_date.format('YYYY-MM-DD')} NEMO "
-            f"nowcast-green research render list"
-        )
-    image_loops = {
         "turbidity": {
+            "dataset": turb_T_hr,
             "nemo var": "turbidity",
             "cmap": cmocean.cm.turbid,
             "depth integrated": False,
-        }
+        },
     }
+    tracer_vars = {
+        tracer: params["dataset"].variables[params["nemo var"]]
+        for tracer, params in image_loops.items()
+    }
+    tracer_clevels = tracer_thalweg_and_surface_hourly.tracers_clevels(
+        tracer_vars,
+        grid,
+        {tracer: params["depth integrated"] for tracer, params in image_loops.items()},
+    )
     for tracer, params in image_loops.items():
-        clevels_thalweg, clevels_surface = tracer_thalweg_and_surface_hourly.clevels(
-            turb_T_hr.variables[params["nemo var"]],
-            mesh_mask,
-            depth_integrated=params["depth integrated"],
-        )
+        clevels_thalweg, clevels_surface = tracer_clevels[tracer]
         fig_functions.update(
             {
                 f"{tracer}_thalweg_and_surface_{yyyymmdd}_{hr:02d}3000_UTC": {
                     "function": tracer_thalweg_and_surface_hourly.make_figure,
                     "args": (
                         hr,
-                        turb_T_hr.variables[params["nemo var"]],
-                        bathy,
-                        mesh_mask,
+                        tracer_vars[tracer],
+                        grid,
                         clevels_thalweg,
                         clevels_surface,
                     ),
@@ -495,7 +484,7 @@ def _prep_nowcast_green_research_fig_functions(
                         "depth_integrated": params["depth integrated"],
                     },
                     "format": "png",
-                    "image loop": True,
+                    "image loop": f"{tracer}_thalweg_and_surface_{yyyymmdd}",
                 }
                 for hr in range(24)
             }
@@ -505,12 +494,29 @@ def _prep_nowcast_green_research_fig_functions(
             f"nowcast-green research render list"
         )
     place = "S3"
-    phys_dataset = xarray.open_dataset(
-        config["figures"]["dataset URLs"]["3d physics fields"]
-    )
-    bio_dataset = xarray.open_dataset(
-        config["figures"]["dataset URLs"]["3d biology fields"]
-    )
+    ts_config = config["figures"]["station time series"]
+    # Update the local station time series store and read the time series from it;
+    # if that fails, the time series figures read the ERDDAP datasets, so that the
+    # failure doesn't abort the rest of the nowcast-green research figures
+    try:
+        if not test_figure_id:
+            # Don't change the production station time series store
+            # when a test figure is rendered
+            station_timeseries.update_station_timeseries(results_dir, ts_config)
+        phys_dataset = bio_dataset = station_timeseries.open_station_timeseries(
+            place, ts_config["storage dir"]
+        )
+    except Exception as e:
+        logger.error(
+            f"{place} station time series update failed: {type(e).__name__} {e}; "
+            f"time series figures will use ERDDAP datasets"
+        )
+        phys_dataset = xarray.open_dataset(
+            config["figures"]["dataset URLs"]["3d physics fields"]
+        )
+        bio_dataset = xarray.open_dataset(
+            config["figures"]["dataset URLs"]["3d biology fields"]
+        )
     fig_functions.update(
         {
             "temperature_salinity_timeseries": {
@@ -588,6 +594,7 @@ def _prep_comparison_fig_functions(
         f"preparing render list for {run_date.format('YYYY-MM-DD')} NEMO nowcast-blue comparison figures"
     )
     hrdps_dataset_url = config["figures"]["dataset URLs"]["HRDPS fields"]
+    local_datasets = config["figures"]["local datasets"]
     if dev_results_home is None:
         dev_grid_T_hr = None
     else:
@@ -597,6 +604,7 @@ def _prep_comparison_fig_functions(
         "SH_wind": {
             "function": sandheads_winds.make_figure,
             "args": (hrdps_dataset_url, run_type, run_date, coastline),
+            "kwargs": {"local_datasets": local_datasets},
         },
         "Compare_VENUS_East": {
             "function": compare_venus_ctd.make_figure,
@@ -608,6 +616,7 @@ def _prep_comparison_fig_functions(
                 mesh_mask,
                 dev_mesh_mask,
             ),
+            "kwargs": {"ctd_config": config["observations"]["ctd data"]},
         },
         "Compare_VENUS_Central": {
             "function": compare_venus_ctd.make_figure,
@@ -619,6 +628,7 @@ def _prep_comparison_fig_functions(
                 mesh_mask,
                 dev_mesh_mask,
             ),
+            "kwargs": {"ctd_config": config["observations"]["ctd data"]},
         },
     }
     for fig_func in fig_functions:
@@ -630,7 +640,15 @@ def _prep_comparison_fig_functions(
 
 
 def _prep_publish_fig_functions(
-    config, bathy, coastline, weather_path, results_dir, run_type, run_date, timezone
+    config,
+    bathy,
+    coastline,
+    weather_path,
+    results_dir,
+    run_type,
+    run_date,
+    timezone,
+    test_figure_id=None,
 ):
     logger.info(
         f"preparing render list for {run_date.format('YYYY-MM-DD')} NEMO {run_type} publish figures"
@@ -638,6 +656,7 @@ def _prep_publish_fig_functions(
     ssh_fcst_dataset_url_tmpl = config["figures"]["dataset URLs"][
         "tide stn ssh time series"
     ]
+    local_datasets = config["figures"]["local datasets"]
     tidal_predictions = Path(config["ssh"]["tidal predictions"])
     forecast_hrs = int(config["run types"][run_type]["duration"] * 24)
     grid_T_hr = _results_dataset("1h", "grid_T", results_dir)
@@ -675,15 +694,40 @@ def _prep_publish_fig_functions(
         name: nc.Dataset(results_dir / "{}.nc".format(name.replace(" ", "")))
         for name in names
     }
+    # Calculate the storm surge summary once for the alerts figures and ATOM feeds;
+    # if that fails, the alerts figures calculate it themselves, so that the failure
+    # is confined to them instead of aborting all of the publish figures
+    try:
+        storm_surge_summary = storm_surge.calc_storm_surge_summary(
+            grids_10m,
+            tidal_predictions,
+            weather_path,
+            places.TIDE_GAUGE_SITES + places.SUPP_TIDE_SITES,
+        )
+    except Exception as e:
+        logger.error(
+            f"{run_type} storm surge summary calculation failed: "
+            f"{type(e).__name__} {e}; alerts figures will calculate it"
+        )
+        storm_surge_summary = None
+    if storm_surge_summary is not None and not test_figure_id:
+        # Don't overwrite the production summary that make_feeds reads
+        # when a test figure is rendered
+        summary_file = storm_surge.write_storm_surge_summary(
+            storm_surge_summary, results_dir
+        )
+        logger.info(f"stored {run_type} storm surge summary in {summary_file}")
     fig_functions = {
         "Website_thumbnail": {
             "function": storm_surge_alerts_thumbnail.make_figure,
             "args": (grids_10m, weather_path, coastline, tidal_predictions),
+            "kwargs": {"storm_surge_summary": storm_surge_summary},
             "format": "png",
         },
         "Threshold_website": {
             "function": storm_surge_alerts.make_figure,
             "args": (grids_10m, weather_path, coastline, tidal_predictions),
+            "kwargs": {"storm_surge_summary": storm_surge_summary},
         },
         "PA_tidal_predictions": {
             "function": pt_atkinson_tide.make_figure,
@@ -708,6 +752,7 @@ def _prep_publish_fig_functions(
                         bathy,
                         grid_T_hr_path,
                     ),
+                    "kwargs": {"local_datasets": local_datasets},
                 }
             }
         )
@@ -717,7 +762,9 @@ def _prep_publish_fig_functions(
     return fig_functions
 
 
-def _prep_wwatch3_publish_fig_functions(wwatch3_dataset_url, run_type, run_date):
+def _prep_wwatch3_publish_fig_functions(
+    wwatch3_dataset_url, local_datasets, run_type, run_date
+):
     logger.info(
         f"preparing render list for {run_date.format('YYYY-MM-DD')} WaveWatch3 {run_type} publish figures"
     )
@@ -729,6 +776,7 @@ def _prep_wwatch3_publish_fig_functions(wwatch3_dataset_url, run_type, run_date)
                 svg_root: {
                     "function": wave_height_period.make_figure,
                     "args": (buoy, wwatch3_dataset_url),
+                    "kwargs": {"local_datasets": local_datasets},
                 }
             }
         )
@@ -745,6 +793,9 @@ def _render_figures(
     logger.info(f"starting to render {model} {run_type} {plot_type} {dmy} figures")
     checklist = {}
     fig_files = []
+    fig_cache = render_cache.RenderCache.from_config(config)
+    fig_cache.prune()
+    image_loops = {}
     for svg_name, func in fig_functions.items():
         fig_func = func["function"]
         args = func.get("args", [])
@@ -762,13 +813,6 @@ def _render_figures(
             )
             if not test_figure:
                 continue
-        logger.debug(f"starting {fig_func.__module__}.{fig_func.__name__}")
-        try:
-            fig = _calc_figure(fig_func, args, kwargs)
-        except FileNotFoundError, IndexError, KeyError, TypeError:
-            # **IMPORTANT**: the collection of exceptions above must match those
-            # handled in the _calc_figure() function
-            continue
         if test_figure:
             fig_files_dir = Path(config["figures"]["test path"], run_type, dmy)
             fig_files_dir.mkdir(parents=True, exist_ok=True)
@@ -779,37 +823,60 @@ def _render_figures(
                 else Path(config["figures"]["storage path"], model, run_type, dmy)
             )
             lib.mkdir(fig_files_dir, logger, grp_name=config["file group"])
-        filename = fig_files_dir / f"{svg_name}_{dmy}.{fig_save_format}"
         if image_loop_figure:
-            filename = fig_files_dir / f"{svg_name}.{fig_save_format}"
-        fig.savefig(
-            os.fspath(filename), facecolor=fig.get_facecolor(), bbox_inches="tight"
-        )
-        logger.debug(f"{filename} saved")
-        matplotlib.pyplot.close(fig)
-        if fig_save_format == "svg":
-            logger.debug(f"starting SVG scouring of {filename}")
-            tmpfilename = filename.with_suffix(".scour")
-            scour = Path(os.environ["NOWCAST_ENV"], "bin", "scour")
-            cmd = f"{scour} {filename} {tmpfilename}"
-            logger.debug(f"running subprocess: {cmd}")
+            # Image loop frames are rendered together after the other figures
+            image_loop = image_loops.setdefault(
+                image_loop_figure,
+                SimpleNamespace(fig_files_dir=fig_files_dir, frames={}),
+            )
+            image_loop.frames[svg_name] = func
+            continue
+        filename = fig_files_dir / f"{svg_name}_{dmy}.{fig_save_format}"
+        cache_key = fig_cache.key(fig_func, args, kwargs, fig_save_format)
+        if fig_cache.fetch(cache_key, filename):
+            logger.debug(f"{filename} linked from render cache")
+        else:
+            logger.debug(f"starting {fig_func.__module__}.{fig_func.__name__}")
             try:
-                proc = subprocess.run(
-                    shlex.split(cmd),
-                    check=True,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    universal_newlines=True,
-                )
-            except subprocess.CalledProcessError as e:
-                logger.warning("SVG scouring failed, proceeding with unscoured figure")
-                logger.debug(f"scour return code: {e.returncode}")
-                if e.output:
-                    logger.debug(e.output)
+                fig = _calc_figure(fig_func, args, kwargs)
+            except FileNotFoundError, IndexError, KeyError, TypeError:
+                # **IMPORTANT**: the collection of exceptions above must match those
+                # handled in the _calc_figure() function
                 continue
-            logger.debug(proc.stdout)
-            tmpfilename.rename(filename)
-            logger.debug(f"{filename} scoured")
+            # filename may be a hard link to a cached figure file that must not be
+            # overwritten
+            filename.unlink(missing_ok=True)
+            fig.savefig(
+                os.fspath(filename), facecolor=fig.get_facecolor(), bbox_inches="tight"
+            )
+            logger.debug(f"{filename} saved")
+            matplotlib.pyplot.close(fig)
+            if fig_save_format == "svg":
+                logger.debug(f"starting SVG scouring of {filename}")
+                tmpfilename = filename.with_suffix(".scour")
+                scour = Path(os.environ["NOWCAST_ENV"], "bin", "scour")
+                cmd = f"{scour} {filename} {tmpfilename}"
+                logger.debug(f"running subprocess: {cmd}")
+                try:
+                    proc = subprocess.run(
+                        shlex.split(cmd),
+                        check=True,
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.PIPE,
+                        universal_newlines=True,
+                    )
+                except subprocess.CalledProcessError as e:
+                    logger.warning(
+                        "SVG scouring failed, proceeding with unscoured figure"
+                    )
+                    logger.debug(f"scour return code: {e.returncode}")
+                    if e.output:
+                        logger.debug(e.output)
+                    continue
+                logger.debug(proc.stdout)
+                tmpfilename.rename(filename)
+                logger.debug(f"{filename} scoured")
+            fig_cache.store(cache_key, filename)
         lib.fix_perms(filename, grp_name=config["file group"])
         fig_files.append(os.fspath(filename))
         fig_path = _render_storm_surge_alerts_thumbnail(
@@ -817,18 +884,146 @@ def _render_figures(
             run_type,
             plot_type,
             dmy,
-            fig,
+            filename,
             svg_name,
-            fig_save_format,
             test_figure,
         )
         if checklist is not None:
             checklist["storm surge alerts thumbnail"] = fig_path
+    for loop_name, image_loop in image_loops.items():
+        fig_files.extend(
+            _render_image_loop(
+                config,
+                loop_name,
+                image_loop.frames,
+                image_loop.fig_files_dir,
+                fig_cache,
+            )
+        )
+    logger.info(f"render cache hits: {fig_cache.hits}, misses: {fig_cache.misses}")
+    checklist[f"{model} {run_type} {plot_type} render cache"] = fig_cache.stats()
     checklist[f"{model} {run_type} {plot_type}"] = fig_files
     logger.info(f"finished rendering {model} {run_type} {plot_type} {dmy} figures")
     return checklist
 
 
+def _render_image_loop(config, loop_name, frames, fig_files_dir, fig_cache):
+    """Render the frames of an image loop in memory and encode them into an
+    animated image file, and optionally into a PNG file per frame.
+    """
+    loop_config = config["figures"]["image loops"]
+    frame_pngs = loop_config["frame pngs"]
+    anim_file = fig_files_dir / f"{loop_name}.{loop_config['animation format']}"
+    frame_keys = {
+        svg_name: fig_cache.key(
+            func["function"], func.get("args", []), func.get("kwargs", {}), "png"
+        )
+        for svg_name, func in frames.items()
+    }
+    anim_key = None
+    if None not in frame_keys.values():
+        anim_key = hashlib.sha256(
+            "\n".join(
+                (
+                    *frame_keys.values(),
+                    anim_file.name,
+                    f"{loop_config['frame duration']}",
+                )
+            ).encode()
+        ).hexdigest()
+    if not frame_pngs and fig_cache.fetch(anim_key, anim_file):
+        logger.debug(f"{anim_file} linked from render cache")
+        lib.fix_perms(anim_file, grp_name=config["file group"])
+        return [os.fspath(anim_file)]
+    fig_files = []
+    images = []
+    for svg_name, func in frames.items():
+        frame_file = fig_files_dir / f"{svg_name}.png"
+        if frame_pngs and fig_cache.fetch(frame_keys[svg_name], frame_file):
+            with PIL.Image.open(frame_file) as image:
+                image.load()
+        else:
+            fig_func = func["function"]
+            logger.debug(f"starting {fig_func.__module__}.{fig_func.__name__}")
+            try:
+                fig = _calc_figure(
+                    fig_func, func.get("args", []), func.get("kwargs", {})
+                )
+            except FileNotFoundError, IndexError, KeyError, TypeError:
+                # **IMPORTANT**: the collection of exceptions above must match those
+                # handled in the _calc_figure() function
+                continue
+            image = _figure_image(fig)
+            matplotlib.pyplot.close(fig)
+            if frame_pngs:
+                _save_image(image, frame_file)
+                logger.debug(f"{frame_file} saved")
+                fig_cache.store(frame_keys[svg_name], frame_file)
+        if frame_pngs:
+            lib.fix_perms(frame_file, grp_name=config["file group"])
+            fig_files.append(os.fspath(frame_file))
+        images.append(image)
+    if not images:
+        return fig_files
+    if len(images) < len(frames):
+        # Don't cache an animation that is missing frames
+        anim_key = None
+    if frame_pngs and fig_cache.fetch(anim_key, anim_file):
+        logger.debug(f"{anim_file} linked from render cache")
+    else:
+        images = _same_size(images)
+        _save_image(
+            images[0],
+            anim_file,
+            save_all=True,
+            append_images=images[1:],
+            duration=loop_config["frame duration"],
+            loop=0,
+        )
+        logger.debug(f"{anim_file} saved with {len(images)} frames")
+        fig_cache.store(anim_key, anim_file)
+    lib.fix_perms(anim_file, grp_name=config["file group"])
+    fig_files.append(os.fspath(anim_file))
+    return fig_files
+
+
+def _figure_image(fig, pad_inches=0.1):
+    """Draw fig into an in-memory RGB image that is cropped to the figure's tight
+    bounding box like :kbd:`savefig(bbox_inches="tight")` does.
+    """
+    fig.canvas.draw()
+    rgba = numpy.asarray(fig.canvas.buffer_rgba())
+    height, width = rgba.shape[:2]
+    bbox = fig.get_tightbbox(fig.canvas.get_renderer()).padded(pad_inches)
+    x0, y0, x1, y1 = bbox.extents * fig.dpi
+    # Image rows are numbered from the top of the figure
+    rows = slice(max(int(height - y1), 0), min(int(numpy.ceil(height - y0)), height))
+    cols = slice(max(int(x0), 0), min(int(numpy.ceil(x1)), width))
+    return PIL.Image.fromarray(rgba[rows, cols, :3].copy())
+
+
+def _same_size(images):
+    size = (max(image.width for image in images), max(image.height for image in images))
+    if all(image.size == size for image in images):
+        return images
+    # Pad smaller frames with the figure background colour
+    background = images[0].getpixel((0, 0))
+    padded = []
+    for image in images:
+        canvas = PIL.Image.new("RGB", size, background)
+        canvas.paste(image)
+        padded.append(canvas)
+    return padded
+
+
+def _save_image(image, image_file, **kwargs):
+    # image_file may be a hard link to a cached figure file that must not be
+    # overwritten
+    tmp_file = image_file.with_name(f".{image_file.name}.tmp")
+    image.save(tmp_file, format=image_file.suffix[1:].upper(), **kwargs)
+    tmp_file.replace(image_file)
+
+
 def _calc_figure(fig_func, args, kwargs):
     try:
         fig = fig_func(*args, **kwargs)
@@ -864,7 +1059,7 @@ def _calc_figure(fig_func, args, kwargs):
 
 
 def _render_storm_surge_alerts_thumbnail(
-    config, run_type, plot_type, dmy, fig, svg_name, fig_save_format, test_figure
+    config, run_type, plot_type, dmy, fig_file, svg_name, test_figure
 ):
     """Undated storm surge alerts thumbnail for storm-surge/index.html page"""
     now = arrow.now()
@@ -895,10 +1090,8 @@ def _render_storm_surge_alerts_thumbnail(
             config["figures"]["storage path"],
             config["figures"]["storm surge info portal path"],
         )
-    undated_thumbnail = dest_dir / f"{thumbnail_root}.{fig_save_format}"
-    fig.savefig(
-        os.fspath(undated_thumbnail), facecolor=fig.get_facecolor(), bbox_inches="tight"
-    )
+    undated_thumbnail = dest_dir / f"{thumbnail_root}{fig_file.suffix}"
+    render_cache.link_or_copy(fig_file, undated_thumbnail)
     lib.fix_perms(undated_thumbnail, grp_name=config["file group"])
     logger.debug(f"{undated_thumbnail} saved")
     return os.fspath(undated_thumbnail)
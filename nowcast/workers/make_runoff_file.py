@@ -40,6 +40,8 @@ from nemo_nowcast import NowcastWorker
 
 from salishsea_tools import rivertools
 
+from nowcast import lib
+
 NAME = "make_runoff_file"
 logger = logging.getLogger(NAME)
 
@@ -573,9 +575,10 @@ def _get_grid_cell_areas(config):
     # TODO: Make getting the coordinates less convoluted
     grid_dir = Path(config["run"]["enabled hosts"]["salish-nowcast"]["grid dir"])
     coords_file = grid_dir / config["run types"]["nowcast-green"]["coordinates"]
-    with xarray.open_dataset(coords_file, decode_times=False) as coords:
-        grid_cell_areas = coords.e1t[0] * coords.e2t[0]
-    return grid_cell_areas.to_numpy()
+    coords = lib.get_grid_arrays(
+        coords_file, ("e1t", "e2t"), cache_dir=config["rivers"]["grid cache dir"]
+    )
+    return coords["e1t"][0] * coords["e2t"][0]
 
 
 def _create_runoff_array(rivers, flows, grid_cell_areas):
@@ -19,30 +19,37 @@ IOS provided the tile specifications and initial code implementation.
 """
 
 import datetime
+import io
 import logging
 import math
 import multiprocessing
 import os
 import shlex
 import subprocess
+import tempfile
+import time
 from glob import glob
 from pathlib import Path
-from queue import Empty
 
 import arrow
 import netCDF4
+import PIL.Image
 import pytz
 from pypdf import PdfWriter
 from matplotlib.backend_bases import FigureCanvasBase
 from nemo_nowcast import NowcastWorker
 
 from nowcast import lib
+from nowcast.figures import website_theme
 from nowcast.figures.publish import surface_current_tiles
 from nowcast.figures.surface_current_domain import tile_coords_dic
 
 NAME = "make_surface_current_tiles"
 logger = logging.getLogger(NAME)
 
+#: File types that the tile figures are saved in
+FILE_TYPES = ("png", "pdf")
+
 
 def main():
     """For command-line usage see:
@@ -159,60 +166,37 @@ def make_surface_current_tiles(parsed_args, config, *args):
         config["figures"]["surface current tiles"]["storage path"], run_type, dmy
     )
     lib.mkdir(storage_path, logger, grp_name=config["file group"])
+    scratch_dir = Path(config["figures"]["surface current tiles"]["scratch dir"])
+    scratch_dir.mkdir(parents=True, exist_ok=True)
 
     # Loop over last 48h and this forecast{,2}
     logger.info(
         f"starting rendering of tiles for {run_date.format('YYYY-MM-DD')} {run_type} "
         f"in {num_procs} processes into {storage_path}"
     )
-    for results_dir in [results_dirm2, results_dirm1, results_dir0]:
-        u_list = glob(os.fspath(results_dir) + "/SalishSea_1h_*_grid_U.nc")
-        v_list = glob(os.fspath(results_dir) + "/SalishSea_1h_*_grid_V.nc")
-
-        Uf = Path(u_list[0])
-        Vf = Path(v_list[0])
-
-        with netCDF4.Dataset(Uf) as dsU:
-            max_time_index = dsU.dimensions["time_counter"].size
-            units = dsU.variables["time_counter"].units
-            calendar = dsU.variables["time_counter"].calendar
-            sec = dsU.variables["time_counter"][:]
-
-        expansion_factor = 0.1  # 10% overlap for each tile
-
-        logger.debug(f"creating figures using {num_procs} concurrent process(es)")
-        # Add tasks to a joinable queue
-        q = multiprocessing.JoinableQueue()
-        for t_index in range(max_time_index):
-            task = (
-                t_index,
-                sec,
-                units,
-                calendar,
-                run_date,
-                Uf,
-                Vf,
-                coordf,
-                mesh_maskf,
-                bathyf,
-                tile_coords_dic,
-                expansion_factor,
-                storage_path,
+    expansion_factor = 0.1  # 10% overlap for each tile
+    with tempfile.TemporaryDirectory(prefix=f"{NAME}_", dir=scratch_dir) as tmp_dir:
+        tasks = []
+        results_dirs = [results_dirm2, results_dirm1, results_dir0]
+        for i, results_dir in enumerate(results_dirs):
+            u_list = glob(os.fspath(results_dir) + "/SalishSea_1h_*_grid_U.nc")
+            v_list = glob(os.fspath(results_dir) + "/SalishSea_1h_*_grid_V.nc")
+
+            Uf = Path(u_list[0])
+            Vf = Path(v_list[0])
+
+            # Prefix with index because forecast2 results dirs have the same name
+            fields_dir = Path(tmp_dir, f"{i}_{results_dir.name}")
+            fields_dir.mkdir()
+            max_time_index = _prepare_fields(
+                Uf, Vf, coordf, mesh_maskf, bathyf, fields_dir
+            )
+            tasks.extend(
+                (t_index, fields_dir, tile_coords_dic, expansion_factor, storage_path)
+                for t_index in range(max_time_index)
             )
-            q.put(task)
-        # Spawn a set of worker processes
-        procs = []
-        for i in range(num_procs):
-            p = multiprocessing.Process(target=_process_time_slice, args=(q,))
-            procs.append(p)
-        # Start each one
-        for p in procs:
-            p.start()
-        # Wait until they complete
-        for p in procs:
-            p.join()
-        # Close the queue
-        q.close()
+
+        rendered, failed = _render_time_slices(tasks, num_procs)
 
     _pdf_concatenate(storage_path, tile_coords_dic)
 
@@ -225,6 +209,8 @@ def make_surface_current_tiles(parsed_args, config, *args):
             "pdf": sorted(
                 [os.fspath(f) for f in storage_path.iterdir() if f.suffix == ".pdf"]
             ),
+            "tiles rendered": rendered,
+            "tiles failed": failed,
         }
     }
     logger.info(
@@ -234,71 +220,139 @@ def make_surface_current_tiles(parsed_args, config, *args):
     return checklist
 
 
-def _process_time_slice(q):
+def _prepare_fields(Uf, Vf, coordf, mesh_maskf, bathyf, fields_dir):
+    """Calculate the rotated and masked surface velocity fields and collect the static
+    grid arrays once for a results directory, and store them as memory-mapped arrays
+    in fields_dir for the tile rendering processes to share.
+
+    :return: Number of time indices in the results files.
+    :rtype: int
     """
-    This is the worker function that gets called for each task in the multiprocessing queue.
+    logger.debug(
+        f"preparing surface velocity fields from {Uf} and {Vf} in {fields_dir}"
+    )
+    surface_current_tiles.prepare_fields(Uf, Vf, coordf, mesh_maskf, bathyf, fields_dir)
+    fields = surface_current_tiles.load_fields(fields_dir)
+    max_time_index = fields.time_counter.size
+    logger.debug(
+        f"prepared {max_time_index} time indices of surface velocity fields "
+        f"in {fields_dir}"
+    )
+    return max_time_index
+
+
+def _render_time_slices(tasks, num_procs):
+    """Render the tile figures for all of the time slice tasks in a pool of
+    num_procs processes that persists across all of the results directories.
+
+    Each process creates the static parts of the tile figures once and re-uses them
+    for all of the tasks that it handles.
+    The tasks are dispatched in chunks to reduce inter-process communication.
+    A task that fails is logged and counted, but does not stop the other tasks.
+
+    :return: Numbers of tile figures rendered and failed, keyed by file type.
+    :rtype: 2-tuple of dict
     """
-    while True:
-        try:
-            task = q.get_nowait()
-            _callMakeFigure(*task)
-            q.task_done()
-        except Empty:
-            break
+    chunksize = max(1, len(tasks) // (4 * num_procs))
+    logger.debug(
+        f"creating figures for {len(tasks)} time slices using {num_procs} concurrent "
+        f"process(es) in chunks of {chunksize}"
+    )
+    rendered = dict.fromkeys(FILE_TYPES, 0)
+    failed = dict.fromkeys(FILE_TYPES, 0)
+    with multiprocessing.Pool(num_procs) as pool:
+        for result in pool.imap_unordered(
+            _process_time_slice, tasks, chunksize=chunksize
+        ):
+            t_index, fields_dir, n_rendered, n_failed, elapsed, error = result
+            for file_type in FILE_TYPES:
+                rendered[file_type] += n_rendered[file_type]
+                failed[file_type] += n_failed[file_type]
+            if error is None:
+                logger.debug(
+                    f"rendered {sum(n_rendered.values())} tiles for time index {t_index} "
+                    f"from {fields_dir.name} in {elapsed:.1f}s"
+                )
+            else:
+                logger.error(
+                    f"rendering of tiles for time index {t_index} from "
+                    f"{fields_dir.name} failed after {elapsed:.1f}s: {error}"
+                )
+    logger.info(
+        f"rendered {rendered['png']} png and {rendered['pdf']} pdf tile figures; "
+        f"{failed['png']} png and {failed['pdf']} pdf failed"
+    )
+    return rendered, failed
+
+
+def _process_time_slice(task):
+    """
+    This is the worker function that gets called for each task in the multiprocessing pool.
+    Exceptions are caught and returned so that a bad time slice is reported instead of
+    terminating the process.
+
+    :return: Time index, fields directory, numbers of tile figures rendered and failed
+             keyed by file type, elapsed time in seconds, and error message,
+             or None if the task succeeded.
+    :rtype: 6-tuple
+    """
+    t_index, fields_dir, tile_coords_dic = task[:3]
+    rendered = dict.fromkeys(FILE_TYPES, 0)
+    t_start = time.perf_counter()
+    error = None
+    try:
+        _callMakeFigure(*task, rendered=rendered)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    failed = {
+        file_type: len(tile_coords_dic) - rendered[file_type]
+        for file_type in FILE_TYPES
+    }
+    return t_index, fields_dir, rendered, failed, time.perf_counter() - t_start, error
 
 
 def _callMakeFigure(
     t_index,
-    sec,
-    units,
-    calendar,
-    run_date,
-    Uf,
-    Vf,
-    coordf,
-    mesh_maskf,
-    bathyf,
+    fields_dir,
     tile_coords_dic,
     expansion_factor,
     storage_path,
+    rendered=None,
 ):
     """
-    Calls the make_figure() function in the surface_currents_tiles module for time index t_index.
-    make_figure() function is called once to produce figures with website theme and called again
-    to produce figures in pdf format.
+    Updates the tile figures for time index t_index using the velocity fields prepared
+    in fields_dir and saves them.
+    The website theme tile figures are saved in png format,
+    and the un-themed tile figures are saved in pdf format.
+    The static parts of the tile figures are created on the first call in each process
+    and re-used for all subsequent time indices.
+    The number of tile figures saved in each format is counted in the rendered dict.
     """
-    date_stamp = _getTimeFileName(sec[t_index], units, calendar)
-
-    # make website theme version
-    fig_list, tile_names = surface_current_tiles.make_figure(
-        run_date,
-        t_index,
-        Uf,
-        Vf,
-        coordf,
-        mesh_maskf,
-        bathyf,
-        tile_coords_dic,
-        expansion_factor,
-    )
-    _render_figures(fig_list, tile_names, storage_path, date_stamp, "png")
-    del fig_list
-
-    # make pdf version
-    fig_list, tile_names = surface_current_tiles.make_figure(
-        run_date,
-        t_index,
-        Uf,
-        Vf,
-        coordf,
-        mesh_maskf,
-        bathyf,
-        tile_coords_dic,
-        expansion_factor,
-        theme=None,
+    if rendered is None:
+        rendered = dict.fromkeys(FILE_TYPES, 0)
+    fields = surface_current_tiles.load_fields(fields_dir)
+    date_stamp = _getTimeFileName(
+        fields.time_counter[t_index], fields.units, fields.calendar
     )
-    _render_figures(fig_list, tile_names, storage_path, date_stamp, "pdf")
-    del fig_list
+
+    for file_type, theme in (
+        ("png", website_theme),
+        ("pdf", None),
+    ):
+        if file_type not in _tile_figures:
+            _tile_figures[file_type] = surface_current_tiles.make_tile_figures(
+                fields, tile_coords_dic, expansion_factor, theme=theme
+            )
+        fig_list, tile_names = surface_current_tiles.update_tile_figures(
+            _tile_figures[file_type], t_index, fields
+        )
+        _render_figures(
+            fig_list, tile_names, storage_path, date_stamp, file_type, rendered
+        )
+
+
+# Persistent tile figures for the process, keyed by file type
+_tile_figures = {}
 
 
 def _getTimeFileName(sec, units, calendar):
@@ -318,49 +372,48 @@ def _getTimeFileName(sec, units, calendar):
     return time_utc
 
 
-def _render_figures(fig_list, tile_names, storage_path, date_stamp, file_type):
+def _render_figures(
+    fig_list, tile_names, storage_path, date_stamp, file_type, rendered
+):
     for fig, name in zip(fig_list, tile_names):
         ftile = "surface_currents_tile{:02d}_{}_UTC.{}".format(
             int(name[4:]), date_stamp, file_type
         )
         outfile = Path(storage_path, ftile)
-        FigureCanvasBase(fig).print_figure(
-            os.fspath(outfile), facecolor=fig.get_facecolor()
-        )
-        logger.debug(f"{outfile} saved")
-
         if file_type == "png":
-            _apply_pngquant(outfile, 16)
+            buffer = io.BytesIO()
+            FigureCanvasBase(fig).print_figure(
+                buffer, format="png", facecolor=fig.get_facecolor()
+            )
+            _quantize_png(buffer, outfile, 16)
+        else:
+            FigureCanvasBase(fig).print_figure(
+                os.fspath(outfile), facecolor=fig.get_facecolor()
+            )
+        rendered[file_type] += 1
+        logger.debug(f"{outfile} saved")
 
 
-def _apply_pngquant(outfile, level):
+def _quantize_png(buffer, outfile, level):
     """
-    Run lossy compression (pngquant) on png frames to reduce their size.
+    Apply lossy palette compression to a png frame rendered into buffer and save it
+    in outfile.
     The argument "level" specifies the number of colours to include in the
     palette. For surface current tiles, 16 is a good choice, and this reduces
     frame size by about a factor of 5.
     """
-    logger.debug(f"starting pngquant compression ({level} bits) for {outfile.name}")
-    tmpfilename = outfile.with_suffix(".pngquant")
-    cmd = f"pngquant --ext .pngquant {level} {outfile}"
-    logger.debug(f"running subprocess: {cmd}")
-    try:
-        proc = subprocess.run(
-            shlex.split(cmd),
-            check=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            universal_newlines=True,
-        )
-    except subprocess.CalledProcessError as e:
-        logger.warning("pngquant compression failed, proceeding with original frame")
-        logger.debug(f"pngquant return code: {e.returncode}")
-        if e.output:
-            logger.debug(e.output)
-        return
-    if proc.stdout:
-        logger.debug(proc.stdout)
-    tmpfilename.rename(outfile)
+    logger.debug(f"starting palette compression ({level} colours) for {outfile.name}")
+    buffer.seek(0)
+    with PIL.Image.open(buffer) as image:
+        try:
+            quantized = image.convert("RGB").quantize(colors=level)
+        except (OSError, ValueError) as e:
+            logger.warning("palette compression failed, proceeding with original frame")
+            logger.debug(e)
+            buffer.seek(0)
+            outfile.write_bytes(buffer.getvalue())
+            return
+    quantized.save(outfile, format="png", optimize=True)
     logger.debug(f"{outfile.name} palette compression succeeded")
 
 
@@ -22,6 +22,7 @@ and Climate Change Canada Fraser River water quality buoy.
 """
 
 import datetime as dt
+import io
 import logging
 import os
 from pathlib import Path
@@ -30,9 +31,10 @@ import arrow
 import netCDF4 as nc
 import numpy as np
 import pandas as pd
-import pytz
 from nemo_nowcast import NowcastWorker
 
+from nowcast import lib
+
 NAME = "make_turbidity_file"
 logger = logging.getLogger(NAME)
 
@@ -120,26 +122,24 @@ def make_turbidity_file(parsed_args, config, *args):
     dest_dir = Path(config["rivers"]["turbidity"]["forcing dir"])
     file_tmpl = config["rivers"]["turbidity"]["file template"]
     nc_filepath = os.fspath(dest_dir / file_tmpl.format(run_date.date()))
-    _writeTFile(nc_filepath, iTurb)
+    grid = lib.get_grid_arrays(
+        config["rivers"]["turbidity"]["grid file"],
+        ("nav_lat", "nav_lon", "time_counter"),
+        cache_dir=config["rivers"]["grid cache dir"],
+    )
+    _writeTFile(nc_filepath, iTurb, grid)
     logger.debug(f"stored Fraser River turbidity forcing file: {nc_filepath}")
     checklist = nc_filepath
     return checklist
 
 
 def _loadturb(idate, turbidity_csv, mthresh, ymd):
-    # Read file into pandas dataframe
-    tdf = pd.read_csv(turbidity_csv, header=0, dtype={"water depth units": str})
-    tdf["dtdate"] = pd.to_datetime(
-        tdf["# date"] + " " + tdf["time"], format="%Y-%m-%d %H:%M:%S"
-    )
-    tdf["DD"] = [_dateTimeToDecDay(jj) for jj in _pacToUTC(tdf["dtdate"].values)]
-    # Select current 24 hr period + extra for interpolation
-    # this will break if np.datetime64 string format changes
+    # Read the tail of the file that covers the current 24 hr period + extra for
+    # interpolation into pandas dataframe
+    start_DD = idate - 1.0 - mthresh / 24
+    tdf = _read_turbidity_tail(turbidity_csv, start_DD)
     tdf2 = (
-        tdf.loc[
-            (tdf["DD"] > (idate - 1.0 - mthresh / 24))
-            & (tdf["DD"] <= (idate + mthresh / 24))
-        ]
+        tdf.loc[(tdf["DD"] > start_DD) & (tdf["DD"] <= (idate + mthresh / 24))]
         .sort_values("DD")
         .copy()
     )
@@ -158,68 +158,53 @@ def _loadturb(idate, turbidity_csv, mthresh, ymd):
     return tdf2
 
 
+def _read_turbidity_tail(turbidity_csv, start_DD, block_size=64 * 1024):
+    # Rows are appended to the file in time order, so read blocks of increasing size
+    # back from the end of the file until they reach back to start_DD,
+    # instead of parsing the whole multi-year record
+    with open(turbidity_csv, "rb") as f:
+        header = f.readline()
+        data_start = f.tell()
+        file_size = f.seek(0, os.SEEK_END)
+        while True:
+            offset = max(file_size - block_size, data_start)
+            f.seek(offset)
+            data = f.read()
+            if offset > data_start:
+                # Drop the partial line at the start of the block
+                data = data.partition(b"\n")[2]
+            tdf = pd.read_csv(
+                io.BytesIO(header + data), header=0, dtype={"water depth units": str}
+            )
+            tdf["dtdate"] = pd.to_datetime(
+                tdf["# date"] + " " + tdf["time"], format="%Y-%m-%d %H:%M:%S"
+            )
+            tdf["DD"] = _dateTimeToDecDay(_pacToUTC(tdf["dtdate"]))
+            if offset == data_start or tdf["DD"].min() <= start_DD:
+                return tdf
+            block_size *= 4
+
+
 def _interpTurb(tdf2, idate, mthresh):
+    n_pad = int(mthresh)
     dfout = pd.DataFrame(
-        index=range(int(mthresh) * 2 + 24), columns=("hDD", "turbidity")
+        {"hDD": idate - 1 + (np.arange(n_pad * 2 + 24) - n_pad) / 24.0}
     )
-    dfout["hDD"] = [
-        idate - 1 + (ind - int(mthresh)) / 24.0 for ind in range(len(dfout))
-    ]
-    iout = 0
-    for ind, row in tdf2.iterrows():
-        if ind == 0:
-            ddlast = row["DD"]
-        if (dfout.loc[iout]["hDD"] - ddlast) < 0:
-            # insert NaNs if no data at beginning of cycle
-            nint = int(np.round((ddlast - dfout.loc[iout]["hDD"]) * 24))
-            for ii in range(0, nint):
-                iout += 1
-        if ((row["DD"] - ddlast) < mthresh / 24.0) & (
-            (row["DD"] - ddlast) > 1.5 / 24.0
-        ):
-            # if a break consists of 4 missing data points or less, linearly
-            # interpolate through
-            tlast = tdf2.loc[ind - 1]["turbidity"]
-            tnext = row["turbidity"]
-            ddnext = row["DD"]
-            nint = int(np.round((ddnext - ddlast) * 24) - 1)
-            for ii in range(1, nint + 1):
-                dd0 = ddlast + ii / 24.0
-                tur0 = tlast + (dd0 - ddlast) / (ddnext - ddlast) * (tnext - tlast)
-                if (dfout.loc[iout]["hDD"] - dd0) < 0.5 / 24.0:
-                    dfout.loc[iout, "turbidity"] = tur0
-                    iout += 1
-                else:
-                    msg = (
-                        f"Anticipated and output hour were consistent: "
-                        f'{dfout.loc[iout]["hDD"]} {dd0} '
-                        f'{dfout.loc[iout]["hDD"] - dd0}'
-                    )
-                    logger.error(msg)
-                    raise ValueError(msg)
-        elif (row["DD"] - ddlast) >= mthresh / 24.0:
-            # insert NaNs in larger holes
-            nint = int(np.round((row["DD"] - ddlast) * 24) - 1)
-            for ii in range(1, nint + 1):
-                dd0 = ddlast + ii / 24.0
-                if (dfout.loc[iout]["hDD"] - dd0) < 0.5 / 24.0:
-                    iout += 1
-                else:
-                    msg = "Anticipated and output hour were consistent"
-                    logger.error(msg)
-                    raise ValueError(msg)
-        # always append current tdf2 row's value
-        if np.abs(dfout.loc[iout]["hDD"] - row["DD"]) < 0.5 / 24.0:
-            dfout.loc[iout, "turbidity"] = row["turbidity"]
-        else:
-            msg = (
-                f"Anticipated and output hour were consistent: "
-                f'iout={iout} ind={ind} {dfout.loc[iout]["hDD"]} {row["DD"]}'
-            )
-            logger.error(msg)
-            raise ValueError(msg)
-        iout += 1
-        ddlast = row["DD"]
+    # Put each observation on the nearest hour of the output grid
+    iout = np.round((tdf2["DD"].to_numpy() - dfout["hDD"].iloc[0]) * 24).astype(int)
+    on_grid = (iout >= 0) & (iout < len(dfout))
+    turbidity = pd.Series(
+        tdf2["turbidity"].to_numpy(dtype=float)[on_grid], index=iout[on_grid]
+    )
+    turbidity = turbidity[~turbidity.index.duplicated(keep="last")]
+    turbidity = turbidity.reindex(dfout.index)
+    # If a break consists of 4 missing data points or less, linearly interpolate
+    # through it; larger holes, and hours before the first and after the last
+    # data points stay NaN
+    missing = turbidity.isna()
+    gap_lengths = missing.groupby((~missing).cumsum()).transform("sum")
+    interpolated = turbidity.interpolate(method="linear", limit_area="inside")
+    dfout["turbidity"] = interpolated.where(~missing | (gap_lengths < n_pad))
     logger.debug("interpolated turbidity data")
     return dfout
 
@@ -243,59 +228,62 @@ def _calcAvgT(dfout, mthresh, ymd):
     return iTurb
 
 
-def _writeTFile(
-    fname, iTurb, dimTemplate="/results/forcing/rivers/RLonFraCElse_y2016m01d23.nc"
-):
-    f = nc.Dataset(dimTemplate)  # example for dims
-    new = nc.Dataset(fname, "w")
-
-    # Copy dimensions
-    for dname, the_dim in f.dimensions.items():
-        new.createDimension(dname, len(the_dim) if not the_dim.isunlimited() else None)
-    # create dimension variables:
-    new_x = new.createVariable("nav_lat", np.float32, ("y", "x"), zlib=True)
-    new_x[:] = f.variables["nav_lat"][:, :]
-    new_y = new.createVariable("nav_lon", np.float32, ("y", "x"), zlib=True)
-    new_y[:] = f.variables["nav_lon"][:, :]
-    new_tc = new.createVariable("time_counter", np.float32, "time_counter", zlib=True)
-    new_tc[:] = f.variables["time_counter"][:]
-    new_run = new.createVariable("turb", float, ("time_counter", "y", "x"), zlib=True)
-    new_run[:, :, :] = -999.99  # most cells are masked with negative numbers
-    new_run[:, 400:448, 338:380] = iTurb  # set turbidity to daily average
-
-    new.close()
+def _writeTFile(fname, iTurb, grid):
+    """
+    :param str fname:
+    :param float iTurb:
+    :param dict grid: nav_lat, nav_lon, and time_counter arrays of the
+                      turbidity forcing grid.
+    """
+    ny, nx = grid["nav_lat"].shape
+    with nc.Dataset(fname, "w") as new:
+        new.createDimension("time_counter", None)
+        new.createDimension("y", ny)
+        new.createDimension("x", nx)
+        for name, dims in (("nav_lat", ("y", "x")), ("nav_lon", ("y", "x"))):
+            var = new.createVariable(name, np.float32, dims, zlib=True)
+            var[:] = grid[name]
+        new_tc = new.createVariable(
+            "time_counter", np.float32, "time_counter", zlib=True
+        )
+        new_tc[:] = grid["time_counter"]
+        # Cells outside of the Fraser River mouth patch are left unwritten
+        # so that they read as the fill value without being stored
+        new_turb = new.createVariable(
+            "turb",
+            np.float32,
+            ("time_counter", "y", "x"),
+            zlib=True,
+            complevel=4,
+            shuffle=True,
+            chunksizes=(1, min(ny, 128), min(nx, 128)),
+            fill_value=np.float32(-999.99),
+        )
+        # set turbidity to daily average at all times
+        new_turb[: len(grid["time_counter"]), 400:448, 338:380] = iTurb
     logger.debug(f"wrote file to {fname}")
-    return
 
 
 def _dateTimeToDecDay(dtin):
-    tdif = dtin - dt.datetime(1900, 1, 1)
-    dd = tdif.days + tdif.seconds / (3600 * 24)
-    return dd
-
-
-def _pacToUTC(pactime0):
-    # input datetime object without tzinfo in Pacific Time and
-    # output datetime object (or np array of them) without tzinfo in UTC
-    pactime = np.array(pactime0, ndmin=1)
-    if pactime.ndim > 1:
-        raise Exception("Error: ndim>1")
-    # handle case where array of numpy.datetime64 is input:
-    # this will break if np.datetime64 string format changes
-    if isinstance(pactime[0], np.datetime64):
-        pactime2 = [
-            dt.datetime.strptime(str(d)[:19], "%Y-%m-%dT%H:%M:%S") for d in pactime
-        ]
-        pactime = np.array(pactime2)
-    out = np.empty(pactime.shape, dtype=object)
-    pac = pytz.timezone("Canada/Pacific")
-    utc = pytz.utc
-    for ii in range(0, len(pactime)):
-        itime = pactime[ii]
-        loc_t = pac.localize(itime)
-        utc_t = loc_t.astimezone(utc)
-        out[ii] = utc_t.replace(tzinfo=None)
-    return out[0] if np.isscalar(pactime0) else out
+    # Works for a datetime or a series of them
+    return (dtin - dt.datetime(1900, 1, 1)) / dt.timedelta(days=1)
+
+
+def _pacToUTC(pactime):
+    # input series of datetimes without tzinfo in Pacific Time and
+    # output series of datetimes without tzinfo in UTC;
+    # like pytz localize(), ambiguous times at the end of daylight time are taken
+    # as standard time, and non-existent times at the start of daylight time are
+    # shifted forward by 1 hour
+    return (
+        pactime.dt.tz_localize(
+            "Canada/Pacific",
+            ambiguous=np.zeros(len(pactime), dtype=bool),
+            nonexistent=pd.Timedelta(hours=1),
+        )
+        .dt.tz_convert("UTC")
+        .dt.tz_localize(None)
+    )
 
 
 if __name__ == "__main__":
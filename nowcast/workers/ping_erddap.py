@@ -14,6 +14,10 @@
 #  limitations under the License.
 """SalishSeaCast worker that creates flag files to tell the ERDDAP server
 to reload datasets for which new results have been downloaded.
+
+If the dataset has a manifest in the :kbd:`erddap: manifest dir` directory,
+the paths of the files that have been recorded in it since the dataset was
+last pinged are written into the flag files.
 """
 
 import logging
@@ -21,6 +25,8 @@ from pathlib import Path
 
 from nemo_nowcast import NowcastWorker
 
+from nowcast import erddap_manifest
+
 NAME = "ping_erddap"
 logger = logging.getLogger(NAME)
 
@@ -84,14 +90,20 @@ def ping_erddap(parsed_args, config, *args):
     dataset = parsed_args.dataset
     flag_path = Path(config["erddap"]["flag dir"])
     checklist = {dataset: []}
+    manifest = erddap_manifest.Manifest.from_config(config, dataset)
+    new_files = [] if manifest is None else manifest.unpublished()
+    flag_contents = "".join(f"{record['path']}\n" for record in new_files)
     try:
         for dataset_id in config["erddap"]["datasetIDs"][dataset]:
-            (flag_path / dataset_id).touch()
+            (flag_path / dataset_id).write_text(flag_contents)
             logger.debug(f"{flag_path / dataset_id} touched")
             checklist[dataset].append(dataset_id)
     except KeyError:
         # run type is not in datasetIDs dict
         pass
+    if manifest is not None:
+        manifest.mark_published(new_files)
+        logger.debug(f"published {len(new_files)} new {dataset} file(s)")
     return checklist
 
 
@@ -399,6 +399,7 @@ def _build_script(run_dir, run_type, run_desc_filepath, results_dir, host_name,
     xios_processors = int(run_desc["output"]["XIOS servers"])
     email = host_config.get("email", "nobody@example.com")
     xios_host = host_config.get("xios host")
+    pipelined = config["run types"][run_type].get("pipelined results", False)
     script = "#!/bin/bash\n"
     if host_config["job exec cmd"] == "qsub":
         script = "\n".join(
@@ -415,6 +416,8 @@ def _build_script(run_dir, run_type, run_desc_filepath, results_dir, host_name,
                 ),
             )
         )
+    if pipelined:
+        script = "\n".join((script, _stage_closed_results()))
     script = "\n".join(
         (
             script,
@@ -431,12 +434,17 @@ def _build_script(run_dir, run_type, run_desc_filepath, results_dir, host_name,
                     host_name,
                     config,
                 ),
-                execute=_execute(nemo_processors, xios_processors, xios_host),
+                execute=_execute(
+                    nemo_processors, xios_processors, xios_host, pipelined
+                ),
                 fix_permissions=_fix_permissions(),
                 cleanup=_cleanup(),
             ),
         )
     )
+    if pipelined:
+        # Exit with NEMO's exit status, not that of the last post-processing command
+        script = "\n".join((script, "exit ${MPIRUN_EXIT_CODE}\n"))
     return script
 
 
@@ -463,10 +471,33 @@ def _definitions(
         mpirun=mpirun,
         salishsea_cmd=host_config["salishsea_cmd"],
     )
+    if config["run types"][run_type].get("pipelined results", False):
+        defns += f'DEFLATE="{host_config["salishsea_cmd"]} deflate"\n'
     return defns
 
 
-def _execute(nemo_processors, xios_processors, xios_host):
+def _stage_closed_results():
+    # Deflate XIOS day-chunk output files and move them to the results directory.
+    # A chunk is closed when XIOS has started writing the next chunk of its stream,
+    # or when the run has ended and the function is called with the final argument.
+    script = (
+        "stage_closed_results() {\n"
+        "  shopt -s nullglob\n"
+        "  local chunk stream newest\n"
+        "  for chunk in *_[0-9]*-[0-9]*.nc; do\n"
+        "    stream=${chunk%_*-*.nc}\n"
+        "    newest=$(ls ${stream}_[0-9]*-[0-9]*.nc | sort | tail -n 1)\n"
+        '    if [[ "$1" == "final" || "${chunk}" != "${newest}" ]]; then\n'
+        "      ${DEFLATE} ${chunk} --debug >>${RESULTS_DIR}/stdout 2>>${RESULTS_DIR}/stderr \\\n"
+        "        && mv ${chunk} ${RESULTS_DIR}/\n"
+        "    fi\n"
+        "  done\n"
+        "}\n"
+    )
+    return script
+
+
+def _execute(nemo_processors, xios_processors, xios_host, pipelined=False):
     mpirun = (
         f"${{MPIRUN}} -np {nemo_processors} --bind-to none ./nemo.exe : "
         f"-np {xios_processors} --bind-to none ./xios_server.exe"
@@ -485,9 +516,30 @@ def _execute(nemo_processors, xios_processors, xios_host):
         "\n"
         'echo "Starting run at $(date)" >>${RESULTS_DIR}/stdout\n'
     )
-    script += f"{mpirun} >>${{RESULTS_DIR}}/stdout 2>>${{RESULTS_DIR}}/stderr\n"
+    if pipelined:
+        # Stage the day-chunks of the run's results while NEMO runs in the background;
+        # the short sleep ends polling soon after NEMO does
+        script += (
+            f"{mpirun} >>${{RESULTS_DIR}}/stdout 2>>${{RESULTS_DIR}}/stderr &\n"
+            "NEMO_PID=$!\n"
+            "while kill -0 ${NEMO_PID} 2>/dev/null; do\n"
+            "  sleep 5\n"
+            "  stage_closed_results\n"
+            "done\n"
+            "wait ${NEMO_PID}\n"
+            "MPIRUN_EXIT_CODE=$?\n"
+        )
+    else:
+        script += f"{mpirun} >>${{RESULTS_DIR}}/stdout 2>>${{RESULTS_DIR}}/stderr\n"
+    script += 'echo "Ended run at $(date)" >>${RESULTS_DIR}/stdout\n'
+    if pipelined:
+        script += (
+            "\n"
+            'echo "Results staging started at $(date)" >>${RESULTS_DIR}/stdout\n'
+            "stage_closed_results final\n"
+            'echo "Results staging ended at $(date)" >>${RESULTS_DIR}/stdout\n'
+        )
     script += (
-        'echo "Ended run at $(date)" >>${RESULTS_DIR}/stdout\n'
         "\n"
         'echo "Results combining started at $(date)" >>${RESULTS_DIR}/stdout\n'
         "${COMBINE} ${RUN_DESC} --debug >>${RESULTS_DIR}/stdout\n"
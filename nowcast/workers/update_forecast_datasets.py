@@ -27,6 +27,8 @@ from pathlib import Path
 import arrow
 from nemo_nowcast import NowcastWorker
 
+from nowcast import erddap_manifest
+
 NAME = "update_forecast_datasets"
 logger = logging.getLogger(NAME)
 
@@ -102,6 +104,10 @@ def update_forecast_datasets(parsed_args, config, *args):
     forecast_dir = Path(config["rolling forecasts"][model]["dest dir"])
     _update_rolling_forecast(run_date, forecast_dir, model, run_type, config)
     updated_dirs.append(os.fspath(forecast_dir))
+    # The rolling forecast directory is replaced by each update
+    erddap_manifest.record_files(
+        config, f"{model}-forecast", sorted(forecast_dir.glob("*.nc")), replace=True
+    )
     checklist = {model: {run_type: updated_dirs}}
     return checklist
 
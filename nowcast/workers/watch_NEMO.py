@@ -31,6 +31,8 @@ import arrow
 import f90nml
 from nemo_nowcast import NowcastWorker
 
+from nowcast import run_telemetry
+
 NAME = "watch_NEMO"
 logger = logging.getLogger(NAME)
 
@@ -79,7 +81,9 @@ def watch_NEMO(parsed_args, config, tell_manager):
     run_type = parsed_args.run_type
     run_info = tell_manager("need", "NEMO run").payload
     run_date = arrow.get(run_info[run_type]["run date"])
+    throughput = run_telemetry.RunThroughput.from_config(config, run_type, host_name)
     pid = _find_run_pid(run_info[run_type])
+    throughput.run_started()
     logger.debug(f"{run_type} on {host_name}: run pid: {pid}")
     # Get run time steps and date info from namelist
     run_dir = Path(run_info[run_type]["run dir"])
@@ -98,10 +102,13 @@ def watch_NEMO(parsed_args, config, tell_manager):
                 "YYYY-MM-DD HH:mm:ss UTC"
             )
             fraction_done = (time_step - it000) / (itend - it000)
+            progress = throughput.update(time_step, it000, itend)
             msg = (
                 f"{run_type} on {host_name}: timestep: "
                 f"{time_step} = {model_time}, {fraction_done:.1%} complete"
+                f"{throughput.progress_msg(progress)}"
             )
+            throughput.log_stall(progress, f"{run_type} on {host_name}")
         except FileNotFoundError:
             # time.step file not found; assume that run is young and it
             # hasn't been created yet, or has finished and it has been
@@ -112,6 +119,7 @@ def watch_NEMO(parsed_args, config, tell_manager):
             )
         logger.info(msg)
         time.sleep(POLL_INTERVAL)
+    throughput.run_finished()
     checklist = {
         run_type: {"host": host_name, "run date": run_date.format("YYYY-MM-DD")}
     }
@@ -125,6 +133,9 @@ def watch_NEMO(parsed_args, config, tell_manager):
     checklist[run_type]["completed"] = _confirm_run_success(
         host_name, run_type, run_date, run_dir, itend, restart_timestep, config
     )
+    checklist[run_type]["performance"] = throughput.record(
+        run_date, checklist[run_type]["completed"]
+    )
     return checklist
 
 
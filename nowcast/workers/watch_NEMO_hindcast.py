@@ -27,11 +27,15 @@ import attr
 import f90nml
 from nemo_nowcast import NowcastWorker, WorkerError
 
-from nowcast import ssh_sftp
+from nowcast import run_telemetry, ssh_sftp
 
 NAME = "watch_NEMO_hindcast"
 logger = logging.getLogger(NAME)
 
+#: Interval in seconds at which keep-alive packets are sent to the HPC host
+#: so that the connection is not dropped between polls
+KEEPALIVE_INTERVAL = 60
+
 
 def main():
     """For command-line usage see:
@@ -91,39 +95,83 @@ def watch_NEMO_hindcast(parsed_args, config, *args):
     queue_info_cmd = config["run"]["hindcast hosts"][host_name][
         "queue info cmd"
     ].rsplit("/", 1)[-1]
+    throughput = run_telemetry.RunThroughput.from_config(config, "hindcast", host_name)
+    job = None
     try:
-        ssh_client, sftp_client = ssh_sftp.sftp(host_name, ssh_key)
+        ssh_client, sftp_client = ssh_sftp.sftp(
+            host_name, ssh_key, keepalive_interval=KEEPALIVE_INTERVAL
+        )
         job = hpc_job_classes[queue_info_cmd](
-            ssh_client, sftp_client, host_name, users, scratch_dir, run_id
+            ssh_client,
+            sftp_client,
+            host_name,
+            users,
+            scratch_dir,
+            run_id,
+            throughput=throughput,
         )
         job.get_run_id()
-        while job.is_queued():
+        while _poll(job, job.is_queued, ssh_key):
             time.sleep(60 * 5)
+        throughput.run_started()
         job.get_tmp_run_dir()
         job.get_run_info()
-        while job.is_running():
-            time.sleep(60 * 5)
+        while _poll(job, job.is_running, ssh_key):
+            # Poll more often as the run approaches its predicted finish time
+            time.sleep(throughput.poll_interval(default=60 * 5))
+        throughput.run_finished()
         while True:
-            completion_state = job.get_completion_state()
+            completion_state = _poll(job, job.get_completion_state, ssh_key)
             if completion_state == "completed":
                 break
             if completion_state in {"cancelled", "aborted"}:
                 raise WorkerError
             time.sleep(60)
     finally:
+        if job is not None:
+            # The job's clients are replaced if the connection is re-established
+            ssh_client, sftp_client = job.ssh_client, job.sftp_client
         sftp_client.close()
         ssh_client.close()
+    run_date = arrow.get(job.run_id[:7], "DDMMMYY")
     checklist = {
         "hindcast": {
             "host": job.host_name,
             "run id": job.run_id,
-            "run date": arrow.get(job.run_id[:7], "DDMMMYY").format("YYYY-MM-DD"),
+            "run date": run_date.format("YYYY-MM-DD"),
             "completed": completion_state == "completed",
+            "performance": throughput.record(run_date, completion_state == "completed"),
         }
     }
     return checklist
 
 
+def _poll(job, poll_method, ssh_key):
+    """Call one of the job's polling methods, re-connecting to the HPC host and
+    calling it again if the connection has been dropped.
+
+    :param job: Hindcast job that poll_method is bound to.
+    :param poll_method: Job method to call.
+    :param :py:class:`pathlib.Path` ssh_key:
+
+    :return: Return value of poll_method.
+    """
+    try:
+        return poll_method()
+    except ssh_sftp.CONNECTION_ERRORS as exc:
+        logger.warning(f"lost connection to {job.host_name}: {exc}; re-connecting")
+    for client in (job.sftp_client, job.ssh_client):
+        try:
+            client.close()
+        except Exception:
+            # Connection is already broken
+            pass
+    job.ssh_client, job.sftp_client = ssh_sftp.sftp(
+        job.host_name, ssh_key, keepalive_interval=KEEPALIVE_INTERVAL
+    )
+    return poll_method()
+
+
 @attr.s
 class _QstatHindcastJob:
     """Interact with the hindcast job on an HPC host that uses :command:`qstat`."""
@@ -140,6 +188,7 @@ class _QstatHindcastJob:
     itend = attr.ib(default=None, type=int)
     date0 = attr.ib(default=None, type=arrow.Arrow)
     rdt = attr.ib(default=None, type=float)
+    throughput = attr.ib(default=None, type=run_telemetry.RunThroughput)
 
     def get_run_id(self):
         """Query the queue manager to get the job id, and the salishsea run id
@@ -211,34 +260,32 @@ class _QstatHindcastJob:
         :return: Flag indicating whether or not run is in R state
         :rtype: boolean
         """
-        if self._get_job_state() != "R":
+        # Get the queue state, time step, and ocean.output errors in 1 round trip
+        probe = ssh_sftp.remote_probe(
+            self.ssh_client,
+            {
+                "queue info": self._queue_info_cmd(),
+                "time step": f"cat {self.tmp_run_dir}/time.step",
+                "ocean output errors": f"grep 'E R R O R' {self.tmp_run_dir}/ocean.output",
+            },
+            self.host_name,
+            logger,
+        )
+        if self._get_job_state(probe["queue info"]) != "R":
             return False
         # Keep checking until we find a time.step file
-        try:
-            time_step_file = ssh_sftp.ssh_exec_command(
-                self.ssh_client,
-                f"cat {self.tmp_run_dir}/time.step",
-                self.host_name,
-                logger,
-            )
-        except ssh_sftp.SSHCommandError:
+        if probe["time step"].status != 0:
             logger.info(
                 f"{self.run_id} on {self.host_name}: time.step not found; continuing to watch..."
             )
             return True
-        self._report_progress(time_step_file)
-        # grep ocean.output file for "E R R O R" lines
-        try:
-            ocean_output_errors = ssh_sftp.ssh_exec_command(
-                self.ssh_client,
-                f"grep 'E R R O R' {self.tmp_run_dir}/ocean.output",
-                self.host_name,
-                logger,
-            )
-        except ssh_sftp.SSHCommandError:
+        self._report_progress(probe["time step"].output)
+        # grep exit status is 1 if there are no "E R R O R" lines in ocean.output,
+        # and 2 if ocean.output is not found
+        if probe["ocean output errors"].status > 1:
             logger.error(f"{self.run_id} on {self.host_name}: ocean.output not found")
             return False
-        error_lines = ocean_output_errors.splitlines()
+        error_lines = probe["ocean output errors"].output.splitlines()
         if not error_lines:
             return True
         # Cancel run if "E R R O R" in ocean.output
@@ -252,14 +299,19 @@ class _QstatHindcastJob:
         )
         return False
 
-    def _get_job_state(self):
-        """Query the queue manger to get the state of the hindcast run.
+    def _get_job_state(self, queue_probe=None):
+        """Query the queue manager to get the state of the hindcast run.
+
+        :param queue_probe: Result of the queue info command from
+                            :py:func:`nowcast.ssh_sftp.remote_probe`.
+                            If :py:obj:`None`, the queue manager is queried.
+        :type queue_probe: :py:class:`types.SimpleNamespace`
 
         :return: Run state reported by queue manager or "UNKNOWN" if the job is not on the queue.
         :rtype: str
         """
         try:
-            queue_info = self._get_queue_info()
+            queue_info = self._get_queue_info(queue_probe)
             state = queue_info.split()[9]
         except WorkerError, AttributeError:
             # job has disappeared from the queue; finished or cancelled
@@ -270,17 +322,26 @@ class _QstatHindcastJob:
         return state
 
     def _report_progress(self, time_step_file):
-        """Calculate and log run progress based on value in time.step file."""
+        """Calculate and log run progress based on value in time.step file,
+        and the time step rate and predicted finish time if a throughput tracker
+        is set.
+        """
         time_step = int(time_step_file.splitlines()[0].strip())
         model_seconds = (time_step - self.it000) * self.rdt
         model_time = self.date0.shift(seconds=model_seconds).format(
             "YYYY-MM-DD HH:mm:ss UTC"
         )
         fraction_done = (time_step - self.it000) / (self.itend - self.it000)
+        progress_msg = ""
+        if self.throughput is not None:
+            progress = self.throughput.update(time_step, self.it000, self.itend)
+            progress_msg = self.throughput.progress_msg(progress)
         logger.info(
             f"{self.run_id} on {self.host_name}: timestep: "
-            f"{time_step} = {model_time}, {fraction_done:.1%} complete"
+            f"{time_step} = {model_time}, {fraction_done:.1%} complete{progress_msg}"
         )
+        if self.throughput is not None:
+            self.throughput.log_stall(progress, f"{self.run_id} on {self.host_name}")
 
     def get_completion_state(self):
         """TORQUE/MOAB doesn't provide a way to query resource use records for the completion
@@ -322,20 +383,57 @@ class _QstatHindcastJob:
                 logger.error(line)
             raise WorkerError
 
-    def _get_queue_info(self):
-        """Query the queue manager to get the state of the hindcast run.
+    def _probe_stdout(self, probe, accept_stderr=""):
+        """Get the output of a :py:func:`nowcast.ssh_sftp.remote_probe` command,
+        handling command failure the same way as :py:meth:`_ssh_exec_command`.
 
-        :return: None or 1 line of output from queue info command that describes
-                 the run's state
+        :param :py:class:`types.SimpleNamespace` probe:
+        :param str accept_stderr:
+
+        :raise: WorkerError
+
+        :return: Output from the probe command.
+        :rtype: str with newline separators
+        """
+        if not probe.stderr:
+            return probe.output
+        for line in probe.stderr.splitlines():
+            if accept_stderr and line.startswith(accept_stderr):
+                return probe.output
+            logger.error(line)
+        raise WorkerError
+
+    def _queue_info_cmd(self):
+        """
+        :return: Queue info command for the hindcast run.
         :rtype: str
         """
         squeue_cmd = "/usr/bin/qstat -a"
-        cmd = (
+        return (
             f"{squeue_cmd} -u {self.users}"
             if self.job_id is None
             else f"{squeue_cmd} {self.job_id}"
         )
-        stdout = self._ssh_exec_command(cmd, accept_stderr="qstat: Unknown Job Id")
+
+    def _get_queue_info(self, queue_probe=None):
+        """Query the queue manager to get the state of the hindcast run.
+
+        :param queue_probe: Result of the queue info command from
+                            :py:func:`nowcast.ssh_sftp.remote_probe`.
+                            If :py:obj:`None`, the queue manager is queried.
+        :type queue_probe: :py:class:`types.SimpleNamespace`
+
+        :return: None or 1 line of output from queue info command that describes
+                 the run's state
+        :rtype: str
+        """
+        accept_stderr = "qstat: Unknown Job Id"
+        if queue_probe is None:
+            stdout = self._ssh_exec_command(
+                self._queue_info_cmd(), accept_stderr=accept_stderr
+            )
+        else:
+            stdout = self._probe_stdout(queue_probe, accept_stderr)
         if not stdout:
             if self.job_id is None:
                 logger.error(f"no jobs found on {self.host_name} queue")
@@ -372,6 +470,7 @@ class _SqueueHindcastJob:
     itend = attr.ib(default=None, type=int)
     date0 = attr.ib(default=None, type=arrow.Arrow)
     rdt = attr.ib(default=None, type=float)
+    throughput = attr.ib(default=None, type=run_telemetry.RunThroughput)
 
     def get_run_id(self):
         """Query the queue manager to get the job id, and the salishsea run id
@@ -447,34 +546,32 @@ class _SqueueHindcastJob:
         :return: Flag indicating whether or not run is in RUNNING state
         :rtype: boolean
         """
-        if self._get_job_state() != "RUNNING":
+        # Get the queue state, time step, and ocean.output errors in 1 round trip
+        probe = ssh_sftp.remote_probe(
+            self.ssh_client,
+            {
+                "queue info": self._queue_info_cmd(),
+                "time step": f"cat {self.tmp_run_dir}/time.step",
+                "ocean output errors": f"grep 'E R R O R' {self.tmp_run_dir}/ocean.output",
+            },
+            self.host_name,
+            logger,
+        )
+        if self._get_job_state(probe["queue info"]) != "RUNNING":
             return False
         # Keep checking until we find a time.step file
-        try:
-            time_step_file = ssh_sftp.ssh_exec_command(
-                self.ssh_client,
-                f"cat {self.tmp_run_dir}/time.step",
-                self.host_name,
-                logger,
-            )
-        except ssh_sftp.SSHCommandError:
+        if probe["time step"].status != 0:
             logger.info(
                 f"{self.run_id} on {self.host_name}: time.step not found; continuing to watch..."
             )
             return True
-        self._report_progress(time_step_file)
-        # grep ocean.output file for "E R R O R" lines
-        try:
-            ocean_output_errors = ssh_sftp.ssh_exec_command(
-                self.ssh_client,
-                f"grep 'E R R O R' {self.tmp_run_dir}/ocean.output",
-                self.host_name,
-                logger,
-            )
-        except ssh_sftp.SSHCommandError:
+        self._report_progress(probe["time step"].output)
+        # grep exit status is 1 if there are no "E R R O R" lines in ocean.output,
+        # and 2 if ocean.output is not found
+        if probe["ocean output errors"].status > 1:
             logger.error(f"{self.run_id} on {self.host_name}: ocean.output not found")
             return False
-        error_lines = ocean_output_errors.splitlines()
+        error_lines = probe["ocean output errors"].output.splitlines()
         if not error_lines:
             return True
         # Cancel run if "E R R O R" in ocean.output
@@ -497,14 +594,19 @@ class _SqueueHindcastJob:
         self.get_run_info()
         return True
 
-    def _get_job_state(self):
+    def _get_job_state(self, queue_probe=None):
         """Query the queue manager to get the state of the hindcast run.
 
+        :param queue_probe: Result of the queue info command from
+                            :py:func:`nowcast.ssh_sftp.remote_probe`.
+                            If :py:obj:`None`, the queue manager is queried.
+        :type queue_probe: :py:class:`types.SimpleNamespace`
+
         :return: Run state reported by queue manager or "UNKNOWN" if the job is not on the queue.
         :rtype: str
         """
         try:
-            queue_info = self._get_queue_info()
+            queue_info = self._get_queue_info(queue_probe)
             state = queue_info.split()[2]
         except WorkerError, AttributeError:
             # job has disappeared from the queue; finished or cancelled
@@ -515,17 +617,26 @@ class _SqueueHindcastJob:
         return state
 
     def _report_progress(self, time_step_file):
-        """Calculate and log run progress based on value in time.step file."""
+        """Calculate and log run progress based on value in time.step file,
+        and the time step rate and predicted finish time if a throughput tracker
+        is set.
+        """
         time_step = int(time_step_file.splitlines()[0].strip())
         model_seconds = (time_step - self.it000) * self.rdt
         model_time = self.date0.shift(seconds=model_seconds).format(
             "YYYY-MM-DD HH:mm:ss UTC"
         )
         fraction_done = (time_step - self.it000) / (self.itend - self.it000)
+        progress_msg = ""
+        if self.throughput is not None:
+            progress = self.throughput.update(time_step, self.it000, self.itend)
+            progress_msg = self.throughput.progress_msg(progress)
         logger.info(
             f"{self.run_id} on {self.host_name}: timestep: "
-            f"{time_step} = {model_time}, {fraction_done:.1%} complete"
+            f"{time_step} = {model_time}, {fraction_done:.1%} complete{progress_msg}"
         )
+        if self.throughput is not None:
+            self.throughput.log_stall(progress, f"{self.run_id} on {self.host_name}")
 
     def _handle_stuck_job(self):
         """Exactly 1 "E R R O R" line is usually a symptom of a run that got stuck
@@ -602,21 +713,52 @@ class _SqueueHindcastJob:
                 logger.error(line)
             raise WorkerError
 
-    def _get_queue_info(self):
-        """Query the queue manager to get the state of the hindcast run.
+    def _probe_stdout(self, probe):
+        """Get the output of a :py:func:`nowcast.ssh_sftp.remote_probe` command,
+        handling command failure the same way as :py:meth:`_ssh_exec_command`.
 
-        :return: None or 1 line of output from queue info command that describes
-                 the run's state
+        :param :py:class:`types.SimpleNamespace` probe:
+
+        :raise: WorkerError
+
+        :return: Output from the probe command.
+        :rtype: str with newline separators
+        """
+        if not probe.stderr:
+            return probe.output
+        for line in probe.stderr.splitlines():
+            logger.error(line)
+        raise WorkerError
+
+    def _queue_info_cmd(self):
+        """
+        :return: Queue info command for the hindcast run.
         :rtype: str
         """
         squeue_cmd = f"/opt/software/slurm/bin/squeue --user {self.users}"
         queue_info_format = '--Format "jobid,name,state,reason,starttime"'
-        cmd = (
+        return (
             f"{squeue_cmd} {queue_info_format}"
             if self.job_id is None
             else f"{squeue_cmd} --job {self.job_id} {queue_info_format}"
         )
-        stdout = self._ssh_exec_command(cmd)
+
+    def _get_queue_info(self, queue_probe=None):
+        """Query the queue manager to get the state of the hindcast run.
+
+        :param queue_probe: Result of the queue info command from
+                            :py:func:`nowcast.ssh_sftp.remote_probe`.
+                            If :py:obj:`None`, the queue manager is queried.
+        :type queue_probe: :py:class:`types.SimpleNamespace`
+
+        :return: None or 1 line of output from queue info command that describes
+                 the run's state
+        :rtype: str
+        """
+        if queue_probe is None:
+            stdout = self._ssh_exec_command(self._queue_info_cmd())
+        else:
+            stdout = self._probe_stdout(queue_probe)
         if len(stdout.splitlines()) == 1:
             if self.job_id is None:
                 logger.error(f"no jobs found on {self.host_name} queue")
@@ -0,0 +1,86 @@
+#  Copyright 2013 – present by the SalishSeaCast Project contributors
+#  and The University of British Columbia
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Unit tests for SalishSeaCast tracer_thalweg_and_surface_hourly figure module."""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from nowcast.figures.research import tracer_thalweg_and_surface_hourly
+
+
+def _calc_clevels(plot_data):
+    """Contour levels calculation that tracers_clevels() replaced."""
+    percent_98_thalweg = np.percentile(
+        np.ma.masked_values(plot_data.tracer_hr, 0).compressed(), 98
+    )
+    percent_2_thalweg = np.percentile(
+        np.ma.masked_values(plot_data.tracer_hr, 0).compressed(), 2
+    )
+    percent_98_surf = np.percentile(plot_data.surface_hr.compressed(), 98)
+    percent_2_surf = np.percentile(plot_data.surface_hr.compressed(), 2)
+    clevels_thalweg = np.arange(
+        percent_2_thalweg,
+        percent_98_thalweg,
+        (percent_98_thalweg - percent_2_thalweg) / 20.0,
+    )
+    clevels_surface = np.arange(
+        percent_2_surf, percent_98_surf, (percent_98_surf - percent_2_surf) / 20.0
+    )
+    return clevels_thalweg, clevels_surface
+
+
+@pytest.fixture
+def grid():
+    tmask = np.ones((4, 810, 400))
+    tmask[:, :, :100] = 0
+    tmask[2:, 300:500, :] = 0
+    return SimpleNamespace(tmask=tmask, e3t_1d=np.array([1.0, 1.5, 2.0, 3.0]))
+
+
+@pytest.fixture
+def tracer_var(grid):
+    rng = np.random.default_rng(42)
+    values = rng.uniform(1, 30, (1, *grid.tmask.shape))
+    values[0][grid.tmask == 0] = 0
+    # Values that np.ma.masked_values(..., 0) treats as 0
+    values[0, 0, 250:260, 200:210] = 1e-10
+    missing = np.zeros_like(values, dtype=bool)
+    missing[0, :, 600:610, 200:300] = True
+    return np.ma.masked_array(values, missing)
+
+
+class TestTracersClevels:
+    """Unit tests for tracers_clevels() function."""
+
+    @pytest.mark.parametrize("depth_integrated", [False, True])
+    def test_same_as_calc_clevels(self, depth_integrated, tracer_var, grid):
+        plot_data = tracer_thalweg_and_surface_hourly._prep_plot_data(
+            0, tracer_var, grid, depth_integrated
+        )
+        expected_thalweg, expected_surface = _calc_clevels(plot_data)
+
+        tracer_clevels = tracer_thalweg_and_surface_hourly.tracers_clevels(
+            {"tracer": tracer_var}, grid, {"tracer": depth_integrated}
+        )
+
+        clevels_thalweg, clevels_surface = tracer_clevels["tracer"]
+        np.testing.assert_allclose(clevels_thalweg, expected_thalweg)
+        np.testing.assert_allclose(clevels_surface, expected_surface)
@@ -0,0 +1,180 @@
+#  Copyright 2013 – present by the SalishSeaCast Project contributors
+#  and The University of British Columbia
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Unit tests for SalishSeaCast erddap_datasets module."""
+
+from types import SimpleNamespace
+
+import arrow
+import numpy
+import pandas
+import pytest
+import xarray
+
+from nowcast import erddap_datasets
+
+
+def _write_ssh_file(nc_filepath, start, periods):
+    times = pandas.date_range(start, periods=periods, freq="10min")
+    ds = xarray.Dataset(
+        {"sossheig": (("time_counter", "y", "x"), numpy.ones((periods, 1, 1)))},
+        coords={"time_counter": times},
+    )
+    nc_filepath.parent.mkdir(parents=True, exist_ok=True)
+    ds.to_netcdf(nc_filepath)
+
+
+@pytest.fixture
+def local_datasets(tmp_path):
+    return {
+        "response cache dir": tmp_path / "cache",
+        "response cache max age": 60,
+        "datasets": {
+            "ubcSSf{place}SSH10m": {
+                "files": str(tmp_path / "rolling-forecasts/*/{place}.nc"),
+                "rename": {
+                    "time_counter": "time",
+                    "sossheig": "ssh",
+                    "y": "gridY",
+                    "x": "gridX",
+                },
+            },
+            "ubcSSaSurfaceAtmosphereFieldsV23-02": {
+                "files": str(tmp_path / "hrdps_{:y%Ym%md%d}.nc"),
+                "rename": {"time_counter": "time"},
+            },
+        },
+    }
+
+
+class TestOpenDataset:
+    """Unit tests for open_dataset() function."""
+
+    def test_local_files(self, local_datasets, tmp_path):
+        # Day directories that don't sort in time order, with overlapping times
+        _write_ssh_file(
+            tmp_path / "rolling-forecasts/01dec24/PointAtkinson.nc", "2024-12-01", 12
+        )
+        _write_ssh_file(
+            tmp_path / "rolling-forecasts/30nov24/PointAtkinson.nc",
+            "2024-11-30 23:00",
+            12,
+        )
+
+        ds = erddap_datasets.open_dataset(
+            "https://salishsea.eos.ubc.ca/erddap/griddap/ubcSSf{place}SSH10m",
+            local_datasets,
+            place="PointAtkinson",
+        )
+
+        assert set(ds.dims) == {"time", "gridY", "gridX"}
+        assert ds.time.size == 18
+        assert ds.time.values[0] == numpy.datetime64("2024-11-30T23:00")
+        assert ds.time.values[-1] == numpy.datetime64("2024-12-01T01:50")
+        assert "ssh" in ds.data_vars
+
+    def test_local_files_by_date(self, local_datasets, tmp_path):
+        for day in ("2024-12-01", "2024-12-02"):
+            times = pandas.date_range(day, periods=24, freq="1h")
+            xarray.Dataset(
+                {"u_wind": ("time_counter", numpy.zeros(24))},
+                coords={"time_counter": times},
+            ).to_netcdf(tmp_path / f"hrdps_y{day[:4]}m{day[5:7]}d{day[8:]}.nc")
+
+        ds = erddap_datasets.open_dataset(
+            "https://salishsea.eos.ubc.ca/erddap/griddap/ubcSSaSurfaceAtmosphereFieldsV23-02",
+            local_datasets,
+            time_range=(arrow.get("2024-12-01"), arrow.get("2024-12-02")),
+        )
+
+        assert ds.time.size == 48
+
+    def test_missing_day_opens_erddap(self, local_datasets, monkeypatch):
+        opened = []
+        monkeypatch.setattr(
+            erddap_datasets.xarray, "open_dataset", lambda url: opened.append(url)
+        )
+
+        erddap_datasets.open_dataset(
+            "https://salishsea.eos.ubc.ca/erddap/griddap/ubcSSaSurfaceAtmosphereFieldsV23-02",
+            local_datasets,
+            time_range=(arrow.get("2024-12-01"), arrow.get("2024-12-01")),
+        )
+
+        assert opened == [
+            "https://salishsea.eos.ubc.ca/erddap/griddap/ubcSSaSurfaceAtmosphereFieldsV23-02"
+        ]
+
+    def test_no_local_datasets_opens_erddap(self, monkeypatch):
+        opened = []
+        monkeypatch.setattr(
+            erddap_datasets.xarray, "open_dataset", lambda url: opened.append(url)
+        )
+
+        erddap_datasets.open_dataset(
+            "https://salishsea.eos.ubc.ca/erddap/griddap/ubcSSf{place}SSH10m",
+            place="PointAtkinson",
+        )
+
+        assert opened == [
+            "https://salishsea.eos.ubc.ca/erddap/griddap/ubcSSfPointAtkinsonSSH10m"
+        ]
+
+
+class TestDownloadDataset:
+    """Unit tests for download_dataset() function."""
+
+    @staticmethod
+    @pytest.fixture
+    def mock_requests_get(tmp_path, monkeypatch):
+        requests = []
+        nc_bytes = xarray.Dataset({"ssh": ("time", numpy.zeros(3))}).to_netcdf()
+
+        def _mock_requests_get(url):
+            requests.append(url)
+            return SimpleNamespace(content=nc_bytes, raise_for_status=lambda: None)
+
+        monkeypatch.setattr(erddap_datasets.requests, "get", _mock_requests_get)
+        return requests
+
+    def test_cached_download_reused(self, local_datasets, mock_requests_get):
+        for _ in range(2):
+            ds = erddap_datasets.download_dataset(
+                "https://salishsea.eos.ubc.ca/erddap/griddap/ubcSSf{place}SSH10m",
+                local_datasets,
+                place="Victoria",
+            )
+
+        assert ds.ssh.size == 3
+        assert mock_requests_get == [
+            "https://salishsea.eos.ubc.ca/erddap/griddap/ubcSSfVictoriaSSH10m.nc"
+        ]
+        assert (
+            local_datasets["response cache dir"] / "ubcSSfVictoriaSSH10m.nc"
+        ).exists()
+
+    def test_stale_download_replaced(self, local_datasets, mock_requests_get):
+        local_datasets["response cache max age"] = 0
+        for _ in range(2):
+            erddap_datasets.download_dataset(
+                "https://salishsea.eos.ubc.ca/erddap/griddap/ubcSSf{place}SSH10m",
+                local_datasets,
+                place="Victoria",
+            )
+
+        assert len(mock_requests_get) == 2
@@ -0,0 +1,159 @@
+#  Copyright 2013 – present by the SalishSeaCast Project contributors
+#  and The University of British Columbia
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Unit tests for SalishSeaCast erddap_manifest module."""
+
+import datetime
+import hashlib
+
+import arrow
+import numpy
+import pandas
+import pytest
+import xarray
+
+from nowcast import erddap_manifest
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    return erddap_manifest.Manifest(tmp_path / "manifests" / "nowcast-green.jsonl")
+
+
+def _write_results(results_dir, day):
+    """Write an hourly grid_T results file for day."""
+    yyyymmdd = day.replace("-", "")
+    results_dir.mkdir(parents=True, exist_ok=True)
+    nc_path = results_dir / f"SalishSea_1h_{yyyymmdd}_{yyyymmdd}_grid_T.nc"
+    xarray.Dataset(
+        {"votemper": (("time_counter", "y", "x"), numpy.zeros((24, 2, 3)))},
+        coords={
+            "time_counter": pandas.date_range(f"{day} 00:30", periods=24, freq="1h")
+        },
+    ).to_netcdf(nc_path)
+    return nc_path
+
+
+class TestFromConfig:
+    """Unit tests for Manifest.from_config() method."""
+
+    def test_manifest(self, tmp_path):
+        config = {"erddap": {"manifest dir": tmp_path}}
+
+        manifest = erddap_manifest.Manifest.from_config(config, "SCVIP-CTD")
+
+        assert manifest.path == tmp_path / "SCVIP-CTD.jsonl"
+
+    def test_no_manifest_dir(self):
+        config = {"erddap": {"flag dir": "flag/"}}
+
+        assert erddap_manifest.Manifest.from_config(config, "SCVIP-CTD") is None
+
+
+class TestUpdate:
+    """Unit tests for Manifest.update() method."""
+
+    def test_file_record(self, manifest, tmp_path):
+        nc_path = _write_results(tmp_path / "20nov24", "2024-11-20")
+
+        (record,) = manifest.update([nc_path])
+
+        assert record["seq"] == 1
+        assert record["path"] == str(nc_path)
+        assert record["time start"] == "2024-11-20T00:30:00"
+        assert record["time end"] == "2024-11-20T23:30:00"
+        assert record["size"] == nc_path.stat().st_size
+        assert record["variables"] == ["votemper"]
+        assert record["sha256"] == hashlib.sha256(nc_path.read_bytes()).hexdigest()
+        assert manifest.records() == {str(nc_path): record}
+
+    def test_unchanged_file_not_recorded_again(self, manifest, tmp_path):
+        nc_path = _write_results(tmp_path / "20nov24", "2024-11-20")
+        manifest.update([nc_path])
+
+        assert manifest.update([nc_path]) == []
+        assert len(manifest.path.read_text().splitlines()) == 1
+
+    def test_changed_file_recorded_again(self, manifest, tmp_path):
+        nc_path = _write_results(tmp_path / "20nov24", "2024-11-20")
+        manifest.update([nc_path])
+        nc_path.unlink()
+        _write_results(tmp_path / "20nov24", "2024-11-20")
+
+        (record,) = manifest.update([nc_path])
+
+        assert record["seq"] == 2
+        assert manifest.records()[str(nc_path)]["seq"] == 2
+
+    def test_replace(self, manifest, tmp_path):
+        old_path = _write_results(tmp_path / "19nov24", "2024-11-19")
+        new_path = _write_results(tmp_path / "20nov24", "2024-11-20")
+        manifest.update([old_path])
+
+        manifest.update([new_path], replace=True)
+
+        assert list(manifest.records()) == [str(new_path)]
+
+
+class TestCovering:
+    """Unit tests for Manifest.covering() method."""
+
+    def test_covering(self, manifest, tmp_path):
+        nc_paths = [
+            _write_results(tmp_path / day, day)
+            for day in ("2024-11-20", "2024-11-18", "2024-11-19")
+        ]
+        manifest.update(nc_paths)
+
+        files = manifest.covering(
+            datetime.datetime(2024, 11, 18, 12), arrow.get("2024-11-19 12:00")
+        )
+
+        assert files == [nc_paths[1], nc_paths[2]]
+
+
+class TestPublish:
+    """Unit tests for Manifest.unpublished() & Manifest.mark_published() methods."""
+
+    def test_unpublished_delta(self, manifest, tmp_path):
+        first = _write_results(tmp_path / "19nov24", "2024-11-19")
+        manifest.update([first])
+        manifest.mark_published(manifest.unpublished())
+        second = _write_results(tmp_path / "20nov24", "2024-11-20")
+        manifest.update([first, second])
+
+        assert [record["path"] for record in manifest.unpublished()] == [str(second)]
+
+    def test_dropped_seq_not_reused(self, manifest, tmp_path):
+        first = _write_results(tmp_path / "19nov24", "2024-11-19")
+        second = _write_results(tmp_path / "20nov24", "2024-11-20")
+        manifest.update([first, second])
+        manifest.mark_published(manifest.unpublished())
+        manifest.update([first], replace=True)
+        third = _write_results(tmp_path / "21nov24", "2024-11-21")
+
+        manifest.update([first, third])
+
+        assert [record["path"] for record in manifest.unpublished()] == [str(third)]
+
+
+class TestRecordFiles:
+    """Unit test for record_files() function."""
+
+    def test_no_manifest_dir(self, tmp_path):
+        assert erddap_manifest.record_files({}, "nowcast-green", [tmp_path]) == []
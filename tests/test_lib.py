@@ -0,0 +1,220 @@
+#  Copyright 2013 – present by the SalishSeaCast Project contributors
+#  and The University of British Columbia
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Unit tests for SalishSeaCast lib module."""
+
+from types import SimpleNamespace
+
+import numpy
+import pandas
+import pytest
+import xarray
+
+from nowcast import lib
+
+
+class TestNEMOGridLocator:
+    """Unit tests for NEMOGridLocator class."""
+
+    lons, lats = numpy.meshgrid(
+        numpy.linspace(-124, -123, 11), numpy.linspace(49, 50, 11)
+    )
+    tmask = numpy.ones_like(lons, dtype=int)
+    tmask[:, :3] = 0
+
+    def test_query(self):
+        locator = lib.NEMOGridLocator(self.lons, self.lats, self.tmask)
+
+        js, is_ = locator.query(
+            numpy.array([-123.51, -123.1]), numpy.array([49.49, 49.8])
+        )
+
+        numpy.testing.assert_array_equal(js, [5, 8])
+        numpy.testing.assert_array_equal(is_, [5, 9])
+
+    def test_query_nearest_wet_point(self):
+        locator = lib.NEMOGridLocator(self.lons, self.lats, self.tmask)
+
+        js, is_ = locator.query(numpy.array([-124.0]), numpy.array([49.5]))
+
+        numpy.testing.assert_array_equal(js, [5])
+        numpy.testing.assert_array_equal(is_, [3])
+
+    def test_query_nan(self):
+        locator = lib.NEMOGridLocator(self.lons, self.lats, self.tmask)
+
+        js, is_ = locator.query(
+            numpy.array([numpy.nan, -123.0]), numpy.array([49.5, 50.0])
+        )
+
+        numpy.testing.assert_array_equal(js, [-1, 10])
+        numpy.testing.assert_array_equal(is_, [-1, 10])
+
+    def test_query_max_distance(self):
+        locator = lib.NEMOGridLocator(self.lons, self.lats, self.tmask)
+
+        js, is_ = locator.query(
+            numpy.array([-124.0, -123.0]), numpy.array([49.5, 50.0]), max_distance=1000
+        )
+
+        numpy.testing.assert_array_equal(js, [-1, 10])
+        numpy.testing.assert_array_equal(is_, [-1, 10])
+
+
+class TestGreatCircleDistance:
+    """Unit tests for great_circle_distance() function."""
+
+    def test_great_circle_distance(self):
+        distances = lib.great_circle_distance(
+            numpy.array([-123.0, -123.0, numpy.nan]),
+            numpy.array([49.0, 50.0, 49.0]),
+            -123.0,
+            49.0,
+        )
+
+        numpy.testing.assert_allclose(
+            distances[:2], [0, numpy.radians(1) * lib.EARTH_RADIUS]
+        )
+        assert numpy.isnan(distances[2])
+
+
+class TestLocateInGeofences:
+    """Unit tests for locate_in_geofences() function."""
+
+    def test_locate_in_geofences(self):
+        geofences = [
+            SimpleNamespace(lon=-123.0, lat=49.0, radius=1000),
+            SimpleNamespace(lon=-124.0, lat=49.5, radius=1000),
+            SimpleNamespace(lon=-124.0, lat=49.505, radius=1000),
+        ]
+
+        indices = lib.locate_in_geofences(
+            numpy.array([-123.001, -124.0, -124.0, -123.5, numpy.nan]),
+            numpy.array([49.001, 49.503, 49.513, 49.0, 49.0]),
+            geofences,
+        )
+
+        assert indices.dtype == numpy.int16
+        numpy.testing.assert_array_equal(indices, [0, 1, 2, -1, -1])
+
+
+class TestResampleStats:
+    """Unit tests for resample_stats() function."""
+
+    @pytest.mark.parametrize("freq", ("1min", "15min"))
+    def test_same_as_xarray_resample(self, freq):
+        rng = numpy.random.default_rng(42)
+        times = pandas.date_range("2024-07-13 00:00:07", periods=300, freq="7s")
+        # Leave a gap with no values, and include some NaNs
+        times = times[(times < "2024-07-13 00:10") | (times > "2024-07-13 00:20")]
+        values = rng.normal(29.5, 0.1, times.size)
+        values[::17] = numpy.nan
+        data_array = xarray.DataArray(
+            name="salinity", data=values, coords={"time": times}, dims="time"
+        )
+
+        stats = lib.resample_stats(data_array, freq)
+
+        resampled = data_array.resample(time=freq)
+        xarray.testing.assert_allclose(stats.mean, resampled.mean())
+        xarray.testing.assert_allclose(stats.std_dev, resampled.std())
+        # xarray counts for bins with no values are NaN
+        xarray.testing.assert_equal(
+            stats.sample_count, resampled.count().fillna(0).astype("int32")
+        )
+        assert stats.sample_count.dtype == numpy.int32
+
+    def test_all_nan(self):
+        times = pandas.date_range("2024-07-13 00:00", periods=120, freq="1s")
+        data_array = xarray.DataArray(
+            name="salinity",
+            data=numpy.full(times.size, numpy.nan),
+            coords={"time": times},
+            dims="time",
+        )
+
+        stats = lib.resample_stats(data_array, "1min")
+
+        assert stats.mean.time.size == 2
+        assert numpy.isnan(stats.mean).all()
+        assert numpy.isnan(stats.std_dev).all()
+        numpy.testing.assert_array_equal(stats.sample_count, [0, 0])
+
+    def test_empty(self):
+        data_array = xarray.DataArray(
+            name="salinity",
+            data=numpy.empty(0),
+            coords={"time": numpy.empty(0, dtype="datetime64[ns]")},
+            dims="time",
+        )
+
+        with pytest.raises(ValueError):
+            lib.resample_stats(data_array, "1min")
+
+
+class TestGetGridArrays:
+    """Unit tests for get_grid_arrays() function."""
+
+    @staticmethod
+    def _write_grid_file(nc_file, e1t):
+        xarray.Dataset(
+            {
+                "e1t": (("t", "y", "x"), numpy.full((1, 3, 2), e1t)),
+                "e2t": (("t", "y", "x"), numpy.full((1, 3, 2), 500.0)),
+            }
+        ).to_netcdf(nc_file)
+
+    def test_no_cache_dir(self, tmp_path):
+        nc_file = tmp_path / "coords.nc"
+        self._write_grid_file(nc_file, 400.0)
+
+        arrays = lib.get_grid_arrays.__wrapped__(nc_file, ("e1t", "e2t"))
+
+        numpy.testing.assert_array_equal(arrays["e1t"], numpy.full((1, 3, 2), 400.0))
+        numpy.testing.assert_array_equal(arrays["e2t"], numpy.full((1, 3, 2), 500.0))
+        assert not arrays["e1t"].flags.writeable
+
+    def test_cache_file(self, tmp_path):
+        nc_file = tmp_path / "coords.nc"
+        self._write_grid_file(nc_file, 400.0)
+        cache_dir = tmp_path / "grid_cache"
+
+        lib.get_grid_arrays.__wrapped__(nc_file, ("e1t", "e2t"), cache_dir)
+        nc_file.unlink()
+        arrays = lib.get_grid_arrays.__wrapped__(nc_file, ("e1t", "e2t"), cache_dir)
+
+        assert (cache_dir / "coords_e1t_e2t.npz").exists()
+        numpy.testing.assert_array_equal(arrays["e1t"], numpy.full((1, 3, 2), 400.0))
+
+    def test_stale_cache_file(self, tmp_path):
+        nc_file = tmp_path / "coords.nc"
+        self._write_grid_file(nc_file, 400.0)
+        cache_dir = tmp_path / "grid_cache"
+        lib.get_grid_arrays.__wrapped__(nc_file, ("e1t", "e2t"), cache_dir)
+        nc_file.unlink()
+        self._write_grid_file(nc_file, 450.0)
+
+        arrays = lib.get_grid_arrays.__wrapped__(nc_file, ("e1t", "e2t"), cache_dir)
+
+        numpy.testing.assert_array_equal(arrays["e1t"], numpy.full((1, 3, 2), 450.0))
+
+    def test_no_nc_file_or_cache_file(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            lib.get_grid_arrays.__wrapped__(
+                tmp_path / "coords.nc", ("e1t",), tmp_path / "grid_cache"
+            )
@@ -0,0 +1,179 @@
+#  Copyright 2013 – present by the SalishSeaCast Project contributors
+#  and The University of British Columbia
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Unit tests for SalishSeaCast observations module."""
+
+import arrow
+import numpy
+import pandas
+import pytest
+import xarray
+
+from nowcast import observations
+
+
+def _write_ctd_file(nc_filepath, day):
+    times = pandas.date_range(day, periods=96, freq="15min")
+    ds = xarray.Dataset(
+        {
+            "temperature": ("time", numpy.linspace(9, 10, times.size)),
+            "salinity": ("time", numpy.linspace(29, 30, times.size)),
+        },
+        coords={"time": times},
+    )
+    nc_filepath.parent.mkdir(parents=True, exist_ok=True)
+    ds.to_netcdf(nc_filepath)
+
+
+class TestGetONC_CTD_Data:
+    """Unit tests for get_onc_ctd_data() function."""
+
+    @staticmethod
+    @pytest.fixture
+    def ctd_config(tmp_path):
+        return {
+            "dest dir": tmp_path / "CTD",
+            "filepath template": "{station}/{station}_CTD_15m_{yyyymmdd}.nc",
+            "response cache dir": tmp_path / "cache",
+        }
+
+    @staticmethod
+    @pytest.fixture
+    def mock_get_onc_data(monkeypatch):
+        requests = []
+
+        def _mock_get_onc_data(endpoint, method, token, **params):
+            requests.append(params)
+            return {"sciencedata": []}
+
+        monkeypatch.setenv("ONC_USER_TOKEN", "mock_token")
+        monkeypatch.setattr(observations.data_tools, "get_onc_data", _mock_get_onc_data)
+        return requests
+
+    def test_local_store(self, ctd_config, mock_get_onc_data):
+        for day in ("2024-07-13", "2024-07-14"):
+            _write_ctd_file(
+                ctd_config["dest dir"]
+                / f"SCVIP/SCVIP_CTD_15m_{day.replace('-', '')}.nc",
+                day,
+            )
+
+        ds = observations.get_onc_ctd_data(
+            "SCVIP",
+            arrow.get("2024-07-13 12:00"),
+            arrow.get("2024-07-14 11:45"),
+            ctd_config,
+        )
+
+        assert ds.time.size == 96
+        assert ds.time.values[0] == numpy.datetime64("2024-07-13T12:00")
+        assert ds.time.values[-1] == numpy.datetime64("2024-07-14T11:45")
+        assert set(ds.data_vars) == {"temperature", "salinity"}
+        assert mock_get_onc_data == []
+
+    def test_incomplete_local_store_requests_onc(
+        self, ctd_config, mock_get_onc_data, monkeypatch
+    ):
+        _write_ctd_file(
+            ctd_config["dest dir"] / "SCVIP/SCVIP_CTD_15m_20240713.nc", "2024-07-13"
+        )
+        monkeypatch.setattr(
+            observations,
+            "qaqc_filter",
+            lambda ctd_data, var: xarray.DataArray(
+                numpy.empty(0), name=var, dims="time"
+            ),
+        )
+        monkeypatch.setattr(
+            observations.data_tools, "onc_json_to_dataset", lambda onc_data: None
+        )
+
+        observations.get_onc_ctd_data(
+            "SCVIP",
+            arrow.get("2024-07-13 12:00"),
+            arrow.get("2024-07-14 11:45"),
+            ctd_config,
+        )
+
+        assert len(mock_get_onc_data) == 1
+        assert mock_get_onc_data[0]["locationCode"] == "SCVIP"
+
+
+class TestQAQC_Filter:
+    """Unit test for qaqc_filter() function."""
+
+    def test_qaqc_filter(self):
+        times = pandas.date_range("2024-07-13", periods=4, freq="15min")
+        temperature = xarray.DataArray(
+            [9.0, 9.1, 99.0, 9.3],
+            coords={"sampleTime": times},
+            dims="sampleTime",
+            attrs={"qaqcFlag": numpy.array([1, 1, 4, 1])},
+        )
+        ctd_data = xarray.Dataset({"temperature": temperature})
+
+        filtered = observations.qaqc_filter(ctd_data, "temperature")
+
+        assert filtered.name == "temperature"
+        assert filtered.dims == ("time",)
+        numpy.testing.assert_array_equal(filtered, [9.0, 9.1, 9.3])
+        numpy.testing.assert_array_equal(filtered.time, times[[0, 1, 3]])
+
+
+class TestCachedONC_Request:
+    """Unit tests for _cached_onc_request() function."""
+
+    @staticmethod
+    @pytest.fixture
+    def mock_get_onc_data(monkeypatch):
+        requests = []
+
+        def _mock_get_onc_data(endpoint, method, token, **params):
+            requests.append(params)
+            return {"sciencedata": [{"sensorCode": "salinity"}]}
+
+        monkeypatch.setenv("ONC_USER_TOKEN", "mock_token")
+        monkeypatch.setattr(observations.data_tools, "get_onc_data", _mock_get_onc_data)
+        return requests
+
+    def test_cached_response_reused(self, mock_get_onc_data, tmp_path):
+        for _ in range(2):
+            onc_data = observations._cached_onc_request(
+                tmp_path, True, "scalardata", "getByLocation", locationCode="SCVIP"
+            )
+
+        assert onc_data == {"sciencedata": [{"sensorCode": "salinity"}]}
+        assert len(mock_get_onc_data) == 1
+        assert len(list(tmp_path.glob("scalardata_*.json"))) == 1
+
+    def test_not_cacheable(self, mock_get_onc_data, tmp_path):
+        for _ in range(2):
+            observations._cached_onc_request(
+                tmp_path, False, "scalardata", "getByLocation", locationCode="SCVIP"
+            )
+
+        assert len(mock_get_onc_data) == 2
+        assert list(tmp_path.glob("scalardata_*.json")) == []
+
+    def test_no_cache_dir(self, mock_get_onc_data):
+        for _ in range(2):
+            observations._cached_onc_request(
+                None, True, "scalardata", "getByLocation", locationCode="SCVIP"
+            )
+
+        assert len(mock_get_onc_data) == 2
@@ -0,0 +1,207 @@
+#  Copyright 2013 – present by the SalishSeaCast Project contributors
+#  and The University of British Columbia
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Unit tests for SalishSeaCast render_cache module."""
+
+import os
+import sys
+import time
+
+import netCDF4
+import numpy
+import pytest
+import xarray
+
+from nowcast import render_cache
+
+
+def fig_func(grid_T, clevels, hr, cmap="haline", figsize=(16, 9)):
+    pass
+
+
+@pytest.fixture
+def grid_T(tmp_path):
+    nc_path = tmp_path / "SalishSea_1h_20241120_20241120_grid_T.nc"
+    xarray.Dataset({"vosaline": (("y", "x"), numpy.zeros((3, 4)))}).to_netcdf(nc_path)
+    with netCDF4.Dataset(nc_path) as ds:
+        yield ds
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return render_cache.RenderCache(tmp_path / "render_cache")
+
+
+class TestFromConfig:
+    """Unit tests for RenderCache.from_config() method."""
+
+    def test_from_config(self):
+        config = {
+            "figures": {
+                "render cache": {"cache dir": "/results/render_cache/", "max age": 3}
+            }
+        }
+
+        cache = render_cache.RenderCache.from_config(config)
+
+        assert cache.cache_dir == render_cache.Path("/results/render_cache/")
+        assert cache.max_age == 3
+
+    def test_no_render_cache_config(self):
+        cache = render_cache.RenderCache.from_config({"figures": {}})
+
+        assert cache.cache_dir is None
+        assert cache.key(fig_func, (), {}, "png") is None
+
+
+class TestKey:
+    """Unit tests for RenderCache.key() method."""
+
+    def test_same_args_same_key(self, cache, grid_T):
+        args = (grid_T.variables["vosaline"], numpy.arange(5.0), 3)
+
+        key = cache.key(fig_func, args, {"cmap": "haline"}, "png")
+
+        assert key == cache.key(fig_func, args, {"cmap": "haline"}, "png")
+        assert len(key) == 64
+
+    @pytest.mark.parametrize(
+        "args, kwargs, fig_save_format",
+        (
+            ((numpy.arange(6.0), 3), {"cmap": "haline"}, "png"),
+            ((numpy.arange(5.0), 4), {"cmap": "haline"}, "png"),
+            ((numpy.arange(5.0), 3), {"cmap": "thermal"}, "png"),
+            ((numpy.arange(5.0), 3), {"cmap": "haline"}, "svg"),
+        ),
+    )
+    def test_changed_args_change_key(
+        self, args, kwargs, fig_save_format, cache, grid_T
+    ):
+        key = cache.key(
+            fig_func,
+            (grid_T.variables["vosaline"], numpy.arange(5.0), 3),
+            {"cmap": "haline"},
+            "png",
+        )
+
+        changed_key = cache.key(
+            fig_func, (grid_T.variables["vosaline"], *args), kwargs, fig_save_format
+        )
+
+        assert changed_key != key
+
+    def test_changed_file_changes_key(self, cache, tmp_path):
+        obs_file = tmp_path / "obs.csv"
+        obs_file.write_text("1,2\n")
+        key = cache.key(fig_func, (obs_file,), {}, "png")
+        os.utime(obs_file, ns=(0, 0))
+
+        assert cache.key(fig_func, (obs_file,), {}, "png") != key
+
+    def test_results_context_arg(self, cache, grid_T):
+        grid = render_cache.results_context.ResultsContext(grid_T, grid_T)
+        key = cache.key(fig_func, (grid,), {}, "png")
+        os.utime(grid_T.filepath(), ns=(0, 0))
+
+        # Fingerprints are memoized for the life of a cache
+        new_cache = render_cache.RenderCache(cache.cache_dir)
+        assert key is not None
+        assert new_cache.key(fig_func, (grid,), {}, "png") != key
+
+    def test_uncacheable_arg(self, cache):
+        ds = xarray.Dataset({"ssh": ("time", numpy.zeros(3))})
+
+        assert cache.key(fig_func, (ds,), {}, "png") is None
+
+    def test_directory_arg(self, cache, tmp_path):
+        assert cache.key(fig_func, (tmp_path,), {}, "png") is None
+
+    def test_changed_module_file_changes_key(self, cache, tmp_path, monkeypatch):
+        thalweg_file = tmp_path / "thalweg_working.txt"
+        thalweg_file.write_text("1 2\n")
+        monkeypatch.setattr(
+            sys.modules[__name__],
+            "RENDER_CACHE_FILES",
+            (thalweg_file,),
+            raising=False,
+        )
+        key = cache.key(fig_func, (3,), {}, "png")
+        os.utime(thalweg_file, ns=(0, 0))
+
+        assert key is not None
+        assert cache.key(fig_func, (3,), {}, "png") != key
+
+    def test_module_excluded(self, cache, monkeypatch):
+        monkeypatch.setattr(sys.modules[__name__], "RENDER_CACHE", False, raising=False)
+
+        assert cache.key(fig_func, (3,), {}, "png") is None
+
+
+class TestFetchStore:
+    """Unit tests for RenderCache.fetch() and RenderCache.store() methods."""
+
+    def test_miss_then_hit(self, cache, tmp_path):
+        fig_path = tmp_path / "figs" / "salinity_20nov24.png"
+        fig_path.parent.mkdir()
+        key = cache.key(fig_func, (numpy.arange(5.0), 3), {}, "png")
+
+        assert not cache.fetch(key, fig_path)
+        fig_path.write_bytes(b"png")
+        cache.store(key, fig_path)
+        fig_path.unlink()
+
+        assert cache.fetch(key, fig_path)
+        assert fig_path.read_bytes() == b"png"
+        assert cache.stats() == {"hits": 1, "misses": 1}
+
+    def test_uncacheable_is_miss(self, cache, tmp_path):
+        assert not cache.fetch(None, tmp_path / "salinity_20nov24.png")
+        assert cache.stats() == {"hits": 0, "misses": 1}
+
+
+class TestPrune:
+    """Unit test for RenderCache.prune() method."""
+
+    def test_prune(self, cache):
+        cache.cache_dir.mkdir()
+        old = cache.cache_dir / "old.png"
+        new = cache.cache_dir / "new.png"
+        for path in (old, new):
+            path.write_bytes(b"png")
+        eight_days_ago = time.time() - 8 * 24 * 60 * 60
+        os.utime(old, (eight_days_ago, eight_days_ago))
+
+        cache.prune()
+
+        assert not old.exists()
+        assert new.exists()
+
+
+class TestLinkOrCopy:
+    """Unit test for link_or_copy() function."""
+
+    def test_replaces_dest(self, tmp_path):
+        src = tmp_path / "Website_thumbnail_20nov24.png"
+        src.write_bytes(b"new")
+        dest = tmp_path / "Website_thumbnail.png"
+        dest.write_bytes(b"old")
+
+        render_cache.link_or_copy(src, dest)
+
+        assert dest.read_bytes() == b"new"
+        assert os.path.samefile(src, dest)
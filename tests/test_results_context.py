@@ -0,0 +1,79 @@
+#  Copyright 2013 – present by the SalishSeaCast Project contributors
+#  and The University of British Columbia
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Unit tests for SalishSeaCast results_context module."""
+
+import numpy
+import pytest
+import xarray
+
+from nowcast import results_context
+
+
+@pytest.fixture
+def grid(tmp_path):
+    bathy_path = tmp_path / "bathymetry_202108.nc"
+    depths = numpy.array([[0.0, 4.0, 10.0], [0.0, 0.0, 25.0]])
+    xarray.Dataset(
+        {
+            "Bathymetry": (("y", "x"), depths, {}, {"_FillValue": 0.0}),
+            "nav_lon": (("y", "x"), numpy.full((2, 3), -123.0)),
+            "nav_lat": (("y", "x"), numpy.full((2, 3), 49.0)),
+        }
+    ).to_netcdf(bathy_path)
+    mesh_mask_path = tmp_path / "mesh_mask202108.nc"
+    tmask = numpy.ones((1, 4, 2, 3), dtype=numpy.int8)
+    tmask[..., 0] = 0
+    xarray.Dataset(
+        {
+            "tmask": (("t", "z", "y", "x"), tmask),
+            "e3t_1d": (("t", "z"), numpy.array([[1.0, 1.5, 2.0, 2.5]])),
+        }
+    ).to_netcdf(mesh_mask_path)
+    grid = results_context.ResultsContext.from_files(bathy_path, mesh_mask_path)
+    yield grid
+    grid.bathy.close()
+    grid.mesh_mask.close()
+
+
+class TestResultsContext:
+    """Unit tests for ResultsContext class."""
+
+    def test_squeezes_time_dim(self, grid):
+        assert grid.tmask.shape == (4, 2, 3)
+        numpy.testing.assert_array_equal(grid.e3t_1d, [1.0, 1.5, 2.0, 2.5])
+
+    def test_bathymetry_masked_on_land(self, grid):
+        numpy.testing.assert_array_equal(
+            numpy.ma.getmaskarray(grid.bathymetry),
+            [[True, False, False], [True, True, False]],
+        )
+
+    def test_memoized(self, grid):
+        assert grid.tmask is grid.tmask
+
+    @pytest.mark.parametrize("name", ("tmask", "bathymetry"))
+    def test_read_only(self, name, grid):
+        with pytest.raises(ValueError):
+            getattr(grid, name)[0, 1] = 0
+
+    def test_filepaths(self, grid, tmp_path):
+        assert grid.filepaths() == (
+            str(tmp_path / "bathymetry_202108.nc"),
+            str(tmp_path / "mesh_mask202108.nc"),
+        )
@@ -0,0 +1,201 @@
+#  Copyright 2013 – present by the SalishSeaCast Project contributors
+#  and The University of British Columbia
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Unit tests for SalishSeaCast run_telemetry module."""
+
+import json
+import logging
+
+import arrow
+import pytest
+
+from nowcast import run_telemetry
+
+
+class MockClock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestRunThroughput:
+    """Unit tests for RunThroughput class."""
+
+    def test_first_sample_has_no_rate(self):
+        throughput = run_telemetry.RunThroughput(
+            "nowcast", "arbutus.cloud", clock=MockClock()
+        )
+
+        progress = throughput.update(1081, 1, 2160)
+
+        assert progress.rate is None
+        assert progress.eta is None
+        assert not progress.stalled
+        assert throughput.progress_msg(progress) == ""
+
+    def test_rolling_rate_and_eta(self):
+        clock = MockClock()
+        throughput = run_telemetry.RunThroughput(
+            "nowcast", "arbutus.cloud", window=3, clock=clock
+        )
+
+        for time_step in (100, 200, 700, 800):
+            progress = throughput.update(time_step, 1, 2160)
+            clock.now += 300
+
+        # Rate is calculated from the last 3 samples only
+        assert progress.rate == pytest.approx(1)
+        assert progress.eta == arrow.get(1_700_000_900 + 1360)
+        assert throughput.progress_msg(progress) == (
+            f", 1.00 steps/s, ETA {progress.eta.format('YYYY-MM-DD HH:mm:ss')} UTC"
+        )
+
+    def test_restarted_run_clears_samples(self):
+        clock = MockClock()
+        throughput = run_telemetry.RunThroughput("hindcast", "nibi", clock=clock)
+        throughput.update(30_000, 21_601, 43_200)
+        clock.now += 300
+
+        progress = throughput.update(21_700, 21_601, 43_200)
+
+        assert progress.rate is None
+        assert len(throughput.samples) == 1
+
+    def test_stalled(self, caplog):
+        clock = MockClock()
+        throughput = run_telemetry.RunThroughput(
+            "forecast", "arbutus.cloud", historical_rate=3.0, clock=clock
+        )
+        throughput.update(100, 1, 2160)
+        clock.now += 300
+        caplog.set_level(logging.DEBUG)
+
+        progress = throughput.update(400, 1, 2160)
+        throughput.log_stall(progress, "forecast on arbutus.cloud")
+
+        assert progress.stalled
+        assert caplog.records[0].levelname == "WARNING"
+        expected = (
+            "forecast on arbutus.cloud: time step rate 1.00 steps/s is less than "
+            "50% of 3.00 steps/s historical rate for forecast on arbutus.cloud; "
+            "run may be stalled"
+        )
+        assert caplog.messages[0] == expected
+
+    @pytest.mark.parametrize(
+        "time_steps, expected",
+        [
+            ((), 300),
+            ((100, 100), 300),
+            ((100, 400), 15 * 60),
+            ((30_000, 36_000), 120),
+            ((42_000, 43_100), 60),
+        ],
+    )
+    def test_poll_interval(self, time_steps, expected):
+        clock = MockClock()
+        throughput = run_telemetry.RunThroughput("hindcast", "nibi", clock=clock)
+        for time_step in time_steps:
+            throughput.update(time_step, 21_601, 43_200)
+            clock.now += 1000
+
+        assert throughput.poll_interval(default=300) == pytest.approx(expected)
+
+    def test_summary(self):
+        clock = MockClock()
+        throughput = run_telemetry.RunThroughput(
+            "nowcast", "arbutus.cloud", clock=clock
+        )
+        clock.now += 120
+        throughput.run_started()
+        throughput.update(1000, 0, 2160)
+        clock.now += 1080
+        throughput.run_finished()
+
+        summary = throughput.summary(completed=True)
+
+        assert summary == {
+            "steps per second": 2.0,
+            "wall time": 1080,
+            "queue wait": 120,
+        }
+
+    def test_record(self, tmp_path):
+        history_file = tmp_path / "NEMO_run_history.jsonl"
+        clock = MockClock()
+        throughput = run_telemetry.RunThroughput(
+            "nowcast", "arbutus.cloud", history_file=history_file, clock=clock
+        )
+        throughput.run_started()
+        throughput.update(1000, 1, 2160)
+        clock.now += 1080
+
+        summary = throughput.record(arrow.get("2024-11-19"), completed=True)
+
+        record = json.loads(history_file.read_text())
+        assert record == {
+            "run type": "nowcast",
+            "host": "arbutus.cloud",
+            "run date": "2024-11-19",
+            "completed": True,
+            **summary,
+        }
+
+
+class TestReadHistoricalRate:
+    """Unit tests for read_historical_rate() function."""
+
+    def test_median_of_recent_completed_runs(self, tmp_path):
+        history_file = tmp_path / "NEMO_run_history.jsonl"
+        records = [
+            ("nowcast", "arbutus.cloud", True, 9.0),
+            ("nowcast", "arbutus.cloud", True, 2.0),
+            ("nowcast", "arbutus.cloud", False, 0.1),
+            ("forecast", "arbutus.cloud", True, 5.0),
+            ("nowcast", "arbutus.cloud", True, 3.0),
+            ("nowcast", "arbutus.cloud", True, 4.0),
+        ]
+        history_file.write_text(
+            "".join(
+                json.dumps(
+                    {
+                        "run type": run_type,
+                        "host": host,
+                        "completed": completed,
+                        "steps per second": rate,
+                    }
+                )
+                + "\n"
+                for run_type, host, completed, rate in records
+            )
+        )
+
+        rate = run_telemetry.read_historical_rate(
+            history_file, "nowcast", "arbutus.cloud", 3
+        )
+
+        assert rate == 3.0
+
+    def test_no_history_file(self, tmp_path):
+        rate = run_telemetry.read_historical_rate(
+            tmp_path / "NEMO_run_history.jsonl", "nowcast", "arbutus.cloud", 10
+        )
+
+        assert rate is None
@@ -0,0 +1,132 @@
+#  Copyright 2013 – present by the SalishSeaCast Project contributors
+#  and The University of British Columbia
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Unit tests for SalishSeaCast ssh_sftp module."""
+
+import logging
+import re
+from unittest.mock import Mock
+
+import paramiko
+import pytest
+
+from nowcast import ssh_sftp
+
+
+def _mock_ssh_client(outputs):
+    """Mock ssh client that responds to a remote probe script with outputs,
+    a list of (output, stderr, exit status) 3-tuples.
+    """
+
+    def exec_command(script):
+        marker = re.search(r"probe-[0-9a-f]+", script).group()
+        stdout = "".join(
+            f"{marker}\n{output}{marker}:stderr\n{stderr}{marker} {status}\n"
+            for output, stderr, status in outputs
+        )
+        return Mock(name="stdin"), Mock(read=Mock(return_value=stdout.encode())), None
+
+    return Mock(name="ssh_client", exec_command=Mock(side_effect=exec_command))
+
+
+class TestRemoteProbe:
+    """Unit tests for remote_probe() function."""
+
+    def test_results(self):
+        ssh_client = _mock_ssh_client(
+            [
+                ("12426878 21dec16hindcast RUNNING None N/A\n", "", 0),
+                ("1658943", "", 0),
+                ("", "grep: ocean.output: No such file or directory", 2),
+            ]
+        )
+        cmds = {
+            "queue info": "squeue --job 12426878",
+            "time step": "cat tmp_run_dir/time.step",
+            "ocean output errors": "grep 'E R R O R' tmp_run_dir/ocean.output",
+        }
+
+        results = ssh_sftp.remote_probe(
+            ssh_client, cmds, "nibi", logging.getLogger(__name__)
+        )
+
+        assert ssh_client.exec_command.call_count == 1
+        assert list(results) == list(cmds)
+        assert results["queue info"].output == (
+            "12426878 21dec16hindcast RUNNING None N/A\n"
+        )
+        assert results["queue info"].stderr == ""
+        assert results["queue info"].status == 0
+        # Output that lacks a final newline is separated from the next marker
+        assert results["time step"].output == "1658943\n"
+        assert results["ocean output errors"].output == ""
+        assert results["ocean output errors"].stderr == (
+            "grep: ocean.output: No such file or directory\n"
+        )
+        assert results["ocean output errors"].status == 2
+
+    def test_stderr_with_zero_status(self):
+        ssh_client = _mock_ssh_client(
+            [
+                (
+                    "12426878 21dec16hindcast RUNNING None N/A\n",
+                    "squeue: error: slurm_receive_msg: Socket timed out\n",
+                    0,
+                )
+            ]
+        )
+
+        results = ssh_sftp.remote_probe(
+            ssh_client,
+            {"queue info": "squeue --job 12426878"},
+            "nibi",
+            logging.getLogger(__name__),
+        )
+
+        assert results["queue info"].output == (
+            "12426878 21dec16hindcast RUNNING None N/A\n"
+        )
+        assert results["queue info"].stderr == (
+            "squeue: error: slurm_receive_msg: Socket timed out\n"
+        )
+        assert results["queue info"].status == 0
+
+    def test_empty_output(self):
+        ssh_client = _mock_ssh_client([("", "", 1)])
+
+        results = ssh_sftp.remote_probe(
+            ssh_client,
+            {"ocean output errors": "grep 'E R R O R' ocean.output"},
+            "nibi",
+            logging.getLogger(__name__),
+        )
+
+        assert results["ocean output errors"].output == ""
+        assert results["ocean output errors"].stderr == ""
+        assert results["ocean output errors"].status == 1
+
+    def test_incomplete_output(self):
+        ssh_client = _mock_ssh_client([("1658943\n", "", 0)])
+
+        with pytest.raises(paramiko.ssh_exception.SSHException):
+            ssh_sftp.remote_probe(
+                ssh_client,
+                {"time step": "cat time.step", "ocean output errors": "grep"},
+                "nibi",
+                logging.getLogger(__name__),
+            )
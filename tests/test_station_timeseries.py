@@ -0,0 +1,176 @@
+#  Copyright 2013 – present by the SalishSeaCast Project contributors
+#  and The University of British Columbia
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Unit tests for SalishSeaCast station_timeseries module."""
+
+import numpy
+import pandas
+import pytest
+import xarray
+
+from nowcast import station_timeseries
+
+
+@pytest.fixture
+def mock_places(monkeypatch):
+    monkeypatch.setattr(
+        station_timeseries.places, "PLACES", {"S3": {"NEMO grid ji": (1, 2)}}
+    )
+
+
+@pytest.fixture
+def ts_config(tmp_path):
+    return {
+        "storage dir": tmp_path / "station_timeseries",
+        "days": 2,
+        "places": ["S3"],
+        "variables": {
+            "grid_T": {"votemper": "temperature", "vosaline": "salinity"},
+            "biol_T": {"nitrate": "nitrate"},
+        },
+    }
+
+
+def _write_results(results_dir, day, offset=0):
+    """Write hourly grid_T and biol_T results files for day in which
+    the value of each variable is its time step number plus offset.
+    """
+    yyyymmdd = day.replace("-", "")
+    times = pandas.date_range(f"{day} 00:30", periods=24, freq="1h")
+    values = numpy.broadcast_to(
+        numpy.arange(24, dtype=float)[:, None, None, None] + offset, (24, 3, 3, 4)
+    )
+    coords = {
+        "time_counter": times,
+        "deptht": [0.5, 1.5, 2.5],
+        "nav_lat": (("y", "x"), numpy.zeros((3, 4))),
+        "nav_lon": (("y", "x"), numpy.zeros((3, 4))),
+    }
+    dims = ("time_counter", "deptht", "y", "x")
+    results_dir.mkdir(parents=True, exist_ok=True)
+    xarray.Dataset(
+        {
+            "votemper": (dims, values, {"long_name": "Temperature", "units": "C"}),
+            "vosaline": (dims, values + 30, {"long_name": "Salinity", "units": "g/kg"}),
+        },
+        coords=coords,
+    ).to_netcdf(results_dir / f"SalishSea_1h_{yyyymmdd}_{yyyymmdd}_grid_T.nc")
+    xarray.Dataset(
+        {"nitrate": (dims, values + 10, {"long_name": "Nitrate", "units": "uM"})},
+        coords=coords,
+    ).to_netcdf(results_dir / f"SalishSea_1h_{yyyymmdd}_{yyyymmdd}_biol_T.nc")
+
+
+@pytest.mark.usefixtures("mock_places")
+class TestExtractStationProfiles:
+    """Unit test for extract_station_profiles() function."""
+
+    def test_extract_station_profiles(self, ts_config, tmp_path):
+        _write_results(tmp_path / "20nov24", "2024-11-20")
+
+        profiles = station_timeseries.extract_station_profiles(
+            tmp_path / "20nov24", ts_config["places"], ts_config["variables"]
+        )
+
+        ds = profiles["S3"]
+        assert dict(ds.sizes) == {"time": 24, "depth": 3}
+        assert set(ds.data_vars) == {"temperature", "salinity", "nitrate"}
+        assert ds.salinity.attrs["units"] == "g/kg"
+        numpy.testing.assert_array_equal(
+            ds.nitrate.isel(depth=0), numpy.arange(24) + 10
+        )
+
+
+@pytest.mark.usefixtures("mock_places")
+class TestUpdateStationTimeseries:
+    """Unit tests for update_station_timeseries() function."""
+
+    def test_appends_days(self, ts_config, tmp_path):
+        for day in ("2024-11-19", "2024-11-20"):
+            results_dir = tmp_path / day
+            _write_results(results_dir, day)
+            store_files = station_timeseries.update_station_timeseries(
+                results_dir, ts_config
+            )
+
+        assert store_files == [ts_config["storage dir"] / "S3_timeseries.nc"]
+        with station_timeseries.open_station_timeseries(
+            "S3", ts_config["storage dir"]
+        ) as ds:
+            assert ds.time.size == 48
+            assert ds.time_coverage_start == "2024-11-19T00:30:00Z"
+            assert ds.time_coverage_end == "2024-11-20T23:30:00Z"
+
+    def test_drops_old_days(self, ts_config, tmp_path):
+        for day in ("2024-11-18", "2024-11-19", "2024-11-20"):
+            results_dir = tmp_path / day
+            _write_results(results_dir, day)
+            station_timeseries.update_station_timeseries(results_dir, ts_config)
+
+        with station_timeseries.open_station_timeseries(
+            "S3", ts_config["storage dir"]
+        ) as ds:
+            assert ds.time.size == 48
+            assert ds.time_coverage_start == "2024-11-19T00:30:00Z"
+
+    def test_replaces_reprocessed_day(self, ts_config, tmp_path):
+        for day, offset in (("2024-11-19", 0), ("2024-11-20", 0), ("2024-11-19", 100)):
+            results_dir = tmp_path / f"{day}-{offset}"
+            _write_results(results_dir, day, offset)
+            station_timeseries.update_station_timeseries(results_dir, ts_config)
+
+        with station_timeseries.open_station_timeseries(
+            "S3", ts_config["storage dir"]
+        ) as ds:
+            assert ds.time.size == 48
+            assert (ds.time.diff("time") > numpy.timedelta64(0)).all()
+            assert ds.temperature.isel(time=0, depth=0) == 100
+            assert ds.temperature.isel(time=-1, depth=0) == 23
+
+    def test_seeds_new_station_file(self, ts_config, tmp_path, monkeypatch):
+        times = pandas.date_range("2024-11-18 00:30", "2024-11-20 00:30", freq="1h")
+        seed_values = numpy.full((times.size, 3, 3, 4), -1.0)
+        dims = ("time", "depth", "gridY", "gridX")
+        seed_datasets = {
+            "physics": xarray.Dataset(
+                {"temperature": (dims, seed_values), "salinity": (dims, seed_values)},
+                coords={"time": times, "depth": [0.5, 1.5, 2.5]},
+            ),
+            "biology": xarray.Dataset(
+                {"nitrate": (dims, seed_values)},
+                coords={"time": times, "depth": [0.5, 1.5, 2.5]},
+            ),
+        }
+        open_dataset = xarray.open_dataset
+        monkeypatch.setattr(
+            station_timeseries.xarray,
+            "open_dataset",
+            lambda path: seed_datasets.get(path) or open_dataset(path),
+        )
+        ts_config["seed dataset URLs"] = {"grid_T": "physics", "biol_T": "biology"}
+        _write_results(tmp_path / "20nov24", "2024-11-20")
+
+        (store_file,) = station_timeseries.update_station_timeseries(
+            tmp_path / "20nov24", ts_config
+        )
+
+        with xarray.open_dataset(store_file) as ds:
+            assert ds.time.size == 48
+            assert ds.time_coverage_start == "2024-11-19T00:30:00Z"
+            assert (ds.nitrate.sel(time=ds.time < times[-1]) == -1).all()
+            assert ds.nitrate.isel(time=-1, depth=0) == 33
@@ -0,0 +1,163 @@
+#  Copyright 2013 – present by the SalishSeaCast Project contributors
+#  and The University of British Columbia
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# SPDX-License-Identifier: Apache-2.0
+
+
+"""Unit tests for SalishSeaCast storm_surge module."""
+
+from types import SimpleNamespace
+
+import arrow
+import numpy
+import pandas
+import pytest
+import xarray
+
+from nowcast import storm_surge
+
+
+@pytest.fixture
+def summary():
+    return SimpleNamespace(
+        start_time=arrow.get("2024-11-19 00:15:00"),
+        max_ssh={"Point Atkinson": 5.2, "Victoria": numpy.nan},
+        max_ssh_time={
+            "Point Atkinson": arrow.get("2024-11-19 17:45:00"),
+            "Victoria": arrow.get("2024-11-19 00:15:00"),
+        },
+        risk_levels={"Point Atkinson": "moderate risk", "Victoria": None},
+        u_wind_4h_avg={"Point Atkinson": -3.5, "Victoria": 1.25},
+        v_wind_4h_avg={"Point Atkinson": 2.0, "Victoria": -0.5},
+        max_wind_avg={"Point Atkinson": 4.03, "Victoria": 1.35},
+        wind_dir_4h_avg={"Point Atkinson": 150.3, "Victoria": 338.2},
+    )
+
+
+@pytest.fixture
+def weather_path(tmp_path):
+    """Weather forcing files for 2024-11-18 and 2024-11-19 in which the u wind
+    is the hour number since the start of 2024-11-18 plus 100 times the point
+    grid x index, and the v wind is the negative of the u wind.
+    """
+    for day in (0, 1):
+        times = pandas.date_range(
+            "2024-11-18", periods=24, freq="1h"
+        ) + pandas.Timedelta(days=day)
+        hours = numpy.arange(24.0) + 24 * day
+        u_wind = hours[:, None, None] + 100 * numpy.arange(4.0)[None, None, :]
+        u_wind = numpy.broadcast_to(u_wind, (24, 3, 4))
+        xarray.Dataset(
+            {
+                "u_wind": (("time_counter", "y", "x"), u_wind),
+                "v_wind": (("time_counter", "y", "x"), -u_wind),
+            },
+            coords={"time_counter": times},
+        ).to_netcdf(tmp_path / f"ops_y2024m11d{18 + day}.nc")
+    return tmp_path
+
+
+class TestWindPoints:
+    """Unit tests for WindPoints class."""
+
+    def test_wind_avg(self, weather_path):
+        wind_points = storm_surge.WindPoints(weather_path, points=[(1, 2), (2, 3)])
+
+        wind_avg = wind_points.wind_avg(arrow.get("2024-11-19 17:45"), (2, 3))
+
+        # Hours 14:00 to 17:00 of 2024-11-19 at x=3
+        assert wind_avg.u == pytest.approx(24 + 15.5 + 300)
+        assert wind_avg.v == pytest.approx(-(24 + 15.5 + 300))
+
+    def test_window_spans_midnight(self, weather_path):
+        wind_points = storm_surge.WindPoints(weather_path, points=[(1, 2)])
+
+        wind_avg = wind_points.wind_avg(arrow.get("2024-11-19 01:15"), [1, 2])
+
+        # Hours 22:00 of 2024-11-18 to 01:00 of 2024-11-19 at x=2
+        assert wind_avg.u == pytest.approx(23.5 + 200)
+        assert list(wind_points.days) == [
+            arrow.get("2024-11-18"),
+            arrow.get("2024-11-19"),
+        ]
+
+    def test_reads_each_file_once(self, weather_path):
+        wind_points = storm_surge.WindPoints(weather_path, points=[(1, 2), (2, 3)])
+        wind_points.wind_avg(arrow.get("2024-11-19 17:45"), (2, 3))
+        (weather_path / "ops_y2024m11d19.nc").unlink()
+
+        wind_avg = wind_points.wind_avg(arrow.get("2024-11-19 10:00"), (1, 2))
+
+        assert wind_avg.u == pytest.approx(24 + 8.5 + 200)
+
+    def test_fcst_file(self, weather_path):
+        (weather_path / "fcst").mkdir()
+        (weather_path / "ops_y2024m11d19.nc").rename(
+            weather_path / "fcst" / "ops_y2024m11d19.nc"
+        )
+        wind_points = storm_surge.WindPoints(weather_path, points=[(1, 2), (2, 3)])
+
+        wind_avg = wind_points.wind_avg(arrow.get("2024-11-19 17:45"), (2, 3))
+
+        assert wind_avg.u == pytest.approx(24 + 15.5 + 300)
+
+    def test_unknown_point(self, weather_path):
+        wind_points = storm_surge.WindPoints(weather_path, points=[(1, 2)])
+
+        with pytest.raises(ValueError):
+            wind_points.wind_avg(arrow.get("2024-11-19 17:45"), (0, 0))
+
+
+class TestWriteStormSurgeSummary:
+    """Unit tests for write_storm_surge_summary() function."""
+
+    def test_json_file(self, summary, tmp_path):
+        json_file = storm_surge.write_storm_surge_summary(summary, tmp_path)
+
+        assert json_file == tmp_path / "storm_surge_summary.json"
+        assert json_file.exists()
+        assert not json_file.with_suffix(".json.tmp").exists()
+
+    def test_netcdf_file(self, summary, tmp_path):
+        storm_surge.write_storm_surge_summary(summary, tmp_path)
+
+        with xarray.open_dataset(tmp_path / "storm_surge_summary.nc") as ds:
+            assert list(ds.station.values) == ["Point Atkinson", "Victoria"]
+            assert ds.max_ssh.sel(station="Point Atkinson") == pytest.approx(5.2)
+            assert list(ds.risk_level.values) == ["moderate risk", "no risk"]
+            assert ds.max_ssh_time.values[0] == numpy.datetime64("2024-11-19T17:45")
+
+
+class TestReadStormSurgeSummary:
+    """Unit tests for read_storm_surge_summary() function."""
+
+    def test_round_trip(self, summary, tmp_path):
+        storm_surge.write_storm_surge_summary(summary, tmp_path)
+
+        stored = storm_surge.read_storm_surge_summary(tmp_path)
+
+        assert stored.start_time == summary.start_time
+        assert stored.max_ssh["Point Atkinson"] == 5.2
+        assert numpy.isnan(stored.max_ssh["Victoria"])
+        assert stored.max_ssh_time == summary.max_ssh_time
+        assert stored.risk_levels == summary.risk_levels
+        assert stored.u_wind_4h_avg == summary.u_wind_4h_avg
+        assert stored.v_wind_4h_avg == summary.v_wind_4h_avg
+        assert stored.max_wind_avg == summary.max_wind_avg
+        assert stored.wind_dir_4h_avg == summary.wind_dir_4h_avg
+
+    def test_no_summary(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            storm_surge.read_storm_surge_summary(tmp_path)
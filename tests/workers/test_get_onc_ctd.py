@@ -89,6 +89,8 @@ class TestConfig:
         assert ctd_data["dest dir"] == "/results/observations/ONC/CTD/"
         expected = "{station}/{station}_CTD_15m_{yyyymmdd}.nc"
         assert ctd_data["filepath template"] == expected
+        expected = "/results/nowcast-sys/onc_response_cache/"
+        assert ctd_data["response cache dir"] == expected
 
 
 @pytest.mark.parametrize("onc_station", ["SCVIP", "SEVIP", "USDDL"])
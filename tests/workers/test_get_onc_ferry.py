@@ -41,7 +41,11 @@ def config(base_config):
     with config_file.open("at") as f:
         f.write(textwrap.dedent("""\
                 observations:
-                  lon/lat to NEMO ji map: /SalishSeaCast/grid/grid_from_lat_lon_mask999.nc
+                  NEMO grid:
+                    coordinates: /SalishSeaCast/grid/coordinates_seagrid_SalishSea201702.nc
+                    mesh mask: /SalishSeaCast/grid/mesh_mask202108.nc
+                    locator cache dir: /results/nowcast-sys/grid_locator/
+                    max distance: 500
 
                   ferry data:
                     ferries:
@@ -96,6 +100,7 @@ def config(base_config):
                         filepath template: "{ferry_platform}/{ferry_platform}_TSG_O2_TURBCHLFL_CO2_METEO_1m_{yyyymmdd}.nc"
 
                     dest dir: /results/observations/ONC/ferries/
+                    max concurrent requests: 4
                     """))
     config_ = nemo_nowcast.Config()
     config_.load(config_file)
@@ -133,6 +138,22 @@ class TestMain:
         )
         assert worker.cli.parser._actions[4].help
 
+    def test_add_start_date_option(self, mock_worker):
+        worker = get_onc_ferry.main()
+        assert worker.cli.parser._actions[5].dest == "start_date"
+        expected = nemo_nowcast.cli.CommandLineInterface.arrow_date
+        assert worker.cli.parser._actions[5].type == expected
+        assert worker.cli.parser._actions[5].default is None
+        assert worker.cli.parser._actions[5].help
+
+    def test_add_end_date_option(self, mock_worker):
+        worker = get_onc_ferry.main()
+        assert worker.cli.parser._actions[6].dest == "end_date"
+        expected = nemo_nowcast.cli.CommandLineInterface.arrow_date
+        assert worker.cli.parser._actions[6].type == expected
+        assert worker.cli.parser._actions[6].default is None
+        assert worker.cli.parser._actions[6].help
+
 
 class TestConfig:
     """Unit tests for production YAML config file elements related to worker."""
@@ -222,9 +243,15 @@ class TestConfig:
         }
         assert devices_config == expected
 
-    def test_lon_lat_ji_map_path(self, prod_config):
-        nemo_ji_map = prod_config["observations"]["lon/lat to NEMO ji map"]
-        assert nemo_ji_map == "/SalishSeaCast/grid/grid_from_lat_lon_mask999.nc"
+    def test_nemo_grid(self, prod_config):
+        nemo_grid = prod_config["observations"]["NEMO grid"]
+        assert (
+            nemo_grid["coordinates"]
+            == "/SalishSeaCast/grid/coordinates_seagrid_SalishSea201702.nc"
+        )
+        assert nemo_grid["mesh mask"] == "/SalishSeaCast/grid/mesh_mask202108.nc"
+        assert nemo_grid["locator cache dir"] == "/results/nowcast-sys/grid_locator/"
+        assert nemo_grid["max distance"] == 500
 
     def test_TWDP_file_path_template(self, prod_config):
         file_path_tmpl = prod_config["observations"]["ferry data"]["ferries"]["TWDP"][
@@ -239,6 +266,10 @@ class TestConfig:
         ferry_data_config = prod_config["observations"]["ferry data"]
         assert ferry_data_config["dest dir"] == "/results/observations/ONC/ferries/"
 
+    def test_max_concurrent_requests(self, prod_config):
+        ferry_data_config = prod_config["observations"]["ferry data"]
+        assert ferry_data_config["max concurrent requests"] == 4
+
 
 @pytest.mark.parametrize("ferry_platform", ["TWDP"])
 class TestSuccess:
@@ -246,7 +277,10 @@ class TestSuccess:
 
     def test_success(self, ferry_platform, caplog):
         parsed_args = SimpleNamespace(
-            ferry_platform=ferry_platform, data_date=arrow.get("2016-09-09")
+            ferry_platform=ferry_platform,
+            data_date=arrow.get("2016-09-09"),
+            start_date=None,
+            end_date=None,
         )
         caplog.set_level(logging.DEBUG)
 
@@ -257,6 +291,24 @@ class TestSuccess:
         assert caplog.messages[0] == expected
         assert msg_type == f"success {ferry_platform}"
 
+    def test_success_backfill(self, ferry_platform, caplog):
+        parsed_args = SimpleNamespace(
+            ferry_platform=ferry_platform,
+            data_date=arrow.get("2016-09-09"),
+            start_date=arrow.get("2016-09-01"),
+            end_date=arrow.get("2016-09-07"),
+        )
+        caplog.set_level(logging.DEBUG)
+
+        msg_type = get_onc_ferry.success(parsed_args)
+
+        assert caplog.records[0].levelname == "INFO"
+        expected = (
+            f"2016-09-01 to 2016-09-07 ONC {ferry_platform} ferry data file created"
+        )
+        assert caplog.messages[0] == expected
+        assert msg_type == f"success {ferry_platform}"
+
 
 @pytest.mark.parametrize("ferry_platform", ["TWDP"])
 class TestFailure:
@@ -264,7 +316,10 @@ class TestFailure:
 
     def test_failure(self, ferry_platform, caplog):
         parsed_args = SimpleNamespace(
-            ferry_platform=ferry_platform, data_date=arrow.get("2016-09-09")
+            ferry_platform=ferry_platform,
+            data_date=arrow.get("2016-09-09"),
+            start_date=None,
+            end_date=None,
         )
         caplog.set_level(logging.DEBUG)
 
@@ -280,7 +335,129 @@ class TestFailure:
 class TestGetONCFerry:
     """Unit tests for get_onc_ferry() function."""
 
-    pass
+    @pytest.fixture
+    def mock_dataset_steps(self, monkeypatch):
+        def mock_submit_onc_requests(
+            executor, ferry_platform, ymd, location_config, devices_config
+        ):
+            return ymd, {}
+
+        def mock_make_dataset(ferry_platform, ymd, nav_request, device_requests, *args):
+            if ymd == "2016-09-02":
+                raise requests.ConnectionError("connection reset")
+            return ymd
+
+        monkeypatch.setattr(
+            get_onc_ferry, "_submit_onc_requests", mock_submit_onc_requests
+        )
+        monkeypatch.setattr(get_onc_ferry, "_make_dataset", mock_make_dataset)
+        monkeypatch.setattr(get_onc_ferry, "_write_netcdf", lambda *args: None)
+
+    def test_checklist_data_date(
+        self, ferry_platform, config, mock_dataset_steps, caplog
+    ):
+        parsed_args = SimpleNamespace(
+            ferry_platform=ferry_platform,
+            data_date=arrow.get("2016-09-01"),
+            start_date=None,
+            end_date=None,
+        )
+
+        checklist = get_onc_ferry.get_onc_ferry(parsed_args, config)
+
+        dest_dir = config["observations"]["ferry data"]["dest dir"]
+        assert list(checklist) == [ferry_platform]
+        assert len(checklist[ferry_platform]) == 1
+        assert checklist[ferry_platform][0].startswith(dest_dir)
+
+    def test_backfill_continues_after_request_exception(
+        self, ferry_platform, config, mock_dataset_steps, caplog
+    ):
+        parsed_args = SimpleNamespace(
+            ferry_platform=ferry_platform,
+            data_date=arrow.get("2016-09-09"),
+            start_date=arrow.get("2016-09-01"),
+            end_date=arrow.get("2016-09-03"),
+        )
+        caplog.set_level(logging.DEBUG)
+
+        checklist = get_onc_ferry.get_onc_ferry(parsed_args, config)
+
+        assert len(checklist[ferry_platform]) == 2
+        assert not any("20160902" in path for path in checklist[ferry_platform])
+        assert caplog.records[0].levelname == "ERROR"
+        assert caplog.messages[0] == (
+            f"ONC {ferry_platform} dataset creation for 2016-09-02 failed: "
+            f"ConnectionError connection reset; continuing with next date"
+        )
+
+    def test_request_exception_data_date(
+        self, ferry_platform, config, mock_dataset_steps
+    ):
+        parsed_args = SimpleNamespace(
+            ferry_platform=ferry_platform,
+            data_date=arrow.get("2016-09-02"),
+            start_date=None,
+            end_date=None,
+        )
+
+        with pytest.raises(requests.ConnectionError):
+            get_onc_ferry.get_onc_ferry(parsed_args, config)
+
+    def test_end_date_without_start_date(
+        self, ferry_platform, config, mock_dataset_steps, caplog
+    ):
+        parsed_args = SimpleNamespace(
+            ferry_platform=ferry_platform,
+            data_date=arrow.get("2016-09-09"),
+            start_date=None,
+            end_date=arrow.get("2016-09-03"),
+        )
+        caplog.set_level(logging.DEBUG)
+
+        with pytest.raises(nemo_nowcast.WorkerError):
+            get_onc_ferry.get_onc_ferry(parsed_args, config)
+
+        assert caplog.messages[0] == "--end-date requires --start-date"
+
+
+class TestCalcDataDates:
+    """Unit tests for _calc_data_dates() function."""
+
+    def test_data_date(self):
+        parsed_args = SimpleNamespace(
+            data_date=arrow.get("2016-09-09"), start_date=None, end_date=None
+        )
+
+        data_dates = get_onc_ferry._calc_data_dates(parsed_args)
+
+        assert data_dates == [arrow.get("2016-09-09")]
+
+    def test_date_range(self):
+        parsed_args = SimpleNamespace(
+            data_date=arrow.get("2016-09-09"),
+            start_date=arrow.get("2016-09-01"),
+            end_date=arrow.get("2016-09-03"),
+        )
+
+        data_dates = get_onc_ferry._calc_data_dates(parsed_args)
+
+        assert data_dates == [
+            arrow.get("2016-09-01"),
+            arrow.get("2016-09-02"),
+            arrow.get("2016-09-03"),
+        ]
+
+    def test_start_date_only(self):
+        parsed_args = SimpleNamespace(
+            data_date=arrow.get("2016-09-09"),
+            start_date=arrow.get("2016-09-01"),
+            end_date=None,
+        )
+
+        data_dates = get_onc_ferry._calc_data_dates(parsed_args)
+
+        assert data_dates == [arrow.get("2016-09-01")]
 
 
 @pytest.mark.parametrize("ferry_platform", ["TWDP"])
@@ -294,7 +471,38 @@ class TestGetNavData:
 class TestCalcLocationArrays:
     """Unit tests for _calc_location_arrays() function."""
 
-    pass
+    def test_on_land_position(self, ferry_platform, config, monkeypatch):
+        grid_lons, grid_lats = numpy.meshgrid(
+            numpy.linspace(-124, -123, 101), numpy.linspace(49, 50, 101)
+        )
+        tmask = numpy.ones_like(grid_lons, dtype=int)
+        tmask[:, :30] = 0
+        locator = get_onc_ferry.lib.NEMOGridLocator(grid_lons, grid_lats, tmask)
+        monkeypatch.setattr(
+            get_onc_ferry.lib, "get_nemo_grid_locator", lambda *args: locator
+        )
+        times = pandas.date_range("2021-03-08 10:00", periods=2, freq="1min")
+        coords = {
+            "longitude": xarray.DataArray([-123.5, -123.95], coords={"time": times}),
+            "latitude": xarray.DataArray([49.5, 49.5], coords={"time": times}),
+        }
+        monkeypatch.setattr(
+            get_onc_ferry,
+            "_resample_nav_coord",
+            lambda nav_data, coord, units: coords[coord],
+        )
+        monkeypatch.setattr(
+            get_onc_ferry, "_on_crossing", lambda lons, lats, terminals: lons > 0
+        )
+        monkeypatch.setattr(get_onc_ferry, "PLACES", {})
+        location_config = {"terminals": []}
+
+        _, _, nemo_grid_js, nemo_grid_is, _, _ = get_onc_ferry._calc_location_arrays(
+            None, location_config, config["observations"]["NEMO grid"]
+        )
+
+        numpy.testing.assert_array_equal(nemo_grid_js, [50, -1])
+        numpy.testing.assert_array_equal(nemo_grid_is, [50, -1])
 
 
 @pytest.mark.parametrize("ferry_platform", ["TWDP"])
@@ -335,18 +543,53 @@ class TestResampleNavCoord:
         assert resampled_coord.attrs["station"] == "TWDP.N1"
 
 
-@pytest.mark.parametrize("ferry_platform", ["TWDP"])
 class TestOnCrossing:
     """Unit tests for _on_crossing() function."""
 
-    pass
+    def test_on_crossing(self):
+        times = pandas.date_range("2021-03-08 10:00", periods=5, freq="1min")
+        lons = xarray.DataArray(
+            [-123.1, -123.5, numpy.nan, -123.9, -124.3], coords={"time": times}
+        )
+        lats = xarray.DataArray(
+            [49.0, 49.1, numpy.nan, 49.1, 49.2], coords={"time": times}
+        )
+        terminals = [
+            SimpleNamespace(lon=-123.1, lat=49.0, radius=200),
+            SimpleNamespace(lon=-123.9, lat=49.1001, radius=200),
+            SimpleNamespace(lon=-124.3, lat=49.2, radius=200),
+        ]
+
+        on_crossing_mask = get_onc_ferry._on_crossing(lons, lats, terminals)
+
+        numpy.testing.assert_array_equal(
+            on_crossing_mask, [False, True, True, False, False]
+        )
+        numpy.testing.assert_array_equal(on_crossing_mask.time, times)
 
 
-@pytest.mark.parametrize("ferry_platform", ["TWDP"])
 class TestCalcCrossingNumbers:
     """Unit tests for _calc_crossing_numbers() function."""
 
-    pass
+    @pytest.mark.parametrize(
+        "on_crossing, expected",
+        (
+            ([True, True, False, True, False, False, True], [0, 0, -1, 1, -1, -1, 2]),
+            ([False, True, True, False, True, True, True], [-1, 1, 1, -1, 2, 2, 2]),
+            ([False, False, False], [-1, -1, -1]),
+        ),
+    )
+    def test_calc_crossing_numbers(self, on_crossing, expected):
+        times = pandas.date_range(
+            "2021-03-08 10:00", periods=len(on_crossing), freq="1min"
+        )
+        on_crossing_mask = xarray.DataArray(on_crossing, coords={"time": times})
+
+        crossing_numbers = get_onc_ferry._calc_crossing_numbers(on_crossing_mask)
+
+        assert crossing_numbers.name == "crossing_number"
+        assert crossing_numbers.dtype == numpy.int16
+        numpy.testing.assert_array_equal(crossing_numbers, expected)
 
 
 class TestGetWaterData:
@@ -26,6 +26,8 @@ from types import SimpleNamespace
 
 import arrow
 import nemo_nowcast
+import numpy
+import pandas
 import pytest
 import xarray
 
@@ -129,7 +131,21 @@ class TestGetVFPA_HADCP:
     def mock_make_hour_dataset(monkeypatch):
 
         def _mock_make_hour_dataset(csv_dir, utc_start_hr, place):
-            return xarray.Dataset()
+            return xarray.Dataset(
+                {"speed": ("time", [1.0]), "direction": ("time", [90.0])},
+                coords={"time": [utc_start_hr.naive]},
+            )
+
+        monkeypatch.setattr(
+            get_vfpa_hadcp, "_make_hour_dataset", _mock_make_hour_dataset
+        )
+
+    @staticmethod
+    @pytest.fixture
+    def mock_no_hour_data(monkeypatch):
+
+        def _mock_make_hour_dataset(csv_dir, utc_start_hr, place):
+            raise FileNotFoundError
 
         monkeypatch.setattr(
             get_vfpa_hadcp, "_make_hour_dataset", _mock_make_hour_dataset
@@ -143,12 +159,21 @@ class TestGetVFPA_HADCP:
 
         monkeypatch.setattr(get_vfpa_hadcp, "_write_netcdf", _mock_write_netcdf)
 
+    @staticmethod
+    @pytest.fixture
+    def mock_append_netcdf(monkeypatch):
+        def _mock_append_netcdf(ds, nc_filepath):
+            return ds.time.size
+
+        monkeypatch.setattr(get_vfpa_hadcp, "_append_netcdf", _mock_append_netcdf)
+
     @pytest.mark.parametrize("nc_file_exists", (True, False))
     def test_log_messages(
         self,
         nc_file_exists,
         mock_make_hour_dataset,
         mock_write_netcdf,
+        mock_append_netcdf,
         config,
         caplog,
         tmp_path,
@@ -172,19 +197,73 @@ class TestGetVFPA_HADCP:
             "processing VFPA HADCP data from 2nd Narrows Rail Bridge for 2024-07-13"
         )
         assert log_records[0].message == expected
-        if not nc_file_exists:
+        if nc_file_exists:
+            assert log_records[1].levelname == "DEBUG"
+            expected = f"appended 24 records to {nc_filepath}"
+            assert log_records[1].message == expected
+        else:
             assert log_records[1].levelname == "INFO"
-            assert log_records[1].message.startswith("created")
-            assert log_records[1].message.endswith(
-                "VFPA_2ND_NARROWS_HADCP_2s_202407.nc"
-            )
-        for rec_num, hr in zip(range(2, 24), range(1, 23)):
+            assert log_records[1].message == f"created {nc_filepath}"
+        assert log_records[2].levelname == "INFO"
+        expected = f"added VFPA HADCP data from 2nd Narrows Rail Bridge for 2024-07-13 to {nc_filepath}"
+        assert log_records[2].message == expected
+
+    def test_no_data_log_messages(
+        self,
+        mock_no_hour_data,
+        config,
+        caplog,
+        tmp_path,
+        monkeypatch,
+    ):
+        dest_dir = tmp_path
+        monkeypatch.setitem(
+            config["observations"]["hadcp data"], "dest dir", os.fspath(dest_dir)
+        )
+        parsed_args = SimpleNamespace(data_date=arrow.get("2024-07-13"))
+        caplog.set_level(logging.DEBUG)
+
+        get_vfpa_hadcp.get_vfpa_hadcp(parsed_args, config)
+
+        log_records = [rec for rec in caplog.records if rec.name == "get_vfpa_hadcp"]
+        for rec_num, hr in zip(range(1, 25), range(0, 24)):
             assert log_records[rec_num].levelname == "DEBUG"
             expected = f"no data for 2024-07-13 {hr:02d}:00 hour"
             assert log_records[rec_num].message == expected
-        assert log_records[25].levelname == "INFO"
-        expected = f"added VFPA HADCP data from 2nd Narrows Rail Bridge for 2024-07-13 to {nc_filepath}"
-        assert log_records[25].message == expected
+
+    def test_skip_stored_hours(
+        self,
+        mock_make_hour_dataset,
+        mock_append_netcdf,
+        config,
+        caplog,
+        tmp_path,
+        monkeypatch,
+    ):
+        dest_dir = tmp_path
+        monkeypatch.setitem(
+            config["observations"]["hadcp data"], "dest dir", os.fspath(dest_dir)
+        )
+        nc_filepath = dest_dir / "VFPA_2ND_NARROWS_HADCP_2s_202407.nc"
+        nc_filepath.write_bytes(b"")
+
+        def _mock_read_stored_hours(nc_filepath):
+            return {numpy.datetime64(f"2024-07-13T{hr:02d}", "h") for hr in range(12)}
+
+        monkeypatch.setattr(
+            get_vfpa_hadcp, "_read_stored_hours", _mock_read_stored_hours
+        )
+        parsed_args = SimpleNamespace(data_date=arrow.get("2024-07-13"))
+        caplog.set_level(logging.DEBUG)
+
+        get_vfpa_hadcp.get_vfpa_hadcp(parsed_args, config)
+
+        log_records = [rec for rec in caplog.records if rec.name == "get_vfpa_hadcp"]
+        for rec_num, hr in zip(range(1, 13), range(0, 12)):
+            assert log_records[rec_num].levelname == "DEBUG"
+            expected = f"2024-07-13 {hr:02d}:00 hour already stored in {nc_filepath}"
+            assert log_records[rec_num].message == expected
+        assert log_records[13].message == f"appended 12 records to {nc_filepath}"
 
     def test_checklist_create(
         self,
@@ -212,7 +291,7 @@ class TestGetVFPA_HADCP:
     def test_checklist_extend(
         self,
         mock_make_hour_dataset,
-        mock_write_netcdf,
+        mock_append_netcdf,
         config,
         caplog,
         tmp_path,
@@ -235,8 +314,7 @@ class TestGetVFPA_HADCP:
 
     def test_checklist_missing_data(
         self,
-        mock_make_hour_dataset,
-        mock_write_netcdf,
+        mock_no_hour_data,
         config,
         caplog,
         tmp_path,
@@ -256,3 +334,86 @@ class TestGetVFPA_HADCP:
             "UTC date": "2018-12-23",
         }
         assert checklist == expected
+
+
+class TestReadStoredHours:
+    """Unit tests for _read_stored_hours() function."""
+
+    def test_no_file(self, tmp_path):
+        stored_hours = get_vfpa_hadcp._read_stored_hours(tmp_path / "foo.nc")
+
+        assert stored_hours == set()
+
+    def test_stored_hours(self, tmp_path):
+        nc_filepath = tmp_path / "VFPA_2ND_NARROWS_HADCP_2s_202407.nc"
+        times = pandas.date_range("2024-07-13 00:00", "2024-07-13 02:00", freq="1min")
+        ds = xarray.Dataset(
+            {
+                "speed": ("time", numpy.ones(times.size)),
+                "direction": ("time", numpy.ones(times.size)),
+            },
+            coords={"time": times},
+        )
+        get_vfpa_hadcp._write_netcdf(ds, nc_filepath)
+
+        stored_hours = get_vfpa_hadcp._read_stored_hours(nc_filepath)
+
+        assert stored_hours == {
+            numpy.datetime64("2024-07-13T00", "h"),
+            numpy.datetime64("2024-07-13T01", "h"),
+        }
+
+
+class TestAppendNetcdf:
+    """Unit tests for _append_netcdf() function."""
+
+    @staticmethod
+    def _make_dataset(start, periods):
+        times = pandas.date_range(start, periods=periods, freq="1min")
+        return xarray.Dataset(
+            {
+                "speed": ("time", numpy.arange(periods) / 10),
+                "direction": ("time", numpy.arange(periods, dtype=float)),
+            },
+            coords={"time": times},
+        )
+
+    def test_append(self, tmp_path):
+        nc_filepath = tmp_path / "VFPA_2ND_NARROWS_HADCP_2s_202407.nc"
+        get_vfpa_hadcp._write_netcdf(
+            self._make_dataset("2024-07-13 00:00", 61), nc_filepath
+        )
+
+        n_records = get_vfpa_hadcp._append_netcdf(
+            self._make_dataset("2024-07-13 01:00", 61), nc_filepath
+        )
+
+        assert n_records == 60
+        with xarray.open_dataset(nc_filepath) as ds:
+            assert ds.time.size == 121
+            assert ds.time.values[-1] == numpy.datetime64("2024-07-13T02:00")
+            assert ds.speed.values[-1] == pytest.approx(6.0)
+
+    def test_append_is_idempotent(self, tmp_path):
+        nc_filepath = tmp_path / "VFPA_2ND_NARROWS_HADCP_2s_202407.nc"
+        get_vfpa_hadcp._write_netcdf(
+            self._make_dataset("2024-07-13 00:00", 61), nc_filepath
+        )
+
+        n_records = get_vfpa_hadcp._append_netcdf(
+            self._make_dataset("2024-07-13 00:00", 61), nc_filepath
+        )
+
+        assert n_records == 0
+
+    def test_out_of_order(self, tmp_path):
+        nc_filepath = tmp_path / "VFPA_2ND_NARROWS_HADCP_2s_202407.nc"
+        get_vfpa_hadcp._write_netcdf(
+            self._make_dataset("2024-07-13 00:00", 61), nc_filepath
+        )
+
+        n_records = get_vfpa_hadcp._append_netcdf(
+            self._make_dataset("2024-07-12 00:00", 61), nc_filepath
+        )
+
+        assert n_records is None
@@ -33,6 +33,7 @@ import numpy as np
 import pytest
 from nemo_nowcast import WorkerError
 
+from nowcast import storm_surge
 from nowcast.workers import make_feeds
 
 
@@ -326,6 +327,34 @@ class TestCalcMaxSshRisk:
         np.testing.assert_array_equal(max_ssh_info["max_ssh_time"], max_ssh_time)
         assert max_ssh_info["risk_level"] == m_ssrl()
 
+    @patch("nowcast.workers.make_feeds.stormtools.load_tidal_predictions", spec=True)
+    def test_storm_surge_summary(self, m_ltp, config, tmp_path, monkeypatch):
+        monkeypatch.setitem(config["results archive"], "forecast", os.fspath(tmp_path))
+        results_dir = tmp_path / "24dec15"
+        results_dir.mkdir()
+        summary = SimpleNamespace(
+            start_time=arrow.get("2015-12-24 00:15:00"),
+            max_ssh={"Point Atkinson": 5.09},
+            max_ssh_time={"Point Atkinson": arrow.get("2015-12-25 19:59:42")},
+            risk_levels={"Point Atkinson": "moderate risk"},
+            u_wind_4h_avg={"Point Atkinson": -0.5},
+            v_wind_4h_avg={"Point Atkinson": -0.7},
+            max_wind_avg={"Point Atkinson": 0.86},
+            wind_dir_4h_avg={"Point Atkinson": 234.5},
+        )
+        storm_surge.write_storm_surge_summary(summary, results_dir)
+
+        max_ssh_info = make_feeds._calc_max_ssh_risk(
+            "pmv.xml", arrow.get("2015-12-24"), "forecast", config
+        )
+
+        assert not m_ltp.called
+        assert max_ssh_info == {
+            "max_ssh": 5.09,
+            "max_ssh_time": arrow.get("2015-12-25 19:59:42"),
+            "risk_level": "moderate risk",
+        }
+
 
 @patch("nowcast.workers.make_feeds.nc.Dataset", autospec=True)
 @patch("nowcast.workers.make_feeds.nc_tools.ssh_timeseries_at_point", autospec=True)
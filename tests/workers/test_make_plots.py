@@ -18,12 +18,16 @@
 
 """Unit tests for SalishSeaCast make_plots worker."""
 
+import collections
 import logging
+import os
 from pathlib import Path
 from types import SimpleNamespace
 
 import arrow
+import matplotlib.pyplot
 import nemo_nowcast
+import PIL.Image
 import pytest
 
 from nowcast.workers import make_plots
@@ -242,6 +246,30 @@ class TestConfig:
 
         assert url == dataset_url
 
+    def test_local_datasets(self, prod_config):
+        local_datasets = prod_config["figures"]["local datasets"]
+
+        assert local_datasets["response cache dir"] == (
+            "/results/nowcast-sys/erddap_cache/"
+        )
+        assert local_datasets["response cache max age"] == 60
+        assert local_datasets["datasets"]["ubcSSaSurfaceAtmosphereFieldsV23-02"] == {
+            "files": "/results/forcing/atmospheric/continental2.5/nemo_forcing/hrdps_{:y%Ym%md%d}.nc",
+            "rename": {"time_counter": "time", "y": "gridY", "x": "gridX"},
+        }
+        assert local_datasets["datasets"]["ubcSSf{place}SSH10m"] == {
+            "files": "/results/SalishSea/rolling-forecasts/nemo/*/{place}.nc",
+            "rename": {
+                "time_counter": "time",
+                "sossheig": "ssh",
+                "y": "gridY",
+                "x": "gridX",
+            },
+        }
+        assert local_datasets["datasets"]["ubcSSf2DWaveFields30mV17-02"] == {
+            "files": "/results/SalishSea/rolling-forecasts/wwatch3/*/SoG_ww3_fields_*.nc"
+        }
+
     def test_agrif_bathymetryy(self, prod_config):
         grid_dir = Path(prod_config["figures"]["grid dir"])
         ss_grid_path = (
@@ -286,6 +314,19 @@ class TestConfig:
 
         assert storage_path == "/results/nowcast-sys/figures/"
 
+    def test_render_cache(self, prod_config):
+        render_cache = prod_config["figures"]["render cache"]
+
+        assert render_cache["cache dir"] == "/results/nowcast-sys/figures_render_cache/"
+        assert render_cache["max age"] == 7
+
+    def test_image_loops(self, prod_config):
+        image_loops = prod_config["figures"]["image loops"]
+
+        assert image_loops["animation format"] == "webp"
+        assert image_loops["frame duration"] == 500
+        assert image_loops["frame pngs"] is True
+
     def test_file_group(self, prod_config):
         file_group = prod_config["file group"]
 
@@ -377,3 +418,292 @@ class TestFailure:
         )
         assert caplog.messages[0] == expected
         assert msg_type == f"failure {model} {run_type} {plot_type}"
+
+
+def _frame_figure(hr):
+    fig, ax = matplotlib.pyplot.subplots(figsize=(4, 3))
+    ax.plot([0, 24], [0, hr])
+    ax.set_title(f"{hr:02d}:30 UTC")
+    return fig
+
+
+class TestRenderImageLoop:
+    """Unit tests for _render_image_loop() function."""
+
+    @pytest.fixture(autouse=True)
+    def mock_fix_perms(self, monkeypatch):
+        monkeypatch.setattr(make_plots.lib, "fix_perms", lambda path, grp_name: None)
+
+    @pytest.fixture
+    def frames(self):
+        return {
+            f"salinity_thalweg_and_surface_20241120_{hr:02d}3000_UTC": {
+                "function": _frame_figure,
+                "args": (hr,),
+                "format": "png",
+                "image loop": "salinity_thalweg_and_surface_20241120",
+            }
+            for hr in range(3)
+        }
+
+    @staticmethod
+    def _config(frame_pngs, animation_format="webp"):
+        return {
+            "file group": "sallen",
+            "figures": {
+                "image loops": {
+                    "animation format": animation_format,
+                    "frame duration": 500,
+                    "frame pngs": frame_pngs,
+                }
+            },
+        }
+
+    @pytest.mark.parametrize("animation_format", ("webp", "png"))
+    def test_animation_only(self, animation_format, frames, tmp_path):
+        fig_files = make_plots._render_image_loop(
+            self._config(False, animation_format),
+            "salinity_thalweg_and_surface_20241120",
+            frames,
+            tmp_path,
+            make_plots.render_cache.RenderCache(),
+        )
+
+        anim_file = (
+            tmp_path / f"salinity_thalweg_and_surface_20241120.{animation_format}"
+        )
+        assert fig_files == [os.fspath(anim_file)]
+        with PIL.Image.open(anim_file) as anim:
+            assert anim.n_frames == 3
+        assert not list(tmp_path.glob("*_UTC.png"))
+
+    def test_frame_pngs(self, frames, tmp_path):
+        fig_files = make_plots._render_image_loop(
+            self._config(True),
+            "salinity_thalweg_and_surface_20241120",
+            frames,
+            tmp_path,
+            make_plots.render_cache.RenderCache(),
+        )
+
+        assert fig_files == [
+            *(os.fspath(tmp_path / f"{svg_name}.png") for svg_name in frames),
+            os.fspath(tmp_path / "salinity_thalweg_and_surface_20241120.webp"),
+        ]
+        with PIL.Image.open(tmp_path / f"{next(iter(frames))}.png") as frame:
+            # Cropped to the tight bounding box of the 400x300 pixel figure
+            assert frame.width < 400
+            assert frame.height < 300
+
+    def test_cached_animation(self, frames, tmp_path):
+        fig_cache = make_plots.render_cache.RenderCache(tmp_path / "render_cache")
+        for _ in range(2):
+            make_plots._render_image_loop(
+                self._config(False),
+                "salinity_thalweg_and_surface_20241120",
+                frames,
+                tmp_path,
+                fig_cache,
+            )
+
+        assert fig_cache.stats() == {"hits": 1, "misses": 1}
+
+
+class TestPrepPublishFigFunctions:
+    """Unit tests for _prep_publish_fig_functions() function."""
+
+    @staticmethod
+    @pytest.fixture
+    def publish_config():
+        return {
+            "figures": {
+                "dataset URLs": {"tide stn ssh time series": "url_tmpl"},
+                "local datasets": {},
+            },
+            "ssh": {"tidal predictions": "tidal_predictions/"},
+            "run types": {"forecast": {"duration": 1.5}},
+        }
+
+    @staticmethod
+    @pytest.fixture
+    def mock_storm_surge(monkeypatch):
+        written = []
+        monkeypatch.setattr(make_plots.nc, "Dataset", lambda path: path)
+        monkeypatch.setattr(
+            make_plots, "_results_dataset", lambda period, grid, results_dir: grid
+        )
+        monkeypatch.setattr(
+            make_plots.storm_surge,
+            "calc_storm_surge_summary",
+            lambda *args: SimpleNamespace(),
+        )
+
+        def mock_write_storm_surge_summary(summary, results_dir):
+            written.append(results_dir)
+            return results_dir / "storm_surge_summary.json"
+
+        monkeypatch.setattr(
+            make_plots.storm_surge,
+            "write_storm_surge_summary",
+            mock_write_storm_surge_summary,
+        )
+        return written
+
+    def _prep(self, publish_config, tmp_path, test_figure_id=None):
+        return make_plots._prep_publish_fig_functions(
+            publish_config,
+            "bathy",
+            "coastline",
+            Path("weather/fcst"),
+            tmp_path,
+            "forecast",
+            arrow.get("2024-11-20"),
+            "Canada/Pacific",
+            test_figure_id,
+        )
+
+    def test_summary_stored(self, publish_config, mock_storm_surge, tmp_path):
+        fig_functions = self._prep(publish_config, tmp_path)
+
+        assert mock_storm_surge == [tmp_path]
+        summary = fig_functions["Threshold_website"]["kwargs"]["storm_surge_summary"]
+        assert summary == SimpleNamespace()
+
+    def test_summary_failure(
+        self, publish_config, mock_storm_surge, tmp_path, monkeypatch, caplog
+    ):
+        def mock_calc_storm_surge_summary(*args):
+            raise FileNotFoundError("PointAtkinson.nc")
+
+        monkeypatch.setattr(
+            make_plots.storm_surge,
+            "calc_storm_surge_summary",
+            mock_calc_storm_surge_summary,
+        )
+        caplog.set_level(logging.DEBUG)
+
+        fig_functions = self._prep(publish_config, tmp_path)
+
+        assert mock_storm_surge == []
+        for svg_name in ("Website_thumbnail", "Threshold_website"):
+            kwargs = fig_functions[svg_name]["kwargs"]
+            assert kwargs["storm_surge_summary"] is None
+        assert "Vic_maxSSH" in fig_functions
+        assert caplog.records[1].levelname == "ERROR"
+        assert caplog.messages[1] == (
+            "forecast storm surge summary calculation failed: "
+            "FileNotFoundError PointAtkinson.nc; alerts figures will calculate it"
+        )
+
+    def test_test_figure_summary_not_stored(
+        self, publish_config, mock_storm_surge, tmp_path
+    ):
+        fig_functions = self._prep(publish_config, tmp_path, "Threshold_website")
+
+        assert mock_storm_surge == []
+        summary = fig_functions["Threshold_website"]["kwargs"]["storm_surge_summary"]
+        assert summary == SimpleNamespace()
+
+
+class TestPrepNowcastGreenResearchFigFunctions:
+    """Unit tests for _prep_nowcast_green_research_fig_functions() function."""
+
+    @staticmethod
+    @pytest.fixture
+    def research_config(tmp_path):
+        return {
+            "figures": {
+                "dataset URLs": {
+                    "3d physics fields": "3d_physics_url",
+                    "3d biology fields": "3d_biology_url",
+                },
+                "station time series": {"storage dir": tmp_path / "station_ts"},
+            },
+        }
+
+    @staticmethod
+    @pytest.fixture
+    def mock_station_timeseries(monkeypatch):
+        updated = []
+        monkeypatch.setattr(
+            make_plots,
+            "_results_dataset",
+            lambda period, grid, results_dir: SimpleNamespace(
+                variables=collections.defaultdict(str)
+            ),
+        )
+        monkeypatch.setattr(
+            make_plots.tracer_thalweg_and_surface_hourly,
+            "tracers_clevels",
+            lambda tracer_vars, grid, depth_integrated: {
+                tracer: ("clevels_thalweg", "clevels_surface") for tracer in tracer_vars
+            },
+        )
+        monkeypatch.setattr(
+            make_plots.station_timeseries,
+            "update_station_timeseries",
+            lambda results_dir, ts_config: updated.append(results_dir),
+        )
+        monkeypatch.setattr(
+            make_plots.station_timeseries,
+            "open_station_timeseries",
+            lambda place, storage_dir: f"{place} station time series",
+        )
+        monkeypatch.setattr(make_plots.xarray, "open_dataset", lambda url: url)
+        return updated
+
+    def _prep(self, research_config, tmp_path, test_figure_id=None):
+        return make_plots._prep_nowcast_green_research_fig_functions(
+            research_config, "grid", tmp_path, arrow.get("2024-11-20"), test_figure_id
+        )
+
+    def test_station_timeseries(
+        self, research_config, mock_station_timeseries, tmp_path
+    ):
+        fig_functions = self._prep(research_config, tmp_path)
+
+        assert mock_station_timeseries == [tmp_path]
+        for svg_name in (
+            "temperature_salinity_timeseries",
+            "z1_z2_zooplankton_timeseries",
+        ):
+            assert fig_functions[svg_name]["args"][0] == "S3 station time series"
+
+    def test_station_timeseries_failure(
+        self, research_config, mock_station_timeseries, tmp_path, monkeypatch, caplog
+    ):
+        def mock_update_station_timeseries(results_dir, ts_config):
+            raise OSError("ERDDAP unavailable")
+
+        monkeypatch.setattr(
+            make_plots.station_timeseries,
+            "update_station_timeseries",
+            mock_update_station_timeseries,
+        )
+        caplog.set_level(logging.DEBUG)
+
+        fig_functions = self._prep(research_config, tmp_path)
+
+        args = fig_functions["temperature_salinity_timeseries"]["args"]
+        assert args[0] == "3d_physics_url"
+        args = fig_functions["nitrate_diatoms_timeseries"]["args"]
+        assert args[0] == "3d_biology_url"
+        assert "diatoms_thalweg_and_surface_20241120_003000_UTC" in fig_functions
+        (error_record,) = [
+            record for record in caplog.records if record.levelname == "ERROR"
+        ]
+        assert error_record.message == (
+            "S3 station time series update failed: OSError ERDDAP unavailable; "
+            "time series figures will use ERDDAP datasets"
+        )
+
+    def test_test_figure_store_not_updated(
+        self, research_config, mock_station_timeseries, tmp_path
+    ):
+        fig_functions = self._prep(
+            research_config, tmp_path, "temperature_salinity_timeseries"
+        )
+
+        assert mock_station_timeseries == []
+        args = fig_functions["temperature_salinity_timeseries"]["args"]
+        assert args[0] == "S3 station time series"
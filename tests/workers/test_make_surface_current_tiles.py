@@ -18,6 +18,7 @@
 
 """Unit tests for SalishSeaCast make_surface_current_tiles worker."""
 
+import io
 import logging
 from pathlib import Path
 import textwrap
@@ -25,6 +26,8 @@ from types import SimpleNamespace
 
 import arrow
 import nemo_nowcast
+import numpy
+import PIL.Image
 import pytest
 
 from nowcast.workers import make_surface_current_tiles
@@ -42,6 +45,7 @@ def config(base_config):
                   grid dir: nowcast-sys/grid/
                   surface current tiles:
                     storage path: nowcast-sys/figures/surface_currents/
+                    scratch dir: SalishSeaCast/surface_current_tiles/
 
                 results archive:
                   nowcast: results/nowcast-blue.201806/
@@ -163,6 +167,7 @@ class TestConfig:
         assert "surface current tiles" in figures
         tiles = figures["surface current tiles"]
         assert tiles["storage path"] == "/results/nowcast-sys/figures/surface_currents/"
+        assert tiles["scratch dir"] == "/SalishSeaCast/surface_current_tiles/"
 
     def test_results_archive_section(self, prod_config):
         assert "results archive" in prod_config
@@ -254,3 +259,127 @@ class TestMakeSurfaceCurrentTiles:
         #     "pdf": [],
         # }
         # assert checklist == expected
+
+
+class TestPrepareFields:
+    """Unit tests for _prepare_fields() function."""
+
+    def test_prepare_fields(self, monkeypatch, tmp_path):
+        prepare_calls = []
+
+        def mock_prepare_fields(Uf, Vf, coordf, mesh_maskf, bathyf, fields_dir):
+            prepare_calls.append((Uf, Vf, coordf, mesh_maskf, bathyf, fields_dir))
+
+        def mock_load_fields(fields_dir):
+            return SimpleNamespace(time_counter=numpy.arange(24))
+
+        monkeypatch.setattr(
+            make_surface_current_tiles.surface_current_tiles,
+            "prepare_fields",
+            mock_prepare_fields,
+        )
+        monkeypatch.setattr(
+            make_surface_current_tiles.surface_current_tiles,
+            "load_fields",
+            mock_load_fields,
+        )
+
+        max_time_index = make_surface_current_tiles._prepare_fields(
+            Path("U.nc"),
+            Path("V.nc"),
+            Path("coords.nc"),
+            Path("mesh_mask.nc"),
+            Path("bathy.nc"),
+            tmp_path,
+        )
+
+        assert prepare_calls == [
+            (
+                Path("U.nc"),
+                Path("V.nc"),
+                Path("coords.nc"),
+                Path("mesh_mask.nc"),
+                Path("bathy.nc"),
+                tmp_path,
+            )
+        ]
+        assert max_time_index == 24
+
+
+class TestQuantizePng:
+    """Unit test for _quantize_png() function."""
+
+    def test_quantize_png(self, tmp_path):
+        buffer = io.BytesIO()
+        PIL.Image.new("RGBA", (20, 10), (30, 60, 90, 255)).save(buffer, format="png")
+        outfile = tmp_path / "surface_currents_tile01_20181129_000000_UTC.png"
+
+        make_surface_current_tiles._quantize_png(buffer, outfile, 16)
+
+        with PIL.Image.open(outfile) as image:
+            assert image.mode == "P"
+            assert image.size == (20, 10)
+
+
+class TestProcessTimeSlice:
+    """Unit tests for _process_time_slice() function."""
+
+    def test_rendered(self, monkeypatch, tmp_path):
+        def mock_callMakeFigure(*task, rendered):
+            rendered.update(png=2, pdf=2)
+
+        monkeypatch.setattr(
+            make_surface_current_tiles, "_callMakeFigure", mock_callMakeFigure
+        )
+        tile_coords_dic = {"tile01": (), "tile02": ()}
+        task = (42, tmp_path, tile_coords_dic, 0.1, tmp_path)
+
+        result = make_surface_current_tiles._process_time_slice(task)
+
+        t_index, fields_dir, rendered, failed, elapsed, error = result
+        assert (t_index, fields_dir, rendered, failed, error) == (
+            42,
+            tmp_path,
+            {"png": 2, "pdf": 2},
+            {"png": 0, "pdf": 0},
+            None,
+        )
+        assert elapsed >= 0
+
+    def test_failed(self, monkeypatch, tmp_path):
+        def mock_callMakeFigure(*task, rendered):
+            raise ValueError("bad time slice")
+
+        monkeypatch.setattr(
+            make_surface_current_tiles, "_callMakeFigure", mock_callMakeFigure
+        )
+        tile_coords_dic = {"tile01": (), "tile02": ()}
+        task = (42, tmp_path, tile_coords_dic, 0.1, tmp_path)
+
+        result = make_surface_current_tiles._process_time_slice(task)
+
+        t_index, fields_dir, rendered, failed, elapsed, error = result
+        assert (t_index, fields_dir, rendered, failed) == (
+            42,
+            tmp_path,
+            {"png": 0, "pdf": 0},
+            {"png": 2, "pdf": 2},
+        )
+        assert error == "ValueError: bad time slice"
+
+    def test_failed_after_png(self, monkeypatch, tmp_path):
+        def mock_callMakeFigure(*task, rendered):
+            rendered["png"] = 2
+            raise ValueError("bad pdf")
+
+        monkeypatch.setattr(
+            make_surface_current_tiles, "_callMakeFigure", mock_callMakeFigure
+        )
+        tile_coords_dic = {"tile01": (), "tile02": ()}
+        task = (42, tmp_path, tile_coords_dic, 0.1, tmp_path)
+
+        result = make_surface_current_tiles._process_time_slice(task)
+
+        t_index, fields_dir, rendered, failed, elapsed, error = result
+        assert rendered == {"png": 2, "pdf": 0}
+        assert failed == {"png": 0, "pdf": 2}
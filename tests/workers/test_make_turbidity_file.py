@@ -18,11 +18,15 @@
 
 """Unit tests for SalishSeaCast make_turbidity_file worker."""
 
+import datetime as dt
 import logging
 from types import SimpleNamespace
 
 import arrow
 import nemo_nowcast
+import netCDF4 as nc
+import numpy as np
+import pandas as pd
 import pytest
 
 from nowcast.workers import make_turbidity_file
@@ -86,3 +90,152 @@ class TestFailure:
         expected = "2017-07-08 Fraser River turbidity file creation failed"
         assert caplog.records[0].message == expected
         assert msg_type == "failure"
+
+
+class TestLoadTurb:
+    """Unit tests for _loadturb() function."""
+
+    @pytest.fixture
+    def turbidity_csv(self, tmp_path):
+        times = pd.date_range("2024-10-01 00:10", "2024-11-30 23:10", freq="h")
+        tdf = pd.DataFrame(
+            {
+                "# date": times.strftime("%Y-%m-%d"),
+                "time": times.strftime("%H:%M:%S"),
+                "turbidity": np.arange(len(times), dtype=float),
+                "water depth": 1.5,
+                "water depth units": "m",
+            }
+        )
+        turbidity_csv = tmp_path / "fraser_buoy.csv"
+        tdf.to_csv(turbidity_csv, index=False)
+        return turbidity_csv
+
+    def test_tail_window(self, turbidity_csv, monkeypatch):
+        # Small blocks so that the file tail is read in several passes
+        read_tail = make_turbidity_file._read_turbidity_tail
+        monkeypatch.setattr(
+            make_turbidity_file,
+            "_read_turbidity_tail",
+            lambda csv, start_DD: read_tail(csv, start_DD, block_size=512),
+        )
+        idate = make_turbidity_file._dateTimeToDecDay(dt.datetime(2024, 11, 20, 19))
+
+        tdf = make_turbidity_file._loadturb(idate, turbidity_csv, 5.01, "2024-11-20")
+
+        # 2024-11-19 19:00 UTC - 5h to 2024-11-20 19:00 UTC + 5h in PST (UTC-8)
+        assert tdf["dtdate"].iloc[0] == pd.Timestamp("2024-11-19 06:10")
+        assert tdf["dtdate"].iloc[-1] == pd.Timestamp("2024-11-20 15:10")
+        assert len(tdf) == 34
+
+    def test_insufficient_data(self, turbidity_csv, caplog):
+        idate = make_turbidity_file._dateTimeToDecDay(dt.datetime(2024, 12, 20, 19))
+        caplog.set_level(logging.DEBUG)
+
+        with pytest.raises(ValueError):
+            make_turbidity_file._loadturb(idate, turbidity_csv, 5.01, "2024-12-20")
+
+        assert caplog.records[0].levelname == "WARNING"
+
+
+class TestInterpTurb:
+    """Unit test for _interpTurb() function."""
+
+    def test_interpTurb(self):
+        idate = make_turbidity_file._dateTimeToDecDay(dt.datetime(2024, 11, 20, 19))
+        # Hourly observations at 10 minutes past the hour with a 4 hour gap
+        # and a 5 hour gap
+        hours = np.array([0, 1, 2, 7, 8, 14, 15, 16])
+        tdf2 = pd.DataFrame(
+            {
+                "DD": idate - 1 - 5 / 24 + (hours + 1 / 6) / 24,
+                "turbidity": hours * 10.0,
+            }
+        )
+
+        dfout = make_turbidity_file._interpTurb(tdf2, idate, 5.01)
+
+        assert len(dfout) == 34
+        assert dfout["hDD"].iloc[5] == pytest.approx(idate - 1)
+        expected = np.full(34, np.nan)
+        expected[:9] = np.arange(9) * 10.0
+        expected[14:17] = hours[-3:] * 10.0
+        np.testing.assert_allclose(dfout["turbidity"], expected)
+
+
+class TestPacToUTC:
+    """Unit test for _pacToUTC() function."""
+
+    def test_pacToUTC(self):
+        pactime = pd.Series(
+            pd.to_datetime(
+                [
+                    "2024-01-15 12:10",
+                    "2024-07-15 12:10",
+                    # non-existent at start of daylight time
+                    "2024-03-10 02:10",
+                    # ambiguous at end of daylight time
+                    "2024-11-03 01:10",
+                ]
+            )
+        )
+
+        utc = make_turbidity_file._pacToUTC(pactime)
+
+        expected = pd.to_datetime(
+            [
+                "2024-01-15 20:10",
+                "2024-07-15 19:10",
+                "2024-03-10 10:10",
+                "2024-11-03 09:10",
+            ]
+        )
+        assert list(utc) == list(expected)
+
+
+class TestWriteTFile:
+    """Unit test for _writeTFile() function."""
+
+    def test_writeTFile(self, tmp_path):
+        nav_lat, nav_lon = np.meshgrid(
+            np.linspace(46, 51, 898), np.linspace(-126, -121, 398), indexing="ij"
+        )
+        grid = {
+            "nav_lat": nav_lat,
+            "nav_lon": nav_lon,
+            "time_counter": np.array([0.0]),
+        }
+        nc_file = tmp_path / "riverTurbDaily2_y2024m11d20.nc"
+
+        make_turbidity_file._writeTFile(nc_file, 12.5, grid)
+
+        with nc.Dataset(nc_file) as ds:
+            assert ds.dimensions["time_counter"].isunlimited()
+            assert ds.variables["nav_lat"].shape == (898, 398)
+            turb = ds.variables["turb"]
+            assert turb.dtype == np.float32
+            assert turb.shape == (1, 898, 398)
+            assert turb._FillValue == np.float32(-999.99)
+            turb.set_auto_mask(False)
+            assert (turb[0, 400:448, 338:380] == np.float32(12.5)).all()
+            assert turb[0, 0, 0] == np.float32(-999.99)
+            assert (turb[0] != np.float32(-999.99)).sum() == 48 * 42
+
+    def test_writeTFile_all_times(self, tmp_path):
+        nav_lat, nav_lon = np.meshgrid(
+            np.linspace(46, 51, 898), np.linspace(-126, -121, 398), indexing="ij"
+        )
+        grid = {
+            "nav_lat": nav_lat,
+            "nav_lon": nav_lon,
+            "time_counter": np.array([0.0, 1.0]),
+        }
+        nc_file = tmp_path / "riverTurbDaily2_y2024m11d20.nc"
+
+        make_turbidity_file._writeTFile(nc_file, 12.5, grid)
+
+        with nc.Dataset(nc_file) as ds:
+            turb = ds.variables["turb"]
+            assert turb.shape == (2, 898, 398)
+            turb.set_auto_mask(False)
+            assert (turb[:, 400:448, 338:380] == np.float32(12.5)).all()
@@ -131,6 +131,7 @@ class TestConfig:
     def test_erddap_section(self, prod_config):
         erddap = prod_config["erddap"]
         assert erddap["flag dir"] == "/results/erddap/flag/"
+        assert erddap["manifest dir"] == "/results/erddap/manifests/"
         assert erddap["datasetIDs"]["weather"] == [
             "ubcSSaSurfaceAtmosphereFieldsV23-02"
         ]
@@ -283,3 +284,25 @@ class TestPingErddap:
 
         assert not caplog.records
         assert checklist == {"nowcast-green": []}
+
+    def test_manifest_delta(self, config, tmp_path, monkeypatch):
+        tmp_flag_dir = tmp_path / "flag"
+        tmp_flag_dir.mkdir()
+        monkeypatch.setitem(config["erddap"], "flag dir", tmp_flag_dir)
+        monkeypatch.setitem(config["erddap"], "manifest dir", tmp_path / "manifests")
+        manifest = ping_erddap.erddap_manifest.Manifest.from_config(
+            config, "nowcast-green"
+        )
+        manifest.path.parent.mkdir()
+        manifest.path.write_text(
+            '{"seq": 1, "path": "/results/20nov24/SalishSea_1h_grid_T.nc"}\n'
+        )
+
+        parsed_args = SimpleNamespace(dataset="nowcast-green")
+        ping_erddap.ping_erddap(parsed_args, config)
+
+        for dataset_id in config["erddap"]["datasetIDs"]["nowcast-green"]:
+            assert (tmp_flag_dir / dataset_id).read_text() == (
+                "/results/20nov24/SalishSea_1h_grid_T.nc\n"
+            )
+        assert manifest.published_path.read_text() == "1\n"
@@ -1080,6 +1080,39 @@ class TestBuildScript:
         for i, line in enumerate(expected.splitlines()[:-1]):
             assert script[i].strip() == line.strip()
 
+    @patch("nowcast.workers.run_NEMO.nemo_cmd.prepare.load_run_desc")
+    @patch(
+        "nowcast.workers.run_NEMO.nemo_cmd.prepare.get_n_processors", return_value=119
+    )
+    def test_script_pipelined_results(self, m_gnp, m_lrd, config, tmpdir):
+        tmp_run_dir = tmpdir.ensure_dir("tmp_run_dir")
+        run_desc_file = tmpdir.ensure("13may17.yaml")
+        m_lrd.return_value = {
+            "run_id": "13may17forecast",
+            "MPI decomposition": "11x18",
+            "output": {"XIOS servers": 1},
+        }
+        p_config = patch.dict(
+            config["run types"]["forecast"], {"pipelined results": True}
+        )
+        with p_config:
+            script = run_NEMO._build_script(
+                Path(str(tmp_run_dir)),
+                "forecast",
+                Path(str(run_desc_file)),
+                Path("results_dir", "13may17"),
+                "arbutus.cloud",
+                config,
+            )
+        script = script.splitlines()
+        assert script[2] == "stage_closed_results() {"
+        assert (
+            'DEFLATE="pixi run -m /nemoShare/MEOPAR/nowcast-sys/SalishSeaNowcast salishsea deflate"'
+            in script
+        )
+        assert "stage_closed_results final" in script
+        assert script[-1] == "exit ${MPIRUN_EXIT_CODE}"
+
 
 class TestDefinitions:
     """Unit test for _definitions() function."""
@@ -1202,6 +1235,68 @@ class TestExecute:
         for i, line in enumerate(expected.splitlines()[:-1]):
             assert script[i].strip() == line.strip()
 
+    def test_execute_pipelined(self, config):
+        script = run_NEMO._execute(
+            nemo_processors=15, xios_processors=1, xios_host=None, pipelined=True
+        )
+        expected = """mkdir -p ${RESULTS_DIR}
+
+        cd ${WORK_DIR}
+        echo "working dir: $(pwd)" >>${RESULTS_DIR}/stdout
+
+        echo "Starting run at $(date)" >>${RESULTS_DIR}/stdout
+        ${MPIRUN} -np 15 --bind-to none ./nemo.exe : \
+-np 1 --bind-to none ./xios_server.exe \
+>>${RESULTS_DIR}/stdout 2>>${RESULTS_DIR}/stderr &
+        NEMO_PID=$!
+        while kill -0 ${NEMO_PID} 2>/dev/null; do
+          sleep 5
+          stage_closed_results
+        done
+        wait ${NEMO_PID}
+        MPIRUN_EXIT_CODE=$?
+        echo "Ended run at $(date)" >>${RESULTS_DIR}/stdout
+
+        echo "Results staging started at $(date)" >>${RESULTS_DIR}/stdout
+        stage_closed_results final
+        echo "Results staging ended at $(date)" >>${RESULTS_DIR}/stdout
+
+        echo "Results combining started at $(date)" >>${RESULTS_DIR}/stdout
+        ${COMBINE} ${RUN_DESC} --debug >>${RESULTS_DIR}/stdout
+        echo "Results combining ended at $(date)" >>${RESULTS_DIR}/stdout
+
+        echo "Results gathering started at $(date)" >>${RESULTS_DIR}/stdout
+        ${GATHER} ${RESULTS_DIR} --debug >>${RESULTS_DIR}/stdout
+        echo "Results gathering ended at $(date)" >>${RESULTS_DIR}/stdout
+        """
+        script = script.splitlines()
+        for i, line in enumerate(expected.splitlines()[:-1]):
+            assert script[i].strip() == line.strip()
+
+
+class TestStageClosedResults:
+    """Unit test for _stage_closed_results() function."""
+
+    def test_stage_closed_results(self):
+        script = run_NEMO._stage_closed_results()
+
+        expected = """stage_closed_results() {
+          shopt -s nullglob
+          local chunk stream newest
+          for chunk in *_[0-9]*-[0-9]*.nc; do
+            stream=${chunk%_*-*.nc}
+            newest=$(ls ${stream}_[0-9]*-[0-9]*.nc | sort | tail -n 1)
+            if [[ "$1" == "final" || "${chunk}" != "${newest}" ]]; then
+              ${DEFLATE} ${chunk} --debug >>${RESULTS_DIR}/stdout 2>>${RESULTS_DIR}/stderr \\
+                && mv ${chunk} ${RESULTS_DIR}/
+            fi
+          done
+        }
+        """
+        script = script.splitlines()
+        for i, line in enumerate(expected.splitlines()[:-1]):
+            assert script[i].strip() == line.strip()
+
 
 @patch("nowcast.workers.run_NEMO.subprocess.Popen", autospec=True)
 @patch("nowcast.workers.run_NEMO.subprocess.run", autospec=True)
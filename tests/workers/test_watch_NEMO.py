@@ -200,7 +200,16 @@ class TestWatchNEMO:
         expected = f"{run_type} on {host_name}: run pid: 4343"
         assert caplog.records[0].message == expected
         expected = {
-            run_type: {"host": host_name, "run date": "2017-11-13", "completed": True}
+            run_type: {
+                "host": host_name,
+                "run date": "2017-11-13",
+                "completed": True,
+                "performance": {
+                    "steps per second": None,
+                    "wall time": 0,
+                    "queue wait": 0,
+                },
+            }
         }
         assert checklist == expected
 
@@ -26,12 +26,35 @@ from unittest.mock import call, Mock, patch
 
 import arrow
 import nemo_nowcast
+import paramiko
 import pytest
 
 import nowcast.ssh_sftp
 from nowcast.workers import watch_NEMO_hindcast
 
 
+def _probe_results(time_step, ocean_output_errors):
+    """Results of the remote probe in is_running() tests.
+
+    time_step and ocean_output_errors are (output, stderr, exit status) 3-tuples.
+    """
+    return {
+        "queue info": SimpleNamespace(output="", stderr="", status=0),
+        "time step": SimpleNamespace(
+            output=time_step[0], stderr=time_step[1], status=time_step[2]
+        ),
+        "ocean output errors": SimpleNamespace(
+            output=ocean_output_errors[0],
+            stderr=ocean_output_errors[1],
+            status=ocean_output_errors[2],
+        ),
+    }
+
+
+NO_TIME_STEP = ("", "cat: time.step: No such file or directory\n", 1)
+NO_OCEAN_OUTPUT = ("", "grep: ocean.output: No such file or directory\n", 2)
+
+
 @pytest.fixture
 def config(base_config):
     """:py:class:`nemo_nowcast.Config` instance from YAML fragment to use as config for unit tests."""
@@ -103,6 +126,15 @@ class TestConfig:
         assert optimum_hindcast["users"] == "sallen,dlatorne"
         assert optimum_hindcast["scratch dir"] == "/scratch/sallen/dlatorne/oxygen/"
 
+    def test_run_telemetry_section(self, prod_config, tmp_path):
+        run_telemetry = prod_config["run telemetry"]
+        assert run_telemetry["history file"] == (
+            f"{tmp_path}/nowcast_logs/NEMO_run_history.jsonl"
+        )
+        assert run_telemetry["rate window"] == 6
+        assert run_telemetry["history runs"] == 10
+        assert run_telemetry["stall fraction"] == 0.5
+
 
 @pytest.mark.parametrize("host_name", ("nibi", "optimum"))
 class TestSuccess:
@@ -148,6 +180,7 @@ class TestWatchNEMO_Hindcast:
     def test_squeue_run_completed(self, m_job, m_sftp, config, caplog):
         parsed_args = SimpleNamespace(host_name="nibi", run_id=None)
         m_job().host_name = parsed_args.host_name
+        m_job().ssh_client, m_job().sftp_client = m_sftp.return_value
         m_job().job_id, m_job().run_id = "9813234", "01jul18hindcast"
         m_job().is_queued.return_value = False
         m_job().tmp_run_dir = Path("tmp_run_dir")
@@ -165,6 +198,11 @@ class TestWatchNEMO_Hindcast:
                     "YYYY-MM-DD"
                 ),
                 "completed": True,
+                "performance": {
+                    "steps per second": None,
+                    "wall time": 0,
+                    "queue wait": 0,
+                },
             }
         }
         assert checklist == expected
@@ -173,6 +211,7 @@ class TestWatchNEMO_Hindcast:
     def test_qstat_run_completed(self, m_job, m_sftp, config, caplog):
         parsed_args = SimpleNamespace(host_name="optimum", run_id=None)
         m_job().host_name = parsed_args.host_name
+        m_job().ssh_client, m_job().sftp_client = m_sftp.return_value
         m_job().job_id, m_job().run_id = "62990.admin", "01jul18hindcast"
         m_job().is_queued.return_value = False
         m_job().tmp_run_dir = Path("tmp_run_dir")
@@ -190,6 +229,11 @@ class TestWatchNEMO_Hindcast:
                     "YYYY-MM-DD"
                 ),
                 "completed": True,
+                "performance": {
+                    "steps per second": None,
+                    "wall time": 0,
+                    "queue wait": 0,
+                },
             }
         }
         assert checklist == expected
@@ -201,6 +245,7 @@ class TestWatchNEMO_Hindcast:
     ):
         parsed_args = SimpleNamespace(host_name="nibi", run_id=None)
         m_job().host_name = parsed_args.host_name
+        m_job().ssh_client, m_job().sftp_client = m_sftp.return_value
         m_job().job_id, m_job().run_id = "9813234", "01jul18hindcast"
         m_job().is_queued.return_value = False
         m_job().tmp_run_dir = Path("tmp_run_dir")
@@ -212,6 +257,47 @@ class TestWatchNEMO_Hindcast:
             watch_NEMO_hindcast.watch_NEMO_hindcast(parsed_args, config)
 
 
+@patch(
+    "nowcast.workers.watch_NEMO_hindcast.ssh_sftp.sftp",
+    return_value=(Mock(name="new_ssh_client"), Mock(name="new_sftp_client")),
+    autospec=True,
+)
+class TestPoll:
+    """Unit tests for _poll() function."""
+
+    def test_connected(self, m_sftp):
+        job = SimpleNamespace(
+            ssh_client=Mock(name="ssh_client"),
+            sftp_client=Mock(name="sftp_client"),
+            host_name="nibi",
+        )
+        poll_method = Mock(name="is_running", return_value=True)
+
+        assert watch_NEMO_hindcast._poll(job, poll_method, Path("ssh_key"))
+        assert not m_sftp.called
+
+    def test_reconnect(self, m_sftp, caplog):
+        ssh_client, sftp_client = Mock(name="ssh_client"), Mock(name="sftp_client")
+        job = SimpleNamespace(
+            ssh_client=ssh_client, sftp_client=sftp_client, host_name="nibi"
+        )
+        poll_method = Mock(
+            name="is_running",
+            side_effect=[paramiko.ssh_exception.SSHException("timeout"), False],
+        )
+        caplog.set_level(logging.DEBUG)
+
+        assert not watch_NEMO_hindcast._poll(job, poll_method, Path("ssh_key"))
+        assert caplog.records[0].levelname == "WARNING"
+        expected = "lost connection to nibi: timeout; re-connecting"
+        assert caplog.messages[0] == expected
+        assert ssh_client.close.called
+        assert sftp_client.close.called
+        m_sftp.assert_called_once_with("nibi", Path("ssh_key"), keepalive_interval=60)
+        assert (job.ssh_client, job.sftp_client) == m_sftp.return_value
+        assert poll_method.call_count == 2
+
+
 class TestQstatHindcastJob:
     """Unit tests for _SqueueHindcastJob class."""
 
@@ -337,7 +423,12 @@ class TestQstatHindcastJob:
         expected = f"{job.run_id} on {job.host_name}: it000=1, itend=2160, date0=2013-01-01T00:00:00+00:00, rdt=40.0"
         assert caplog.records[1].message == expected
 
-    def test_is_running_not_running(self, config, caplog):
+    @patch(
+        "nowcast.workers.watch_NEMO_hindcast.ssh_sftp.remote_probe",
+        return_value=_probe_results(NO_TIME_STEP, NO_OCEAN_OUTPUT),
+        autospec=True,
+    )
+    def test_is_running_not_running(self, m_remote_probe, config, caplog):
         job = watch_NEMO_hindcast._QstatHindcastJob(
             Mock(name="ssh_client"),
             Mock(name="sftp_client"),
@@ -351,11 +442,11 @@ class TestQstatHindcastJob:
         assert not job.is_running()
 
     @patch(
-        "nowcast.workers.watch_NEMO_hindcast.ssh_sftp.ssh_exec_command",
-        side_effect=nowcast.ssh_sftp.SSHCommandError("cmd", "stdout", "stderr"),
+        "nowcast.workers.watch_NEMO_hindcast.ssh_sftp.remote_probe",
+        return_value=_probe_results(NO_TIME_STEP, NO_OCEAN_OUTPUT),
         autospec=True,
     )
-    def test_is_running_no_time_step_file(self, m_ssh_exec_cmd, config, caplog):
+    def test_is_running_no_time_step_file(self, m_remote_probe, config, caplog):
         job = watch_NEMO_hindcast._QstatHindcastJob(
             Mock(name="ssh_client"),
             Mock(name="sftp_client"),
@@ -374,14 +465,11 @@ class TestQstatHindcastJob:
         assert caplog.records[0].message == expected
 
     @patch(
-        "nowcast.workers.watch_NEMO_hindcast.ssh_sftp.ssh_exec_command",
-        side_effect=[
-            "1\n",
-            nowcast.ssh_sftp.SSHCommandError("cmd", "stdout", "stderr"),
-        ],
+        "nowcast.workers.watch_NEMO_hindcast.ssh_sftp.remote_probe",
+        return_value=_probe_results(("1\n", "", 0), NO_OCEAN_OUTPUT),
         autospec=True,
     )
-    def test_is_running_no_ocean_output(self, m_ssh_exec_cmd, config, caplog):
+    def test_is_running_no_ocean_output(self, m_remote_probe, config, caplog):
         job = watch_NEMO_hindcast._QstatHindcastJob(
             Mock(name="ssh_client"),
             Mock(name="sftp_client"),
@@ -400,12 +488,12 @@ class TestQstatHindcastJob:
         assert caplog.records[0].message == expected
 
     @patch(
-        "nowcast.workers.watch_NEMO_hindcast.ssh_sftp.ssh_exec_command",
-        side_effect=["1\n", "E R R O R\nE R R O R\n"],
+        "nowcast.workers.watch_NEMO_hindcast.ssh_sftp.remote_probe",
+        return_value=_probe_results(("1\n", "", 0), ("E R R O R\nE R R O R\n", "", 0)),
         autospec=True,
     )
     def test_is_running_ocean_output_errors_cancel_run(
-        self, m_ssh_exec_cmd, config, caplog
+        self, m_remote_probe, config, caplog
     ):
         job = watch_NEMO_hindcast._QstatHindcastJob(
             Mock(name="ssh_client"),
@@ -430,11 +518,11 @@ class TestQstatHindcastJob:
         )
 
     @patch(
-        "nowcast.workers.watch_NEMO_hindcast.ssh_sftp.ssh_exec_command",
-        side_effect=["1\n", ""],
+        "nowcast.workers.watch_NEMO_hindcast.ssh_sftp.remote_probe",
+        return_value=_probe_results(("1\n", "", 0), ("", "", 1)),
         autospec=True,
     )
-    def test_is_running(self, m_ssh_exec_cmd, config, caplog):
+    def test_is_running(self, m_remote_probe, config, caplog):
         job = watch_NEMO_hindcast._QstatHindcastJob(
             Mock(name="ssh_client"),
             Mock(name="sftp_client"),
@@ -686,6 +774,26 @@ class TestQstatHindcastJob:
         expected = "62995.admin.default.do  dlatorne    mpi      11jan13hindcast  28434  14    280    --     10:00:00  R 00:20:53"
         assert queue_info == expected
 
+    def test_get_queue_info_probe_unknown_job_id(self, config, caplog):
+        job = watch_NEMO_hindcast._QstatHindcastJob(
+            Mock(name="ssh_client"),
+            Mock(name="sftp_client"),
+            "optimum",
+            config["run"]["hindcast hosts"]["optimum"]["users"],
+            Path(config["run"]["hindcast hosts"]["optimum"]["scratch dir"]),
+            run_id="01jan13hindcast",
+            job_id="62991.admin",
+        )
+        queue_probe = SimpleNamespace(
+            output="", stderr="qstat: Unknown Job Id 62991.admin\n", status=153
+        )
+        caplog.set_level(logging.DEBUG)
+
+        queue_info = job._get_queue_info(queue_probe)
+
+        assert queue_info is None
+        assert not caplog.records
+
 
 class TestSqueueHindcastJob:
     """Unit tests for _SqueueHindcastJob class."""
@@ -857,7 +965,12 @@ class TestSqueueHindcastJob:
         )
         assert caplog.records[1].message == expected
 
-    def test_is_running_not_running(self, config, caplog):
+    @patch(
+        "nowcast.workers.watch_NEMO_hindcast.ssh_sftp.remote_probe",
+        return_value=_probe_results(NO_TIME_STEP, NO_OCEAN_OUTPUT),
+        autospec=True,
+    )
+    def test_is_running_not_running(self, m_remote_probe, config, caplog):
         job = watch_NEMO_hindcast._SqueueHindcastJob(
             Mock(name="ssh_client"),
             Mock(name="sftp_client"),
@@ -873,11 +986,11 @@ class TestSqueueHindcastJob:
         assert not job.is_running()
 
     @patch(
-        "nowcast.workers.watch_NEMO_hindcast.ssh_sftp.ssh_exec_command",
-        side_effect=nowcast.ssh_sftp.SSHCommandError("cmd", "stdout", "stderr"),
+        "nowcast.workers.watch_NEMO_hindcast.ssh_sftp.remote_probe",
+        return_value=_probe_results(NO_TIME_STEP, NO_OCEAN_OUTPUT),
         autospec=True,
     )
-    def test_is_running_no_time_step_file(self, m_ssh_exec_cmd, config, caplog):
+    def test_is_running_no_time_step_file(self, m_remote_probe, config, caplog):
         job = watch_NEMO_hindcast._SqueueHindcastJob(
             Mock(name="ssh_client"),
             Mock(name="sftp_client"),
@@ -896,14 +1009,11 @@ class TestSqueueHindcastJob:
         assert caplog.records[0].message == expected
 
     @patch(
-        "nowcast.workers.watch_NEMO_hindcast.ssh_sftp.ssh_exec_command",
-        side_effect=[
-            "1658943\n",
-            nowcast.ssh_sftp.SSHCommandError("cmd", "stdout", "stderr"),
-        ],
+        "nowcast.workers.watch_NEMO_hindcast.ssh_sftp.remote_probe",
+        return_value=_probe_results(("1658943\n", "", 0), NO_OCEAN_OUTPUT),
         autospec=True,
     )
-    def test_is_running_no_ocean_output(self, m_logger, config, caplog):
+    def test_is_running_no_ocean_output(self, m_remote_probe, config, caplog):
         job = watch_NEMO_hindcast._SqueueHindcastJob(
             Mock(name="ssh_client"),
             Mock(name="sftp_client"),
@@ -923,12 +1033,14 @@ class TestSqueueHindcastJob:
         assert caplog.records[0].message == expected
 
     @patch(
-        "nowcast.workers.watch_NEMO_hindcast.ssh_sftp.ssh_exec_command",
-        side_effect=["1658943\n", "E R R O R\nE R R O R\n"],
+        "nowcast.workers.watch_NEMO_hindcast.ssh_sftp.remote_probe",
+        return_value=_probe_results(
+            ("1658943\n", "", 0), ("E R R O R\nE R R O R\n", "", 0)
+        ),
         autospec=True,
     )
     def test_is_running_ocean_output_errors_cancel_run(
-        self, m_ssh_exec_cmd, config, caplog
+        self, m_remote_probe, config, caplog
     ):
         job = watch_NEMO_hindcast._SqueueHindcastJob(
             Mock(name="ssh_client"),
@@ -957,11 +1069,11 @@ class TestSqueueHindcastJob:
         )
 
     @patch(
-        "nowcast.workers.watch_NEMO_hindcast.ssh_sftp.ssh_exec_command",
-        side_effect=["1658943\n", "E R R O R\n"],
+        "nowcast.workers.watch_NEMO_hindcast.ssh_sftp.remote_probe",
+        return_value=_probe_results(("1658943\n", "", 0), ("E R R O R\n", "", 0)),
         autospec=True,
     )
-    def test_is_running_handle_stuck_job(self, m_ssh_exec_cmd, config, caplog):
+    def test_is_running_handle_stuck_job(self, m_remote_probe, config, caplog):
         job = watch_NEMO_hindcast._SqueueHindcastJob(
             Mock(name="ssh_client"),
             Mock(name="sftp_client"),
@@ -994,11 +1106,11 @@ class TestSqueueHindcastJob:
         assert job._handle_stuck_job.called
 
     @patch(
-        "nowcast.workers.watch_NEMO_hindcast.ssh_sftp.ssh_exec_command",
-        side_effect=["1658943\n", ""],
+        "nowcast.workers.watch_NEMO_hindcast.ssh_sftp.remote_probe",
+        return_value=_probe_results(("1658943\n", "", 0), ("", "", 1)),
         autospec=True,
     )
-    def test_is_running(self, m_ssh_exec_cmd, config, caplog):
+    def test_is_running(self, m_remote_probe, config, caplog):
         job = watch_NEMO_hindcast._SqueueHindcastJob(
             Mock(name="ssh_client"),
             Mock(name="sftp_client"),
@@ -1013,6 +1125,11 @@ class TestSqueueHindcastJob:
         caplog.set_level(logging.DEBUG)
 
         assert job.is_running()
+        assert m_remote_probe.call_count == 1
+        job._get_job_state.assert_called_once_with(
+            m_remote_probe.return_value["queue info"]
+        )
+        job._report_progress.assert_called_once_with("1658943\n")
 
     @pytest.mark.parametrize("exception", [nemo_nowcast.WorkerError, AttributeError])
     def test_get_job_state_unknown(self, exception, config, caplog):
@@ -1200,3 +1317,51 @@ class TestSqueueHindcastJob:
         assert (
             stdout == "/scratch/hindcast/01jan17hindcast_2018-10-07T141411.374009-0700"
         )
+
+    def test_get_queue_info_probe_failed(self, config, caplog):
+        job = watch_NEMO_hindcast._SqueueHindcastJob(
+            Mock(name="ssh_client"),
+            Mock(name="sftp_client"),
+            "nibi",
+            config["run"]["hindcast hosts"]["nibi"]["users"],
+            Path(config["run"]["hindcast hosts"]["nibi"]["scratch dir"]),
+            run_id="21dec16hindcast",
+            job_id="12426878",
+        )
+        queue_probe = SimpleNamespace(
+            output="",
+            stderr="slurm_load_jobs error: Invalid job id specified\n",
+            status=1,
+        )
+        caplog.set_level(logging.DEBUG)
+
+        with pytest.raises(nemo_nowcast.WorkerError):
+            job._get_queue_info(queue_probe)
+
+        assert caplog.records[0].levelname == "ERROR"
+        expected = "slurm_load_jobs error: Invalid job id specified"
+        assert caplog.messages[0] == expected
+
+    def test_get_queue_info_probe_stderr_with_zero_status(self, config, caplog):
+        job = watch_NEMO_hindcast._SqueueHindcastJob(
+            Mock(name="ssh_client"),
+            Mock(name="sftp_client"),
+            "nibi",
+            config["run"]["hindcast hosts"]["nibi"]["users"],
+            Path(config["run"]["hindcast hosts"]["nibi"]["scratch dir"]),
+            run_id="21dec16hindcast",
+            job_id="12426878",
+        )
+        queue_probe = SimpleNamespace(
+            output="12426878 21dec16hindcast RUNNING None N/A\n",
+            stderr="squeue: error: slurm_receive_msg: Socket timed out\n",
+            status=0,
+        )
+        caplog.set_level(logging.DEBUG)
+
+        with pytest.raises(nemo_nowcast.WorkerError):
+            job._get_queue_info(queue_probe)
+
+        assert caplog.records[0].levelname == "ERROR"
+        expected = "squeue: error: slurm_receive_msg: Socket timed out"
+        assert caplog.messages[0] == expected